@@ -0,0 +1,58 @@
+"""
+Аудит непрерывности свечей по всей БД (gaps / дубликаты / невыровненные свечи)
+Запуск: python audit_candles.py [--symbols BTCUSDT ETHUSDT] [--timeframes 15m 1h] [--days 90] [--output manifest.json]
+        python audit_candles.py --sync-coverage   # пересобрать таблицу candle_coverage по результату аудита
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import pytz
+
+from src.database.db import db
+from src.data.candle_coverage import candle_coverage
+from src.data.integrity_auditor import CandleIntegrityAuditor, DEFAULT_TIMEFRAMES
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Candle continuity audit')
+    parser.add_argument('--symbols', nargs='+', default=None, help='Символы (по умолчанию вся БД)')
+    parser.add_argument('--timeframes', nargs='+', default=DEFAULT_TIMEFRAMES)
+    parser.add_argument('--days', type=int, default=None, help='Проверять только последние N дней')
+    parser.add_argument('--output', type=str, default=None, help='Сохранить gap manifest в JSON')
+    parser.add_argument('--top', type=int, default=20, help='Показать N символов с наибольшим числом пропусков')
+    parser.add_argument('--sync-coverage', action='store_true',
+                        help='Перезаписать candle_coverage результатом аудита (только полный аудит, без --days)')
+    args = parser.parse_args()
+
+    if args.sync_coverage and args.days:
+        parser.error('--sync-coverage requires a full-history audit (without --days)')
+
+    since = datetime.now(pytz.UTC) - timedelta(days=args.days) if args.days else None
+    manifest = CandleIntegrityAuditor(db).audit(symbols=args.symbols, timeframes=args.timeframes, since=since)
+
+    print(manifest.summary())
+
+    missing_by_symbol = {}
+    for gap in manifest.gaps:
+        missing_by_symbol[gap['symbol']] = missing_by_symbol.get(gap['symbol'], 0) + gap['missing_candles']
+
+    if missing_by_symbol:
+        print(f"\n{'СИМВОЛ':<16} {'ПРОПУЩЕНО':>10}  ТАЙМФРЕЙМЫ")
+        by_symbol = manifest.by_symbol()
+        for symbol, missing in sorted(missing_by_symbol.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+            tfs = ', '.join(f"{tf}×{len(gaps)}" for tf, gaps in by_symbol[symbol].items())
+            print(f"{symbol:<16} {missing:>10}  {tfs}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(manifest.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Gap manifest saved to {args.output}")
+
+    if args.sync_coverage:
+        updated = candle_coverage.rebuild_from_manifest(manifest)
+        print(f"\n🗂️ Candle coverage synced: {updated} series")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare Cycle Benchmark Results
+
+Сравнивает два JSON результата cycle_benchmark.py (база vs новый коммит)
+по времени цикла и self-времени каждой стадии. Последний (прогретый) цикл
+каждого размера используется как эталон.
+
+Использование:
+    python benchmarks/compare.py base.json new.json [--threshold 15]
+
+Код возврата 1, если хотя бы одна стадия медленнее базы больше чем на threshold %.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+# Стадии короче этого порога не считаются регрессией (шум таймера)
+MIN_STAGE_SECONDS = 0.05
+
+
+def _last_cycles(result: Dict) -> Dict[int, Dict]:
+    return {run['symbols']: run['cycles'][-1] for run in result.get('runs', []) if run.get('cycles')}
+
+
+def _delta_pct(base: float, new: float) -> float:
+    if base <= 0:
+        return 0.0
+    return (new - base) / base * 100.0
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> bool:
+    base_cycles = _last_cycles(base)
+    new_cycles = _last_cycles(new)
+    regressed = False
+
+    print(f"Base: {base['meta'].get('commit')}  →  New: {new['meta'].get('commit')}")
+
+    for count in sorted(set(base_cycles) & set(new_cycles)):
+        b, n = base_cycles[count], new_cycles[count]
+        wall_delta = _delta_pct(b['wall_s'], n['wall_s'])
+        print(f"\n=== {count} symbols: wall {b['wall_s']:.2f}s → {n['wall_s']:.2f}s ({wall_delta:+.1f}%)")
+        print(f"{'stage':<16}{'base self_s':>14}{'new self_s':>14}{'delta':>10}")
+
+        for stage, b_stage in b['stages'].items():
+            n_stage = n['stages'].get(stage, {'self_s': 0.0})
+            delta = _delta_pct(b_stage['self_s'], n_stage['self_s'])
+            flag = ''
+            if delta > threshold and n_stage['self_s'] >= MIN_STAGE_SECONDS:
+                flag = '  ⚠️ REGRESSION'
+                regressed = True
+            print(f"{stage:<16}{b_stage['self_s']:>14.3f}{n_stage['self_s']:>14.3f}{delta:>9.1f}%{flag}")
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two cycle benchmark JSON results')
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=15.0, help='Допустимое замедление стадии, %%')
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
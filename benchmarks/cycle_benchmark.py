@@ -0,0 +1,439 @@
+"""
+End-to-End Cycle Benchmark
+
+Прогоняет реальный цикл анализа TradingBot (основные стратегии, Action Price,
+V3 S/R) на детерминированных синтетических данных во временной SQLite БД
+и замеряет время каждой стадии отдельно.
+
+Стадии:
+- candle_load      DataLoader.get_candles / get_candles_async
+- indicators       LazyIndicators._load (группы общих индикаторов по требованию,
+                   вложено в strategies / scoring)
+- regime           MarketRegimeDetector.detect_regime / get_h4_bias / detect_regime_batch
+                   (промахи кеша RegimeService; со 2-го цикла на тех же 4h свечах - кеш)
+- strategies       StrategyManager.check_all_signals
+- scoring          SignalScorer.score_signal
+- action_price     ActionPriceEngine.analyze
+- v3_zone_build    SRZonesV3Strategy.batch_build_zones_parallel
+- v3_analyze       SRZonesV3Strategy.analyze
+- db_writes        _save_signal_to_db / _save_action_price_signal / _save_v3_sr_signal
+
+С --pool стадии regime/indicators/strategies выполняются в worker процессах
+и берутся из perf_metrics (symbol_stage), а не из StageTimer.
+
+Для каждой стадии считается total (включая вложенные стадии) и self
+(без вложенных), поэтому сумма self ≈ время цикла без sleep/IO ожидания.
+
+Сеть не используется: Binance клиент заменен SyntheticExchange
+(tick size и mark price из тех же синтетических свечей), Telegram не запускается.
+
+Использование:
+    python benchmarks/cycle_benchmark.py                      # 50/200/500 символов
+    python benchmarks/cycle_benchmark.py --symbols 50 --cycles 2
+    python benchmarks/cycle_benchmark.py --output results/base.json
+    python benchmarks/cycle_benchmark.py --symbols 200 --pool 4   # стратегии в пуле процессов
+    python benchmarks/compare.py base.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+STAGES = [
+    'candle_load', 'indicators', 'regime', 'strategies', 'scoring',
+    'action_price', 'v3_zone_build', 'v3_analyze', 'db_writes',
+]
+
+
+class StageTimer:
+    """
+    Таймер стадий с учетом вложенности
+
+    Символы обрабатываются последовательно, поэтому стек активных стадий
+    корректен и для async функций (между await нет чужих стадий).
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {name: [] for name in STAGES}
+        self.self_time: Dict[str, float] = {name: 0.0 for name in STAGES}
+        self._stack: List[list] = []
+
+    def _enter(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def _exit(self, stage: str):
+        started, child = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.samples[stage].append(elapsed)
+        self.self_time[stage] += elapsed - child
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def wrap(self, stage: str, func):
+        if asyncio.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                self._enter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._exit(stage)
+            return async_wrapper
+
+        def wrapper(*args, **kwargs):
+            self._enter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit(stage)
+        return wrapper
+
+    def report(self) -> Dict[str, Dict]:
+        result = {}
+        for stage in STAGES:
+            samples = self.samples[stage]
+            if samples:
+                arr = np.array(samples) * 1000.0
+                result[stage] = {
+                    'calls': len(samples),
+                    'total_s': round(float(arr.sum()) / 1000.0, 4),
+                    'self_s': round(self.self_time[stage], 4),
+                    'mean_ms': round(float(arr.mean()), 3),
+                    'p95_ms': round(float(np.percentile(arr, 95)), 3),
+                    'max_ms': round(float(arr.max()), 3),
+                }
+            else:
+                result[stage] = {'calls': 0, 'total_s': 0.0, 'self_s': 0.0,
+                                 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        return result
+
+
+class SyntheticExchange:
+    """Офлайн замена BinanceClient: только методы, нужные циклу анализа"""
+
+    def __init__(self, data_loader):
+        self.data_loader = data_loader
+
+    def get_tick_size(self, symbol: str) -> float:
+        df = self.data_loader.get_candles(symbol, '15m', limit=1)
+        if df is None or len(df) == 0:
+            return 0.0001
+        price = float(df['close'].iloc[-1])
+        return 10 ** (int(np.floor(np.log10(price))) - 4)
+
+    async def get_mark_price(self, symbol: str) -> Dict:
+        df = self.data_loader.get_candles(symbol, '15m', limit=1)
+        price = float(df['close'].iloc[-1]) if df is not None and len(df) > 0 else 0.0
+        return {'markPrice': str(price), 'symbol': symbol}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def _build_bot(symbols: List[str], timer: StageTimer, all_strategies: bool = False,
+               pool_shards: int = 0):
+    """Собрать TradingBot с компонентами как в _initialize, но без сети"""
+    import main as bot_module
+    from src.indicators.lazy import LazyIndicators
+    from src.strategies.analysis_pool import ShardedAnalysisPool
+    from src.utils.config import config
+    from src.database.db import db
+    from src.binance.data_loader import DataLoader
+    from src.action_price.engine import ActionPriceEngine
+    from src.v3_sr.strategy import SRZonesV3Strategy
+    from src.utils.v3_zones_provider import get_v3_zones_provider
+
+    bot = bot_module.TradingBot()
+    bot.data_loader = DataLoader(client=None)
+    exchange = SyntheticExchange(bot.data_loader)
+    bot.ready_symbols = list(symbols)
+
+    if all_strategies:
+        for strategy in bot.strategy_manager.strategies:
+            strategy.enabled = True
+
+    if config.get('action_price.enabled', True):
+        bot.action_price_enabled = True
+        bot.action_price_engine = ActionPriceEngine(
+            config.get('action_price', {}), exchange, _null_signal_logger()
+        )
+
+    if config.get('sr_zones_v3_strategy.enabled', True):
+        bot.v3_enabled = True
+        bot.v3_sr_strategy = SRZonesV3Strategy(
+            config=config._config, db=db, data_loader=bot.data_loader, binance_client=exchange
+        )
+        get_v3_zones_provider().cache.clear()
+
+    # Инструментирование стадий
+    bot.data_loader.get_candles = timer.wrap('candle_load', bot.data_loader.get_candles)
+    bot.data_loader.get_candles_async = timer.wrap('candle_load', bot.data_loader.get_candles_async)
+    LazyIndicators._load = timer.wrap('indicators', _ORIGINAL_INDICATORS)
+    bot.regime_detector.detect_regime = timer.wrap('regime', bot.regime_detector.detect_regime)
+    bot.regime_detector.get_h4_bias = timer.wrap('regime', bot.regime_detector.get_h4_bias)
+    bot.regime_detector.detect_regime_batch = timer.wrap('regime', bot.regime_detector.detect_regime_batch)
+    bot.strategy_manager.check_all_signals = timer.wrap('strategies', bot.strategy_manager.check_all_signals)
+    bot.signal_scorer.score_signal = timer.wrap('scoring', bot.signal_scorer.score_signal)
+    bot._save_signal_to_db = timer.wrap('db_writes', bot._save_signal_to_db)
+    bot._save_action_price_signal = timer.wrap('db_writes', bot._save_action_price_signal)
+    bot._save_v3_sr_signal = timer.wrap('db_writes', bot._save_v3_sr_signal)
+    if bot.action_price_engine:
+        bot.action_price_engine.analyze = timer.wrap('action_price', bot.action_price_engine.analyze)
+    if bot.v3_sr_strategy:
+        bot.v3_sr_strategy.batch_build_zones_parallel = timer.wrap(
+            'v3_zone_build', bot.v3_sr_strategy.batch_build_zones_parallel
+        )
+        bot.v3_sr_strategy.analyze = timer.wrap('v3_analyze', bot.v3_sr_strategy.analyze)
+
+    # Пул стартует после инструментирования - worker'ы считают свои стадии сами
+    if pool_shards:
+        bot.analysis_pool = ShardedAnalysisPool(shards=pool_shards)
+        bot.analysis_pool.start()
+
+    return bot
+
+
+def _null_signal_logger():
+    """JSONL логгер Action Price без записи в logs/ (бенчмарк не должен мусорить)"""
+    from src.action_price.signal_logger import ActionPriceSignalLogger
+
+    class NullSignalLogger(ActionPriceSignalLogger):
+        def __init__(self):
+            self.log_filename = os.devnull
+
+        def log_signal(self, signal_data):
+            pass
+
+    return NullSignalLogger()
+
+
+_ORIGINAL_INDICATORS = None
+
+
+async def _run_cycle(bot, symbols: List[str], updated_timeframes: List[str], batch_size: int) -> Dict:
+    """Один цикл анализа - те же фазы, что и _check_signals (без сетевых фаз)"""
+    phases = {}
+    current_time = datetime.now(pytz.UTC)
+
+    if '4h' in updated_timeframes and not bot.analysis_pool:
+        started = time.perf_counter()
+        await bot._refresh_regimes(symbols)
+        phases['regimes'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    btc_data = await bot.data_loader.get_candles_async('BTCUSDT', '1h', limit=100)
+    for i in range(0, len(symbols), batch_size):
+        for symbol in symbols[i:i + batch_size]:
+            await bot._check_symbol_signals_safe(symbol, btc_data, updated_timeframes, {}, {})
+    phases['main_strategies'] = time.perf_counter() - started
+
+    if bot.action_price_engine:
+        started = time.perf_counter()
+        await bot._check_action_price_signals(current_time, symbols)
+        phases['action_price'] = time.perf_counter() - started
+
+    if bot.v3_sr_strategy:
+        started = time.perf_counter()
+        await bot._check_v3_sr_signals(current_time, symbols)
+        phases['v3_sr'] = time.perf_counter() - started
+
+    return {k: round(v, 4) for k, v in phases.items()}
+
+
+def _count_signals() -> Dict[str, int]:
+    from sqlalchemy import text
+    from src.database.db import db
+
+    counts = {}
+    with db.engine.connect() as conn:
+        for table in ('signals', 'action_price_signals', 'v3_sr_signals'):
+            counts[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() or 0
+    return counts
+
+
+def _reset_signals():
+    from sqlalchemy import text
+    from src.database.db import db
+
+    with db.engine.begin() as conn:
+        for table in ('signals', 'action_price_signals', 'v3_sr_signals', 'signal_locks', 'v3_sr_signal_locks'):
+            conn.execute(text(f"DELETE FROM {table}"))
+
+
+def run_benchmark(symbol_counts: List[int], cycles: int, days: int, seed: int,
+                  updated_timeframes: List[str], batch_size: int, all_strategies: bool = False,
+                  pool_shards: int = 0) -> Dict:
+    global _ORIGINAL_INDICATORS
+
+    from src.database.db import db
+    from src.utils.config import config
+    from benchmarks.synthetic_market import make_symbols, write_candles, DEFAULT_END_TIME
+
+    from src.indicators.lazy import LazyIndicators
+    from src.utils.perf_metrics import perf_metrics
+    _ORIGINAL_INDICATORS = LazyIndicators._load
+
+    all_symbols = make_symbols(max(symbol_counts))
+    print(f"📦 Generating synthetic candles: {len(all_symbols)} symbols × {days} days (seed={seed})")
+    started = time.perf_counter()
+    rows = write_candles(db.db_path, all_symbols, days, seed=seed, end_time=DEFAULT_END_TIME)
+    generation_s = time.perf_counter() - started
+    print(f"✅ {rows} candles written in {generation_s:.1f}s")
+
+    result = {
+        'meta': {
+            'commit': _git_commit(),
+            'created_at': datetime.now(pytz.UTC).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'days': days,
+            'end_time': DEFAULT_END_TIME.isoformat(),
+            'updated_timeframes': updated_timeframes,
+            'batch_size': batch_size,
+            'all_strategies': all_strategies,
+            'pool_shards': pool_shards,
+            'candles_written': rows,
+            'generation_s': round(generation_s, 2),
+            'v3_parallel_workers': config.get('sr_zones_v3_strategy.parallel_processing.max_workers', 4),
+        },
+        'runs': [],
+    }
+
+    for count in symbol_counts:
+        symbols = all_symbols[:count]
+        run = {'symbols': count, 'cycles': []}
+        timer = StageTimer()
+        bot = _build_bot(symbols, timer, all_strategies, pool_shards)
+
+        for cycle in range(cycles):
+            _reset_signals()
+            bot.symbols_blocked_main = {}
+            bot.symbols_blocked_action_price = set()
+            bot.symbols_blocked_v3 = set()
+            timer.__init__()
+            perf_metrics.reset()
+
+            print(f"⏱️  {count} symbols - cycle {cycle + 1}/{cycles}...")
+            started = time.perf_counter()
+            phases = asyncio.run(_run_cycle(bot, symbols, updated_timeframes, batch_size))
+            wall = time.perf_counter() - started
+
+            stages = timer.report()
+            if bot.analysis_pool:
+                # Стадии worker процессов (суммарное CPU время всех shard'ов)
+                for stage in ('regime', 'indicators', 'strategies'):
+                    stats = perf_metrics.get_stats('symbol_stage', stage)
+                    if stats:
+                        stages[stage] = {
+                            'calls': stats['count'],
+                            'total_s': round(stats['total'], 4),
+                            'self_s': round(stats['total'], 4),
+                            'mean_ms': round(stats['mean'] * 1000.0, 3),
+                            'p95_ms': round(stats['p95'] * 1000.0, 3),
+                            'max_ms': round(stats['max'] * 1000.0, 3),
+                        }
+
+            run['cycles'].append({
+                'cycle': cycle + 1,
+                'wall_s': round(wall, 4),
+                'per_symbol_ms': round(wall * 1000.0 / count, 3),
+                'phases': phases,
+                'stages': stages,
+                'signals': _count_signals(),
+            })
+            print(f"   wall={wall:.2f}s ({wall * 1000.0 / count:.1f} ms/symbol) phases={phases}")
+
+        if bot.analysis_pool:
+            bot.analysis_pool.shutdown()
+        LazyIndicators._load = _ORIGINAL_INDICATORS
+        result['runs'].append(run)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end cycle benchmark on synthetic market data')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[50, 200, 500],
+                        help='Количество символов (можно несколько: 50 200 500)')
+    parser.add_argument('--cycles', type=int, default=2,
+                        help='Циклов на размер (1-й холодный, следующие с прогретым кешем индикаторов)')
+    parser.add_argument('--days', type=int, default=95, help='Глубина синтетической истории')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeframes', nargs='+', default=['15m', '1h', '4h'],
+                        help='Таймфреймы, чьи свечи "закрылись" в цикле')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--output', type=str, default=None,
+                        help='Путь JSON результата (по умолчанию benchmarks/results/cycle_<commit>.json)')
+    parser.add_argument('--all-strategies', action='store_true',
+                        help='Включить все зарегистрированные стратегии (игнорируя enabled в config.yaml)')
+    parser.add_argument('--pool', type=int, default=0, metavar='SHARDS',
+                        help='Выполнять стратегии в пуле процессов (strategy_pool) с N shard\'ами')
+    parser.add_argument('--keep-db', action='store_true', help='Не удалять временную БД')
+    args = parser.parse_args()
+
+    # КРИТИЧНО: подменить путь БД ДО импорта src.database (db создается при импорте)
+    from src.utils.config import config
+    tmp_dir = tempfile.mkdtemp(prefix='bench_')
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    config._config.setdefault('database', {})['path'] = db_path
+
+    import logging
+    logging.disable(logging.INFO)
+
+    try:
+        result = run_benchmark(
+            symbol_counts=sorted(set(args.symbols)),
+            cycles=max(1, args.cycles),
+            days=args.days,
+            seed=args.seed,
+            updated_timeframes=args.timeframes,
+            batch_size=args.batch_size,
+            all_strategies=args.all_strategies,
+            pool_shards=max(0, args.pool),
+        )
+    finally:
+        if not args.keep_db:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(db_path + suffix)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(tmp_dir)
+            except OSError:
+                pass
+        else:
+            print(f"💾 Benchmark DB kept at {db_path}")
+
+    output = args.output or str(ROOT / 'benchmarks' / 'results' / f"cycle_{result['meta']['commit'] or 'local'}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"📊 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Indicator Kernel Benchmark
+
+Сравнивает расчет общих индикаторов по одному символу (pandas_ta,
+calculate_technical_indicators) с матрицами вселенной (UniverseIndicators,
+src/indicators/kernels.py) на детерминированных синтетических свечах.
+
+Замеры (медиана --repeat прогонов):
+- per_symbol   calculate_technical_indicators для каждого символа
+- universe     UniverseIndicators (все индикаторы всех символов)
+- views        universe + symbol_indicators для каждого символа
+- regime       detect_regime по символам vs detect_regime_batch (4h)
+
+Часть символов - молодые листинги (короче --bars, в матрице NaN слева).
+Перед замером значения универсального пути сверяются с pandas_ta
+(максимальная относительная разница по каждому индикатору).
+
+Использование:
+    python benchmarks/indicator_kernel_benchmark.py                 # 500 символов, 1h
+    python benchmarks/indicator_kernel_benchmark.py --symbols 100 500 --timeframe 15m
+    python benchmarks/indicator_kernel_benchmark.py --output results/kernels.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+
+def build_frames(symbols: List[str], timeframe: str, bars: int, days: int, seed: int,
+                 young_share: float) -> Dict[str, pd.DataFrame]:
+    """Свечи символов: последние bars баров, young_share символов - короче (молодые листинги)"""
+    from benchmarks.synthetic_market import generate_symbol_candles
+
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for symbol in symbols:
+        df = generate_symbol_candles(symbol, days, seed)[timeframe].tail(bars)
+        if rng.random() < young_share:
+            df = df.tail(int(rng.integers(bars // 2, bars)))
+        frames[symbol] = df.reset_index(drop=True)
+    return frames
+
+
+def _median_time(func: Callable, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples))
+
+
+def _series_pairs(expected, actual):
+    if isinstance(expected, tuple):
+        return list(zip(expected, actual))
+    if isinstance(expected, pd.DataFrame):
+        return [(expected[column], actual[column]) for column in expected.columns]
+    if isinstance(expected, pd.Series):
+        return [(expected, actual)]
+    return []
+
+
+def parity(frames: Dict[str, pd.DataFrame], universe) -> Dict[str, float]:
+    """Максимальная относительная разница view vs pandas_ta по каждому индикатору"""
+    from src.indicators.common import calculate_technical_indicators
+
+    worst: Dict[str, float] = {}
+    for symbol, df in frames.items():
+        expected = calculate_technical_indicators(df)
+        actual = universe.symbol_indicators(symbol, df)
+        for name, value in expected.items():
+            for left, right in _series_pairs(value, actual[name]):
+                left = left.to_numpy(dtype=float)
+                right = right.to_numpy(dtype=float)
+                if not (np.isnan(left) == np.isnan(right)).all():
+                    worst[name] = float('inf')
+                    continue
+                mask = ~np.isnan(left) & (np.abs(left) > 1e-6)
+                diff = float(np.max(np.abs(left[mask] - right[mask]) / np.abs(left[mask]))) if mask.any() else 0.0
+                worst[name] = max(worst.get(name, 0.0), diff)
+    return worst
+
+
+def run_benchmark(symbol_counts: List[int], timeframe: str, bars: int, days: int, seed: int,
+                  young_share: float, repeat: int) -> dict:
+    from benchmarks.synthetic_market import make_symbols
+    from src.detectors.market_regime import MarketRegimeDetector
+    from src.indicators.common import calculate_technical_indicators
+    from src.indicators.universe import UniverseIndicators
+
+    detector = MarketRegimeDetector()
+    runs = []
+
+    for count in symbol_counts:
+        symbols = make_symbols(count)
+        started = time.perf_counter()
+        frames = build_frames(symbols, timeframe, bars, days, seed, young_share)
+        frames_4h = build_frames(symbols, '4h', 360, days, seed, young_share)
+        print(f"🕯️ {count} symbols × {bars} {timeframe} bars generated in {time.perf_counter() - started:.1f}s")
+
+        universe = UniverseIndicators(frames, timeframe)
+        worst = parity(frames, universe)
+
+        def views():
+            built = UniverseIndicators(frames, timeframe)
+            for symbol, df in frames.items():
+                built.symbol_indicators(symbol, df)
+
+        timings = {
+            'per_symbol': _median_time(lambda: [calculate_technical_indicators(df) for df in frames.values()], repeat),
+            'universe': _median_time(lambda: UniverseIndicators(frames, timeframe), repeat),
+            'views': _median_time(views, repeat),
+            'regime_per_symbol': _median_time(lambda: [detector.detect_regime(df, '4h') for df in frames_4h.values()], repeat),
+            'regime_batch': _median_time(lambda: detector.detect_regime_batch(frames_4h, '4h'), repeat),
+        }
+
+        print(f"\n{'stage':<20} {'ms':>10} {'per symbol µs':>14}")
+        for name, seconds in timings.items():
+            print(f"{name:<20} {seconds * 1000:>10.1f} {seconds / count * 1e6:>14.1f}")
+        print(f"⚡ universe views: x{timings['per_symbol'] / timings['views']:.1f}, "
+              f"regime batch: x{timings['regime_per_symbol'] / timings['regime_batch']:.1f}")
+        print(f"🎯 max relative diff vs pandas_ta: {max(worst.values()):.2e} "
+              f"({max(worst, key=worst.get)})")
+
+        runs.append({
+            'symbols': count,
+            'timings_ms': {name: seconds * 1000 for name, seconds in timings.items()},
+            'max_relative_diff': worst,
+        })
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=ROOT).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now(pytz.UTC).isoformat(),
+            'timeframe': timeframe,
+            'bars': bars,
+            'young_share': young_share,
+            'repeat': repeat,
+        },
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Universe indicator kernels vs per-symbol pandas_ta')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[500],
+                        help='Количество символов (можно несколько)')
+    parser.add_argument('--timeframe', type=str, default='1h', choices=['15m', '1h', '4h'])
+    parser.add_argument('--bars', type=int, default=500, help='Баров на символ (как limit DataLoader)')
+    parser.add_argument('--days', type=int, default=95, help='Глубина синтетической истории')
+    parser.add_argument('--young-share', type=float, default=0.1,
+                        help='Доля молодых листингов (история короче --bars)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None,
+                        help='Путь JSON результата (по умолчанию benchmarks/results/indicator_kernels_<commit>.json)')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    result = run_benchmark(
+        symbol_counts=sorted(set(args.symbols)),
+        timeframe=args.timeframe,
+        bars=args.bars,
+        days=args.days,
+        seed=args.seed,
+        young_share=args.young_share,
+        repeat=max(1, args.repeat),
+    )
+
+    output = args.output or str(ROOT / 'benchmarks' / 'results' / f"indicator_kernels_{result['meta']['commit'] or 'local'}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\n📊 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
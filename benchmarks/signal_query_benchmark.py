@@ -0,0 +1,353 @@
+"""
+Signal Query Benchmark
+
+Заполняет временную SQLite БД синтетической историей сигналов (100k+ строк
+в каждой из signals / action_price_signals / v3_sr_signals) и замеряет запросы
+трекеров и Telegram отчетов - те же SELECT'ы, что строит src/database/signal_queries.py.
+
+Для каждого запроса:
+- EXPLAIN QUERY PLAN: должен использовать ожидаемый индекс и не сканировать таблицу
+- mean / p50 / p95 времени выполнения (budget по умолчанию 1ms на p50)
+
+После замера индексы возвращаются к прежней схеме (индексы по status) и запросы
+прогоняются повторно (колонка legacy) - видно, сколько дают partial / covering индексы.
+
+Использование:
+    python benchmarks/signal_query_benchmark.py
+    python benchmarks/signal_query_benchmark.py --rows 100000 300000 --signals-per-day 100
+    python benchmarks/signal_query_benchmark.py --output results/signal_queries.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+# Индексы, добавленные под запросы трекеров / отчетов (удаляются для legacy прогона)
+SIGNAL_QUERY_INDEXES = [
+    'idx_signals_active', 'idx_signals_stats', 'idx_signals_strategy_stats', 'idx_signals_closed_at',
+    'idx_ap_active', 'idx_ap_stats', 'idx_ap_pattern_stats', 'idx_ap_closed_at',
+    'idx_v3sr_active',
+]
+
+# Схема до partial / covering индексов (индексы по status)
+LEGACY_INDEXES = [
+    "CREATE INDEX idx_status_symbol ON signals (status, symbol)",
+    "CREATE INDEX idx_ap_status_symbol ON action_price_signals (status, symbol)",
+    "CREATE INDEX idx_v3sr_status_symbol ON v3_sr_signals (status, symbol)",
+    "CREATE INDEX ix_v3_sr_signals_status ON v3_sr_signals (status)",
+]
+
+MAIN_STRATEGIES = [
+    'Donchian Breakout', 'Squeeze Breakout', 'ORB/IRB', 'MA/VWAP Pullback',
+    'Break & Retest', 'ATR Momentum', 'VWAP Mean Reversion', 'Range Fade',
+    'Volume Profile', 'RSI/Stoch MR', 'Liquidity Sweep', 'Order Flow',
+]
+AP_PATTERNS = ['pin_bar', 'engulfing', 'inside_bar', 'fakey', 'ppr', 'body_cross']
+V3_SETUPS = ['FlipRetest', 'SweepReturn']
+
+
+def _closed_outcome(rng: random.Random, statuses: List[str], exits: List[str]):
+    status = rng.choice(statuses)
+    return status, rng.choice(exits), round(rng.uniform(-2.0, 3.0), 3)
+
+
+def generate_rows(rows: int, signals_per_day: int, active: int, seed: int) -> Dict[str, List[dict]]:
+    """
+    Синтетическая история: signals_per_day сигналов в день (глубина = rows / signals_per_day дней),
+    последние active - открытые
+    """
+    rng = random.Random(seed)
+    now = datetime.now(pytz.UTC)
+    symbols = [f"SYM{i:03d}USDT" for i in range(400)]
+    span = rows / signals_per_day * 86400
+
+    def _created(i: int) -> datetime:
+        return now - timedelta(seconds=span * (1 - i / rows))
+
+    signals, ap_signals, v3_signals = [], [], []
+    for i in range(rows):
+        created_at = _created(i)
+        is_active = i >= rows - active
+        symbol = rng.choice(symbols)
+        entry = rng.uniform(0.1, 100.0)
+
+        strategy_name = rng.choice(MAIN_STRATEGIES)
+        status, exit_type, pnl = _closed_outcome(
+            rng, ['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN'], ['TP1', 'TP2', 'SL', 'BREAKEVEN', 'TIME_STOP']
+        )
+        signals.append({
+            'context_hash': f"ctx{i}", 'symbol': symbol,
+            'strategy_id': MAIN_STRATEGIES.index(strategy_name) + 1, 'strategy_name': strategy_name,
+            'direction': rng.choice(['LONG', 'SHORT']), 'entry_price': entry, 'stop_loss': entry * 0.98,
+            'score': rng.uniform(1.0, 5.0), 'market_regime': rng.choice(['TREND', 'RANGE', 'SQUEEZE']),
+            'timeframe': '15m', 'created_at': created_at,
+            'status': rng.choice(['ACTIVE', 'PENDING']) if is_active else status,
+            'exit_type': None if is_active else exit_type,
+            'pnl_percent': None if is_active else pnl,
+            'closed_at': None if is_active else created_at + timedelta(hours=rng.uniform(0.5, 24)),
+        })
+
+        status, exit_reason, pnl = _closed_outcome(
+            rng, ['WIN', 'LOSS'],
+            ['TAKE_PROFIT_1', 'TAKE_PROFIT_2', 'TRAILING_STOP', 'BREAKEVEN', 'STOP_LOSS', 'TIME_STOP']
+        )
+        ap_signals.append({
+            'context_hash': f"ap{i}", 'symbol': symbol, 'pattern_type': rng.choice(AP_PATTERNS),
+            'direction': rng.choice(['LONG', 'SHORT']), 'timeframe': '1h', 'zone_id': f"z{i}",
+            'zone_low': entry * 0.99, 'zone_high': entry * 1.01, 'entry_price': entry,
+            'stop_loss': entry * 0.98, 'take_profit_1': entry * 1.02, 'confidence_score': rng.uniform(0, 10),
+            'created_at': created_at,
+            'status': rng.choice(['ACTIVE', 'PENDING']) if is_active else status,
+            'exit_reason': None if is_active else exit_reason,
+            'pnl_percent': None if is_active else pnl,
+            'closed_at': None if is_active else created_at + timedelta(hours=rng.uniform(0.5, 24)),
+        })
+
+        v3_signals.append({
+            'signal_id': f"v3_{i}", 'symbol': symbol, 'setup_type': rng.choice(V3_SETUPS),
+            'direction': rng.choice(['LONG', 'SHORT']), 'entry_tf': '15m', 'zone_id': f"z{i}",
+            'zone_tf': '1h', 'zone_kind': 'S', 'zone_low': entry * 0.99, 'zone_high': entry * 1.01,
+            'zone_mid': entry, 'zone_strength': rng.uniform(0, 100), 'zone_class': 'key',
+            'entry_price': entry, 'stop_loss': entry * 0.98, 'take_profit_1': entry * 1.02,
+            'take_profit_2': entry * 1.04, 'risk_r': 1.0, 'confidence': rng.uniform(0, 100),
+            'valid_until_ts': created_at + timedelta(hours=4), 'created_at': created_at,
+            'status': rng.choice(['ACTIVE', 'PENDING']) if is_active else rng.choice(['CLOSED', 'CANCELLED']),
+        })
+
+    return {'signals': signals, 'action_price_signals': ap_signals, 'v3_sr_signals': v3_signals}
+
+
+def build_queries() -> List[dict]:
+    """Запросы трекеров / Telegram и индекс, которым каждый из них должен обслуживаться"""
+    from sqlalchemy import func, select
+
+    from src.database import signal_queries as q
+    from src.database.models import ActionPriceSignal, Signal, V3SRSignal
+
+    now = datetime.now(pytz.UTC)
+    days_30 = now - timedelta(days=30)
+    hours_24 = now - timedelta(hours=24)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    closed = ['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN']
+
+    return [
+        {'name': 'signals.tracker_poll', 'index': 'idx_signals_active',
+         'statement': q.active_signals(Signal)},
+        {'name': 'signals.active_blocks', 'index': 'idx_signals_active',
+         'statement': q.active_main_blocks()},
+        {'name': 'signals.stats_30d', 'index': 'idx_signals_stats',
+         'statement': q.outcome_summary(Signal, Signal.exit_type, days_30)},
+        {'name': 'signals.stats_30d_strategy', 'index': 'idx_signals_strategy_stats',
+         'statement': q.outcome_summary(Signal, Signal.exit_type, days_30, Signal.strategy_id == 3)},
+        {'name': 'signals.closed_24h', 'index': 'idx_signals_closed_at',
+         'statement': select(Signal).where(Signal.closed_at >= hours_24, Signal.status.in_(closed))
+         .order_by(Signal.closed_at.desc())},
+        {'name': 'ap.tracker_poll', 'index': 'idx_ap_active',
+         'statement': q.active_signals(ActionPriceSignal)},
+        {'name': 'ap.active_symbols', 'index': 'idx_ap_active',
+         'statement': q.active_action_price_symbols()},
+        {'name': 'ap.stats_30d', 'index': 'idx_ap_stats',
+         'statement': q.outcome_summary(ActionPriceSignal, ActionPriceSignal.exit_reason, days_30)},
+        {'name': 'ap.stats_30d_pattern', 'index': 'idx_ap_pattern_stats',
+         'statement': q.outcome_summary(ActionPriceSignal, ActionPriceSignal.exit_reason, days_30,
+                                        ActionPriceSignal.pattern_type == 'pin_bar')},
+        {'name': 'ap.closed_24h', 'index': 'idx_ap_closed_at',
+         'statement': select(ActionPriceSignal).where(ActionPriceSignal.closed_at >= hours_24,
+                                                      ActionPriceSignal.status.in_(closed))
+         .order_by(ActionPriceSignal.closed_at.desc())},
+        {'name': 'v3.tracker_poll', 'index': 'idx_v3sr_active',
+         'statement': q.active_signals(V3SRSignal)},
+        {'name': 'v3.active_list', 'index': 'idx_v3sr_active',
+         'statement': q.active_signals(V3SRSignal).order_by(V3SRSignal.created_at.desc()).limit(10)},
+        {'name': 'v3.active_count', 'index': 'idx_v3sr_active',
+         'statement': select(func.count()).select_from(V3SRSignal).where(q.active_filter(V3SRSignal))},
+        {'name': 'v3.today_count', 'index': 'created',
+         'statement': select(func.count()).select_from(V3SRSignal).where(V3SRSignal.created_at >= today)},
+    ]
+
+
+def check_plan(plan: List[str], expected_index: str) -> bool:
+    """План использует ожидаемый индекс и ни одна таблица не сканируется целиком"""
+    uses_index = any(expected_index in line for line in plan)
+    full_scan = any(line.startswith('SCAN') and 'INDEX' not in line for line in plan)
+    return uses_index and not full_scan
+
+
+def time_queries(engine, queries: List[dict], repeat: int) -> Dict[str, dict]:
+    from src.database.signal_queries import explain_query_plan
+
+    results = {}
+    with engine.connect() as conn:
+        for query in queries:
+            statement = query['statement']
+            plan = explain_query_plan(conn, statement)
+            rows = len(conn.execute(statement).all())
+
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(statement).all()
+                samples.append((time.perf_counter() - started) * 1000.0)
+
+            arr = np.array(samples)
+            results[query['name']] = {
+                'rows': rows,
+                'plan': plan,
+                'plan_ok': check_plan(plan, query['index']),
+                'mean_ms': round(float(arr.mean()), 4),
+                'p50_ms': round(float(np.percentile(arr, 50)), 4),
+                'p95_ms': round(float(np.percentile(arr, 95)), 4),
+            }
+    return results
+
+
+def run_benchmark(row_counts: List[int], signals_per_day: int, active: int, repeat: int,
+                  seed: int, budget_ms: float) -> dict:
+    from sqlalchemy import insert, text
+
+    from src.database.db import Database
+    from src.database.models import Base
+
+    queries = build_queries()
+    runs = []
+
+    for rows in row_counts:
+        tmp_dir = tempfile.mkdtemp(prefix='bench_signals_')
+        db_path = os.path.join(tmp_dir, 'signals.db')
+        database = Database(db_path)
+        try:
+            started = time.perf_counter()
+            data = generate_rows(rows, signals_per_day, active, seed)
+            with database.engine.begin() as conn:
+                for table_name, table_rows in data.items():
+                    conn.execute(insert(Base.metadata.tables[table_name]), table_rows)
+            print(f"🗄️ {rows} rows x 3 tables inserted in {time.perf_counter() - started:.1f}s")
+
+            indexed = time_queries(database.engine, queries, repeat)
+
+            with database.engine.begin() as conn:
+                for index_name in SIGNAL_QUERY_INDEXES:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+                for statement in LEGACY_INDEXES:
+                    conn.execute(text(statement))
+            legacy = time_queries(database.engine, queries, repeat)
+        finally:
+            database.close()
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(db_path + suffix)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(tmp_dir)
+            except OSError:
+                pass
+
+        print(f"\n{'query':<28} {'rows':>6} {'p50 ms':>9} {'p95 ms':>9} {'legacy p50':>11}  plan")
+        for query in queries:
+            name = query['name']
+            stats = indexed[name]
+            ok = stats['plan_ok'] and stats['p50_ms'] <= budget_ms
+            print(f"{name:<28} {stats['rows']:>6} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                  f"{legacy[name]['p50_ms']:>11.3f}  {'✅' if ok else '❌'} {' | '.join(stats['plan'])}")
+
+        runs.append({'rows': rows, 'indexed': indexed, 'legacy': legacy})
+
+    failed = [
+        f"{run['rows']}:{name}"
+        for run in runs
+        for name, stats in run['indexed'].items()
+        if not stats['plan_ok'] or stats['p50_ms'] > budget_ms
+    ]
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=ROOT).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now(pytz.UTC).isoformat(),
+            'signals_per_day': signals_per_day,
+            'active_signals': active,
+            'repeat': repeat,
+            'budget_ms': budget_ms,
+        },
+        'runs': runs,
+        'failed': failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Signal tables query benchmark (tracker polls / Telegram stats)')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000],
+                        help='Строк в каждой таблице сигналов (можно несколько)')
+    parser.add_argument('--signals-per-day', type=int, default=100,
+                        help='Сигналов в день в каждой таблице (объем окна 30d не зависит от --rows)')
+    parser.add_argument('--active', type=int, default=40, help='Открытых (ACTIVE/PENDING) сигналов в таблице')
+    parser.add_argument('--repeat', type=int, default=200, help='Повторов каждого запроса')
+    parser.add_argument('--budget-ms', type=float, default=1.0, help='Допустимое p50 время запроса')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None,
+                        help='Путь JSON результата (по умолчанию benchmarks/results/signal_queries_<commit>.json)')
+    args = parser.parse_args()
+
+    # КРИТИЧНО: подменить путь БД ДО импорта src.database (db создается при импорте)
+    from src.utils.config import config
+    tmp_dir = tempfile.mkdtemp(prefix='bench_')
+    default_db_path = os.path.join(tmp_dir, 'bench.db')
+    config._config.setdefault('database', {})['path'] = default_db_path
+
+    import logging
+    logging.disable(logging.INFO)
+
+    try:
+        result = run_benchmark(
+            row_counts=sorted(set(args.rows)),
+            signals_per_day=args.signals_per_day,
+            active=args.active,
+            repeat=max(1, args.repeat),
+            seed=args.seed,
+            budget_ms=args.budget_ms,
+        )
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(default_db_path + suffix)
+            except OSError:
+                pass
+        try:
+            os.rmdir(tmp_dir)
+        except OSError:
+            pass
+
+    output = args.output or str(ROOT / 'benchmarks' / 'results' / f"signal_queries_{result['meta']['commit'] or 'local'}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\n📊 Results saved to {output}")
+
+    if result['failed']:
+        print(f"❌ Over budget / wrong plan: {', '.join(result['failed'])}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Synthetic Market Data Generator
+
+Детерминированная генерация OHLCV для N символов и запись в SQLite БД
+в формате таблицы candles (тот же, что использует DataLoader).
+
+- Базовый ряд 15m: геометрическое случайное блуждание с чередованием
+  трендовых и флэтовых режимов (чтобы стратегии реально срабатывали)
+- 1h / 4h / 1d получаются ресемплингом 15m → все таймфреймы согласованы
+- Один и тот же seed + символ + end_time = байт-в-байт одинаковые свечи
+"""
+
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytz
+
+
+TIMEFRAME_RULES = {
+    '15m': '15min',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1D',
+}
+
+TIMEFRAME_MINUTES = {'15m': 15, '1h': 60, '4h': 240, '1d': 1440}
+
+# Фиксированная точка отсчета - данные не зависят от момента запуска
+DEFAULT_END_TIME = datetime(2025, 1, 1, tzinfo=pytz.UTC)
+
+
+def make_symbols(count: int) -> List[str]:
+    """Список синтетических символов. BTCUSDT всегда первый (нужен для BTC фильтра)"""
+    symbols = ['BTCUSDT']
+    for i in range(1, count):
+        symbols.append(f"SYN{i:04d}USDT")
+    return symbols[:count]
+
+
+def _symbol_seed(symbol: str, seed: int) -> int:
+    """Стабильный seed для символа (CRC32 не зависит от PYTHONHASHSEED)"""
+    return (zlib.crc32(symbol.encode()) ^ seed) & 0x7FFFFFFF
+
+
+def generate_symbol_candles(symbol: str, days: int, seed: int = 42,
+                            end_time: datetime = DEFAULT_END_TIME) -> Dict[str, pd.DataFrame]:
+    """
+    Сгенерировать свечи для одного символа по всем таймфреймам
+
+    Args:
+        symbol: Символ
+        days: Глубина истории в днях
+        seed: Глобальный seed
+        end_time: Время окончания (open_time последней 15m свечи < end_time)
+
+    Returns:
+        Dict {timeframe: DataFrame[open_time, open, high, low, close, volume, taker_buy_base]}
+    """
+    rng = np.random.default_rng(_symbol_seed(symbol, seed))
+    n = days * 24 * 4
+
+    # Режимы: блоки 1-5 дней, в каждом свой дрейф и волатильность
+    drift = np.empty(n)
+    vol = np.empty(n)
+    pos = 0
+    while pos < n:
+        length = int(rng.integers(96, 480))
+        regime = rng.choice(['trend_up', 'trend_down', 'range', 'squeeze'], p=[0.3, 0.3, 0.3, 0.1])
+        if regime == 'trend_up':
+            mu, sigma = 0.0006, 0.004
+        elif regime == 'trend_down':
+            mu, sigma = -0.0006, 0.004
+        elif regime == 'range':
+            mu, sigma = 0.0, 0.003
+        else:
+            mu, sigma = 0.0, 0.0012
+        drift[pos:pos + length] = mu
+        vol[pos:pos + length] = sigma * rng.uniform(0.7, 1.4)
+        pos += length
+
+    returns = drift + vol * rng.standard_t(df=4, size=n) / np.sqrt(2.0)
+    start_price = float(rng.uniform(0.05, 500.0)) if symbol != 'BTCUSDT' else 40000.0
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+
+    wick = np.abs(rng.normal(0.0, vol * 0.6, size=n))
+    high = np.maximum(open_, close) * (1.0 + wick)
+    low = np.minimum(open_, close) * (1.0 - np.abs(rng.normal(0.0, vol * 0.6, size=n)))
+
+    # Объем растет на сильных движениях
+    base_volume = float(rng.uniform(1e4, 1e6))
+    volume = base_volume * (1.0 + 40.0 * np.abs(returns)) * rng.lognormal(0.0, 0.35, size=n)
+    buy_share = np.clip(0.5 + np.sign(close - open_) * rng.uniform(0.0, 0.2, size=n), 0.05, 0.95)
+    taker_buy_base = volume * buy_share
+
+    first_open = end_time - timedelta(minutes=15 * n)
+    index = pd.date_range(first_open, periods=n, freq='15min', tz=pytz.UTC)
+
+    df_15m = pd.DataFrame({
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'taker_buy_base': taker_buy_base,
+    }, index=index)
+
+    result = {}
+    for tf, rule in TIMEFRAME_RULES.items():
+        if tf == '15m':
+            df_tf = df_15m
+        else:
+            df_tf = df_15m.resample(rule, label='left', closed='left').agg({
+                'open': 'first',
+                'high': 'max',
+                'low': 'min',
+                'close': 'last',
+                'volume': 'sum',
+                'taker_buy_base': 'sum',
+            }).dropna()
+        df_tf = df_tf.reset_index().rename(columns={'index': 'open_time'})
+        result[tf] = df_tf
+
+    return result
+
+
+def write_candles(db_path: str, symbols: List[str], days: int, seed: int = 42,
+                  end_time: datetime = DEFAULT_END_TIME) -> int:
+    """
+    Записать синтетические свечи в таблицу candles
+
+    Таблица должна уже существовать (создается Database() через create_all).
+    Формат open_time совпадает с ORM ('YYYY-MM-DD HH:MM:SS.000000').
+
+    Returns:
+        Количество записанных строк
+    """
+    conn = sqlite3.connect(db_path)
+    total = 0
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        for symbol in symbols:
+            candles = generate_symbol_candles(symbol, days, seed=seed, end_time=end_time)
+            rows = []
+            for tf, df in candles.items():
+                minutes = TIMEFRAME_MINUTES[tf]
+                open_times = df['open_time'].dt.strftime('%Y-%m-%d %H:%M:%S.000000').tolist()
+                close_times = (df['open_time'] + pd.Timedelta(minutes=minutes) - pd.Timedelta(milliseconds=1))
+                close_times = close_times.dt.strftime('%Y-%m-%d %H:%M:%S.%f').tolist()
+                quote_volume = (df['volume'] * df['close']).tolist()
+                taker_buy_quote = (df['taker_buy_base'] * df['close']).tolist()
+                for i, (o, h, l, c, v, tbb) in enumerate(zip(
+                    df['open'].tolist(), df['high'].tolist(), df['low'].tolist(),
+                    df['close'].tolist(), df['volume'].tolist(), df['taker_buy_base'].tolist()
+                )):
+                    rows.append((
+                        symbol, tf, open_times[i], o, h, l, c, v, close_times[i],
+                        quote_volume[i], int(v / 50) + 1, tbb, taker_buy_quote[i]
+                    ))
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO candles
+                (symbol, timeframe, open_time, open, high, low, close, volume,
+                 close_time, quote_volume, trades, taker_buy_base, taker_buy_quote)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            total += len(rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return total
@@ -0,0 +1,41 @@
+"""
+Экспорт / импорт переносимого снимка свечей (npz на символ + manifest.json)
+Запуск: python candle_snapshot.py export --dir snapshots/2025-01-01 [--symbols BTCUSDT ETHUSDT] [--timeframes 15m 1h]
+        python candle_snapshot.py import --dir snapshots/2025-01-01 [--symbols BTCUSDT] [--no-verify]
+"""
+import argparse
+
+from src.database.db import db
+from src.data.candle_snapshot import CandleSnapshot
+from src.data.integrity_auditor import DEFAULT_TIMEFRAMES
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Candle snapshot export/import')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Сохранить свечи из БД в снимок')
+    export_parser.add_argument('--dir', required=True, help='Каталог снимка')
+    export_parser.add_argument('--symbols', nargs='+', default=None, help='Символы (по умолчанию вся БД)')
+    export_parser.add_argument('--timeframes', nargs='+', default=DEFAULT_TIMEFRAMES)
+
+    import_parser = subparsers.add_parser('import', help='Загрузить снимок в БД')
+    import_parser.add_argument('--dir', required=True, help='Каталог снимка')
+    import_parser.add_argument('--symbols', nargs='+', default=None, help='Символы (по умолчанию все из manifest)')
+    import_parser.add_argument('--no-verify', action='store_true', help='Не проверять sha256 файлов')
+    args = parser.parse_args()
+
+    snapshot = CandleSnapshot(db)
+    if args.command == 'export':
+        manifest = snapshot.export(args.dir, symbols=args.symbols, timeframes=args.timeframes)
+        print(f"📦 Exported {len(manifest['symbols'])} symbols / {manifest['rows']} candles "
+              f"to {args.dir} in {manifest['elapsed_s']:.1f}s")
+    else:
+        result = snapshot.import_snapshot(args.dir, symbols=args.symbols, verify=not args.no_verify)
+        print(f"📦 Imported {result['symbols']} symbols / {result['rows']} candles in {result['elapsed_s']:.1f}s")
+        if result['skipped']:
+            print(f"⚠️ Skipped (missing/corrupted): {', '.join(result['skipped'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Retention старых данных вручную (то же, что ежедневная задача бота)
+Запуск: python db_retention.py                               # один проход по политикам из config.yaml (retention)
+        python db_retention.py --enable-incremental-vacuum   # одноразово перевести БД в auto_vacuum=INCREMENTAL (бот остановлен!)
+"""
+import argparse
+import asyncio
+
+from src.database.db import db
+from src.database.executor import db_executor
+from src.database.retention import RetentionService
+
+
+async def run_once(service: RetentionService):
+    try:
+        return await service.run()
+    finally:
+        db_executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database retention')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help='VACUUM с переводом БД в auto_vacuum=INCREMENTAL (блокирует БД, бот должен быть остановлен)')
+    args = parser.parse_args()
+
+    service = RetentionService.from_config(db, db_executor)
+
+    if args.enable_incremental_vacuum:
+        result = service.enable_incremental_vacuum()
+        freed = (result['pages_before'] - result['pages_after']) * result['page_size']
+        print(f"🧹 auto_vacuum={result['auto_vacuum']} (2 = INCREMENTAL), freed {freed / 1024 / 1024:.1f}MB")
+        return
+
+    report = asyncio.run(run_once(service))
+    for name, rows in report['deleted'].items():
+        print(f"{name:<20} {rows:>10} rows deleted")
+    if report['downsampled']:
+        print(f"{'candles_1h':<20} {report['downsampled']:>10} rows downsampled from 15m")
+    print(f"\n🧹 Freed {report['freed_bytes'] / 1024 / 1024:.1f}MB ({report['vacuum_pages']} pages vacuumed), "
+          f"DB {report['db_bytes'] / 1024 / 1024:.1f}MB, {report['elapsed_s']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import asyncio
 import signal
 import sys
+import time
 from typing import List, Optional, Dict
 from src.utils.logger import logger
 from src.utils.strategy_logger import strategy_logger
@@ -9,43 +10,39 @@ from src.binance.client import BinanceClient
 from src.binance.data_loader import DataLoader
 from src.data.fast_catchup import FastCatchupLoader
 from src.data.periodic_gap_refill import PeriodicGapRefill
+from src.data.candle_writer import CandleWriter
+from src.database.wal_checkpoint import WalCheckpointer
+from src.database.retention import RetentionService
 from src.strategies.strategy_manager import StrategyManager
 from src.scoring.signal_scorer import SignalScorer
 from src.filters.btc_filter import BTCFilter
 from src.detectors.market_regime import MarketRegimeDetector
+from src.detectors.regime_service import RegimeService
 
-# Импорт всех стратегий
-from src.strategies.donchian_breakout import DonchianBreakoutStrategy
-from src.strategies.squeeze_breakout import SqueezeBreakoutStrategy
-from src.strategies.orb_strategy import ORBStrategy
-from src.strategies.ma_vwap_pullback import MAVWAPPullbackStrategy
-from src.strategies.break_retest import BreakRetestStrategy
-from src.strategies.atr_momentum import ATRMomentumStrategy
-from src.strategies.vwap_mean_reversion import VWAPMeanReversionStrategy
-from src.strategies.range_fade import RangeFadeStrategy
-from src.strategies.rsi_stoch_mr import RSIStochMRStrategy
-from src.strategies.volume_profile import VolumeProfileStrategy
-from src.strategies.liquidity_sweep import LiquiditySweepStrategy
-from src.strategies.cvd_divergence import CVDDivergenceStrategy
-from src.strategies.time_of_day import TimeOfDayStrategy
-from src.strategies.order_flow import OrderFlowStrategy
-from src.strategies.cash_and_carry import CashAndCarryStrategy
-from src.strategies.market_making import MarketMakingStrategy
+# Реестр всех стратегий + пул анализа вне event loop
+from src.strategies.registry import create_all_strategies
+from src.strategies.analysis_pool import ShardedAnalysisPool
+from src.strategies.symbol_analysis import prepare_symbol_analysis, attach_scoring_frames
 from src.telegram.bot import TelegramBot
 from src.utils.symbol_load_coordinator import SymbolLoadCoordinator
 from src.utils.signal_lock import SignalLockManager
 from src.utils.signal_tracker import SignalPerformanceTracker
 from src.utils.strategy_validator import StrategyValidator
 from src.utils.timeframe_sync import TimeframeSync
-from src.utils.indicator_validator import IndicatorValidator
+from src.utils.perf_metrics import perf_metrics
+from src.utils.strategy_profiler import strategy_profiler
+from src.utils.signal_pipeline import SignalPipeline, PipelineStage
+from src.utils.adaptive_concurrency import AdaptiveConcurrency
 from src.database.db import db
-from src.database.models import Signal
+from src.database.executor import db_executor
+from src.database.signal_repository import signal_repository
+from src.database.models import Signal, Candle
 from sqlalchemy import and_
 from src.indicators.cache import IndicatorCache
-from src.indicators.common import calculate_common_indicators
-from src.indicators.swing_levels import calculate_swing_levels
+from src.indicators.lazy import materialized_counts
 from src.indicators.open_interest import OpenInterestCalculator
 from src.indicators.orderbook import OrderbookAnalyzer
+from src.indicators.prefix_sums import prefix_sum_cache
 import hashlib
 from datetime import datetime, timedelta
 import pytz
@@ -66,6 +63,16 @@ from src.database.models import V3SRSignal
 
 
 class TradingBot:
+    # Лимиты свечей анализа стратегий (по максимальным требованиям стратегий):
+    # - 15m: RSI/Stoch MR требует 90 дней × 24 × 4 = 8,640 баров
+    # - 1h: Donchian требует ~87 дней × 24 = 2,100 баров
+    # - 4h: 60 дней × 6 = 360 баров (режим рынка)
+    ANALYSIS_TF_LIMITS = {
+        '15m': 8640,
+        '1h': 2100,
+        '4h': 360
+    }
+    
     def __init__(self):
         self.running = False
         self.client: Optional[BinanceClient] = None
@@ -101,9 +108,14 @@ class TradingBot:
         self.signal_scorer = SignalScorer(config)  # Config object supports dot notation
         self.btc_filter = BTCFilter(config)  # Config object supports dot notation
         self.regime_detector = MarketRegimeDetector()
+        self.regime_service = RegimeService(self.regime_detector)  # Режим по символам до закрытия 4h
         self.telegram_bot = TelegramBot(binance_client=None)  # Will be set after client init
         self.signal_lock_manager = SignalLockManager()
         self.indicator_cache = IndicatorCache()  # Кеш для индикаторов
+        self.analysis_pool: Optional[ShardedAnalysisPool] = None  # Стратегии в worker процессах (опционально)
+        self.candle_writer: Optional[CandleWriter] = None  # Write-behind запись свечей
+        self.wal_checkpointer: Optional[WalCheckpointer] = None  # Фоновый checkpoint WAL
+        self.retention_task: Optional[asyncio.Task] = None  # Суточная retention старых данных
         
         self._check_signals_lock = asyncio.Lock()
         self._check_signals_task: Optional[asyncio.Task] = None
@@ -297,7 +309,26 @@ class TradingBot:
         )
         
         # Загрузить активные сигналы из БД и заблокировать символы
-        self._load_active_signals_on_startup()
+        await self._load_active_signals_on_startup()
+        
+        # WAL checkpoint вне commit'ов писателя (PASSIVE в простое, TRUNCATE по размеру)
+        # Запускается до импорта снимка: autocheckpoint писателей выключен только пока он работает
+        if config.get('database.wal_checkpoint.enabled', False):
+            self.wal_checkpointer = WalCheckpointer.from_config(db)
+            await self.wal_checkpointer.start()
+        
+        # Холодный старт: загрузить снимок свечей, если БД пуста
+        await self._import_candle_snapshot_if_empty()
+        
+        # Write-behind запись свечей: страницы всех символов → одна транзакция
+        if config.get('candle_writer.enabled', True) and self.data_loader:
+            self.candle_writer = CandleWriter(
+                db,
+                flush_interval_ms=config.get('candle_writer.flush_interval_ms', 20),
+                max_batch_rows=config.get('candle_writer.max_batch_rows', 20000)
+            )
+            await self.candle_writer.start()
+            self.data_loader.candle_writer = self.candle_writer
         
         # Получаем начальный список символов
         self.symbols = await self._fetch_symbols_by_volume()
@@ -322,6 +353,7 @@ class TradingBot:
         update_symbols_task = asyncio.create_task(self._update_symbols_task())
         periodic_gap_refill_task = asyncio.create_task(self._periodic_gap_refill_task())
         zone_reaction_check_task = asyncio.create_task(self._periodic_zone_reaction_check_task())
+        self.retention_task = asyncio.create_task(self._retention_task())
         
         logger.info("Background tasks started (loader + analyzer + symbol updater + periodic gap refill + zone reaction check running in parallel)")
         logger.info("Bot will start analyzing symbols as soon as their data is loaded")
@@ -367,6 +399,22 @@ class TradingBot:
             reason = "testnet mode" if use_testnet else "disabled in config"
             logger.info(f"⏸️  Action Price disabled ({reason})")
         
+        # Prometheus endpoint для метрик производительности (опционально)
+        if config.get('perf_metrics.prometheus.enabled', False):
+            try:
+                await perf_metrics.start_http_server()
+            except Exception as e:
+                logger.error(f"Failed to start Prometheus metrics endpoint: {e}")
+        
+        # Пул процессов для стратегий (CPU анализ вне event loop)
+        if config.get('strategy_pool.enabled', False):
+            try:
+                self.analysis_pool = ShardedAnalysisPool(shards=config.get('strategy_pool.shards', 4))
+                self.analysis_pool.start()
+            except Exception as e:
+                logger.error(f"Failed to start strategy analysis pool, running strategies inline: {e}")
+                self.analysis_pool = None
+        
         # Создание валидатора стратегий
         strategy_validator = StrategyValidator(
             strategy_manager=self.strategy_manager,
@@ -379,6 +427,7 @@ class TradingBot:
         # Связываем компоненты с Telegram ботом для команд
         self.telegram_bot.set_performance_tracker(self.performance_tracker)
         self.telegram_bot.set_validator(strategy_validator)
+        self.telegram_bot.set_regime_service(self.regime_service)
         
         # Связать Action Price tracker если активирован
         if self.ap_performance_tracker:
@@ -435,24 +484,7 @@ class TradingBot:
     
     def _register_strategies(self):
         """Регистрация всех стратегий согласно мануалу"""
-        strategies = [
-            DonchianBreakoutStrategy(),          # Стратегия #1
-            SqueezeBreakoutStrategy(),           # Стратегия #2
-            ORBStrategy(),                       # Стратегия #3
-            MAVWAPPullbackStrategy(),            # Стратегия #4
-            BreakRetestStrategy(),               # Стратегия #5
-            ATRMomentumStrategy(),               # Стратегия #6
-            VWAPMeanReversionStrategy(),         # Стратегия #7
-            RangeFadeStrategy(),                 # Стратегия #8
-            VolumeProfileStrategy(),             # Стратегия #9
-            RSIStochMRStrategy(),                # Стратегия #10
-            LiquiditySweepStrategy(),            # Стратегия #11
-            OrderFlowStrategy(),                 # Стратегия #12
-            CVDDivergenceStrategy(),             # Стратегия #13
-            TimeOfDayStrategy(),                 # Стратегия #14
-            CashAndCarryStrategy(),              # Стратегия #19 (требует funding данных)
-            MarketMakingStrategy(),              # Стратегия #26 (требует HFT orderbook)
-        ]
+        strategies = create_all_strategies()
         
         self.strategy_manager.register_all(strategies)
         logger.info(f"Registered {len(strategies)} strategies")
@@ -613,6 +645,48 @@ class TradingBot:
         
         return updated_by_tf
     
+    async def _fetch_orderbook(self, symbol: str) -> Dict:
+        """Загрузить orderbook для одного символа с aggressive timeout"""
+        try:
+            # Timeout 5 секунд - плохие токены падают быстро
+            return await OrderbookAnalyzer.fetch_and_calculate_depth(
+                client=self.client,
+                symbol=symbol,
+                limit=20,
+                use_weighted=True,
+                timeout=5.0  # Агрессивный timeout
+            )
+        except Exception as e:
+            logger.debug(f"Orderbook fetch failed for {symbol}: {e}")
+            return {
+                'depth_imbalance': 0.0,
+                'bid_volume': 0.0,
+                'ask_volume': 0.0,
+                'spread_pct': 0.0,
+                'data_valid': False
+            }
+    
+    async def _fetch_open_interest(self, symbol: str) -> Dict:
+        """Загрузить OI для одного символа с aggressive timeout"""
+        try:
+            # Timeout 5 секунд - плохие токены падают быстро
+            return await OpenInterestCalculator.fetch_and_calculate_oi(
+                client=self.client,
+                symbol=symbol,
+                period='5m',
+                limit=30,
+                lookback=5,
+                timeout=5.0  # Агрессивный timeout
+            )
+        except Exception as e:
+            logger.debug(f"OI fetch failed for {symbol}: {e}")
+            return {
+                'oi_delta': 0.0,
+                'doi_pct': 0.0,
+                'current_oi': 0.0,
+                'data_valid': False
+            }
+    
     async def _fetch_all_orderbooks_parallel(self, symbols: list) -> Dict[str, Dict]:
         """
         ОПТИМИЗАЦИЯ: Параллельная загрузка orderbook для всех символов с агрессивным timeout
@@ -630,27 +704,8 @@ class TradingBot:
         semaphore = asyncio.Semaphore(100)
         
         async def fetch_one_orderbook(symbol: str):
-            """Загрузить orderbook для одного символа с aggressive timeout"""
             async with semaphore:
-                try:
-                    # Timeout 5 секунд - плохие токены падают быстро
-                    metrics = await OrderbookAnalyzer.fetch_and_calculate_depth(
-                        client=self.client,
-                        symbol=symbol,
-                        limit=20,
-                        use_weighted=True,
-                        timeout=5.0  # Агрессивный timeout
-                    )
-                    return (symbol, metrics)
-                except Exception as e:
-                    logger.debug(f"Orderbook fetch failed for {symbol}: {e}")
-                    return (symbol, {
-                        'depth_imbalance': 0.0,
-                        'bid_volume': 0.0,
-                        'ask_volume': 0.0,
-                        'spread_pct': 0.0,
-                        'data_valid': False
-                    })
+                return (symbol, await self._fetch_orderbook(symbol))
         
         # Создать задачи для всех символов
         tasks = [fetch_one_orderbook(symbol) for symbol in symbols]
@@ -695,27 +750,8 @@ class TradingBot:
         semaphore = asyncio.Semaphore(100)
         
         async def fetch_one_oi(symbol: str):
-            """Загрузить OI для одного символа с aggressive timeout"""
             async with semaphore:
-                try:
-                    # Timeout 5 секунд - плохие токены падают быстро
-                    metrics = await OpenInterestCalculator.fetch_and_calculate_oi(
-                        client=self.client,
-                        symbol=symbol,
-                        period='5m',
-                        limit=30,
-                        lookback=5,
-                        timeout=5.0  # Агрессивный timeout
-                    )
-                    return (symbol, metrics)
-                except Exception as e:
-                    logger.debug(f"OI fetch failed for {symbol}: {e}")
-                    return (symbol, {
-                        'oi_delta': 0.0,
-                        'doi_pct': 0.0,
-                        'current_oi': 0.0,
-                        'data_valid': False
-                    })
+                return (symbol, await self._fetch_open_interest(symbol))
         
         # Создать задачи для всех символов
         tasks = [fetch_one_oi(symbol) for symbol in symbols]
@@ -757,6 +793,8 @@ class TradingBot:
             self._is_checking_signals = True
         
         start_time = datetime.now()
+        indicator_counts = materialized_counts()
+        prefilter_skips = self.strategy_manager.get_prefilter_skips()
         try:
             # Выполнить проверку БЕЗ lock (не блокируем следующие циклы)
             await self._check_signals()
@@ -768,6 +806,10 @@ class TradingBot:
                 self._is_checking_signals = False
             
             elapsed = (datetime.now() - start_time).total_seconds()
+            perf_metrics.record('cycle', 'total', elapsed)
+            strategy_profiler.on_cycle_end()
+            self._log_indicator_materialization(indicator_counts)
+            self._log_prefilter_skips(prefilter_skips)
             
             # Логировать cycle duration для мониторинга
             if elapsed > 90:
@@ -777,6 +819,36 @@ class TradingBot:
             else:
                 logger.debug(f"✅ Signal check completed in {elapsed:.1f}s")
     
+    def _log_indicator_materialization(self, before: Dict[str, int]):
+        """Какие группы общих индикаторов посчитаны за цикл (LazyIndicators, в т.ч. в worker процессах)"""
+        computed = {
+            label: count - before.get(label, 0)
+            for label, count in materialized_counts().items()
+            if count > before.get(label, 0)
+        }
+        if not computed:
+            return
+        details = ', '.join(
+            f"{label}×{count}" for label, count in sorted(computed.items(), key=lambda item: -item[1])
+        )
+        logger.info(f"🧮 Indicators materialized: {sum(computed.values())} ({details})")
+    
+    def _log_prefilter_skips(self, before: Dict[str, Dict[str, int]]):
+        """Сколько проверок стратегий отсек префильтр за цикл (по причинам и стратегиям)"""
+        by_reason: Dict[str, int] = {}
+        by_strategy: Dict[str, int] = {}
+        for name, reasons in self.strategy_manager.get_prefilter_skips().items():
+            for reason, count in reasons.items():
+                delta = count - before.get(name, {}).get(reason, 0)
+                if delta > 0:
+                    by_reason[reason] = by_reason.get(reason, 0) + delta
+                    by_strategy[name] = by_strategy.get(name, 0) + delta
+        if not by_reason:
+            return
+        reasons = ', '.join(f"{reason}×{count}" for reason, count in sorted(by_reason.items(), key=lambda item: -item[1]))
+        top = ', '.join(f"{name}×{count}" for name, count in sorted(by_strategy.items(), key=lambda item: -item[1])[:5])
+        logger.info(f"🚧 Prefilter skips: {sum(by_reason.values())} ({reasons}) | top: {top}")
+    
     async def _check_signals(self):
         """Проверить сигналы для всех готовых символов"""
         if not self.data_loader:
@@ -815,61 +887,53 @@ class TradingBot:
         # 1. ПАРАЛЛЕЛЬНО обновить BTC данные
         if '1h' in updated_timeframes:
             try:
-                await self.data_loader.update_missing_candles('BTCUSDT', '1h')
+                with perf_metrics.span('cycle', 'btc_update'):
+                    await self.data_loader.update_missing_candles('BTCUSDT', '1h')
                 logger.info(f"✅ Updated BTCUSDT 1h data (candle closed at {now.strftime('%H:%M UTC')})")
             except Exception as e:
                 logger.debug(f"Could not update BTCUSDT: {e}")
         
+        # Выбывшие символы не остаются в сводке режимов (и в конвейере тоже)
+        self.regime_service.retain(symbols_to_check)
+        pipeline_enabled = config.get('signal_pipeline.enabled', False)
+        
         # 2. ПАРАЛЛЕЛЬНО обновить все символы (Runtime Fast Catchup)
+        # Конвейер грузит свечи сам, кроме 4h: режимы считаются batch до анализа символов
         updated_by_tf = {}
-        if symbols_to_update:
-            updated_by_tf = await self._parallel_update_candles(symbols_to_update, updated_timeframes)
-        
-        # 2.5. ЗАПУСК ACTION PRICE после сохранения 15m свечей
-        if self.action_price_enabled and ('15m' in updated_timeframes or '1h' in updated_timeframes):
-            # Определить символы с успешно обновленными 15m свечами
-            symbols_for_ap = []
-            if '15m' in updated_by_tf:
-                symbols_for_ap.extend(updated_by_tf['15m'])
-            if '1h' in updated_by_tf and '15m' not in updated_by_tf:
-                # Если 1h закрылась но 15m не обновлялась, использовать 1h символы
-                symbols_for_ap.extend(updated_by_tf['1h'])
-            
-            # Убрать дубликаты
-            symbols_for_ap = list(set(symbols_for_ap))
-            
-            if symbols_for_ap:
-                tf_4h_close = TimeframeSync.should_update_timeframe('4h', consumer_id='action_price')
-                force_zone_recalc = (now.hour == 0 and now.minute == 0) or tf_4h_close
-                await self._check_action_price_signals(now, symbols_for_ap, force_zone_recalc)
+        update_timeframes = ['4h'] if pipeline_enabled and '4h' in updated_timeframes else updated_timeframes
+        if symbols_to_update and (not pipeline_enabled or update_timeframes != updated_timeframes):
+            with perf_metrics.span('cycle', 'candles_update'):
+                updated_by_tf = await self._parallel_update_candles(symbols_to_update, update_timeframes)
+        
+        # 2.6.5. Закрылась 4h свеча - режимы всех символов одним batch (дальше - кеш RegimeService)
+        if '4h' in updated_timeframes and not self.analysis_pool:
+            await self._refresh_regimes(symbols_to_check)
+        
+        # КОНВЕЙЕР: каждый символ проходит fetch → analyze → dispatch независимо (опционально)
+        if pipeline_enabled:
+            with perf_metrics.span('cycle', 'pipeline'):
+                await self._run_signal_pipeline(now, updated_timeframes, symbols_to_check, updated_by_tf)
+            return
         
-        # 2.6. ЗАПУСК V3 S/R STRATEGY после обновления свечей
-        if self.v3_enabled and ('15m' in updated_timeframes or '1h' in updated_timeframes):
-            symbols_for_v3 = []
-            if '15m' in updated_by_tf:
-                symbols_for_v3.extend(updated_by_tf['15m'])
-            if '1h' in updated_by_tf and '15m' not in updated_by_tf:
-                symbols_for_v3.extend(updated_by_tf['1h'])
-            
-            symbols_for_v3 = list(set(symbols_for_v3))
-            
-            if symbols_for_v3:
-                await self._check_v3_sr_signals(now, symbols_for_v3)
+        # 2.5-2.6. Action Price и V3 S/R по символам с обновленными свечами
+        await self._run_candle_close_engines(now, updated_timeframes, updated_by_tf)
         
-        btc_data = self.data_loader.get_candles('BTCUSDT', '1h', limit=100)
+        btc_data = await self.data_loader.get_candles_async('BTCUSDT', '1h', limit=100)
         
         # 2.7. ПАРАЛЛЕЛЬНО загрузить orderbook для всех символов (ОПТИМИЗАЦИЯ)
         # Вместо последовательных запросов внутри каждого символа - один batch запрос
         orderbook_cache = {}
         if symbols_to_check:
-            orderbook_cache = await self._fetch_all_orderbooks_parallel(symbols_to_check)
+            with perf_metrics.span('cycle', 'orderbooks'):
+                orderbook_cache = await self._fetch_all_orderbooks_parallel(symbols_to_check)
         
         # 2.8. ПАРАЛЛЕЛЬНО загрузить Open Interest для всех символов (ОПТИМИЗАЦИЯ)
         # Было: 211 символов × 30 секунд = 105 минут последовательно
         # Стало: все 211 символов паралельно за 5-15 секунд!
         oi_cache = {}
         if symbols_to_check:
-            oi_cache = await self._fetch_all_open_interest_parallel(symbols_to_check)
+            with perf_metrics.span('cycle', 'open_interest'):
+                oi_cache = await self._fetch_all_open_interest_parallel(symbols_to_check)
         
         # 3. Проверить стратегии для каждого символа (ПАРАЛЛЕЛЬНО)
         # Каждая стратегия проверяет блокировку независимо
@@ -879,6 +943,7 @@ class TradingBot:
             
             logger.info(f"🔄 Starting parallel strategy checks: {len(symbols_to_check)} symbols in {total_batches} batches (batch_size={batch_size})")
             
+            strategies_started = time.perf_counter()
             for batch_idx in range(0, len(symbols_to_check), batch_size):
                 batch = symbols_to_check[batch_idx:batch_idx + batch_size]
                 batch_num = (batch_idx // batch_size) + 1
@@ -893,8 +958,173 @@ class TradingBot:
                 
                 logger.debug(f"  ✅ Batch {batch_num}/{total_batches} completed ({len(batch)} symbols)")
             
+            perf_metrics.record('cycle', 'strategies', time.perf_counter() - strategies_started)
             logger.info(f"✅ All strategy checks completed for {len(symbols_to_check)} symbols")
     
+    async def _refresh_regimes(self, symbols: list):
+        """Пересчитать режим рынка всех символов после закрытия 4h свечи
+        
+        Свечи 4h грузятся с тем же лимитом, что и в _analyze_symbol, поэтому
+        анализ символа дальше берет режим из кеша RegimeService.
+        """
+        started = time.perf_counter()
+        with perf_metrics.span('cycle', 'regimes'):
+            loaded = await asyncio.gather(*[
+                self.data_loader.get_candles_async(symbol, '4h', limit=self.ANALYSIS_TF_LIMITS['4h'])
+                for symbol in symbols
+            ], return_exceptions=True)
+            frames = {
+                symbol: df for symbol, df in zip(symbols, loaded)
+                if not isinstance(df, Exception) and df is not None and len(df) > 0
+            }
+            self.regime_service.refresh(frames)
+        
+        counts = self.regime_service.snapshot()['counts']
+        logger.info(
+            f"🧭 Regimes refreshed for {len(frames)} symbols in {time.perf_counter() - started:.2f}s | "
+            + ", ".join(f"{regime}: {count}" for regime, count in counts.items() if count)
+        )
+    
+    async def _run_candle_close_engines(self, now: datetime, updated_timeframes: list, updated_by_tf: Dict):
+        """Запустить Action Price и V3 S/R по символам с успешно обновленными свечами
+        
+        Args:
+            now: Время цикла
+            updated_timeframes: Список обновившихся таймфреймов
+            updated_by_tf: {timeframe: [успешно обновленные символы]}
+        """
+        # 2.5. ЗАПУСК ACTION PRICE после сохранения 15m свечей
+        if self.action_price_enabled and ('15m' in updated_timeframes or '1h' in updated_timeframes):
+            # Определить символы с успешно обновленными 15m свечами
+            symbols_for_ap = []
+            if '15m' in updated_by_tf:
+                symbols_for_ap.extend(updated_by_tf['15m'])
+            if '1h' in updated_by_tf and '15m' not in updated_by_tf:
+                # Если 1h закрылась но 15m не обновлялась, использовать 1h символы
+                symbols_for_ap.extend(updated_by_tf['1h'])
+            
+            # Убрать дубликаты
+            symbols_for_ap = list(set(symbols_for_ap))
+            
+            if symbols_for_ap:
+                tf_4h_close = TimeframeSync.should_update_timeframe('4h', consumer_id='action_price')
+                force_zone_recalc = (now.hour == 0 and now.minute == 0) or tf_4h_close
+                with perf_metrics.span('cycle', 'action_price'):
+                    await self._check_action_price_signals(now, symbols_for_ap, force_zone_recalc)
+        
+        # 2.6. ЗАПУСК V3 S/R STRATEGY после обновления свечей
+        if self.v3_enabled and ('15m' in updated_timeframes or '1h' in updated_timeframes):
+            symbols_for_v3 = []
+            if '15m' in updated_by_tf:
+                symbols_for_v3.extend(updated_by_tf['15m'])
+            if '1h' in updated_by_tf and '15m' not in updated_by_tf:
+                symbols_for_v3.extend(updated_by_tf['1h'])
+            
+            symbols_for_v3 = list(set(symbols_for_v3))
+            
+            if symbols_for_v3:
+                with perf_metrics.span('cycle', 'v3_sr'):
+                    await self._check_v3_sr_signals(now, symbols_for_v3)
+    
+    async def _run_signal_pipeline(self, now: datetime, updated_timeframes: list, symbols: list,
+                                   prefetched: Optional[Dict[str, list]] = None):
+        """Конвейерный цикл сигналов: fetch → analyze → dispatch для каждого символа
+        
+        Символ идет в анализ сразу после загрузки СВОИХ свечей/orderbook/OI, а сигнал
+        уходит сразу после анализа - не дожидаясь самого медленного символа фазы.
+        Action Price и V3 запускаются после загрузки свечей всех символов,
+        параллельно с анализом стратегий.
+        
+        Args:
+            now: Время цикла
+            updated_timeframes: Список обновившихся таймфреймов
+            symbols: Символы для проверки
+            prefetched: {timeframe: [символы]} - таймфреймы, уже обновленные до конвейера
+                (4h для batch режимов), fetch их не грузит повторно
+        """
+        btc_data = await self.data_loader.get_candles_async('BTCUSDT', '1h', limit=100)
+        prefetched = prefetched or {}
+        updated_by_tf = {tf: list(prefetched.get(tf, [])) for tf in updated_timeframes}
+        fetch_timeframes = [tf for tf in updated_timeframes if tf not in prefetched]
+        fetch_workers = config.get('signal_pipeline.fetch_workers', 50)
+        analyze_workers = config.get('signal_pipeline.analyze_workers', 4)
+        
+        async def fetch(symbol: str):
+            """I/O: свечи обновившихся таймфреймов + orderbook + OI символа"""
+            started = time.perf_counter()
+            
+            async def update_tf(tf: str):
+                try:
+                    await self.data_loader.update_missing_candles(symbol, tf)
+                    updated_by_tf[tf].append(symbol)
+                except Exception as e:
+                    logger.debug(f"Could not update {symbol} {tf}: {e}")
+            
+            _, orderbook, oi = await asyncio.gather(
+                asyncio.gather(*(update_tf(tf) for tf in fetch_timeframes)),
+                self._fetch_orderbook(symbol),
+                self._fetch_open_interest(symbol)
+            )
+            perf_metrics.record('symbol_stage', 'fetch', time.perf_counter() - started)
+            return (symbol, orderbook, oi)
+        
+        async def analyze(item):
+            """CPU: индикаторы + стратегии (символы без сигналов дальше не идут)"""
+            symbol, orderbook, oi = item
+            try:
+                with perf_metrics.span('symbol', symbol):
+                    analysis = await self._analyze_symbol(
+                        symbol, btc_data, updated_timeframes, {symbol: orderbook}, {symbol: oi}
+                    )
+            except Exception as e:
+                logger.error(f"Error checking {symbol}: {e}")
+                return None
+            if not analysis or not analysis['signals']:
+                return None
+            return (symbol, analysis)
+        
+        async def dispatch(item):
+            """Скоринг, блокировки, Telegram и БД (один worker - порядок блокировок детерминирован)"""
+            symbol, analysis = item
+            try:
+                await self._dispatch_symbol_signals(symbol, analysis, btc_data)
+            except Exception as e:
+                logger.error(f"Error dispatching signals for {symbol}: {e}")
+        
+        pipeline = SignalPipeline(
+            [
+                PipelineStage('fetch', fetch, workers=fetch_workers),
+                PipelineStage('analyze', analyze, workers=analyze_workers),
+                PipelineStage('dispatch', dispatch, workers=1),
+            ],
+            queue_size=config.get('signal_pipeline.queue_size', 50)
+        )
+        
+        logger.info(
+            f"🔄 Starting pipelined signal cycle: {len(symbols)} symbols "
+            f"(fetch×{fetch_workers} → analyze×{analyze_workers} → dispatch)"
+        )
+        pipeline_task = asyncio.create_task(pipeline.run(symbols))
+        try:
+            # Action Price / V3 ждут свечи всех символов, стратегии тем временем продолжают работу
+            await pipeline.wait_stage('fetch')
+            success_count = sum(len(updated) for updated in updated_by_tf.values())
+            logger.info(
+                f"⚡ Pipeline fetch complete: {success_count}/{len(symbols) * len(updated_timeframes)} candle updates"
+            )
+            await self._run_candle_close_engines(now, updated_timeframes, updated_by_tf)
+            
+            stats = await pipeline_task
+        finally:
+            # Ошибка Action Price / V3 или отмена цикла (shutdown) - конвейер не продолжает
+            # отправлять сигналы в фоне
+            if not pipeline_task.done():
+                pipeline_task.cancel()
+                await asyncio.gather(pipeline_task, return_exceptions=True)
+        if stats['first_output_s'] is not None:
+            perf_metrics.record('cycle', 'first_dispatch', stats['first_output_s'])
+        logger.info(f"✅ Pipelined signal cycle completed: {pipeline.format_stats()}")
+    
     async def _check_symbol_signals_safe(self, symbol: str, btc_data, updated_timeframes: list, 
                                          orderbook_cache: Dict, oi_cache: Dict):
         """Обёртка для безопасной параллельной проверки сигналов (с обработкой ошибок)
@@ -907,7 +1137,8 @@ class TradingBot:
             oi_cache: Кеш с предзагруженными Open Interest данными
         """
         try:
-            await self._check_symbol_signals(symbol, btc_data, updated_timeframes, orderbook_cache, oi_cache)
+            with perf_metrics.span('symbol', symbol):
+                await self._check_symbol_signals(symbol, btc_data, updated_timeframes, orderbook_cache, oi_cache)
         except Exception as e:
             logger.error(f"Error checking {symbol}: {e}")
     
@@ -924,153 +1155,127 @@ class TradingBot:
         
         Note: Свечи уже обновлены параллельно в _check_signals через Runtime Fast Catchup
         """
+        analysis = await self._analyze_symbol(symbol, btc_data, updated_timeframes, orderbook_cache, oi_cache)
+        if analysis:
+            await self._dispatch_symbol_signals(symbol, analysis, btc_data)
+    
+    async def _analyze_symbol(self, symbol: str, btc_data, updated_timeframes: list,
+                              orderbook_cache: Dict, oi_cache: Dict) -> Optional[Dict]:
+        """Загрузить свечи символа, рассчитать индикаторы и получить сигналы стратегий
+        
+        Returns:
+            {'regime', 'signals', 'indicators', 'timeframe_data'} или None если анализ невозможен
+        """
         if not self.data_loader:
-            return
+            return None
         
-        # Загрузить данные ТОЛЬКО для обновившихся таймфреймов
-        # Лимиты рассчитаны на основе максимальных требований стратегий:
-        # - 15m: RSI/Stoch MR требует 90 дней × 24 × 4 = 8,640 баров
-        # - 1h: Donchian требует ~87 дней × 24 = 2,100 баров
-        # - 4h: 60 дней × 6 = 360 баров
-        tf_limits = {
-            '15m': 8640,  # 90 дней для RSI/Stoch MR
-            '1h': 2100,   # ~87 дней для Donchian
-            '4h': 360     # 60 дней
-        }
+        # Загрузить данные ТОЛЬКО для обновившихся таймфреймов (лимиты - ANALYSIS_TF_LIMITS)
+        tf_limits = self.ANALYSIS_TF_LIMITS
         
         timeframe_data = {}
-        for tf in updated_timeframes:  # ОПТИМИЗАЦИЯ: загружаем только обновившиеся таймфреймы
-            limit = tf_limits.get(tf, 200)
-            df = self.data_loader.get_candles(symbol, tf, limit=limit)
-            if df is not None and len(df) > 0:
-                timeframe_data[tf] = df
-        
-        # ВСЕГДА загружаем 4h для определения режима рынка (даже если свеча не закрылась)
-        if '4h' not in timeframe_data:
-            df_4h = self.data_loader.get_candles(symbol, '4h', limit=tf_limits['4h'])
-            if df_4h is not None and len(df_4h) > 0:
-                timeframe_data['4h'] = df_4h
+        with perf_metrics.span('symbol_stage', 'candle_load'):
+            for tf in updated_timeframes:  # ОПТИМИЗАЦИЯ: загружаем только обновившиеся таймфреймы
+                limit = tf_limits.get(tf, 200)
+                df = await self.data_loader.get_candles_async(symbol, tf, limit=limit)
+                if df is not None and len(df) > 0:
+                    timeframe_data[tf] = df
+            
+            # ВСЕГДА загружаем 4h для определения режима рынка (даже если свеча не закрылась)
+            if '4h' not in timeframe_data:
+                df_4h = await self.data_loader.get_candles_async(symbol, '4h', limit=tf_limits['4h'])
+                if df_4h is not None and len(df_4h) > 0:
+                    timeframe_data['4h'] = df_4h
         
         if not timeframe_data:
             logger.debug(f"❌ {symbol}: No timeframe data available")
-            return
+            return None
         
-        # Определить режим рынка и bias
-        h4_data = timeframe_data.get('4h')
-        if h4_data is None or len(h4_data) < 200:
-            logger.debug(f"❌ {symbol}: Insufficient H4 data ({len(h4_data) if h4_data is not None else 0} bars, требуется 200)")
-            return
-        
-        regime_data = self.regime_detector.detect_regime(h4_data)
-        regime = regime_data['regime'].value  # Convert ENUM to string
-        bias = self.regime_detector.get_h4_bias(h4_data)
-        
-        logger.debug(f"🔍 Analyzing {symbol} | Regime: {regime} | Bias: {bias}")
-        strategy_logger.info(f"\n{'='*80}")
-        strategy_logger.info(f"🔍 АНАЛИЗ: {symbol} | Режим: {regime} | Bias: {bias}")
-        
-        # Рассчитать H4 swings для confluence проверки
-        # Используем fractal patterns (локальные экстремумы) вместо простого max/min
-        # lookback=5 означает 5 баров с каждой стороны для подтверждения swing
-        h4_swing_high, h4_swing_low = calculate_swing_levels(h4_data, lookback=5) if h4_data is not None and len(h4_data) >= 20 else (None, None)
-        
-        # Рассчитать общие индикаторы (с кешированием)
-        # Проверяем кеш для каждого таймфрейма
-        cached_indicators = {}
-        for tf, df in timeframe_data.items():
-            last_bar_time = df.index[-1]
-            cached = self.indicator_cache.get(symbol, tf, last_bar_time)
-            
-            if cached is None:
-                # Кеша нет или устарел - рассчитываем заново
-                common_indicators = calculate_common_indicators(df, tf)
-                self.indicator_cache.set(symbol, tf, last_bar_time, common_indicators)
-                cached_indicators[tf] = common_indicators
-            else:
-                # Используем закешированные индикаторы
-                cached_indicators[tf] = cached
-        
-        # ОПТИМИЗАЦИЯ: Использовать предзагруженный OI кеш вместо индивидуальных API запитів
+        # ОПТИМИЗАЦИЯ: OI и orderbook предзагружены параллельно в начале цикла
         # Було: кожен символ робить свій запит (211 символів × 30 сек = 105 хвилин!)
         # Стало: все завантажено паралельно на початку циклу за 5-15 секунд
-        oi_metrics = oi_cache.get(symbol, {
-            'oi_delta': 0.0,
-            'doi_pct': 0.0,
-            'current_oi': 0.0,
-            'data_valid': False
-        })
-        
-        # ОПТИМИЗАЦИЯ: Получить orderbook из кеша (уже загружен параллельно)
-        # Вместо медленного API запроса для каждого символа - используем предзагруженные данные
-        depth_metrics = orderbook_cache.get(symbol, {
-            'depth_imbalance': 0.0,
-            'bid_volume': 0.0,
-            'ask_volume': 0.0,
-            'spread_pct': 0.0,
-            'data_valid': False  # Fallback если символа нет в кеше
-        })
-        
-        # Indicators для стратегий (объединяем кешированные + дополнительные)
-        # NOTE: CVD теперь берется из indicators[self.timeframe]['cvd'] в каждой стратегии
-        indicators = {
-            **cached_indicators,  # Все закешированные индикаторы по таймфреймам (включая CVD)
-            # Nested timeframe data with both DataFrames and indicators (for CVD Divergence)
-            # This allows both old style (indicators['1h'] = DataFrame) and new style (indicators['15m_data']['df'])
-            '15m_data': {
-                'df': timeframe_data.get('15m'),
-                **cached_indicators.get('15m', {})
-            },
-            '1h_data': {
-                'df': timeframe_data.get('1h'),
-                **cached_indicators.get('1h', {})
-            },
-            '4h_data': {
-                'df': timeframe_data.get('4h'),
-                **cached_indicators.get('4h', {})
-            },
-            # Keep backward compatibility for Break&Retest (expects direct DataFrames)
-            '1h': timeframe_data.get('1h'),  # DataFrame 1H для HTF проверки
-            '4h': timeframe_data.get('4h'),  # DataFrame 4H для HTF проверки
-            'doi_pct': oi_metrics['doi_pct'],  # Реальные данные Open Interest Delta %
-            'oi_delta': oi_metrics['oi_delta'],  # Абсолютное изменение OI
-            'oi_data_valid': oi_metrics.get('data_valid', False),  # Флаг валидности OI данных
-            'depth_imbalance': depth_metrics['depth_imbalance'],  # Реальный дисбаланс orderbook
-            'bid_volume': depth_metrics['bid_volume'],  # Bid ликвидность
-            'ask_volume': depth_metrics['ask_volume'],  # Ask ликвидность
-            'spread_pct': depth_metrics['spread_pct'],  # Спред в %
-            'depth_data_valid': depth_metrics.get('data_valid', False),  # Флаг валидности depth данных
-            'late_trend': regime_data.get('late_trend', False),
-            'h4_adx': regime_data.get('details', {}).get('adx', 0),  # H4 ADX для ORB стратегии
-            'funding_extreme': False,  # TODO: Рассчитать из API Funding Rate
+        market_context = {
+            'oi_metrics': oi_cache.get(symbol),
+            'depth_metrics': orderbook_cache.get(symbol),
             'btc_bias': self.btc_filter.get_btc_bias(btc_data) if btc_data is not None else 'Neutral',
-            'h4_swing_high': h4_swing_high,
-            'h4_swing_low': h4_swing_low
+            # Валидация индикаторов (только для первого символа или периодически)
+            'validate': symbol == self.ready_symbols[0] if self.ready_symbols else True,
+            # Префильтр стратегий: закрывшиеся свечи и MR блокировка по BTC
+            'updated_timeframes': list(updated_timeframes),
+            'btc_block_mr': False,
         }
         
-        # Валидация индикаторов (только для первого символа или периодически)
-        if symbol == self.ready_symbols[0] if self.ready_symbols else True:
-            validation = IndicatorValidator.validate_indicators(indicators, symbol=symbol)
-            IndicatorValidator.log_validation_results(validation, symbol=symbol)
-        
         # Проверка MR блокировки по BTC
-        btc_block_mr = False
         if btc_data is not None:
-            btc_block_mr = self.btc_filter.should_block_mean_reversion(btc_data)
-            if btc_block_mr:
+            market_context['btc_block_mr'] = self.btc_filter.should_block_mean_reversion(btc_data)
+            if market_context['btc_block_mr']:
                 logger.debug(f"{symbol}: MR strategies blocked due to BTC volatility")
                 strategy_logger.warning(f"⚠️  BTC импульс обнаружен - Mean Reversion стратегии ЗАБЛОКИРОВАНЫ")
         
-        # Получить сигналы от всех стратегий
-        strategy_logger.info(f"📋 Проверка {len(self.strategy_manager.strategies)} стратегий...")
+        # Стратегии в worker процессе shard'а (если пул включен), иначе inline
+        result = None
+        if self.analysis_pool:
+            result = await self.analysis_pool.analyze(
+                symbol,
+                timeframe_data,
+                market_context,
+                blocked_strategies=self.symbols_blocked_main,
+                enabled_names=self.strategy_manager.get_enabled_names()
+            )
         
-        signals = await self.strategy_manager.check_all_signals(
-            symbol=symbol,
-            timeframe_data=timeframe_data,
-            blocked_symbols_by_strategy=self.symbols_blocked_main,  # Передать блокировки по стратегиям
-            regime=regime,
-            bias=bias,
-            indicators=indicators
-        )
+        if result is not None:
+            perf_metrics.merge(result['perf_samples'])
+            self.strategy_manager.merge_prefilter_skips(result.get('prefilter_skips'))
+            for stage in ('regime', 'indicators', 'strategies'):
+                if stage in result['timings']:
+                    perf_metrics.record('symbol_stage', stage, result['timings'][stage])
+            if result['error'] or result['skipped']:
+                return None
+            
+            regime = result['regime']
+            signals = result['signals']
+            if result['regime_data'] is not None:
+                self.regime_service.remember(symbol, timeframe_data['4h'], result['regime_data'], result['bias'])
+            # Счетчики и mark price - в основном процессе (worker без сети)
+            strategies_by_name = {s.name: s for s in self.strategy_manager.strategies}
+            for signal in signals:
+                strategy = strategies_by_name.get(signal.strategy_name)
+                if strategy:
+                    strategy.increment_signal_count()
+                await self.strategy_manager.apply_mark_price(symbol, signal)
+            
+            # Скорингу нужны только скалярные индикаторы + DataFrame'ы (уже есть здесь)
+            indicators = attach_scoring_frames(result['scoring_indicators'] or {}, timeframe_data)
+        else:
+            timings = {}
+            analysis = prepare_symbol_analysis(
+                symbol,
+                timeframe_data,
+                self.regime_service,
+                self.indicator_cache,
+                market_context,
+                timings=timings
+            )
+            for stage, seconds in timings.items():
+                perf_metrics.record('symbol_stage', stage, seconds)
+            if analysis is None:
+                return None
+            
+            regime = analysis['regime']
+            indicators = analysis['indicators']
+            
+            # Получить сигналы от всех стратегий
+            strategy_logger.info(f"📋 Проверка {len(self.strategy_manager.strategies)} стратегий...")
+            
+            with perf_metrics.span('symbol_stage', 'strategies'):
+                signals = await self.strategy_manager.check_all_signals(
+                    symbol=symbol,
+                    timeframe_data=timeframe_data,
+                    blocked_symbols_by_strategy=self.symbols_blocked_main,  # Передать блокировки по стратегиям
+                    regime=regime,
+                    bias=analysis['bias'],
+                    indicators=indicators,
+                    market_context=market_context
+                )
         
         if signals:
             logger.debug(f"📊 {symbol}: {len(signals)} signals from strategies: {[s.strategy_name for s in signals]}")
@@ -1079,17 +1284,35 @@ class TradingBot:
             logger.debug(f"⚪ {symbol}: No signals from any strategy")
             strategy_logger.info(f"⚪ Ни одна стратегия не дала сигнал")
         
+        return {
+            'regime': regime,
+            'signals': signals,
+            'indicators': indicators,
+            'timeframe_data': timeframe_data,
+        }
+    
+    async def _dispatch_symbol_signals(self, symbol: str, analysis: Dict, btc_data):
+        """Скоринг, приоритизация, блокировки и отправка сигналов символа (результат _analyze_symbol)"""
+        regime = analysis['regime']
+        signals = analysis['signals']
+        indicators = analysis['indicators']
+        timeframe_data = analysis['timeframe_data']
+        
+        # Сводка режимов по всем символам (контекст для скоринга)
+        indicators['regime_snapshot'] = self.regime_service.snapshot()
+        
         # ШАГ 1: Рассчитать final_score для ВСЕХ сигналов
         scored_signals = []
         for signal in signals:
             strategy_logger.info(f"\n📊 СКОРИНГ: {signal.strategy_name} | {signal.direction}")
             
-            final_score = self.signal_scorer.score_signal(
-                signal=signal,
-                market_data={'df': timeframe_data.get(signal.timeframe)},
-                indicators=indicators,
-                btc_data=btc_data
-            )
+            with perf_metrics.span('symbol_stage', 'scoring'):
+                final_score = self.signal_scorer.score_signal(
+                    signal=signal,
+                    market_data={'df': timeframe_data.get(signal.timeframe)},
+                    indicators=indicators,
+                    btc_data=btc_data
+                )
             
             # Детальная информация о скоринге
             score_breakdown = (
@@ -1159,7 +1382,7 @@ class TradingBot:
                 })
                 
                 # Сохранить сигнал в БД - ТОЛЬКО если успешно, блокируем символ
-                save_success = self._save_signal_to_db(
+                save_success = await self._save_signal_to_db(
                     signal=signal,
                     final_score=final_score,
                     regime=regime,
@@ -1211,74 +1434,75 @@ class TradingBot:
         )
         
         signals_found = 0
-        symbols_analyzed = 0
         symbols_blocked = 0
         
+        # Пропускаем символы с активными сигналами ACTION PRICE
+        symbols_to_analyze = []
         for symbol in symbols_to_check:
-            # Пропускаем символы с активными сигналами ACTION PRICE
             if symbol in self.symbols_blocked_action_price:
                 symbols_blocked += 1
                 get_action_price_logger().debug(f"{symbol} - Blocked (active AP signal)")
                 continue
-            
-            symbols_analyzed += 1
-            
+            symbols_to_analyze.append(symbol)
+        symbols_analyzed = len(symbols_to_analyze)
+        
+        engine_tf = self.action_price_engine.timeframe
+        limits = {'15m': 500, '1h': 500, '4h': 500, '1d': 200}
+        
+        async def load(symbol: str):
+            """Свечи таймфрейма engine; 15m/1h нужны только как проверка наличия данных"""
             try:
-                # Загрузить данные для всех необходимых таймфреймов
-                timeframe_data = {}
-                for tf in ['15m', '1h', '4h', '1d']:
-                    limits = {'15m': 500, '1h': 500, '4h': 500, '1d': 200}
-                    df = self.data_loader.get_candles(symbol, tf, limit=limits.get(tf, 200))
-                    if df is not None and len(df) > 0:
-                        # DataLoader уже фильтрует незакрытые свечи (close_time > now)
-                        # Поэтому все свечи в df - ЗАКРЫТЫЕ, дополнительная фильтрация НЕ нужна
-                        timeframe_data[tf] = df
+                # DataLoader уже фильтрует незакрытые свечи (close_time > now)
+                # Поэтому все свечи в df - ЗАКРЫТЫЕ, дополнительная фильтрация НЕ нужна
+                df = await self.data_loader.get_candles_async(symbol, engine_tf, limit=limits.get(engine_tf, 200))
+                missing = []
+                for tf in ('15m', '1h'):
+                    if tf == engine_tf:
+                        tf_df = df
+                    else:
+                        tf_df = await self.data_loader.get_candles_async(symbol, tf, limit=1)
+                    if tf_df is None or len(tf_df) == 0:
+                        missing.append(tf)
                 
-                # Требуем минимум 15m и 1h данные (4h и 1d опциональны)
-                if '15m' not in timeframe_data or '1h' not in timeframe_data:
-                    missing = []
-                    if '15m' not in timeframe_data:
-                        missing.append('15m')
-                    if '1h' not in timeframe_data:
-                        missing.append('1h')
+                # Требуем минимум 15m и 1h данные
+                if missing:
                     get_action_price_logger().debug(f"{symbol} - Missing required timeframes: {', '.join(missing)}")
-                    continue
-                
-                # Анализ паттернов - новый EMA200 Body Cross engine
-                # Использует 15m данные (или 1h если timeframe='1h')
-                tf_data = timeframe_data.get(self.action_price_engine.timeframe, timeframe_data.get('15m'))
-                ap_signal = await self.action_price_engine.analyze(
-                    symbol=symbol,
-                    df=tf_data,
-                    df_1h=timeframe_data.get('1h')
-                )
+                    return symbol, None
+                return symbol, df
+            except Exception as e:
+                get_action_price_logger().error(f"Error checking AP for {symbol}: {e}", exc_info=True)
+                return symbol, None
+        
+        loaded = await asyncio.gather(*(load(symbol) for symbol in symbols_to_analyze))
+        frames = {symbol: df for symbol, df in loaded if df is not None}
+        
+        # EMA200 Body Cross для всей вселенной одним батчем - скоринг/SL/TP только для сработавших
+        ap_signals = await self.action_price_engine.analyze_batch(frames)
+        
+        for symbol, ap_signal in ap_signals.items():
+            try:
+                # Сохранить в БД - ТОЛЬКО если успешно, блокируем символ
+                save_success = await self._save_action_price_signal(ap_signal)
                 
-                # Обработать сигнал (новый engine возвращает один Dict или None)
-                if ap_signal:
-                    # Сохранить в БД - ТОЛЬКО если успешно, блокируем символ
-                    save_success = self._save_action_price_signal(ap_signal)
+                if save_success:
+                    signals_found += 1
                     
-                    if save_success:
-                        signals_found += 1
-                        
-                        # Заблокировать символ ТОЛЬКО после успешного сохранения (для ACTION PRICE)
-                        self._block_symbol_action_price(symbol)
-                        
-                        # Отправить в Telegram
-                        await self._send_action_price_telegram(ap_signal)
-                        
-                        get_action_price_logger().info(
-                            f"🎯 AP Signal: {ap_signal['symbol']} {ap_signal['direction']} "
-                            f"{ap_signal['pattern_type']} @ {ap_signal.get('entry_price', 0):.4f} "
-                            f"(Score: {ap_signal.get('confidence_score', 0):.1f})"
-                        )
-                    else:
-                        get_action_price_logger().warning(f"⚠️ Skipping {symbol} - failed to save signal to DB")
+                    # Заблокировать символ ТОЛЬКО после успешного сохранения (для ACTION PRICE)
+                    self._block_symbol_action_price(symbol)
+                    
+                    # Отправить в Telegram
+                    await self._send_action_price_telegram(ap_signal)
+                    
+                    get_action_price_logger().info(
+                        f"🎯 AP Signal: {ap_signal['symbol']} {ap_signal['direction']} "
+                        f"{ap_signal['pattern_type']} @ {ap_signal.get('entry_price', 0):.4f} "
+                        f"(Score: {ap_signal.get('confidence_score', 0):.1f})"
+                    )
+                else:
+                    get_action_price_logger().warning(f"⚠️ Skipping {symbol} - failed to save signal to DB")
             
             except Exception as e:
                 get_action_price_logger().error(f"Error checking AP for {symbol}: {e}", exc_info=True)
-            
-            await asyncio.sleep(0.05)
         
         # Всегда логировать итоги анализа
         get_action_price_logger().info(
@@ -1289,6 +1513,32 @@ class TradingBot:
             f"  ✅ Signals found: {signals_found}"
         )
     
+    async def _import_candle_snapshot_if_empty(self):
+        """Импорт снимка свечей (candle_snapshot.import_path) при пустой БД - catchup докачает только хвост
+        
+        Проверка БД, вставка по символам и аудит целостности идут в потоке -
+        event loop не стоит все время импорта.
+        """
+        snapshot_path = config.get('candle_snapshot.import_path')
+        if not snapshot_path or not self.data_loader:
+            return
+        
+        def has_candles() -> bool:
+            session = db.get_session()
+            try:
+                return session.query(Candle.id).first() is not None
+            finally:
+                session.close()
+        
+        if await asyncio.to_thread(has_candles):
+            logger.info("📦 Candle snapshot import skipped - database already has candles")
+            return
+        
+        try:
+            await asyncio.to_thread(self.data_loader.import_snapshot, snapshot_path)
+        except Exception as e:
+            logger.error(f"Failed to import candle snapshot from {snapshot_path}: {e}")
+    
     async def _fast_catchup_phase(self):
         """FAST CATCHUP: Быстрая параллельная догрузка gaps для existing symbols"""
         if not self.fast_catchup or not self.coordinator:
@@ -1351,65 +1601,92 @@ class TradingBot:
         )
     
     async def _symbol_loader_task(self):
-        """Background task to load symbol data and add to ready queue"""
+        """Background task to load symbol data and add to ready queue
+        
+        Символы загружаются параллельно: количество одновременных загрузок
+        регулирует AdaptiveConcurrency (AIMD по запасу rate limiter'а).
+        """
         if not self.coordinator or not self.data_loader:
             return
         
         logger.info("Symbol loader task started")
-        max_retries = 3
-        retry_delays = [5, 15, 30]
+        started = time.perf_counter()
         
+        pending = []
         for idx, symbol in enumerate(self.symbols, 1):
-            if self.coordinator.is_shutdown_requested():
-                logger.info("Loader task shutting down...")
-                break
-            
             # Пропускаем символы уже обработанные в fast catchup
             if symbol in self.catchup_done_symbols:
                 logger.debug(f"⚡ Skipping {symbol} - already processed in catchup")
                 continue
+            pending.append((idx, symbol))
+        
+        if config.get('adaptive_loading.enabled', True):
+            concurrency = AdaptiveConcurrency.from_config(self.client.rate_limiter, name='warm-up loader')
+        else:
+            # Старое поведение: строго по одному символу
+            concurrency = AdaptiveConcurrency(self.client.rate_limiter, initial=1, minimum=1, maximum=1,
+                                              name='warm-up loader')
+        
+        async def load(idx: int, symbol: str):
+            async with concurrency.slot():
+                if self.coordinator.is_shutdown_requested():
+                    return
+                await self._load_symbol(idx, symbol)
+        
+        await asyncio.gather(*(load(idx, symbol) for idx, symbol in pending))
+        
+        if self.coordinator.is_shutdown_requested():
+            logger.info("Loader task shutting down...")
+        
+        stats = concurrency.get_stats()
+        logger.info(
+            f"Loader task complete. Loaded {self.coordinator.get_progress().loaded_count}/{len(self.symbols)} symbols "
+            f"in {time.perf_counter() - started:.1f}s (concurrency peak {stats['peak']}, "
+            f"backoffs {stats['decreases']})"
+        )
+    
+    async def _load_symbol(self, idx: int, symbol: str):
+        """Загрузить данные одного символа (с retry) и добавить в ready queue"""
+        max_retries = 3
+        retry_delays = [5, 15, 30]
+        
+        try:
+            self.coordinator.increment_loading_count()
             
-            try:
-                self.coordinator.increment_loading_count()
-                
-                # Всегда вызываем load_warm_up_data - она умная и сама решит что делать
-                # (догрузить gap или загрузить все данные)
-                logger.info(f"[{idx}/{len(self.symbols)}] Checking {symbol}... ({(idx/len(self.symbols))*100:.1f}%)")
-                
-                success = False
-                for attempt in range(max_retries):
-                    try:
-                        success = await self.data_loader.load_warm_up_data(symbol, silent=False)
-                        if success:
-                            break
-                        
-                        if attempt < max_retries - 1:
-                            delay = retry_delays[attempt]
-                            logger.warning(f"Retry {attempt + 1}/{max_retries} for {symbol} in {delay}s...")
-                            await asyncio.sleep(delay)
-                    except Exception as retry_error:
-                        if attempt < max_retries - 1:
-                            delay = retry_delays[attempt]
-                            logger.warning(f"Retry {attempt + 1}/{max_retries} for {symbol} after error: {retry_error}")
-                            await asyncio.sleep(delay)
-                        else:
-                            raise
-                
-                if success:
-                    await self.coordinator.add_ready_symbol(symbol)
-                    logger.info(f"✓ {symbol} loaded and ready for analysis")
-                else:
-                    self.coordinator.mark_symbol_failed(symbol, f"Loading failed after {max_retries} attempts")
-                
-            except Exception as e:
-                logger.error(f"Error loading {symbol} after {max_retries} retries: {e}")
-                self.coordinator.mark_symbol_failed(symbol, str(e))
-            finally:
-                self.coordinator.decrement_loading_count()
+            # Всегда вызываем load_warm_up_data - она умная и сама решит что делать
+            # (догрузить gap или загрузить все данные)
+            logger.info(f"[{idx}/{len(self.symbols)}] Checking {symbol}... ({(idx/len(self.symbols))*100:.1f}%)")
             
-            await asyncio.sleep(0.1)
-        
-        logger.info(f"Loader task complete. Loaded {self.coordinator.get_progress().loaded_count}/{len(self.symbols)} symbols")
+            success = False
+            for attempt in range(max_retries):
+                try:
+                    success = await self.data_loader.load_warm_up_data(symbol, silent=False)
+                    if success:
+                        break
+                    
+                    if attempt < max_retries - 1:
+                        delay = retry_delays[attempt]
+                        logger.warning(f"Retry {attempt + 1}/{max_retries} for {symbol} in {delay}s...")
+                        await asyncio.sleep(delay)
+                except Exception as retry_error:
+                    if attempt < max_retries - 1:
+                        delay = retry_delays[attempt]
+                        logger.warning(f"Retry {attempt + 1}/{max_retries} for {symbol} after error: {retry_error}")
+                        await asyncio.sleep(delay)
+                    else:
+                        raise
+            
+            if success:
+                await self.coordinator.add_ready_symbol(symbol)
+                logger.info(f"✓ {symbol} loaded and ready for analysis")
+            else:
+                self.coordinator.mark_symbol_failed(symbol, f"Loading failed after {max_retries} attempts")
+            
+        except Exception as e:
+            logger.error(f"Error loading {symbol} after {max_retries} retries: {e}")
+            self.coordinator.mark_symbol_failed(symbol, str(e))
+        finally:
+            self.coordinator.decrement_loading_count()
     
     async def _symbol_analyzer_task(self):
         """Background task to consume ready symbols and add them to analysis list"""
@@ -1484,6 +1761,12 @@ class TradingBot:
                     # Удаляем из обоих списков
                     self.symbols = [s for s in self.symbols if s not in removed_symbols]
                     self.ready_symbols = [s for s in self.ready_symbols if s not in removed_symbols]
+                    # Кеши индикаторов и накопленных сумм выбывших символов (иначе живут вечно)
+                    for symbol in removed_symbols:
+                        self.indicator_cache.clear_symbol(symbol)
+                        prefix_sum_cache.clear_symbol(symbol)
+                    if self.analysis_pool:
+                        await self.analysis_pool.forget(removed_symbols)
                 
                 if not added_symbols and not removed_symbols:
                     logger.info(f"✓ Symbol list unchanged ({len(self.symbols)} pairs)")
@@ -1520,6 +1803,36 @@ class TradingBot:
         
         logger.info("Periodic gap refill task stopped")
     
+    async def _retention_task(self):
+        """Background task: retention старых данных раз в сутки в тихий час (UTC)"""
+        if not config.get('retention.enabled', False):
+            logger.info("Retention disabled")
+            return
+        
+        retention = RetentionService.from_config(db, db_executor)
+        run_hour = config.get('retention.run_at_hour_utc', 4)
+        run_minute = config.get('retention.run_at_minute_utc', 7)
+        logger.info(f"🧹 Retention scheduled daily at {run_hour:02d}:{run_minute:02d} UTC")
+        
+        while self.running:
+            # Минута вне закрытий свечей (15m закрываются в :00/:15/:30/:45) - DELETE и
+            # trim_before не совпадают с записью свечей CandleWriter на закрытии
+            now = datetime.now(pytz.UTC)
+            next_run = now.replace(hour=run_hour, minute=run_minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            
+            if not self.running:
+                break
+            
+            try:
+                await retention.run()
+            except Exception as e:
+                logger.error(f"Error in retention: {e}", exc_info=True)
+        
+        logger.info("Retention task stopped")
+    
     async def _periodic_zone_reaction_check_task(self):
         """Background task to periodically check zone reactions every 30 minutes"""
         if not self.v3_enabled or self.v3_sr_strategy is None:
@@ -1551,14 +1864,14 @@ class TradingBot:
         
         logger.info("Periodic zone reaction check task stopped")
     
-    def _save_signal_to_db(self, signal, final_score: float, regime: str, telegram_msg_id: Optional[int] = None, status: str = 'ACTIVE') -> bool:
+    async def _save_signal_to_db(self, signal, final_score: float, regime: str, telegram_msg_id: Optional[int] = None, status: str = 'ACTIVE') -> bool:
         """
-        Сохранить сигнал в базу данных
+        Сохранить сигнал в базу данных (commit в потоке-писателе DB executor)
         
         Returns:
             bool: True если успешно сохранено, False если ошибка
         """
-        session = db.get_session()
+        started = time.perf_counter()
         try:
             # Генерировать уникальный context_hash для сигнала
             context_str = f"{signal.symbol}_{signal.strategy_name}_{signal.direction}_{signal.entry_price}_{regime}"
@@ -1597,25 +1910,23 @@ class TradingBot:
                 }
             )
             
-            session.add(db_signal)
-            session.commit()
-            logger.info(f"💾 Signal saved to DB: {signal.symbol} {signal.direction} (ID: {db_signal.id}, Strategy ID: {strategy_id})")
+            signal_id = await signal_repository.save(db_signal)
+            logger.info(f"💾 Signal saved to DB: {signal.symbol} {signal.direction} (ID: {signal_id}, Strategy ID: {strategy_id})")
             return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to save signal to DB: {e}", exc_info=True)
             return False
         finally:
-            session.close()
+            perf_metrics.record('db_write', 'signal', time.perf_counter() - started)
     
-    def _save_action_price_signal(self, ap_signal: Dict) -> bool:
+    async def _save_action_price_signal(self, ap_signal: Dict) -> bool:
         """
-        Сохранить Action Price сигнал в БД
+        Сохранить Action Price сигнал в БД (commit в потоке-писателе DB executor)
         
         Returns:
             bool: True если успешно сохранено, False если ошибка
         """
-        session = db.get_session()
+        started = time.perf_counter()
         try:
             # Получить meta_data
             meta_data = ap_signal.get('meta_data', {})
@@ -1668,17 +1979,15 @@ class TradingBot:
                 created_at=datetime.now(pytz.UTC)
             )
             
-            session.add(signal)
-            session.commit()
+            await signal_repository.save(signal)
             get_action_price_logger().info(f"💾 Saved AP signal to DB: {ap_signal['symbol']} {ap_signal['direction']}")
             return True
             
         except Exception as e:
-            session.rollback()
             get_action_price_logger().error(f"Failed to save AP signal to DB: {e}", exc_info=True)
             return False
         finally:
-            session.close()
+            perf_metrics.record('db_write', 'action_price_signal', time.perf_counter() - started)
     
     async def _send_action_price_telegram(self, ap_signal: Dict):
         """Отправить Action Price сигнал в Telegram"""
@@ -1826,28 +2135,22 @@ class TradingBot:
         except Exception as e:
             get_action_price_logger().error(f"Failed to send AP signal to Telegram: {e}", exc_info=True)
     
-    def _load_active_signals_on_startup(self):
+    async def _load_active_signals_on_startup(self):
         """Загрузить активные сигналы из БД при старте и заблокировать символы"""
-        session = db.get_session()
         try:
-            # Получить все активные и pending сигналы из основной таблицы
-            active_signals = session.query(Signal).filter(
-                Signal.status.in_(['ACTIVE', 'PENDING'])
-            ).all()
-            
-            # Получить активные Action Price сигналы
-            active_ap_signals = session.query(ActionPriceSignal).filter(
-                ActionPriceSignal.status.in_(['ACTIVE', 'PENDING'])
-            ).all()
+            # Активные и pending сигналы основной таблицы и Action Price (поток-читатель)
+            blocks = await signal_repository.get_active_blocks()
+            active_signals = blocks['main']
+            active_ap_signals = blocks['action_price']
             
             total_active = len(active_signals) + len(active_ap_signals)
             
             if active_signals or active_ap_signals:
                 # Добавить символы в РАЗДЕЛЬНЫЕ блокировки (по стратегиям для Main)
-                for signal in active_signals:
-                    self._block_symbol_main(str(signal.symbol), signal.strategy_name)
-                for ap_signal in active_ap_signals:
-                    self.symbols_blocked_action_price.add(str(ap_signal.symbol))
+                for symbol, strategy_name in active_signals:
+                    self._block_symbol_main(symbol, strategy_name)
+                for symbol in active_ap_signals:
+                    self.symbols_blocked_action_price.add(symbol)
                 
                 # Подсчитать общее количество заблокированных символов для main
                 total_main_blocked = sum(len(symbols) for symbols in self.symbols_blocked_main.values())
@@ -1872,8 +2175,6 @@ class TradingBot:
                 
         except Exception as e:
             logger.error(f"Error loading active signals on startup: {e}", exc_info=True)
-        finally:
-            session.close()
     
     def _block_symbol_main(self, symbol: str, strategy_name: str):
         """Заблокировать символ для конкретной стратегии (есть активный сигнал)"""
@@ -1952,7 +2253,7 @@ class TradingBot:
                 timeframe_data = {}
                 for tf in ['15m', '1h', '4h', '1d']:
                     limits = {'15m': 500, '1h': 500, '4h': 500, '1d': 200}
-                    df = self.data_loader.get_candles(symbol, tf, limit=limits.get(tf, 200))
+                    df = await self.data_loader.get_candles_async(symbol, tf, limit=limits.get(tf, 200))
                     if df is not None and len(df) > 0:
                         timeframe_data[tf] = df
                 
@@ -2010,7 +2311,7 @@ class TradingBot:
                 # Process signal
                 if v3_signal:
                     # Save to DB
-                    save_success = self._save_v3_sr_signal(v3_signal)
+                    save_success = await self._save_v3_sr_signal(v3_signal)
                     
                     if save_success:
                         signals_found += 1
@@ -2038,9 +2339,9 @@ class TradingBot:
             f"Analyzed: {symbols_analyzed}, Signals: {signals_found}"
         )
     
-    def _save_v3_sr_signal(self, v3_signal: Dict) -> bool:
-        """Save V3 S/R signal to database"""
-        session = db.get_session()
+    async def _save_v3_sr_signal(self, v3_signal: Dict) -> bool:
+        """Save V3 S/R signal to database (commit в потоке-писателе DB executor)"""
+        started = time.perf_counter()
         try:
             zone = v3_signal.get('zone', {})
             
@@ -2085,18 +2386,16 @@ class TradingBot:
                 created_at=datetime.now(pytz.UTC)
             )
             
-            session.add(signal)
-            session.commit()
+            await signal_repository.save(signal)
             
             get_v3_sr_logger().info(f"✅ V3 signal saved to DB: {v3_signal['symbol']} {v3_signal['direction']}")
             return True
             
         except Exception as e:
-            session.rollback()
             get_v3_sr_logger().error(f"❌ Error saving V3 signal to DB: {e}", exc_info=True)
             return False
         finally:
-            session.close()
+            perf_metrics.record('db_write', 'v3_sr_signal', time.perf_counter() - started)
     
     async def _send_v3_sr_telegram(self, v3_signal: Dict):
         """Send V3 S/R signal to Telegram"""
@@ -2146,6 +2445,31 @@ class TradingBot:
             await self.ap_performance_tracker.stop()
         
         await self.telegram_bot.stop()
+        await perf_metrics.stop_http_server()
+        strategy_profiler.stop_session()
+        
+        if self.analysis_pool:
+            self.analysis_pool.shutdown()
+            self.analysis_pool = None
+        
+        # Retention не начинает новый батч во время остановки (текущий батч
+        # DB executor дописывает до shutdown ниже)
+        if self.retention_task:
+            self.retention_task.cancel()
+            await asyncio.gather(self.retention_task, return_exceptions=True)
+            self.retention_task = None
+        
+        # Дописать очередь свечей до закрытия соединений
+        if self.candle_writer:
+            await self.candle_writer.stop()
+            self.candle_writer = None
+        
+        # Дождаться операций DB executor (потоки-писатель / читатели) и закрыть соединения
+        await asyncio.to_thread(db_executor.shutdown)
+        
+        if self.wal_checkpointer:
+            await self.wal_checkpointer.stop()
+            self.wal_checkpointer = None
         
         # Закрываем сессию BinanceClient
         if self.client:
@@ -9,6 +9,30 @@ from datetime import datetime, timedelta
 from .utils import calculate_mtr
 
 
+class AVWAPAccumulator:
+    """
+    Накопленные sum(TP×V) и sum(V) закрытых баров от якоря для (symbol, tf)
+    
+    Последний бар DataFrame в сумму не входит (может быть не закрыт и
+    обновиться) - он добавляется при каждом расчете заново.
+    """
+    
+    # Полный пересчет после N инкрементальных шагов (дрейф float при вычитании)
+    REBASE_UPDATES = 256
+    # Больше баров к добавлению/удалению - дешевле векторный пересчет
+    MAX_STEP_BARS = 64
+    
+    __slots__ = ('anchor_key', 'first_ts', 'last_ts', 'pv', 'v', 'updates')
+    
+    def __init__(self, anchor_key: Tuple):
+        self.anchor_key = anchor_key
+        self.first_ts = None  # Первый бар в сумме
+        self.last_ts = None  # Последний закрытый бар в сумме
+        self.pv = 0.0
+        self.v = 0.0
+        self.updates = 0
+
+
 class AnchoredVWAP:
     """Anchored VWAP с sticky якорями"""
     
@@ -55,6 +79,9 @@ class AnchoredVWAP:
         
         # V2: История переякорений для анти-дребезга
         self.reanchor_history = {}  # {symbol: {tf: [timestamps]}}
+        
+        # Инкрементальные суммы AVWAP (сброс при смене якоря)
+        self.avwap_state: Dict[Tuple[str, str], AVWAPAccumulator] = {}
     
     def find_fractal_swings(self, df: pd.DataFrame, k: int) -> Dict[str, list]:
         """Найти fractal swing точки"""
@@ -304,7 +331,7 @@ class AnchoredVWAP:
             conditions_met += 1
         
         # (c) Цена далеко от якоря
-        avwap_value = self.calculate_avwap_from_anchor(df, anchor)
+        avwap_value = self.calculate_avwap_from_anchor(df, anchor, symbol, timeframe)
         current_price = df['close'].iloc[-1]
         distance = abs(current_price - avwap_value)
         threshold = self.v2_hysteresis_distance_mult * mtr
@@ -369,7 +396,7 @@ class AnchoredVWAP:
         # Гистерезис - запрет переякоривания в lock period
         if bars_since_anchor < lock_bars:
             # Исключение: слом структуры
-            avwap_value = self.calculate_avwap_from_anchor(df, anchor)
+            avwap_value = self.calculate_avwap_from_anchor(df, anchor, symbol, timeframe)
             if self.check_structure_break(df, avwap_value, timeframe):
                 return True
             return False
@@ -382,19 +409,23 @@ class AnchoredVWAP:
                 return True
         
         # Слом структуры
-        avwap_value = self.calculate_avwap_from_anchor(df, anchor)
+        avwap_value = self.calculate_avwap_from_anchor(df, anchor, symbol, timeframe)
         if self.check_structure_break(df, avwap_value, timeframe):
             return True
         
         return False
     
-    def calculate_avwap_from_anchor(self, df: pd.DataFrame, anchor: Dict) -> float:
+    def calculate_avwap_from_anchor(self, df: pd.DataFrame, anchor: Dict,
+                                    symbol: Optional[str] = None,
+                                    timeframe: Optional[str] = None) -> float:
         """
         Рассчитать AVWAP от якоря до текущей свечи
         
         Args:
             df: DataFrame
             anchor: Данные якоря
+            symbol: Символ (вместе с timeframe - инкрементальный расчет по avwap_state)
+            timeframe: Таймфрейм якоря
             
         Returns:
             Текущее значение AVWAP
@@ -404,6 +435,17 @@ class AnchoredVWAP:
         if anchor_idx >= len(df):
             return anchor['price']
         
+        times = self._bar_times(df) if symbol is not None and timeframe is not None else None
+        if times is not None:
+            bars = self._bar_arrays(df)
+            acc = self._advance_accumulator(symbol, timeframe, times, bars, anchor)
+            # Последний (возможно незакрытый) бар - всегда по текущим данным
+            last_pv, last_v = self._slice_sums(bars, len(df) - 1, len(df))
+            pv, v = acc.pv + last_pv, acc.v + last_v
+            if v == 0:
+                return anchor['price']
+            return float(pv / v)
+        
         # Slice от якоря до конца
         avwap_slice = df.iloc[anchor_idx:]
         
@@ -417,6 +459,106 @@ class AnchoredVWAP:
         avwap = pv.sum() / avwap_slice['volume'].sum()
         return float(avwap)
     
+    @staticmethod
+    def _bar_times(df: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        Время баров для сопоставления окон между вызовами (open_time колонка
+        или DatetimeIndex). None - без времени инкрементальный расчет невозможен.
+        """
+        if 'open_time' in df.columns:
+            times = df['open_time']
+        elif isinstance(df.index, pd.DatetimeIndex):
+            times = df.index
+        else:
+            return None
+        return np.asarray(times.values, dtype='datetime64[ns]')
+    
+    @staticmethod
+    def _bar_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, ...]:
+        """high, low, close, volume как numpy (без копии для float колонок)"""
+        return tuple(df[col].to_numpy(dtype=float) for col in ('high', 'low', 'close', 'volume'))
+    
+    @staticmethod
+    def _slice_sums(bars: Tuple[np.ndarray, ...], start: int, stop: int) -> Tuple[float, float]:
+        """sum(TP×V), sum(V) для баров [start, stop) (NaN пропускаются, как в pandas sum)"""
+        if stop <= start:
+            return 0.0, 0.0
+        high, low, close, volume = bars
+        if stop - start <= 8:
+            # Шаг окна = 1-2 бара: скаляры дешевле вызовов numpy
+            pv_sum = v_sum = 0.0
+            for i in range(start, stop):
+                v = float(volume[i])
+                pv = (float(high[i]) + float(low[i]) + float(close[i])) / 3 * v
+                if pv == pv:
+                    pv_sum += pv
+                if v == v:
+                    v_sum += v
+            return pv_sum, v_sum
+        pv = (high[start:stop] + low[start:stop] + close[start:stop]) / 3 * volume[start:stop]
+        return float(np.nansum(pv)), float(np.nansum(volume[start:stop]))
+    
+    def _advance_accumulator(self, symbol: str, timeframe: str, times: np.ndarray,
+                             bars: Tuple[np.ndarray, ...], anchor: Dict) -> AVWAPAccumulator:
+        """
+        Довести суммы закрытых баров [anchor_idx, len(times) - 1) до текущего DataFrame
+        
+        Окно свечей скользит (anchor['index'] - позиция в текущем df): новые
+        закрытые бары добавляются, ушедшие из начала среза - вычитаются.
+        Полный пересчет - при смене якоря, разрыве с прошлым окном и раз
+        в REBASE_UPDATES шагов.
+        """
+        anchor_idx = anchor['index']
+        closed_end = len(times) - 1
+        anchor_key = (anchor_idx, anchor.get('timestamp'))
+        
+        acc = self.avwap_state.get((symbol, timeframe))
+        if acc is None or acc.anchor_key != anchor_key:
+            acc = AVWAPAccumulator(anchor_key)
+            self.avwap_state[(symbol, timeframe)] = acc
+        
+        first_ts = times[anchor_idx] if anchor_idx < closed_end else None
+        last_ts = times[closed_end - 1] if anchor_idx < closed_end else None
+        
+        if first_ts is not None and acc.first_ts == first_ts and acc.last_ts == last_ts:
+            return acc  # Окно не изменилось
+        
+        if not self._step_accumulator(acc, times, bars, anchor_idx, closed_end):
+            acc.pv, acc.v = self._slice_sums(bars, anchor_idx, closed_end)
+            acc.updates = 0
+        
+        acc.first_ts = first_ts
+        acc.last_ts = last_ts
+        return acc
+    
+    def _step_accumulator(self, acc: AVWAPAccumulator, times: np.ndarray,
+                          bars: Tuple[np.ndarray, ...], anchor_idx: int, closed_end: int) -> bool:
+        """Инкрементальный шаг: False - нужен полный пересчет"""
+        if acc.first_ts is None or acc.updates >= AVWAPAccumulator.REBASE_UPDATES:
+            return False
+        
+        first_pos = int(times.searchsorted(acc.first_ts))
+        last_pos = int(times.searchsorted(acc.last_ts))
+        if (first_pos >= len(times) or times[first_pos] != acc.first_ts
+                or last_pos >= len(times) or times[last_pos] != acc.last_ts):
+            return False  # Прошлое окно не пересекается с текущим
+        if first_pos > anchor_idx or last_pos >= closed_end or last_pos < anchor_idx - 1:
+            return False
+        if (anchor_idx - first_pos) + (closed_end - 1 - last_pos) > AVWAPAccumulator.MAX_STEP_BARS:
+            return False
+        
+        removed_pv, removed_v = self._slice_sums(bars, first_pos, anchor_idx)
+        added_pv, added_v = self._slice_sums(bars, last_pos + 1, closed_end)
+        
+        v = acc.v - removed_v + added_v
+        if removed_v and v <= 1e-9 * (acc.v + added_v):
+            return False  # Остаток объема ~ ошибка округления - пересчитать точно
+        
+        acc.pv = acc.pv - removed_pv + added_pv
+        acc.v = v
+        acc.updates += 1
+        return True
+    
     def get_avwap(self, symbol: str, df: pd.DataFrame, timeframe: str,
                   force_recalc: bool = False, parent_config: Optional[dict] = None) -> Optional[float]:
         """
@@ -476,7 +618,7 @@ class AnchoredVWAP:
         # Рассчитываем AVWAP от текущего якоря
         if timeframe in self.anchors[symbol]:
             anchor = self.anchors[symbol][timeframe]
-            return self.calculate_avwap_from_anchor(df, anchor)
+            return self.calculate_avwap_from_anchor(df, anchor, symbol, timeframe)
         
         return None
     
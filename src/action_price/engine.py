@@ -9,17 +9,30 @@ from datetime import datetime
 import hashlib
 import pytz
 import logging
-import pandas_ta as ta
 
 logger = logging.getLogger(__name__)
 
 from .signal_logger import ActionPriceSignalLogger
 from .cooldown import ActionPriceCooldown
+# EMA / ATR как pandas_ta, по последней оси (ряд или матрица symbols × bars)
+from src.indicators.kernels import atr as _atr, ema as _ema
 
 
 class ActionPriceEngine:
     """EMA200 Body Cross Strategy с профессиональной системой скоринга"""
     
+    # Баров в конце df для булевых условий паттерна/скоринга
+    # (самое дальнее окно - касания EMA200 за 5 баров до инициатора [-2])
+    SCORE_WINDOW = 16
+    
+    PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    
+    SCORE_COMPONENTS = (
+        'initiator_size', 'confirm_depth', 'close_position', 'slope200', 'ema_fan',
+        'gap_to_atr', 'lipuchka', 'confirm_color', 'break_and_base', 'retest_tag',
+        'initiator_wick', 'volume_confirmation',
+    )
+    
     def __init__(self, config: dict, binance_client=None, signal_logger=None):
         """
         Args:
@@ -90,34 +103,120 @@ class ActionPriceEngine:
         if not self.enabled:
             return None
         
-        if len(df) < 250:  # Нужно минимум для EMA200
-            logger.debug(f"{symbol} - Insufficient data: {len(df)} bars < 250")
+        df = self._prepare_frame(symbol, df)
+        if df is None:
             return None
         
-        # КРИТИЧНО: Валидация и подготовка датафрейма
-        # 1. Создать копию чтобы не менять original
-        df = df.copy()
-        
-        # 2. Убедиться что есть open_time колонка
-        if 'open_time' not in df.columns:
-            logger.error(f"{symbol} - No 'open_time' column in dataframe!")
-            return None
-        
-        # 3. Сортировать по open_time (ASC - от старых к новым)
-        df = df.sort_values('open_time', ascending=True).reset_index(drop=True)
-        
-        # Рассчитать индикаторы
+        # Рассчитать индикаторы (NumPy массивы поверх колонок df)
         indicators = self._calculate_indicators(df)
         if indicators is None:
             logger.debug(f"{symbol} - Failed to calculate indicators")
             return None
         
+        # Условия паттерна/скоринга на последних барах - один раз на символ
+        window = self._body_cross_window(indicators)
+        
         # Определить инициатор и подтверждение
-        pattern_result = self._detect_body_cross_pattern(df, indicators)
+        pattern_result = self._detect_body_cross_pattern(df, indicators, window)
         if pattern_result is None:
             logger.debug(f"{symbol} - No EMA200 Body Cross pattern detected")
             return None
         
+        return await self._finalize_signal(symbol, df, indicators, window, pattern_result)
+    
+    async def analyze_batch(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Анализ всех символов за один проход
+        
+        Свечи символов с одинаковым числом баров складываются в матрицы
+        (symbols × bars): EMA / ATR / условия Body Cross считаются одним
+        векторным вызовом на группу. Скоринг, cooldown и SL/TP (с запросом
+        mark price) - только для символов, где паттерн найден.
+        Результат по каждому символу тот же, что у analyze().
+        
+        Args:
+            frames: {symbol: DataFrame таймфрейма engine}
+            
+        Returns:
+            {symbol: сигнал} для символов с сигналом
+        """
+        if not self.enabled:
+            return {}
+        
+        groups: Dict[int, List[Tuple[str, pd.DataFrame]]] = {}
+        for symbol, df in frames.items():
+            df = self._prepare_frame(symbol, df)
+            if df is not None:
+                groups.setdefault(len(df), []).append((symbol, df))
+        
+        signals = {}
+        for bars, members in groups.items():
+            try:
+                stacked = self._indicator_arrays({
+                    column: np.vstack([df[column].to_numpy(dtype=float) for _, df in members])
+                    for column in self.PRICE_COLUMNS
+                    if column != 'volume' or all('volume' in df.columns for _, df in members)
+                })
+            except Exception as e:
+                logger.error(f"Error calculating batch indicators ({len(members)} symbols × {bars} bars): {e}")
+                continue
+            
+            window = self._body_cross_window(stacked)
+            ready = ~(np.isnan(stacked['ema200'][:, -3:]).any(axis=1) | np.isnan(stacked['atr'][:, -3:]).any(axis=1))
+            # Без инициатора на [-2] паттерна нет - дальше идут только эти строки
+            initiators = np.flatnonzero(ready & (window['cross_up'][:, -2] | window['cross_down'][:, -2]))
+            
+            logger.debug(
+                f"Body Cross batch: {len(members)} symbols × {bars} bars, "
+                f"{int(ready.sum())} with indicators, {len(initiators)} initiators"
+            )
+            
+            for row in initiators:
+                symbol, df = members[row]
+                indicators = {column: values[row] for column, values in stacked.items()}
+                indicators['open_time'] = df['open_time'].array
+                row_window = {name: values[row] for name, values in window.items()}
+                try:
+                    pattern_result = self._detect_body_cross_pattern(df, indicators, row_window)
+                    if pattern_result is None:
+                        continue
+                    signal = await self._finalize_signal(symbol, df, indicators, row_window, pattern_result)
+                    if signal:
+                        signals[symbol] = signal
+                except Exception as e:
+                    logger.error(f"{symbol} - Error in batch Action Price analysis: {e}", exc_info=True)
+        
+        # Порядок входных символов
+        return {symbol: signals[symbol] for symbol in frames if symbol in signals}
+    
+    def _prepare_frame(self, symbol: str, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Проверить свечи и отсортировать по open_time (без копии, если уже отсортированы)"""
+        if len(df) < 250:  # Нужно минимум для EMA200
+            logger.debug(f"{symbol} - Insufficient data: {len(df)} bars < 250")
+            return None
+        
+        # КРИТИЧНО: Валидация и подготовка датафрейма
+        # 1. Убедиться что есть open_time колонка
+        if 'open_time' not in df.columns:
+            logger.error(f"{symbol} - No 'open_time' column in dataframe!")
+            return None
+        
+        # 2. Сортировать по open_time (ASC - от старых к новым) только если нужно:
+        # свечи из хранилища уже отсортированы, df не копируется и не меняется
+        if not df['open_time'].is_monotonic_increasing:
+            df = df.sort_values('open_time', ascending=True).reset_index(drop=True)
+        
+        return df
+    
+    async def _finalize_signal(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        indicators: Dict[str, np.ndarray],
+        window: Dict[str, np.ndarray],
+        pattern_result: Tuple[str, int, int]
+    ) -> Optional[Dict]:
+        """Cooldown → score → режим → SL/TP → JSONL лог для найденного паттерна"""
         direction, initiator_idx, confirm_idx = pattern_result
         
         # Проверить cooldown ПОСЛЕ определения direction
@@ -130,7 +229,7 @@ class ActionPriceEngine:
         
         # Рассчитать score компоненты
         score_result = self._calculate_score_components(
-            df, indicators, direction, initiator_idx, confirm_idx
+            df, indicators, direction, initiator_idx, confirm_idx, window
         )
         
         if score_result is None:
@@ -233,41 +332,101 @@ class ActionPriceEngine:
             }
         }
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
-        """Рассчитать все необходимые индикаторы"""
+    def _calculate_indicators(self, df: pd.DataFrame) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Рассчитать все необходимые индикаторы
+        
+        Returns:
+            {колонка: массив} - OHLCV как view колонок df (без копии DataFrame),
+            EMA / ATR / ATR полосы - новые массивы той же длины
+        """
         try:
-            df = df.copy()
-            
-            # EMA
-            df['ema5'] = ta.ema(df['close'], length=5)
-            df['ema9'] = ta.ema(df['close'], length=9)
-            df['ema13'] = ta.ema(df['close'], length=13)
-            df['ema21'] = ta.ema(df['close'], length=21)
-            df['ema200'] = ta.ema(df['close'], length=200)
-            
-            # ATR
-            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=self.atr_length)
-            
-            # ATR полосы
-            df['atr_upper'] = df['ema200'] + df['atr'] * self.atr_multiplier
-            df['atr_lower'] = df['ema200'] - df['atr'] * self.atr_multiplier
-            
-            # Swing High/Low
-            df['swing_high'] = df['high'].rolling(window=self.swing_length).max()
-            df['swing_low'] = df['low'].rolling(window=self.swing_length).min()
+            indicators = self._indicator_arrays({
+                column: df[column].to_numpy(dtype=float)
+                for column in self.PRICE_COLUMNS if column in df.columns
+            })
+            indicators['open_time'] = df['open_time'].array
             
             # Проверить наличие NaN
-            if df[['ema200', 'atr']].iloc[-3:].isna().any().any():
+            if np.isnan(indicators['ema200'][-3:]).any() or np.isnan(indicators['atr'][-3:]).any():
                 return None
             
-            return df
+            return indicators
             
         except Exception as e:
             logger.error(f"Error calculating indicators: {e}")
             return None
     
+    def _indicator_arrays(self, prices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        EMA / ATR / ATR полосы для OHLCV массивов
+        
+        Массивы - (bars,) одного символа или (symbols × bars) для analyze_batch:
+        все расчеты идут по последней оси.
+        """
+        indicators = dict(prices)
+        close = indicators['close']
+        
+        # EMA
+        indicators['ema5'] = _ema(close, 5)
+        indicators['ema9'] = _ema(close, 9)
+        indicators['ema13'] = _ema(close, 13)
+        indicators['ema21'] = _ema(close, 21)
+        indicators['ema200'] = _ema(close, 200)
+        
+        # ATR
+        indicators['atr'] = _atr(indicators['high'], indicators['low'], close, self.atr_length)
+        
+        # ATR полосы
+        indicators['atr_upper'] = indicators['ema200'] + indicators['atr'] * self.atr_multiplier
+        indicators['atr_lower'] = indicators['ema200'] - indicators['atr'] * self.atr_multiplier
+        
+        return indicators
+    
+    def _body_cross_window(self, indicators: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Условия паттерна и скоринга на последних SCORE_WINDOW барах (булевы массивы)
+        
+        Позиции в массивах - от конца (-1 = последний бар), как initiator_idx / confirm_idx.
+        Для матриц analyze_batch - (symbols × SCORE_WINDOW).
+        """
+        tail = (Ellipsis, slice(-self.SCORE_WINDOW, None))
+        open_ = indicators['open'][tail]
+        high = indicators['high'][tail]
+        low = indicators['low'][tail]
+        close = indicators['close'][tail]
+        ema5 = indicators['ema5'][tail]
+        ema9 = indicators['ema9'][tail]
+        ema13 = indicators['ema13'][tail]
+        ema21 = indicators['ema21'][tail]
+        ema200 = indicators['ema200'][tail]
+        small_range = (high - low) < 0.5 * indicators['atr'][tail]
+        
+        return {
+            # Body Cross: тело пересекает EMA200 / бар держится по одну сторону без касания
+            'cross_up': (close > ema200) & (open_ < ema200) & (np.minimum(close, open_) < ema200),
+            'cross_down': (close < ema200) & (open_ > ema200) & (np.maximum(close, open_) > ema200),
+            'hold_above': (close > ema200) & (low > ema200),
+            'hold_below': (close < ema200) & (high < ema200),
+            'touch_ema200': (low <= ema200) & (ema200 <= high),
+            # EMA stack
+            'fan_bull': (ema5 > ema9) & (ema9 > ema13) & (ema13 > ema21),
+            'fan_bear': (ema5 < ema9) & (ema9 < ema13) & (ema13 < ema21),
+            # Break-and-base / retest EMA13-21
+            'base_long': (close > ema13) & (low > ema21) & small_range,
+            'base_short': (close < ema13) & (high < ema21) & small_range,
+            'retest_long': ((low <= ema13) & (close > ema13)) | ((low <= ema21) & (close > ema21)),
+            'retest_short': ((high >= ema13) & (close < ema13)) | ((high >= ema21) & (close < ema21)),
+        }
+    
+    @staticmethod
+    def _from_end(indicators: Dict[str, np.ndarray], idx: int) -> int:
+        """Индекс бара как отрицательная позиция (для массивов _body_cross_window)"""
+        return idx - len(indicators['close']) if idx >= 0 else idx
+    
     def _detect_body_cross_pattern(
-        self, df: pd.DataFrame, indicators: pd.DataFrame
+        self, df: pd.DataFrame, indicators: Dict[str, np.ndarray],
+        window: Optional[Dict[str, np.ndarray]] = None
     ) -> Optional[Tuple[str, int, int]]:
         """
         Определить паттерн Body Cross
@@ -285,26 +444,29 @@ class ActionPriceEngine:
         # Подтверждение: close и тень не касаются EMA200 (значение EMA200 на момент начала свечи)
         #
         # Проверяем что у нас минимум 2 свечи
-        if len(indicators) < 2:
+        if len(indicators['close']) < 2:
             return None
         
         # Индексы: инициатор = -2 (предпоследняя), подтверждение = -1 (последняя)
         initiator_idx = -2
         confirm_idx = -1
         
+        if window is None:
+            window = self._body_cross_window(indicators)
+        
         # Данные инициатора
-        init_open = indicators['open'].iloc[initiator_idx]
-        init_close = indicators['close'].iloc[initiator_idx]
-        ema200_init = indicators['ema200'].iloc[initiator_idx]
-        init_time = indicators['open_time'].iloc[initiator_idx] if 'open_time' in indicators.columns else None
+        init_open = indicators['open'][initiator_idx]
+        init_close = indicators['close'][initiator_idx]
+        ema200_init = indicators['ema200'][initiator_idx]
+        init_time = indicators['open_time'][initiator_idx]
         
         # Данные подтверждения
-        conf_open = indicators['open'].iloc[confirm_idx]
-        conf_close = indicators['close'].iloc[confirm_idx]
-        conf_high = indicators['high'].iloc[confirm_idx]
-        conf_low = indicators['low'].iloc[confirm_idx]
-        ema200_conf = indicators['ema200'].iloc[confirm_idx]
-        conf_time = indicators['open_time'].iloc[confirm_idx] if 'open_time' in indicators.columns else None
+        conf_open = indicators['open'][confirm_idx]
+        conf_close = indicators['close'][confirm_idx]
+        conf_high = indicators['high'][confirm_idx]
+        conf_low = indicators['low'][confirm_idx]
+        ema200_conf = indicators['ema200'][confirm_idx]
+        conf_time = indicators['open_time'][confirm_idx]
         
         # ДИАГНОСТИКА: Логировать timestamp и OHLC для проверки
         logger.info(
@@ -315,17 +477,10 @@ class ActionPriceEngine:
         
         # === LONG PATTERN ===
         # Инициатор: body пересекает EMA200 снизу вверх (закрытие выше)
-        initiator_long = (
-            init_close > ema200_init and 
-            init_open < ema200_init and
-            min(init_close, init_open) < ema200_init
-        )
+        initiator_long = bool(window['cross_up'][initiator_idx])
         
-        # Подтверждение: close выше EMA200, без касания
-        confirm_long = (
-            conf_close > ema200_conf and
-            conf_low > ema200_conf  # Нет касания низом
-        )
+        # Подтверждение: close выше EMA200, без касания низом
+        confirm_long = bool(window['hold_above'][confirm_idx])
         
         # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ для LONG
         if initiator_long:
@@ -352,17 +507,10 @@ class ActionPriceEngine:
         
         # === SHORT PATTERN ===
         # Инициатор: body пересекает EMA200 сверху вниз (закрытие ниже)
-        initiator_short = (
-            init_close < ema200_init and
-            init_open > ema200_init and
-            max(init_close, init_open) > ema200_init
-        )
+        initiator_short = bool(window['cross_down'][initiator_idx])
         
-        # Подтверждение: close ниже EMA200, без касания
-        confirm_short = (
-            conf_close < ema200_conf and
-            conf_high < ema200_conf  # Нет касания верхом
-        )
+        # Подтверждение: close ниже EMA200, без касания верхом
+        confirm_short = bool(window['hold_below'][confirm_idx])
         
         # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ для SHORT
         if initiator_short:
@@ -392,423 +540,210 @@ class ActionPriceEngine:
     def _calculate_score_components(
         self,
         df: pd.DataFrame,
-        indicators: pd.DataFrame,
+        indicators: Dict[str, np.ndarray],
         direction: str,
         initiator_idx: int,
-        confirm_idx: int
+        confirm_idx: int,
+        window: Optional[Dict[str, np.ndarray]] = None
     ) -> Optional[Tuple[float, Dict[str, float]]]:
         """
         Рассчитать все компоненты score согласно спецификации
         
+        Условия по барам (касания EMA200, break-and-base, retest, веер EMA)
+        берутся из булевых массивов _body_cross_window.
+        
         Returns:
             (score_total, score_components) или None
         """
         components = {}
+        if window is None:
+            window = self._body_cross_window(indicators)
+        
+        # Позиции инициатора / подтверждения в массивах window (от конца)
+        init = self._from_end(indicators, initiator_idx)
+        conf = self._from_end(indicators, confirm_idx)
         
         # Данные свечей
-        init_open = indicators['open'].iloc[initiator_idx]
-        init_close = indicators['close'].iloc[initiator_idx]
-        init_high = indicators['high'].iloc[initiator_idx]
-        init_low = indicators['low'].iloc[initiator_idx]
+        init_open = indicators['open'][initiator_idx]
+        init_close = indicators['close'][initiator_idx]
+        init_high = indicators['high'][initiator_idx]
+        init_low = indicators['low'][initiator_idx]
         
-        conf_open = indicators['open'].iloc[confirm_idx]
-        conf_close = indicators['close'].iloc[confirm_idx]
-        conf_high = indicators['high'].iloc[confirm_idx]
-        conf_low = indicators['low'].iloc[confirm_idx]
+        conf_open = indicators['open'][confirm_idx]
+        conf_close = indicators['close'][confirm_idx]
         
         # EMA на подтверждении
-        ema5 = indicators['ema5'].iloc[confirm_idx]
-        ema9 = indicators['ema9'].iloc[confirm_idx]
-        ema13 = indicators['ema13'].iloc[confirm_idx]
-        ema21 = indicators['ema21'].iloc[confirm_idx]
-        ema200 = indicators['ema200'].iloc[confirm_idx]
-        ema200_init = indicators['ema200'].iloc[initiator_idx]
+        ema5 = indicators['ema5'][confirm_idx]
+        ema13 = indicators['ema13'][confirm_idx]
+        ema21 = indicators['ema21'][confirm_idx]
+        ema200 = indicators['ema200'][confirm_idx]
         
         # ATR
-        atr_init = indicators['atr'].iloc[initiator_idx]
-        atr_conf = indicators['atr'].iloc[confirm_idx]
-        atr_upper = indicators['atr_upper'].iloc[confirm_idx]
-        atr_lower = indicators['atr_lower'].iloc[confirm_idx]
+        atr_init = indicators['atr'][initiator_idx]
+        atr_conf = indicators['atr'][confirm_idx]
+        atr_upper = indicators['atr_upper'][confirm_idx]
+        atr_lower = indicators['atr_lower'][confirm_idx]
+        
+        # Общие для обоих направлений
+        # 1. Размер инициатора (|body| в ATR)
+        init_body_atr = abs(init_close - init_open) / atr_init
+        if init_body_atr >= 1.10:
+            components['initiator_size'] = 2
+        elif init_body_atr >= 0.80:
+            components['initiator_size'] = 1
+        else:
+            components['initiator_size'] = 0
+        
+        # Наклон EMA200 за 10 баров (в ATR)
+        slope200_norm = (ema200 - indicators['ema200'][confirm_idx - 10]) / atr_conf
+        
+        # Веер EMA: компактное выравнивание = ранний тренд (хорошо), широкий разброс = поздний вход (плохо)
+        # Оценивается по бычьему вееру для обоих направлений
+        fan_spread = (ema5 - ema21) / atr_conf
+        if window['fan_bull'][conf]:
+            if fan_spread < 0.05:
+                components['ema_fan'] = 2  # Очень компактное выравнивание = ранний тренд
+            elif fan_spread < 0.10:
+                components['ema_fan'] = 1  # Компактное
+            elif fan_spread >= 0.20:
+                components['ema_fan'] = -2  # Широкий разброс = поздний/экстремум вход
+            else:
+                components['ema_fan'] = 0
+        elif window['fan_bear'][conf]:
+            components['ema_fan'] = -2  # Медвежий веер
+        else:
+            components['ema_fan'] = 0  # Нет четкого веера = нейтрально
+        
+        # Липучка к EMA200: много касаний за 5 баров до инициатора = слабый импульс
+        touches = int(window['touch_ema200'][init - 5:init].sum())
         
         if direction == 'long':
-            # 1. Размер инициатора (|body| в ATR)
-            init_body = abs(init_close - init_open)
-            init_body_atr = init_body / atr_init
-            if init_body_atr >= 1.10:
-                components['initiator_size'] = 2
-            elif init_body_atr >= 0.80:
-                components['initiator_size'] = 1
-            else:
-                components['initiator_size'] = 0
-            
-            # 2. НОВОЕ: Proximity to EMA200 (близость к EMA200 = ЛУЧШЕ!)
-            # БЫЛО: depth_atr >= 0.40 давало +2 (НЕПРАВИЛЬНО - далеко от EMA = перекуп!)
-            # СТАЛО: близко к EMA200 = высокий score (свежий breakout)
-            depth = conf_close - ema200
-            depth_atr = depth / atr_conf
+            # 2. Proximity to EMA200 (близко к EMA200 = свежий пробой, низкий риск отката)
+            depth_atr = (conf_close - ema200) / atr_conf
             
-            # Близко к EMA200 = отлично (свежий пробой, низкий риск отката)
-            if depth_atr < 0.30:
-                components['confirm_depth'] = 2  # Очень близко!
-            elif depth_atr < 0.50:
-                components['confirm_depth'] = 1  # Близко
-            # Далеко от EMA200 = плохо (вход на вершине импульса)
-            elif depth_atr >= 1.0:
-                components['confirm_depth'] = -2  # Слишком далеко = штраф!
-            elif depth_atr >= 0.70:
-                components['confirm_depth'] = -1  # Далековато
-            else:
-                components['confirm_depth'] = 0  # Нейтрально
-            
-            # 3. ФАЗА 2: Положение close подтверждения (ПЕРЕРАБОТАН!)
-            # НОВАЯ ЛОГИКА: награждать pullback зону (EMA200-EMA13), штрафовать overbought
-            # LONG: в бычьем тренде EMA200 < EMA13 < EMA21 < EMA9 < EMA5
+            # 3. Положение close: pullback зона EMA200-EMA13, выше всех EMA = overbought
             if ema200 <= conf_close <= ema13:
-                # ИДЕАЛЬНО: цена в pullback зоне между EMA200 (снизу) и EMA13 (сверху)
                 components['close_position'] = 2
             elif ema13 < conf_close <= ema21:
-                # ХОРОШО: близко к EMA13
                 components['close_position'] = 1
             elif conf_close > ema5:
-                # ПЛОХО: выше всех EMA = overbought
                 components['close_position'] = -2
             elif conf_close > ema200:
-                # НОРМАЛЬНО: выше EMA200 но не экстремум
                 components['close_position'] = 0
             else:
-                # Цена ниже EMA200 для LONG = странно
-                components['close_position'] = -1
-            
-            # 4. Наклон EMA200 (за 10 баров)
-            ema200_10bars_ago = indicators['ema200'].iloc[confirm_idx - 10]
-            slope200 = ema200 - ema200_10bars_ago
-            slope200_norm = slope200 / atr_conf
-            if slope200_norm >= 0.20:
-                components['slope200'] = 1
-            elif slope200_norm <= -0.20:
-                components['slope200'] = -1
-            else:
-                components['slope200'] = 0
+                components['close_position'] = -1  # Цена ниже EMA200 для LONG
             
-            # 5. ФАЗА 2: Веер EMA (ПЕРЕРАБОТАН!)
-            # НОВАЯ ЛОГИКА: компактное выравнивание = ранний тренд (хорошо), широкий разброс = поздний вход (плохо)
-            bullish_fan = ema5 > ema9 and ema9 > ema13 and ema13 > ema21
-            fan_spread = (ema5 - ema21) / atr_conf
-            
-            if bullish_fan:
-                if fan_spread < 0.05:
-                    # Очень компактное выравнивание = ранний тренд
-                    components['ema_fan'] = 2
-                elif fan_spread < 0.10:
-                    # Компактное
-                    components['ema_fan'] = 1
-                elif fan_spread >= 0.20:
-                    # Широкий разброс = поздний/экстремум вход
-                    components['ema_fan'] = -2
-                else:
-                    components['ema_fan'] = 0
-            elif ema5 < ema9 and ema9 < ema13 and ema13 < ema21:
-                # Медвежий веер на бычьем сигнале = плохо
-                components['ema_fan'] = -2
-            else:
-                # Нет четкого веера = нейтрально
-                components['ema_fan'] = 0
-            
-            # 6. НОВОЕ: Overextension Penalty (штраф за перекупленность!)
-            # БЫЛО: gap_atr >= 0.50 давало +1 (близко к экстремуму = хорошо) - НЕПРАВИЛЬНО!
-            # СТАЛО: близко к ATR upper band = ПЕРЕКУПЛЕННОСТЬ = штраф
-            gap_to_outer = atr_upper - conf_close
-            gap_atr = gap_to_outer / atr_conf
-            
-            # Цена близко к верхней ATR полосе = перекупленность = плохо!
-            if gap_atr < 0.20:
-                components['gap_to_atr'] = -2  # Очень близко к экстремуму = сильный штраф!
-            elif gap_atr < 0.40:
-                components['gap_to_atr'] = -1  # Близковато
-            # Цена далеко от экстремумов = нормально (есть запас роста)
-            elif gap_atr >= 0.80:
-                components['gap_to_atr'] = 1  # Большой запас = хорошо
-            else:
-                components['gap_to_atr'] = 0  # Нейтрально
-            
-            # 7. УСИЛЕНО: Липучка к EMA200 (штраф за ложный пробой)
-            # Если было много касаний EMA200 перед пробоем = слабый импульс
-            touches = 0
-            for i in range(initiator_idx - 5, initiator_idx):
-                bar_low = indicators['low'].iloc[i]
-                bar_high = indicators['high'].iloc[i]
-                ema200_bar = indicators['ema200'].iloc[i]
-                if bar_low <= ema200_bar <= bar_high:
-                    touches += 1
+            # 4. Наклон EMA200
+            slope_sign = 1
             
-            # УСИЛЕН ШТРАФ: было -1, стало -2
-            components['lipuchka'] = -2 if touches >= 3 else 0
+            # 6. Overextension: запас до верхней ATR полосы
+            gap_atr = (atr_upper - conf_close) / atr_conf
             
             # 8. Цвет подтверждения
-            confirm_green = conf_close > conf_open
-            if confirm_green:
-                components['confirm_color'] = 1
-            elif not confirm_green and depth_atr < 0.30:
-                components['confirm_color'] = -1
-            else:
-                components['confirm_color'] = 0
+            confirm_with_direction = conf_close > conf_open
             
-            # 9. УСИЛЕНО x2: Break-and-Base (консолидация = сильный сигнал!)
-            # Упрощённая реализация: проверка 3 баров до подтверждения
-            base_bars = 0
-            for i in range(confirm_idx - 3, confirm_idx):
-                bar_close = indicators['close'].iloc[i]
-                bar_low = indicators['low'].iloc[i]
-                bar_ema13 = indicators['ema13'].iloc[i]
-                bar_ema21 = indicators['ema21'].iloc[i]
-                bar_range = indicators['high'].iloc[i] - indicators['low'].iloc[i]
-                bar_atr = indicators['atr'].iloc[i]
-                
-                if (bar_close > bar_ema13 and 
-                    bar_low > bar_ema21 and 
-                    bar_range < 0.5 * bar_atr):
-                    base_bars += 1
+            # 9-10. Break-and-Base (3 бара) и Retest-tag EMA13/21 (5 баров) до подтверждения
+            base_bars = int(window['base_long'][conf - 3:conf].sum())
+            retest = bool(window['retest_long'][conf - 5:conf].any())
             
-            # УСИЛЕН ВЕС: было +1, стало +2
-            components['break_and_base'] = 2 if base_bars >= 2 else 0
-            
-            # 10. УСИЛЕНО x2: Retest-tag (pullback = best practice 2025!)
-            # Упрощённо: если был контакт с EMA13/21 за 5 баров и структура бычья
-            retest = False
-            for i in range(confirm_idx - 5, confirm_idx):
-                bar_low = indicators['low'].iloc[i]
-                bar_close = indicators['close'].iloc[i]
-                bar_ema13 = indicators['ema13'].iloc[i]
-                bar_ema21 = indicators['ema21'].iloc[i]
-                
-                if ((bar_low <= bar_ema13 and bar_close > bar_ema13) or
-                    (bar_low <= bar_ema21 and bar_close > bar_ema21)):
-                    retest = True
-                    break
-            
-            # УСИЛЕН ВЕС: было +1, стало +2 (pullback = ключевой фактор!)
-            components['retest_tag'] = 2 if retest else 0
-            
-            # 11. УСИЛЕНО x2: Хвост инициатора (rejection wick = сильный сигнал!)
-            init_lower_wick = init_low - min(init_open, init_close)
-            init_lower_wick_atr = init_lower_wick / atr_init
-            # УСИЛЕН ВЕС: было +1, стало +2 (wick показывает отклонение!)
-            components['initiator_wick'] = 2 if init_lower_wick_atr >= 0.25 else 0
-            
-            # 12. ФАЗА 2: Volume Confirmation (2025 best practice!)
-            # Проверка что breakout произошел с хорошим объемом
-            init_volume = indicators['volume'].iloc[initiator_idx]
-            
-            # Рассчитать средний объем за volume_avg_period баров ДО инициатора
-            if initiator_idx >= self.volume_avg_period:
-                volume_lookback_start = initiator_idx - self.volume_avg_period
-                avg_volume = indicators['volume'].iloc[volume_lookback_start:initiator_idx].mean()
-                
-                volume_ratio = init_volume / avg_volume if avg_volume > 0 else 0
-                
-                if volume_ratio >= self.volume_breakout_multiplier * 1.5:
-                    # Очень сильный объем (>= 1.8× среднего)
-                    components['volume_confirmation'] = 2
-                elif volume_ratio >= self.volume_breakout_multiplier:
-                    # Хороший объем (>= 1.2× среднего)
-                    components['volume_confirmation'] = 1
-                elif volume_ratio < 0.8:
-                    # Слабый объем (< 0.8× среднего) = плохо
-                    components['volume_confirmation'] = -1
-                else:
-                    components['volume_confirmation'] = 0
-            else:
-                # Недостаточно данных для расчета среднего объема
-                components['volume_confirmation'] = 0
+            # 11. Хвост инициатора (нижний)
+            init_wick_atr = (init_low - min(init_open, init_close)) / atr_init
             
         else:  # SHORT (зеркально)
-            # 1. Размер инициатора
-            init_body = abs(init_close - init_open)
-            init_body_atr = init_body / atr_init
-            if init_body_atr >= 1.10:
-                components['initiator_size'] = 2
-            elif init_body_atr >= 0.80:
-                components['initiator_size'] = 1
-            else:
-                components['initiator_size'] = 0
-            
-            # 2. НОВОЕ: Proximity to EMA200 (близость к EMA200 = ЛУЧШЕ!)
-            # SHORT: зеркально
-            depth = ema200 - conf_close
-            depth_atr = depth / atr_conf
+            depth_atr = (ema200 - conf_close) / atr_conf
             
-            # Близко к EMA200 = отлично
-            if depth_atr < 0.30:
-                components['confirm_depth'] = 2  # Очень близко!
-            elif depth_atr < 0.50:
-                components['confirm_depth'] = 1  # Близко
-            # Далеко от EMA200 = плохо
-            elif depth_atr >= 1.0:
-                components['confirm_depth'] = -2  # Слишком далеко = штраф!
-            elif depth_atr >= 0.70:
-                components['confirm_depth'] = -1  # Далековато
-            else:
-                components['confirm_depth'] = 0  # Нейтрально
-            
-            # 3. ФАЗА 2: Положение close подтверждения (ПЕРЕРАБОТАН!)
-            # НОВАЯ ЛОГИКА: награждать pullback зону (EMA13-EMA200), штрафовать oversold
-            # SHORT: в медвежьем тренде EMA5 < EMA9 < EMA21 < EMA13 < EMA200
+            # Pullback зона EMA13-EMA200, ниже всех EMA = oversold
             if ema13 <= conf_close <= ema200:
-                # ИДЕАЛЬНО: цена в pullback зоне между EMA13 (снизу) и EMA200 (сверху)
                 components['close_position'] = 2
             elif ema21 <= conf_close < ema13:
-                # ХОРОШО: близко к EMA13
                 components['close_position'] = 1
             elif conf_close < ema5:
-                # ПЛОХО: ниже всех EMA = oversold
                 components['close_position'] = -2
             elif conf_close < ema200:
-                # НОРМАЛЬНО: ниже EMA200 но не экстремум
                 components['close_position'] = 0
             else:
-                # Цена выше EMA200 для SHORT = странно
-                components['close_position'] = -1
-            
-            # 4. Наклон EMA200
-            ema200_10bars_ago = indicators['ema200'].iloc[confirm_idx - 10]
-            slope200 = ema200 - ema200_10bars_ago
-            slope200_norm = slope200 / atr_conf
-            if slope200_norm <= -0.20:
-                components['slope200'] = 1
-            elif slope200_norm >= 0.20:
-                components['slope200'] = -1
-            else:
-                components['slope200'] = 0
-            
-            # 5. ФАЗА 2: Веер EMA (ПЕРЕРАБОТАН!)
-            # НОВАЯ ЛОГИКА: компактное выравнивание = ранний тренд (хорошо), широкий разброс = поздний вход (плохо)
-            bullish_fan = ema5 > ema9 and ema9 > ema13 and ema13 > ema21
-            fan_spread = (ema5 - ema21) / atr_conf
-            
-            if bullish_fan:
-                if fan_spread < 0.05:
-                    # Очень компактное выравнивание = ранний тренд
-                    components['ema_fan'] = 2
-                elif fan_spread < 0.10:
-                    # Компактное
-                    components['ema_fan'] = 1
-                elif fan_spread >= 0.20:
-                    # Широкий разброс = поздний/экстремум вход
-                    components['ema_fan'] = -2
-                else:
-                    components['ema_fan'] = 0
-            elif ema5 < ema9 and ema9 < ema13 and ema13 < ema21:
-                # Медвежий веер на бычьем сигнале = плохо
-                components['ema_fan'] = -2
-            else:
-                # Нет четкого веера = нейтрально
-                components['ema_fan'] = 0
-            
-            # 6. НОВОЕ: Overextension Penalty (штраф за перепроданность!)
-            # SHORT: зеркально
-            gap_to_outer = conf_close - atr_lower
-            gap_atr = gap_to_outer / atr_conf
-            
-            # Цена близко к нижней ATR полосе = перепроданность = плохо!
-            if gap_atr < 0.20:
-                components['gap_to_atr'] = -2  # Очень близко к экстремуму = сильный штраф!
-            elif gap_atr < 0.40:
-                components['gap_to_atr'] = -1  # Близковато
-            # Цена далеко от экстремумов = нормально (есть запас падения)
-            elif gap_atr >= 0.80:
-                components['gap_to_atr'] = 1  # Большой запас = хорошо
-            else:
-                components['gap_to_atr'] = 0  # Нейтрально
-            
-            # 7. УСИЛЕНО: Липучка (штраф за ложный пробой)
-            # Если было много касаний EMA200 перед пробоем = слабый импульс
-            touches = 0
-            for i in range(initiator_idx - 5, initiator_idx):
-                bar_low = indicators['low'].iloc[i]
-                bar_high = indicators['high'].iloc[i]
-                ema200_bar = indicators['ema200'].iloc[i]
-                if bar_low <= ema200_bar <= bar_high:
-                    touches += 1
-            
-            # УСИЛЕН ШТРАФ: было -1, стало -2
-            components['lipuchka'] = -2 if touches >= 3 else 0
-            
-            # 8. Цвет подтверждения
-            confirm_red = conf_close < conf_open
-            if confirm_red:
-                components['confirm_color'] = 1
-            elif not confirm_red and depth_atr < 0.30:
-                components['confirm_color'] = -1
-            else:
-                components['confirm_color'] = 0
-            
-            # 9. УСИЛЕНО x2: Break-and-Base (консолидация = сильный сигнал!)
-            base_bars = 0
-            for i in range(confirm_idx - 3, confirm_idx):
-                bar_close = indicators['close'].iloc[i]
-                bar_high = indicators['high'].iloc[i]
-                bar_ema13 = indicators['ema13'].iloc[i]
-                bar_ema21 = indicators['ema21'].iloc[i]
-                bar_range = indicators['high'].iloc[i] - indicators['low'].iloc[i]
-                bar_atr = indicators['atr'].iloc[i]
-                
-                if (bar_close < bar_ema13 and 
-                    bar_high < bar_ema21 and 
-                    bar_range < 0.5 * bar_atr):
-                    base_bars += 1
-            
-            # УСИЛЕН ВЕС: было +1, стало +2
-            components['break_and_base'] = 2 if base_bars >= 2 else 0
-            
-            # 10. УСИЛЕНО x2: Retest-tag (pullback = best practice 2025!)
-            retest = False
-            for i in range(confirm_idx - 5, confirm_idx):
-                bar_high = indicators['high'].iloc[i]
-                bar_close = indicators['close'].iloc[i]
-                bar_ema13 = indicators['ema13'].iloc[i]
-                bar_ema21 = indicators['ema21'].iloc[i]
-                
-                if ((bar_high >= bar_ema13 and bar_close < bar_ema13) or
-                    (bar_high >= bar_ema21 and bar_close < bar_ema21)):
-                    retest = True
-                    break
-            
-            # УСИЛЕН ВЕС: было +1, стало +2 (pullback = ключевой фактор!)
-            components['retest_tag'] = 2 if retest else 0
-            
-            # 11. УСИЛЕНО x2: Хвост инициатора (rejection wick = сильный сигнал!)
-            init_upper_wick = init_high - max(init_open, init_close)
-            init_upper_wick_atr = init_upper_wick / atr_init
-            # УСИЛЕН ВЕС: было +1, стало +2 (wick показывает отклонение!)
-            components['initiator_wick'] = 2 if init_upper_wick_atr >= 0.25 else 0
+                components['close_position'] = -1  # Цена выше EMA200 для SHORT
+            
+            slope_sign = -1
+            gap_atr = (conf_close - atr_lower) / atr_conf
+            confirm_with_direction = conf_close < conf_open
+            base_bars = int(window['base_short'][conf - 3:conf].sum())
+            retest = bool(window['retest_short'][conf - 5:conf].any())
+            
+            # 11. Хвост инициатора (верхний)
+            init_wick_atr = (init_high - max(init_open, init_close)) / atr_init
+        
+        # 2. Близко к EMA200 = отлично, далеко = вход на вершине импульса
+        if depth_atr < 0.30:
+            components['confirm_depth'] = 2
+        elif depth_atr < 0.50:
+            components['confirm_depth'] = 1
+        elif depth_atr >= 1.0:
+            components['confirm_depth'] = -2
+        elif depth_atr >= 0.70:
+            components['confirm_depth'] = -1
+        else:
+            components['confirm_depth'] = 0
+        
+        # 4. Наклон EMA200 по направлению сигнала
+        if slope200_norm * slope_sign >= 0.20:
+            components['slope200'] = 1
+        elif slope200_norm * slope_sign <= -0.20:
+            components['slope200'] = -1
+        else:
+            components['slope200'] = 0
+        
+        # 6. Близко к внешней ATR полосе = перекупленность/перепроданность = штраф
+        if gap_atr < 0.20:
+            components['gap_to_atr'] = -2
+        elif gap_atr < 0.40:
+            components['gap_to_atr'] = -1
+        elif gap_atr >= 0.80:
+            components['gap_to_atr'] = 1
+        else:
+            components['gap_to_atr'] = 0
+        
+        # 7. Липучка (штраф за ложный пробой)
+        components['lipuchka'] = -2 if touches >= 3 else 0
+        
+        # 8. Цвет подтверждения по направлению
+        if confirm_with_direction:
+            components['confirm_color'] = 1
+        elif depth_atr < 0.30:
+            components['confirm_color'] = -1
+        else:
+            components['confirm_color'] = 0
+        
+        # 9. Break-and-Base (консолидация = сильный сигнал)
+        components['break_and_base'] = 2 if base_bars >= 2 else 0
+        
+        # 10. Retest-tag (pullback к EMA13/21)
+        components['retest_tag'] = 2 if retest else 0
+        
+        # 11. Хвост инициатора (rejection wick)
+        components['initiator_wick'] = 2 if init_wick_atr >= 0.25 else 0
+        
+        # 12. Volume Confirmation: объем инициатора против среднего за volume_avg_period баров ДО него
+        if initiator_idx >= self.volume_avg_period:
+            init_volume = indicators['volume'][initiator_idx]
+            avg_volume = np.nanmean(indicators['volume'][initiator_idx - self.volume_avg_period:initiator_idx])
             
-            # 12. ФАЗА 2: Volume Confirmation (2025 best practice!)
-            # SHORT: та же логика что и для LONG
-            init_volume = indicators['volume'].iloc[initiator_idx]
+            volume_ratio = init_volume / avg_volume if avg_volume > 0 else 0
             
-            # Рассчитать средний объем за volume_avg_period баров ДО инициатора
-            if initiator_idx >= self.volume_avg_period:
-                volume_lookback_start = initiator_idx - self.volume_avg_period
-                avg_volume = indicators['volume'].iloc[volume_lookback_start:initiator_idx].mean()
-                
-                volume_ratio = init_volume / avg_volume if avg_volume > 0 else 0
-                
-                if volume_ratio >= self.volume_breakout_multiplier * 1.5:
-                    # Очень сильный объем (>= 1.8× среднего)
-                    components['volume_confirmation'] = 2
-                elif volume_ratio >= self.volume_breakout_multiplier:
-                    # Хороший объем (>= 1.2× среднего)
-                    components['volume_confirmation'] = 1
-                elif volume_ratio < 0.8:
-                    # Слабый объем (< 0.8× среднего) = плохо
-                    components['volume_confirmation'] = -1
-                else:
-                    components['volume_confirmation'] = 0
+            if volume_ratio >= self.volume_breakout_multiplier * 1.5:
+                components['volume_confirmation'] = 2  # Очень сильный объем (>= 1.8× среднего)
+            elif volume_ratio >= self.volume_breakout_multiplier:
+                components['volume_confirmation'] = 1  # Хороший объем (>= 1.2× среднего)
+            elif volume_ratio < 0.8:
+                components['volume_confirmation'] = -1  # Слабый объем
             else:
-                # Недостаточно данных для расчета среднего объема
                 components['volume_confirmation'] = 0
+        else:
+            # Недостаточно данных для расчета среднего объема
+            components['volume_confirmation'] = 0
         
-        # Итоговый score
+        # Итоговый score (компоненты в порядке спецификации - так они пишутся в JSONL)
+        components = {name: components[name] for name in self.SCORE_COMPONENTS}
         score_total = sum(components.values())
         
         return (score_total, components)
@@ -826,7 +761,7 @@ class ActionPriceEngine:
         self,
         symbol: str,
         df: pd.DataFrame,
-        indicators: pd.DataFrame,
+        indicators: Dict[str, np.ndarray],
         direction: str,
         initiator_idx: int,
         confirm_idx: int,
@@ -844,15 +779,15 @@ class ActionPriceEngine:
             Dict с entry, sl, tp1, tp2 или None
         """
         # Close подтверждающей свечи (техническая точка для TP)
-        confirm_close = indicators['close'].iloc[confirm_idx]
+        confirm_close = indicators['close'][confirm_idx]
         
         # ATR для буфера
-        atr = indicators['atr'].iloc[initiator_idx]
+        atr = indicators['atr'][initiator_idx]
         sl_buffer = atr * self.sl_buffer_atr
         
         if direction == 'long':
             # SL за экстремумом инициатора (low - буфер)
-            sl = indicators['low'].iloc[initiator_idx] - sl_buffer
+            sl = indicators['low'][initiator_idx] - sl_buffer
             
             # Risk от SL до Close подтверждающей (фиксированный)
             risk_r = confirm_close - sl
@@ -871,7 +806,7 @@ class ActionPriceEngine:
             
         else:  # SHORT
             # SL за экстремумом инициатора (high + буфер)
-            sl = indicators['high'].iloc[initiator_idx] + sl_buffer
+            sl = indicators['high'][initiator_idx] + sl_buffer
             
             # Risk от SL до Close подтверждающей (фиксированный)
             risk_r = sl - confirm_close
@@ -923,7 +858,7 @@ class ActionPriceEngine:
         score_total: float,
         score_components: Dict[str, float],
         df: pd.DataFrame,
-        indicators: pd.DataFrame,
+        indicators: Dict[str, np.ndarray],
         initiator_idx: int,
         confirm_idx: int,
         levels: Dict
@@ -932,10 +867,7 @@ class ActionPriceEngine:
         Собрать все данные для JSONL лога согласно спецификации
         """
         # Signal ID - берем timestamp из колонки open_time, а не из индекса
-        if 'open_time' in indicators.columns:
-            timestamp_val = indicators['open_time'].iloc[confirm_idx]
-        else:
-            timestamp_val = indicators.index[confirm_idx]
+        timestamp_val = indicators['open_time'][confirm_idx]
         
         if isinstance(timestamp_val, pd.Timestamp):
             timestamp = timestamp_val
@@ -947,10 +879,7 @@ class ActionPriceEngine:
         ).hexdigest()[:16]
         
         # Timestamp инициатора
-        if 'open_time' in indicators.columns:
-            init_timestamp_val = indicators['open_time'].iloc[initiator_idx]
-        else:
-            init_timestamp_val = indicators.index[initiator_idx]
+        init_timestamp_val = indicators['open_time'][initiator_idx]
         
         if isinstance(init_timestamp_val, pd.Timestamp):
             init_timestamp = init_timestamp_val
@@ -958,41 +887,41 @@ class ActionPriceEngine:
             init_timestamp = pd.to_datetime(init_timestamp_val)
         
         # Данные инициатора ([2])
-        init_open = indicators['open'].iloc[initiator_idx]
-        init_high = indicators['high'].iloc[initiator_idx]
-        init_low = indicators['low'].iloc[initiator_idx]
-        init_close = indicators['close'].iloc[initiator_idx]
-        init_atr = indicators['atr'].iloc[initiator_idx]
-        init_ema200 = indicators['ema200'].iloc[initiator_idx]
+        init_open = indicators['open'][initiator_idx]
+        init_high = indicators['high'][initiator_idx]
+        init_low = indicators['low'][initiator_idx]
+        init_close = indicators['close'][initiator_idx]
+        init_atr = indicators['atr'][initiator_idx]
+        init_ema200 = indicators['ema200'][initiator_idx]
         
         # Данные подтверждения ([1])
-        conf_open = indicators['open'].iloc[confirm_idx]
-        conf_high = indicators['high'].iloc[confirm_idx]
-        conf_low = indicators['low'].iloc[confirm_idx]
-        conf_close = indicators['close'].iloc[confirm_idx]
-        conf_atr = indicators['atr'].iloc[confirm_idx]
-        conf_ema200 = indicators['ema200'].iloc[confirm_idx]
+        conf_open = indicators['open'][confirm_idx]
+        conf_high = indicators['high'][confirm_idx]
+        conf_low = indicators['low'][confirm_idx]
+        conf_close = indicators['close'][confirm_idx]
+        conf_atr = indicators['atr'][confirm_idx]
+        conf_ema200 = indicators['ema200'][confirm_idx]
         
         # EMA на инициаторе
-        init_ema5 = indicators['ema5'].iloc[initiator_idx]
-        init_ema9 = indicators['ema9'].iloc[initiator_idx]
-        init_ema13 = indicators['ema13'].iloc[initiator_idx]
-        init_ema21 = indicators['ema21'].iloc[initiator_idx]
+        init_ema5 = indicators['ema5'][initiator_idx]
+        init_ema9 = indicators['ema9'][initiator_idx]
+        init_ema13 = indicators['ema13'][initiator_idx]
+        init_ema21 = indicators['ema21'][initiator_idx]
         
         # EMA на подтверждении
-        conf_ema5 = indicators['ema5'].iloc[confirm_idx]
-        conf_ema9 = indicators['ema9'].iloc[confirm_idx]
-        conf_ema13 = indicators['ema13'].iloc[confirm_idx]
-        conf_ema21 = indicators['ema21'].iloc[confirm_idx]
+        conf_ema5 = indicators['ema5'][confirm_idx]
+        conf_ema9 = indicators['ema9'][confirm_idx]
+        conf_ema13 = indicators['ema13'][confirm_idx]
+        conf_ema21 = indicators['ema21'][confirm_idx]
         
         # ATR полосы
-        init_atr_upper = indicators['atr_upper'].iloc[initiator_idx]
-        init_atr_lower = indicators['atr_lower'].iloc[initiator_idx]
-        conf_atr_upper = indicators['atr_upper'].iloc[confirm_idx]
-        conf_atr_lower = indicators['atr_lower'].iloc[confirm_idx]
+        init_atr_upper = indicators['atr_upper'][initiator_idx]
+        init_atr_lower = indicators['atr_lower'][initiator_idx]
+        conf_atr_upper = indicators['atr_upper'][confirm_idx]
+        conf_atr_lower = indicators['atr_lower'][confirm_idx]
         
         # Slope EMA200
-        ema200_10bars_ago = indicators['ema200'].iloc[confirm_idx - 10]
+        ema200_10bars_ago = indicators['ema200'][confirm_idx - 10]
         slope200_norm = (conf_ema200 - ema200_10bars_ago) / conf_atr
         
         # Веер EMA state
@@ -1037,13 +966,8 @@ class ActionPriceEngine:
             close_vs_ema_fan = 'inside'
         
         # Касания EMA200 за 5 баров
-        touches_ema200_last5 = 0
-        for i in range(initiator_idx - 5, initiator_idx):
-            bar_low = indicators['low'].iloc[i]
-            bar_high = indicators['high'].iloc[i]
-            ema200_bar = indicators['ema200'].iloc[i]
-            if bar_low <= ema200_bar <= bar_high:
-                touches_ema200_last5 += 1
+        init = self._from_end(indicators, initiator_idx)
+        touches_ema200_last5 = int(self._body_cross_window(indicators)['touch_ema200'][init - 5:init].sum())
         
         # Trend tag
         if slope200_norm >= 0.20 and ema_fan_state == 'bullish':
@@ -1059,9 +983,11 @@ class ActionPriceEngine:
         # Break and base tag
         break_and_base_tag = bool(score_components.get('break_and_base', 0) == 1)
         
-        # Swing High/Low
-        swing_high_price = float(indicators['swing_high'].iloc[confirm_idx])
-        swing_low_price = float(indicators['swing_low'].iloc[confirm_idx])
+        # Swing High/Low (swing_length баров до подтверждения включительно)
+        conf = self._from_end(indicators, confirm_idx)
+        swing = slice(conf - self.swing_length + 1, conf + 1 if conf < -1 else None)
+        swing_high_price = float(np.max(indicators['high'][swing]))
+        swing_low_price = float(np.min(indicators['low'][swing]))
         
         # Создать запись через SignalLogger
         timestamp_dt = timestamp.to_pydatetime() if hasattr(timestamp, 'to_pydatetime') else timestamp
@@ -1145,8 +1071,8 @@ class ActionPriceEngine:
             swing_low_index=None,
             
             # Volume (если есть)
-            initiator_volume=float(indicators['volume'].iloc[initiator_idx]) if 'volume' in indicators else None,
-            confirm_volume=float(indicators['volume'].iloc[confirm_idx]) if 'volume' in indicators else None
+            initiator_volume=float(indicators['volume'][initiator_idx]) if 'volume' in indicators else None,
+            confirm_volume=float(indicators['volume'][confirm_idx]) if 'volume' in indicators else None
         )
         
         # Добавить timestamp инициатора для Telegram сообщения
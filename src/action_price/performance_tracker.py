@@ -9,6 +9,8 @@ import logging
 
 from src.database.models import ActionPriceSignal
 from src.database.db import db
+from src.database.signal_repository import signal_repository
+from src.database.signal_queries import active_filter, summary_totals
 from src.binance.client import BinanceClient
 from src.action_price.logger import get_action_price_logger
 
@@ -62,7 +64,7 @@ class ActionPricePerformanceTracker:
         session = self.db.get_session()
         try:
             active_signals = session.query(ActionPriceSignal).filter(
-                ActionPriceSignal.status.in_(['PENDING', 'ACTIVE'])
+                active_filter(ActionPriceSignal)
             ).all()
             
             if not active_signals:
@@ -519,79 +521,71 @@ class ActionPricePerformanceTracker:
         Returns:
             Dict со статистикой
         """
-        session = self.db.get_session()
-        try:
-            start_date = datetime.now(pytz.UTC) - timedelta(days=days)
-            
-            query = session.query(ActionPriceSignal).filter(
-                ActionPriceSignal.created_at >= start_date
-            )
-            
-            if pattern_type:
-                query = query.filter(ActionPriceSignal.pattern_type == pattern_type)
-            
-            signals = query.all()
-            
-            if not signals:
-                return {
-                    'total_signals': 0,
-                    'closed_signals': 0,
-                    'active_signals': 0,
-                    'wins': 0,
-                    'losses': 0,
-                    'win_rate': 0.0,
-                    'avg_pnl': 0.0,
-                    'total_pnl': 0.0,
-                    'avg_win': 0.0,
-                    'avg_loss': 0.0,
-                    'tp1_count': 0,
-                    'tp2_count': 0,
-                    'trailing_stop_count': 0,
-                    'breakeven_count': 0,
-                    'time_stop_count': 0
-                }
-            
-            total = len(signals)
-            closed = [s for s in signals if s.status in ['WIN', 'LOSS']]
-            wins = [s for s in closed if s.status == 'WIN']
-            losses = [s for s in closed if s.status == 'LOSS']
-            
-            # Подсчет exit reasons (взаимоисключающие)
-            tp1_count = len([s for s in closed if s.exit_reason == 'TAKE_PROFIT_1'])
-            tp2_count = len([s for s in closed if s.exit_reason == 'TAKE_PROFIT_2'])
-            trailing_stop_count = len([s for s in closed if s.exit_reason == 'TRAILING_STOP'])
-            breakeven_count = len([s for s in closed if s.exit_reason == 'BREAKEVEN'])
-            time_stop_count = len([s for s in closed if 'TIME_STOP' in (s.exit_reason or '')])
-            
-            win_rate = (len(wins) / len(closed) * 100) if closed else 0.0
-            
-            closed_with_pnl = [s for s in closed if s.pnl_percent is not None]
-            avg_pnl = sum(float(s.pnl_percent) for s in closed_with_pnl) / len(closed_with_pnl) if closed_with_pnl else 0.0
-            total_pnl = sum(float(s.pnl_percent) for s in closed_with_pnl)
-            
-            wins_with_pnl = [s for s in wins if s.pnl_percent is not None]
-            losses_with_pnl = [s for s in losses if s.pnl_percent is not None]
-            
+        start_date = datetime.now(pytz.UTC) - timedelta(days=days)
+        
+        # Отчет читает через read-only соединение (не мешает записи сигналов)
+        criteria = [ActionPriceSignal.created_at >= start_date]
+        if pattern_type:
+            criteria.append(ActionPriceSignal.pattern_type == pattern_type)
+        
+        # Агрегаты (status, exit_reason) по covering индексу - строки сигналов не читаются
+        rows = await signal_repository.summary(
+            ActionPriceSignal, ActionPriceSignal.exit_reason, start_date, *criteria
+        )
+        
+        if not rows:
             return {
-                'total_signals': total,
-                'closed_signals': len(closed),
-                'active_signals': total - len(closed),
-                'wins': len(wins),
-                'losses': len(losses),
-                'win_rate': round(win_rate, 2),
-                'avg_pnl': round(avg_pnl, 2),
-                'total_pnl': round(total_pnl, 2),
-                'avg_win': round(sum(float(s.pnl_percent) for s in wins_with_pnl) / len(wins_with_pnl), 2) if wins_with_pnl else 0.0,
-                'avg_loss': round(sum(float(s.pnl_percent) for s in losses_with_pnl) / len(losses_with_pnl), 2) if losses_with_pnl else 0.0,
-                'tp1_count': tp1_count,
-                'tp2_count': tp2_count,
-                'trailing_stop_count': trailing_stop_count,  # НОВОЕ: Трейлинг стоп для 30% остатка
-                'breakeven_count': breakeven_count,
-                'time_stop_count': time_stop_count
+                'total_signals': 0,
+                'closed_signals': 0,
+                'active_signals': 0,
+                'wins': 0,
+                'losses': 0,
+                'win_rate': 0.0,
+                'avg_pnl': 0.0,
+                'total_pnl': 0.0,
+                'avg_win': 0.0,
+                'avg_loss': 0.0,
+                'tp1_count': 0,
+                'tp2_count': 0,
+                'trailing_stop_count': 0,
+                'breakeven_count': 0,
+                'time_stop_count': 0
             }
-            
-        finally:
-            session.close()
+        
+        closed_statuses = ['WIN', 'LOSS']
+        total = sum(row[2] for row in rows)
+        closed_count, closed_pnl_count, total_pnl = summary_totals(rows, closed_statuses)
+        wins_count, wins_pnl_count, wins_pnl = summary_totals(rows, ['WIN'])
+        losses_count, losses_pnl_count, losses_pnl = summary_totals(rows, ['LOSS'])
+        
+        # Подсчет exit reasons (взаимоисключающие)
+        tp1_count = summary_totals(rows, closed_statuses, lambda reason: reason == 'TAKE_PROFIT_1')[0]
+        tp2_count = summary_totals(rows, closed_statuses, lambda reason: reason == 'TAKE_PROFIT_2')[0]
+        trailing_stop_count = summary_totals(rows, closed_statuses, lambda reason: reason == 'TRAILING_STOP')[0]
+        breakeven_count = summary_totals(rows, closed_statuses, lambda reason: reason == 'BREAKEVEN')[0]
+        time_stop_count = summary_totals(rows, closed_statuses, lambda reason: 'TIME_STOP' in reason)[0]
+        
+        win_rate = (wins_count / closed_count * 100) if closed_count else 0.0
+        avg_pnl = total_pnl / closed_pnl_count if closed_pnl_count else 0.0
+        
+        return {
+            'total_signals': total,
+            'closed_signals': closed_count,
+            'active_signals': total - closed_count,
+            'wins': wins_count,
+            'losses': losses_count,
+            'win_rate': round(win_rate, 2),
+            'avg_pnl': round(avg_pnl, 2),
+            'total_pnl': round(total_pnl, 2),
+            'avg_win': round(wins_pnl / wins_pnl_count, 2) if wins_pnl_count else 0.0,
+            'avg_loss': round(losses_pnl / losses_pnl_count, 2) if losses_pnl_count else 0.0,
+            'tp1_count': tp1_count,
+            'tp2_count': tp2_count,
+            'trailing_stop_count': trailing_stop_count,  # НОВОЕ: Трейлинг стоп для 30% остатка
+            'breakeven_count': breakeven_count,
+            'time_stop_count': time_stop_count
+        }
+        
     
     async def get_pattern_breakdown(self, days: int = 7) -> Dict:
         """
@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Optional, Literal
 from dataclasses import dataclass
+from src.indicators.percentiles import percentile_rank
 from src.utils.logger import logger
 
 
@@ -185,8 +186,7 @@ class MarketRegimeDetectorPro:
         
         # Перцентиль текущей ширины за последние 100 баров
         current_width = bb_width.iloc[-1]
-        historical_widths = bb_width.iloc[-self.atr_lookback:]
-        percentile = (historical_widths < current_width).sum() / len(historical_widths) * 100
+        percentile = percentile_rank(bb_width, current_width, self.atr_lookback)
         
         return current_width, percentile
     
@@ -207,8 +207,7 @@ class MarketRegimeDetectorPro:
         
         # Перцентиль текущего ATR
         current_atr = atr.iloc[-1]
-        historical_atr = atr.iloc[-self.atr_lookback:]
-        percentile = (historical_atr < current_atr).sum() / len(historical_atr) * 100
+        percentile = percentile_rank(atr, current_atr, self.atr_lookback)
         
         return percentile
     
@@ -6,95 +6,129 @@ from pathlib import Path
 import pytz
 import pandas as pd
 import math
+import time
 from src.utils.logger import logger
 from src.utils.config import config
+from src.utils.perf_metrics import perf_metrics
 from src.binance.client import BinanceClient
 from src.database.db import db
+from src.database.executor import db_executor
 from src.database.models import Candle, Trade
+from src.data.integrity_auditor import CandleIntegrityAuditor, GapManifest, INTERVAL_SECONDS
+from src.data.candle_writer import upsert_klines
+from src.data.candle_snapshot import CandleSnapshot
 import zipfile
 import io
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.telegram.bot import TelegramBot
+    from src.data.candle_writer import CandleWriter
 
 
 class DataLoader:
     BINANCE_VISION_URL = "https://data.binance.vision"
+    KLINES_PAGE_LIMIT = 1500  # Максимум свечей на запрос /fapi/v1/klines (weight 10)
     
     def __init__(self, client: BinanceClient, telegram_bot: Optional['TelegramBot'] = None):
         self.client = client
         self.telegram_bot = telegram_bot
         self.cache_dir = Path(config.get('data_sources.cache_directory', 'data/cache'))
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.candle_writer: Optional['CandleWriter'] = None  # Write-behind writer (устанавливает main)
     
     async def download_historical_klines(self, symbol: str, interval: str, 
                                         start_date: datetime, end_date: datetime, max_retries: int = 3):
+        """Загрузить свечи за период страницами по KLINES_PAGE_LIMIT свечей
+        
+        ОПТИМИЗАЦИЯ: вместо запроса на каждый день (90 запросов по weight 10 для 15m)
+        история листается страницами максимального размера (~7 запросов для 15m × 90 дней),
+        каждая страница сохраняется в БД своей bulk транзакцией сразу после загрузки.
+        
+        Returns:
+            List: Все загруженные (закрытые) свечи
+        """
         total_days = max(1, math.ceil((end_date - start_date).total_seconds() / 86400))
         logger.info(f"Downloading historical klines for {symbol} {interval} from {start_date} to {end_date} ({total_days} days)")
         
-        current_date = start_date
+        step_ms = INTERVAL_SECONDS.get(interval, 900) * 1000
+        page_span_ms = step_ms * self.KLINES_PAGE_LIMIT
+        start_ms = int(start_date.timestamp() * 1000)
+        end_ms = int(end_date.timestamp() * 1000)
+        total_pages = max(1, math.ceil((end_ms - start_ms) / page_span_ms))
+        
+        cursor_ms = start_ms
         all_klines = []
-        day_counter = 0
+        saved_count = 0
+        page_counter = 0
         
-        while current_date < end_date:
-            start_ms = int(current_date.timestamp() * 1000)
-            end_ms = int((current_date + timedelta(days=1)).timestamp() * 1000)
+        while cursor_ms < end_ms:
+            page_end_ms = min(cursor_ms + page_span_ms - 1, end_ms)
             
             # Retry logic with exponential backoff
             retry_count = 0
-            success = False
+            klines = None
             
-            while retry_count < max_retries and not success:
+            while klines is None:
                 try:
                     klines = await self.client.get_klines(
                         symbol=symbol,
                         interval=interval,
-                        start_time=start_ms,
-                        end_time=end_ms,
-                        limit=1500
+                        start_time=cursor_ms,
+                        end_time=page_end_ms,
+                        limit=self.KLINES_PAGE_LIMIT
                     )
-                    
-                    all_klines.extend(klines)
-                    success = True
-                    
                 except Exception as e:
                     retry_count += 1
                     error_msg = str(e) if str(e) else type(e).__name__
+                    page_start = datetime.fromtimestamp(cursor_ms / 1000, tz=pytz.UTC)
                     if retry_count < max_retries:
                         wait_time = 2 ** retry_count  # Exponential backoff: 2, 4, 8 seconds
-                        logger.warning(f"Error downloading {symbol} {interval} on {current_date.date()}: {error_msg}. Retry {retry_count}/{max_retries} in {wait_time}s")
+                        logger.warning(f"Error downloading {symbol} {interval} from {page_start}: {error_msg}. Retry {retry_count}/{max_retries} in {wait_time}s")
                         await asyncio.sleep(wait_time)
                     else:
-                        logger.error(f"Failed to download {symbol} {interval} on {current_date.date()} after {max_retries} retries: {error_msg}")
+                        logger.error(f"Failed to download {symbol} {interval} from {page_start} after {max_retries} retries: {error_msg}")
                         # Raise exception to stop loading if data is critical
                         raise Exception(f"Data download failed for {symbol} {interval} after {max_retries} retries: {error_msg}")
             
-            if success:
-                day_counter += 1
-                if day_counter % 10 == 0 or current_date >= end_date - timedelta(days=1):
-                    progress = (day_counter / total_days) * 100
-                    logger.info(f"  Progress: {progress:.1f}% ({day_counter}/{total_days} days) - {symbol} {interval}")
-            
-            current_date += timedelta(days=1)
-        
-        # ВАЖНО: Удалить последнюю незакрытую свечу (Binance API всегда возвращает её)
-        # Проверяем что это действительно незакрытая свеча (close_time > now)
-        if all_klines:
-            last_kline = all_klines[-1]
-            last_close_time = datetime.fromtimestamp(last_kline[6] / 1000, tz=pytz.UTC)
-            now = datetime.now(pytz.UTC)
+            # ВАЖНО: Удалить незакрытую свечу (Binance API всегда возвращает текущую свечу)
+            now_ms = int(datetime.now(pytz.UTC).timestamp() * 1000)
+            if klines and klines[-1][6] > now_ms:
+                logger.debug(f"Removed last unclosed candle from {symbol} {interval} (close_time: {klines[-1][6]})")
+                klines = klines[:-1]
+            
+            if klines:
+                saved_count += await self._store_klines(symbol, interval, klines)
+                all_klines.extend(klines)
+                if len(klines) >= self.KLINES_PAGE_LIMIT:
+                    # Полная страница - продолжаем сразу после последней полученной свечи
+                    cursor_ms = klines[-1][0] + step_ms
+                else:
+                    # Неполная страница - диапазон страницы исчерпан
+                    cursor_ms = max(page_end_ms + 1, klines[-1][0] + step_ms)
+            else:
+                # Пустая страница (символ еще не торговался) - переходим к следующей
+                cursor_ms = page_end_ms + 1
             
-            if last_close_time > now:
-                # Это незакрытая свеча - удаляем
-                all_klines = all_klines[:-1]
-                logger.debug(f"Removed last unclosed candle from {symbol} {interval} (close_time: {last_close_time})")
+            page_counter += 1
+            if total_pages > 1 and (page_counter % 5 == 0 or cursor_ms >= end_ms):
+                progress = min(100.0, page_counter / total_pages * 100)
+                logger.info(f"  Progress: {progress:.1f}% ({page_counter}/{total_pages} pages) - {symbol} {interval}")
         
-        saved_count = self._save_klines_to_db(symbol, interval, all_klines)
         logger.info(f"Saved {saved_count} klines for {symbol} {interval}")
         
         return all_klines
     
+    async def _store_klines(self, symbol: str, interval: str, klines: List) -> int:
+        """Save klines via write-behind CandleWriter (if running) or directly
+        
+        Returns:
+            int: Number of candles saved (after commit)
+        """
+        if self.candle_writer and self.candle_writer.is_running:
+            return await self.candle_writer.write(symbol, interval, klines)
+        return self._save_klines_to_db(symbol, interval, klines)
+    
     def _save_klines_to_db(self, symbol: str, interval: str, klines: List) -> int:
         """Save klines to database using BULK UPSERT (100-500x faster)
         
@@ -107,47 +141,13 @@ class DataLoader:
         if not klines:
             return 0
         
+        started = time.perf_counter()
         session = db.get_session()
         
         try:
-            # Подготовить данные для bulk insert
-            candles_data = []
-            for kline in klines:
-                candles_data.append({
-                    'symbol': symbol,
-                    'timeframe': interval,
-                    'open_time': datetime.fromtimestamp(kline[0] / 1000, tz=pytz.UTC),
-                    'open': float(kline[1]),
-                    'high': float(kline[2]),
-                    'low': float(kline[3]),
-                    'close': float(kline[4]),
-                    'volume': float(kline[5]),
-                    'close_time': datetime.fromtimestamp(kline[6] / 1000, tz=pytz.UTC),
-                    'quote_volume': float(kline[7]),
-                    'trades': int(kline[8]),
-                    'taker_buy_base': float(kline[9]),
-                    'taker_buy_quote': float(kline[10])
-                })
-            
-            # BULK UPSERT используя SQLite INSERT OR REPLACE
+            # BULK UPSERT (INSERT OR REPLACE) + candle_coverage одной транзакцией
             # Это в 100-500 раз быстрее чем циклы SELECT + INSERT/UPDATE
-            from sqlalchemy import text
-            
-            # SQLite: INSERT OR REPLACE автоматически обновит существующие записи
-            insert_sql = text("""
-                INSERT OR REPLACE INTO candles (
-                    symbol, timeframe, open_time, open, high, low, close,
-                    volume, close_time, quote_volume, trades, 
-                    taker_buy_base, taker_buy_quote
-                ) VALUES (
-                    :symbol, :timeframe, :open_time, :open, :high, :low, :close,
-                    :volume, :close_time, :quote_volume, :trades,
-                    :taker_buy_base, :taker_buy_quote
-                )
-            """)
-            
-            # Выполнить bulk insert (все записи одним запросом)
-            session.execute(insert_sql, candles_data)
+            upsert_klines(session, symbol, interval, klines)
             session.commit()
             
             return len(klines)
@@ -160,6 +160,7 @@ class DataLoader:
             return 0
         finally:
             session.close()
+            perf_metrics.record('db_write', 'candles', time.perf_counter() - started)
     
     def _is_data_fresh(self, last_candle_time: datetime, interval: str, current_time: datetime) -> bool:
         """Проверить свежесть данных - актуальна ли последняя свеча для текущего времени
@@ -243,43 +244,33 @@ class DataLoader:
         
         try:
             for idx, interval in enumerate(timeframes, 1):
-                session = db.get_session()
-                try:
-                    # Находим последнюю свечу в БД
-                    latest_candle = session.query(Candle).filter(
-                        Candle.symbol == symbol,
-                        Candle.timeframe == interval
-                    ).order_by(Candle.open_time.desc()).first()
+                # Находим последнюю свечу в БД (поток-читатель DB executor)
+                last_time: Optional[datetime] = await db_executor.read(self._query_last_open_time, symbol, interval)
+                
+                if last_time:
+                    # Есть данные - проверяем свежесть
+                    # Убеждаемся что last_time имеет timezone UTC
+                    if last_time.tzinfo is None:
+                        last_time = pytz.UTC.localize(last_time)
                     
-                    if latest_candle and latest_candle.open_time:
-                        # Есть данные - проверяем свежесть
-                        # SQLAlchemy возвращает datetime, но LSP не видит тип - явно приводим
-                        last_time: datetime = latest_candle.open_time  # type: ignore
-                        
-                        # Убеждаемся что last_time имеет timezone UTC
-                        if last_time.tzinfo is None:
-                            last_time = pytz.UTC.localize(last_time)
-                        
-                        # ✅ ОПТИМИЗАЦИЯ: Проверка свежести перед запросом к API
-                        if self._is_data_fresh(last_time, interval, full_end_date):
-                            if not silent:
-                                logger.info(f"  [{idx}/{total_tf}] ✓ {symbol} {interval} up-to-date (fresh)")
-                            continue  # SKIP запрос к Binance!
-                        
-                        # Данные устарели - загружаем gap
-                        gap_start = last_time + timedelta(minutes=1)
-                        gap_end = full_end_date
-                        
+                    # ✅ ОПТИМИЗАЦИЯ: Проверка свежести перед запросом к API
+                    if self._is_data_fresh(last_time, interval, full_end_date):
                         if not silent:
-                            logger.info(f"  [{idx}/{total_tf}] 🔄 {symbol} {interval} - updating from {gap_start.strftime('%Y-%m-%d %H:%M')}")
-                        await self.download_historical_klines(symbol, interval, gap_start, gap_end)
-                    else:
-                        # Нет данных - загружаем все 90 дней
-                        if not silent:
-                            logger.info(f"  [{idx}/{total_tf}] 📥 {symbol} {interval} - loading {warm_up_days} days")
-                        await self.download_historical_klines(symbol, interval, full_start_date, full_end_date)
-                finally:
-                    session.close()
+                            logger.info(f"  [{idx}/{total_tf}] ✓ {symbol} {interval} up-to-date (fresh)")
+                        continue  # SKIP запрос к Binance!
+                    
+                    # Данные устарели - загружаем gap
+                    gap_start = last_time + timedelta(minutes=1)
+                    gap_end = full_end_date
+                    
+                    if not silent:
+                        logger.info(f"  [{idx}/{total_tf}] 🔄 {symbol} {interval} - updating from {gap_start.strftime('%Y-%m-%d %H:%M')}")
+                    await self.download_historical_klines(symbol, interval, gap_start, gap_end)
+                else:
+                    # Нет данных - загружаем все 90 дней
+                    if not silent:
+                        logger.info(f"  [{idx}/{total_tf}] 📥 {symbol} {interval} - loading {warm_up_days} days")
+                    await self.download_historical_klines(symbol, interval, full_start_date, full_end_date)
                 
                 # Validate continuity and fix internal gaps
                 gaps = self.validate_candles_continuity(symbol, interval)
@@ -536,71 +527,42 @@ class DataLoader:
         Returns:
             List of gap dictionaries with details about missing candles
         """
-        session = db.get_session()
-        gaps = []
+        # Vectorized: int64 open_time array + np.diff instead of walking ORM objects
+        manifest = CandleIntegrityAuditor(db).audit(symbols=[symbol], timeframes=[interval])
+        return manifest.gaps
+    
+    def export_snapshot(self, directory: str, symbols: Optional[List[str]] = None,
+                        timeframes: Optional[List[str]] = None) -> dict:
+        """Export candle store as portable compressed snapshot (npz per symbol + manifest)
         
-        try:
-            # Get all candles ordered by time
-            candles = session.query(Candle).filter(
-                Candle.symbol == symbol,
-                Candle.timeframe == interval
-            ).order_by(Candle.open_time).all()
-            
-            if len(candles) < 2:
-                return gaps
-            
-            # Define expected interval in minutes
-            interval_minutes = {
-                '1m': 1,
-                '5m': 5,
-                '15m': 15,
-                '1h': 60,
-                '4h': 240,
-                '1d': 1440
-            }.get(interval, 15)
-            
-            # Check continuity between consecutive candles
-            for i in range(len(candles) - 1):
-                current_time = candles[i].open_time
-                next_time = candles[i + 1].open_time
-                
-                # Ensure timezone aware
-                if current_time.tzinfo is None:
-                    current_time = pytz.UTC.localize(current_time)
-                if next_time.tzinfo is None:
-                    next_time = pytz.UTC.localize(next_time)
-                
-                expected_next = current_time + timedelta(minutes=interval_minutes)
-                
-                # Detect gap
-                if next_time != expected_next:
-                    gap_minutes = (next_time - expected_next).total_seconds() / 60
-                    missing_candles = int(gap_minutes / interval_minutes)
-                    
-                    gaps.append({
-                        'symbol': symbol,
-                        'interval': interval,
-                        'gap_start': expected_next,
-                        'gap_end': next_time,
-                        'gap_minutes': gap_minutes,
-                        'missing_candles': missing_candles,
-                        'after_candle': current_time
-                    })
-            
-            return gaps
-            
-        finally:
-            session.close()
+        Returns:
+            Snapshot manifest dict
+        """
+        return CandleSnapshot(db).export(directory, symbols=symbols, timeframes=timeframes)
     
-    async def auto_fix_gaps(self, gaps: list) -> int:
+    def import_snapshot(self, directory: str, symbols: Optional[List[str]] = None) -> dict:
+        """Bulk-load candle snapshot into DB (existing candles are kept, coverage rebuilt)
+        
+        After import fast catchup downloads only the tail (snapshot end → now).
+        
+        Returns:
+            {'symbols', 'rows', 'skipped', 'elapsed_s'}
+        """
+        return CandleSnapshot(db).import_snapshot(directory, symbols=symbols)
+    
+    async def auto_fix_gaps(self, gaps) -> int:
         """Automatically fix detected gaps by downloading missing candles
         
         Args:
             gaps: List of gap dictionaries from validate_candles_continuity
+                  or GapManifest from CandleIntegrityAuditor.audit
             
         Returns:
             int: Number of gaps successfully fixed
         """
+        if isinstance(gaps, GapManifest):
+            gaps = gaps.gaps
+        
         if not gaps:
             return 0
         
@@ -679,36 +641,34 @@ class DataLoader:
             symbol: Trading pair symbol
             interval: Timeframe (15m, 1h, 4h, 1d)
         """
-        session = db.get_session()
-        try:
-            latest_candle = session.query(Candle).filter(
-                Candle.symbol == symbol,
-                Candle.timeframe == interval
-            ).order_by(Candle.open_time.desc()).first()
-            
-            if latest_candle and latest_candle.open_time:
-                # SQLAlchemy возвращает datetime, но LSP не видит тип - явно приводим
-                last_time: datetime = latest_candle.open_time  # type: ignore
-                
-                # Убеждаемся что last_time имеет timezone UTC
-                if last_time.tzinfo is None:
-                    last_time = pytz.UTC.localize(last_time)
-                
-                end_date = datetime.now(pytz.UTC)
-                
-                # FIXED: Interval-aware threshold instead of fixed 300s
-                # Calculate gap from last_time to detect missing candles correctly
-                interval_seconds = self._get_interval_minutes(interval) * 60
-                gap_seconds = (end_date - last_time).total_seconds()
-                
-                # Update if gap >= 1 full candle duration
-                if gap_seconds >= interval_seconds:
-                    # Use last_time + 1 minute as start to avoid duplicate candles
-                    start_date = last_time + timedelta(minutes=1)
-                    logger.info(f"Updating missing candles for {symbol} {interval} from {start_date}")
-                    await self.download_historical_klines(symbol, interval, start_date, end_date)
-        finally:
-            session.close()
+        # Последняя свеча - в потоке-читателе; session не держится открытой во время загрузки
+        last_time: Optional[datetime] = await db_executor.read(self._query_last_open_time, symbol, interval)
+        
+        if last_time:
+            # Убеждаемся что last_time имеет timezone UTC
+            if last_time.tzinfo is None:
+                last_time = pytz.UTC.localize(last_time)
+            
+            end_date = datetime.now(pytz.UTC)
+            
+            # FIXED: Interval-aware threshold instead of fixed 300s
+            # Calculate gap from last_time to detect missing candles correctly
+            interval_seconds = self._get_interval_minutes(interval) * 60
+            gap_seconds = (end_date - last_time).total_seconds()
+            
+            # Update if gap >= 1 full candle duration
+            if gap_seconds >= interval_seconds:
+                # Use last_time + 1 minute as start to avoid duplicate candles
+                start_date = last_time + timedelta(minutes=1)
+                logger.info(f"Updating missing candles for {symbol} {interval} from {start_date}")
+                await self.download_historical_klines(symbol, interval, start_date, end_date)
+    
+    @staticmethod
+    def _query_last_open_time(session, symbol: str, interval: str) -> Optional[datetime]:
+        return session.query(Candle.open_time).filter(
+            Candle.symbol == symbol,
+            Candle.timeframe == interval
+        ).order_by(Candle.open_time.desc()).limit(1).scalar()
     
     async def refresh_recent_candles(self, symbol: str, days: int = 10):
         """
@@ -734,32 +694,47 @@ class DataLoader:
                 logger.error(f"❌ Failed to refresh {symbol} {interval}: {e}")
     
     def get_candles(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+        """Синхронное чтение свечей (для корутин - get_candles_async)"""
+        started = time.perf_counter()
         session = db.get_session()
         try:
-            candles = session.query(Candle).filter(
-                Candle.symbol == symbol,
-                Candle.timeframe == interval
-            ).order_by(Candle.open_time.desc()).limit(limit).all()
-            
-            if not candles:
-                return pd.DataFrame()
-            
-            data = [{
-                'open_time': c.open_time,
-                'open': c.open,
-                'high': c.high,
-                'low': c.low,
-                'close': c.close,
-                'volume': c.volume,
-                'taker_buy_base': c.taker_buy_base,
-                'taker_buy_quote': c.taker_buy_quote
-            } for c in reversed(candles)]
-            
-            df = pd.DataFrame(data)
-            df['open_time'] = pd.to_datetime(df['open_time'], utc=True)
-            # ВАЖНО: НЕ делать set_index - Action Price требует open_time как колонку для timestamp-based selection
-            # df.set_index('open_time', inplace=True)
-            
-            return df
+            return self._query_candles(session, symbol, interval, limit)
         finally:
             session.close()
+            perf_metrics.record('db_read', 'get_candles', time.perf_counter() - started)
+    
+    async def get_candles_async(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+        """get_candles в потоке-читателе DB executor - event loop не ждет SQLite"""
+        started = time.perf_counter()
+        try:
+            return await db_executor.read(self._query_candles, symbol, interval, limit)
+        finally:
+            perf_metrics.record('db_read', 'get_candles', time.perf_counter() - started)
+    
+    @staticmethod
+    def _query_candles(session, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        candles = session.query(Candle).filter(
+            Candle.symbol == symbol,
+            Candle.timeframe == interval
+        ).order_by(Candle.open_time.desc()).limit(limit).all()
+        
+        if not candles:
+            return pd.DataFrame()
+        
+        data = [{
+            'open_time': c.open_time,
+            'open': c.open,
+            'high': c.high,
+            'low': c.low,
+            'close': c.close,
+            'volume': c.volume,
+            'taker_buy_base': c.taker_buy_base,
+            'taker_buy_quote': c.taker_buy_quote
+        } for c in reversed(candles)]
+        
+        df = pd.DataFrame(data)
+        df['open_time'] = pd.to_datetime(df['open_time'], utc=True)
+        # ВАЖНО: НЕ делать set_index - Action Price требует open_time как колонку для timestamp-based selection
+        # df.set_index('open_time', inplace=True)
+        
+        return df
@@ -0,0 +1,370 @@
+"""
+Candle Coverage - постоянный watermark / coverage по каждой серии (symbol, timeframe)
+
+Таблица candle_coverage хранит first/last open_time, количество свечей и
+известные пропуски (holes). Обновляется в той же транзакции, что и запись
+свечей (DataLoader._save_klines_to_db), поэтому:
+- FastCatchupLoader берет last open_time одним чтением таблицы
+- PeriodicGapRefill строит план докачки без запросов к candles
+- CandleIntegrityAuditor (полный аудит) пересобирает таблицу - сверка с реальностью
+
+Инвариант: holes - ВСЕ пропуски между first и last (кроме самых старых сверх MAX_HOLES).
+Благодаря этому количество новых свечей в пачке считается без запроса к БД:
+свеча новая, если она вне [first, last] или попадает в hole.
+"""
+
+import bisect
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+from sqlalchemy import Integer, cast, func, select
+
+from src.database.db import db
+from src.database.models import Candle, CandleCoverage
+from src.data.integrity_auditor import (
+    CandleIntegrityAuditor, GapManifest, INTERVAL_SECONDS, DEFAULT_TIMEFRAMES
+)
+
+logger = logging.getLogger('trading_bot')
+
+
+Hole = Tuple[int, int]  # (gap_start_epoch, gap_end_epoch), gap_end = open_time следующей свечи
+
+
+def begin_write(session):
+    """
+    Взять блокировку записи до чтения строки покрытия (BEGIN IMMEDIATE)
+
+    pysqlite открывает транзакцию только перед первым INSERT/DELETE: строка,
+    прочитанная раньше, могла устареть к моменту записи (trim_before retention
+    закоммитился между чтением и BEGIN) и затереться старыми first/count.
+    Если транзакция уже открыта записью этой session - блокировка уже есть.
+    """
+    connection = session.connection().connection.driver_connection
+    if not connection.in_transaction:
+        connection.execute("BEGIN IMMEDIATE")
+
+
+def _to_epoch(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=pytz.UTC)
+    return int(value.timestamp())
+
+
+def _to_datetime(epoch_seconds: int) -> datetime:
+    return datetime.fromtimestamp(int(epoch_seconds), tz=pytz.UTC)
+
+
+def _to_db_time(epoch_seconds: int) -> datetime:
+    """Naive UTC - в том же формате, что open_time в candles"""
+    return datetime.fromtimestamp(int(epoch_seconds), tz=pytz.UTC).replace(tzinfo=None)
+
+
+def holes_in_sequence(times: List[int], step: int) -> List[Hole]:
+    """Пропуски внутри отсортированной последовательности open_time"""
+    return [
+        (prev + step, current)
+        for prev, current in zip(times, times[1:])
+        if current - prev > step
+    ]
+
+
+def merge_batch(first: Optional[int], last: Optional[int], count: int, holes: List[Hole],
+                batch: List[int], step: int) -> Tuple[int, int, int, List[Hole]]:
+    """
+    Применить пачку open_time (отсортированных, уникальных) к покрытию серии
+
+    Returns:
+        (first, last, count, holes)
+    """
+    if first is None:
+        return batch[0], batch[-1], len(batch), holes_in_sequence(batch, step)
+
+    added = 0
+    merged: List[Hole] = []
+
+    # Пачка заполняет известные пропуски (частично или полностью)
+    for hole_start, hole_end in holes:
+        lo = bisect.bisect_left(batch, hole_start)
+        hi = bisect.bisect_left(batch, hole_end)
+        if lo == hi:
+            merged.append((hole_start, hole_end))
+            continue
+        added += hi - lo
+        merged.extend(holes_in_sequence([hole_start - step] + batch[lo:hi] + [hole_end], step))
+
+    # Пачка продлевает серию в прошлое / в будущее
+    below = batch[:bisect.bisect_left(batch, first)]
+    if below:
+        added += len(below)
+        merged.extend(holes_in_sequence(below + [first], step))
+        first = below[0]
+
+    above = batch[bisect.bisect_right(batch, last):]
+    if above:
+        added += len(above)
+        merged.extend(holes_in_sequence([last] + above, step))
+        last = above[-1]
+
+    merged.sort()
+    return first, last, count + added, merged
+
+
+class CandleCoverageStore:
+    """Чтение / обновление таблицы candle_coverage"""
+
+    MAX_HOLES = 500  # Самые старые пропуски сверх лимита отбрасываются (их найдет полный аудит)
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Database instance
+        """
+        self.db = db
+        self._bootstrapped = False
+
+    # ------------------------------------------------------------------
+    # Запись (внутри транзакции сохранения свечей)
+    # ------------------------------------------------------------------
+
+    def apply_batch(self, session, symbol: str, timeframe: str, open_times_ms: Iterable[int]):
+        """
+        Обновить покрытие серии пачкой свечей
+
+        Вызывается ДО INSERT свечей в той же session: commit/rollback
+        применяются к свечам и покрытию вместе.
+        """
+        step = INTERVAL_SECONDS.get(timeframe)
+        if step is None:
+            return
+        batch = sorted({int(ms) // 1000 for ms in open_times_ms})
+        if not batch:
+            return
+
+        begin_write(session)
+        row = session.query(CandleCoverage).filter(
+            CandleCoverage.symbol == symbol,
+            CandleCoverage.timeframe == timeframe
+        ).first()
+
+        if row is None:
+            # Серии нет в таблице: засеять из уже сохраненных свечей (один раз на серию)
+            existing = self._load_series_times(session, symbol, timeframe)
+            if existing:
+                first, last, count, holes = merge_batch(None, None, 0, [], existing, step)
+            else:
+                first, last, count, holes = None, None, 0, []
+            row = CandleCoverage(symbol=symbol, timeframe=timeframe)
+            session.add(row)
+        else:
+            first, last = _to_epoch(row.first_open_time), _to_epoch(row.last_open_time)
+            count, holes = row.candle_count, [tuple(hole) for hole in (row.holes or [])]
+
+        first, last, count, holes = merge_batch(first, last, count, holes, batch, step)
+
+        row.first_open_time = _to_db_time(first)
+        row.last_open_time = _to_db_time(last)
+        row.candle_count = count
+        row.holes = [list(hole) for hole in holes[-self.MAX_HOLES:]]
+        row.updated_at = datetime.now(pytz.UTC).replace(tzinfo=None)
+
+    def trim_before(self, session, symbol: str, timeframe: str, removed: int):
+        """
+        Обновить покрытие серии после удаления самых старых свечей (retention)
+
+        Вызывается ПОСЛЕ DELETE в той же session: first берется из оставшихся
+        свечей (индекс symbol, timeframe, open_time), пропуски до нового first отбрасываются.
+        """
+        if removed <= 0:
+            return
+        begin_write(session)
+        row = session.query(CandleCoverage).filter(
+            CandleCoverage.symbol == symbol,
+            CandleCoverage.timeframe == timeframe
+        ).first()
+        if row is None:
+            return
+
+        new_first = session.query(func.min(Candle.open_time)).filter(
+            Candle.symbol == symbol,
+            Candle.timeframe == timeframe
+        ).scalar()
+        if new_first is None:
+            session.delete(row)
+            return
+
+        first = _to_epoch(new_first)
+        row.first_open_time = _to_db_time(first)
+        row.candle_count = max(0, row.candle_count - removed)
+        row.holes = [list(hole) for hole in (row.holes or []) if hole[1] > first]
+        row.updated_at = datetime.now(pytz.UTC).replace(tzinfo=None)
+
+    def _load_series_times(self, session, symbol: str, timeframe: str) -> List[int]:
+        rows = session.execute(
+            select(cast(func.strftime('%s', Candle.open_time), Integer)).where(
+                Candle.symbol == symbol,
+                Candle.timeframe == timeframe
+            ).order_by(Candle.open_time)
+        ).scalars().all()
+        return sorted(set(rows))
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def load(self, symbols: Optional[Iterable[str]] = None,
+             timeframes: Optional[List[str]] = None) -> Dict[str, Dict[str, Dict]]:
+        """
+        Returns:
+            {symbol: {timeframe: {'count', 'first', 'last', 'holes': [(start, end)]}}}
+            (datetime в UTC)
+        """
+        symbol_filter = set(symbols) if symbols is not None else None
+        query = select(
+            CandleCoverage.symbol, CandleCoverage.timeframe, CandleCoverage.first_open_time,
+            CandleCoverage.last_open_time, CandleCoverage.candle_count, CandleCoverage.holes
+        )
+        if timeframes is not None:
+            query = query.where(CandleCoverage.timeframe.in_(list(timeframes)))
+
+        result: Dict[str, Dict[str, Dict]] = {}
+        session = self.db.get_session()
+        try:
+            for symbol, tf, first, last, count, holes in session.execute(query):
+                # Фильтр символов в памяти: таблица маленькая (символы × таймфреймы)
+                if symbol_filter is not None and symbol not in symbol_filter:
+                    continue
+                result.setdefault(symbol, {})[tf] = {
+                    'count': count,
+                    'first': pytz.UTC.localize(first),
+                    'last': pytz.UTC.localize(last),
+                    'holes': [(_to_datetime(start), _to_datetime(end)) for start, end in (holes or [])],
+                }
+        finally:
+            session.close()
+        return result
+
+    def last_times(self, symbols: List[str], timeframes: List[str]) -> Dict[str, Dict[str, Optional[datetime]]]:
+        """{symbol: {timeframe: last open_time или None}}"""
+        coverage = self.load(symbols, timeframes)
+        return {
+            symbol: {
+                tf: coverage.get(symbol, {}).get(tf, {}).get('last')
+                for tf in timeframes
+            }
+            for symbol in symbols
+        }
+
+    def to_manifest(self, symbols: Optional[Iterable[str]] = None,
+                    timeframes: Optional[List[str]] = None,
+                    since: Optional[datetime] = None) -> GapManifest:
+        """
+        GapManifest из таблицы покрытия (без чтения candles)
+
+        Args:
+            since: Включить только пропуски, заканчивающиеся после since
+        """
+        started = time.perf_counter()
+        timeframes = list(timeframes or DEFAULT_TIMEFRAMES)
+        manifest = GapManifest(created_at=datetime.now(pytz.UTC), timeframes=timeframes)
+
+        for symbol, tfs in self.load(symbols, timeframes).items():
+            for tf, info in tfs.items():
+                manifest.coverage.setdefault(symbol, {})[tf] = {
+                    'count': info['count'], 'first': info['first'], 'last': info['last']
+                }
+                step = timedelta(seconds=INTERVAL_SECONDS[tf])
+                interval_minutes = step.total_seconds() / 60
+                for gap_start, gap_end in info['holes']:
+                    if since is not None and gap_end <= since:
+                        continue
+                    gap_minutes = (gap_end - gap_start).total_seconds() / 60
+                    manifest.gaps.append({
+                        'symbol': symbol,
+                        'interval': tf,
+                        'gap_start': gap_start,
+                        'gap_end': gap_end,
+                        'gap_minutes': gap_minutes,
+                        'missing_candles': int(gap_minutes / interval_minutes),
+                        'after_candle': gap_start - step,
+                    })
+
+        manifest.gaps.sort(key=lambda gap: (gap['symbol'], gap['interval'], gap['gap_start']))
+        manifest.elapsed_s = time.perf_counter() - started
+        return manifest
+
+    # ------------------------------------------------------------------
+    # Сверка с полным аудитом
+    # ------------------------------------------------------------------
+
+    def rebuild_from_manifest(self, manifest: GapManifest) -> int:
+        """
+        Перезаписать покрытие серий из GapManifest ПОЛНОГО аудита (since=None)
+
+        Returns:
+            Количество обновленных серий
+        """
+        by_symbol = manifest.by_symbol()
+        session = self.db.get_session()
+        try:
+            rows = {
+                (row.symbol, row.timeframe): row
+                for row in session.query(CandleCoverage).filter(
+                    CandleCoverage.timeframe.in_(manifest.timeframes)
+                )
+            }
+            now = datetime.now(pytz.UTC).replace(tzinfo=None)
+            updated = 0
+            for symbol, tfs in manifest.coverage.items():
+                for tf, info in tfs.items():
+                    row = rows.get((symbol, tf))
+                    if row is None:
+                        row = CandleCoverage(symbol=symbol, timeframe=tf)
+                        session.add(row)
+                    holes = [
+                        [_to_epoch(gap['gap_start']), _to_epoch(gap['gap_end'])]
+                        for gap in by_symbol.get(symbol, {}).get(tf, [])
+                    ]
+                    row.first_open_time = info['first'].replace(tzinfo=None)
+                    row.last_open_time = info['last'].replace(tzinfo=None)
+                    row.candle_count = info['count']
+                    row.holes = holes[-self.MAX_HOLES:]
+                    row.updated_at = now
+                    updated += 1
+            session.commit()
+            return updated
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ensure_bootstrapped(self):
+        """
+        Первый запуск с таблицей покрытия: заполнить ее полным аудитом candles
+
+        Дальше таблица поддерживается записью свечей - повторного сканирования нет.
+        """
+        if self._bootstrapped:
+            return
+
+        session = self.db.get_session()
+        try:
+            has_coverage = session.query(CandleCoverage.id).first() is not None
+            has_candles = session.query(Candle.id).first() is not None
+        finally:
+            session.close()
+
+        if not has_coverage and has_candles:
+            logger.info("🗂️ Candle coverage table is empty - bootstrapping from full candle audit...")
+            manifest = CandleIntegrityAuditor(self.db).audit()
+            updated = self.rebuild_from_manifest(manifest)
+            logger.info(f"🗂️ Candle coverage bootstrapped: {updated} series in {manifest.elapsed_s:.2f}s")
+
+        self._bootstrapped = True
+
+
+candle_coverage = CandleCoverageStore(db)
@@ -0,0 +1,281 @@
+"""
+Candle Snapshot - переносимый сжатый снимок хранилища свечей
+
+Экспорт: по одному файлу <SYMBOL>.npz на символ (np.savez_compressed,
+колонки свечей отдельными массивами по каждому таймфрейму) + manifest.json
+с покрытием (count / first / last по серии) и sha256 файлов.
+
+Импорт: пакетная вставка массивов в SQLite (executemany одной транзакцией
+на символ) → пересборка candle_coverage по импортированным символам.
+После импорта fast catchup докачивает через REST только хвост
+(последняя свеча снимка → сейчас).
+
+Новый сервер поднимается за секунды из снимка, скопированного с другой машины,
+вместо загрузки всей истории через rate-limited API.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pytz
+
+from src.data.candle_coverage import candle_coverage
+from src.data.integrity_auditor import CandleIntegrityAuditor, DEFAULT_TIMEFRAMES
+
+logger = logging.getLogger('trading_bot')
+
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Колонки снимка: (имя, dtype). Время - int64 epoch ms, NULL → NaN / -1
+COLUMNS = [
+    ('open_time', np.int64),
+    ('close_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('quote_volume', np.float64),
+    ('trades', np.int64),
+    ('taker_buy_base', np.float64),
+    ('taker_buy_quote', np.float64),
+]
+
+_EXPORT_SQL = """
+    SELECT timeframe,
+           CAST(strftime('%s', open_time) AS INTEGER) * 1000,
+           CAST(strftime('%s', close_time) AS INTEGER) * 1000
+               + CAST(ROUND(strftime('%f', close_time) * 1000) AS INTEGER) % 1000,
+           open, high, low, close, volume,
+           quote_volume, COALESCE(trades, -1), taker_buy_base, taker_buy_quote
+    FROM candles
+    WHERE symbol = ?
+    ORDER BY timeframe, open_time
+"""
+
+_IMPORT_SQL = """
+    INSERT OR IGNORE INTO candles (
+        symbol, timeframe, open_time, open, high, low, close,
+        volume, close_time, quote_volume, trades,
+        taker_buy_base, taker_buy_quote
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _db_time_strings(epoch_ms: np.ndarray) -> np.ndarray:
+    """
+    epoch ms → строки в формате, который пишет DataLoader._save_klines_to_db
+    (datetime.isoformat(' ') для UTC: '2024-12-20 20:00:00+00:00' / '... 20:59:59.999000+00:00')
+
+    Формат важен: уникальный индекс candles сравнивает строки, иначе
+    импорт и последующие upsert'ы с Binance разойдутся в дубликаты.
+    """
+    text = np.datetime_as_string(epoch_ms.astype('datetime64[ms]'), unit='ms')
+    text = np.char.replace(text, 'T', ' ')
+    whole = (epoch_ms % 1000) == 0
+    seconds = np.char.add(text.astype('<U19'), '+00:00')
+    fractional = np.char.add(text, '000+00:00')
+    return np.where(whole, seconds, fractional)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CandleSnapshot:
+    """Экспорт / импорт свечей в переносимый снимок (npz на символ + manifest)"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Database instance
+        """
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Экспорт
+    # ------------------------------------------------------------------
+
+    def export(self, directory: str, symbols: Optional[Iterable[str]] = None,
+               timeframes: Optional[List[str]] = None) -> Dict:
+        """
+        Записать снимок в directory
+
+        Args:
+            symbols: Символы (None = все символы в БД)
+            timeframes: Таймфреймы (по умолчанию 15m/1h/4h/1d)
+
+        Returns:
+            manifest dict
+        """
+        started = time.perf_counter()
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        timeframes = list(timeframes or DEFAULT_TIMEFRAMES)
+        symbols = sorted(set(symbols)) if symbols is not None else self._list_symbols()
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'created_at': datetime.now(pytz.UTC).isoformat(),
+            'timeframes': timeframes,
+            'symbols': {},
+        }
+        total_rows = 0
+
+        with self.db.engine.connect() as conn:
+            for symbol in symbols:
+                rows = conn.exec_driver_sql(_EXPORT_SQL, (symbol,)).fetchall()
+                if not rows:
+                    continue
+
+                arrays, coverage = self._rows_to_arrays(rows, timeframes)
+                if not coverage:
+                    continue
+
+                path = out_dir / f"{symbol}.npz"
+                np.savez_compressed(path, **arrays)
+                manifest['symbols'][symbol] = {
+                    'file': path.name,
+                    'sha256': _sha256(path),
+                    'coverage': coverage,
+                }
+                total_rows += sum(info['count'] for info in coverage.values())
+
+        manifest['rows'] = total_rows
+        manifest['elapsed_s'] = round(time.perf_counter() - started, 3)
+        with open(out_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(
+            f"📦 Candle snapshot exported: {len(manifest['symbols'])} symbols / {total_rows} candles "
+            f"→ {out_dir} in {manifest['elapsed_s']:.1f}s"
+        )
+        return manifest
+
+    def _list_symbols(self) -> List[str]:
+        with self.db.engine.connect() as conn:
+            return [row[0] for row in conn.exec_driver_sql("SELECT DISTINCT symbol FROM candles ORDER BY symbol")]
+
+    @staticmethod
+    def _rows_to_arrays(rows: List, timeframes: List[str]):
+        timeframe_col = np.array([row[0] for row in rows], dtype=object)
+        values = np.array([row[1:] for row in rows], dtype=np.float64)
+
+        arrays = {}
+        coverage = {}
+        for tf in timeframes:
+            mask = timeframe_col == tf
+            if not mask.any():
+                continue
+            tf_values = values[mask]
+            for idx, (name, dtype) in enumerate(COLUMNS):
+                column = tf_values[:, idx]
+                if dtype is np.int64:
+                    column = np.nan_to_num(column, nan=-1)
+                arrays[f"{tf}__{name}"] = column.astype(dtype)
+            open_times = arrays[f"{tf}__open_time"]
+            coverage[tf] = {
+                'count': int(len(open_times)),
+                'first': int(open_times[0]),
+                'last': int(open_times[-1]),
+            }
+        return arrays, coverage
+
+    # ------------------------------------------------------------------
+    # Импорт
+    # ------------------------------------------------------------------
+
+    def import_snapshot(self, directory: str, symbols: Optional[Iterable[str]] = None,
+                        verify: bool = True) -> Dict:
+        """
+        Загрузить снимок в SQLite (существующие свечи не перезаписываются)
+
+        Args:
+            symbols: Импортировать только эти символы (None = все из manifest)
+            verify: Проверять sha256 файлов
+
+        Returns:
+            {'symbols': int, 'rows': int, 'skipped': [symbol], 'elapsed_s': float}
+        """
+        started = time.perf_counter()
+        in_dir = Path(directory)
+        with open(in_dir / MANIFEST_FILE, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported candle snapshot version: {manifest.get('version')}")
+
+        wanted = set(symbols) if symbols is not None else None
+        imported: List[str] = []
+        skipped: List[str] = []
+        total_rows = 0
+
+        for symbol, entry in manifest['symbols'].items():
+            if wanted is not None and symbol not in wanted:
+                continue
+
+            path = in_dir / entry['file']
+            if not path.exists() or (verify and _sha256(path) != entry['sha256']):
+                logger.warning(f"📦 Snapshot file for {symbol} is missing or corrupted, skipped")
+                skipped.append(symbol)
+                continue
+
+            rows = self._load_symbol_rows(symbol, path, entry['coverage'])
+            with self.db.engine.begin() as conn:
+                conn.exec_driver_sql(_IMPORT_SQL, rows)
+            imported.append(symbol)
+            total_rows += len(rows)
+
+        # Покрытие импортированных серий - из фактического состояния candles
+        if imported:
+            audit = CandleIntegrityAuditor(self.db).audit(symbols=imported, timeframes=manifest['timeframes'])
+            candle_coverage.rebuild_from_manifest(audit)
+
+        result = {
+            'symbols': len(imported),
+            'rows': total_rows,
+            'skipped': skipped,
+            'elapsed_s': time.perf_counter() - started,
+        }
+        logger.info(
+            f"📦 Candle snapshot imported: {result['symbols']} symbols / {total_rows} candles "
+            f"in {result['elapsed_s']:.1f}s" + (f" ({len(skipped)} skipped)" if skipped else "")
+        )
+        return result
+
+    @staticmethod
+    def _load_symbol_rows(symbol: str, path: Path, coverage: Dict) -> List[tuple]:
+        rows: List[tuple] = []
+        with np.load(path) as data:
+            for tf in coverage:
+                columns = {name: data[f"{tf}__{name}"] for name, _ in COLUMNS}
+                trades = columns['trades'].astype(object)
+                trades[columns['trades'] < 0] = None
+                rows.extend(zip(
+                    [symbol] * len(columns['open_time']),
+                    [tf] * len(columns['open_time']),
+                    _db_time_strings(columns['open_time']).tolist(),
+                    columns['open'].tolist(),
+                    columns['high'].tolist(),
+                    columns['low'].tolist(),
+                    columns['close'].tolist(),
+                    columns['volume'].tolist(),
+                    _db_time_strings(columns['close_time']).tolist(),
+                    columns['quote_volume'].tolist(),
+                    trades.tolist(),
+                    columns['taker_buy_base'].tolist(),
+                    columns['taker_buy_quote'].tolist(),
+                ))
+        return rows
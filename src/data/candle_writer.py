@@ -0,0 +1,254 @@
+"""
+Candle Writer - write-behind очередь для upsert свечей
+
+На закрытии свечи сотни символов одновременно сохраняют свои страницы свечей.
+Раньше каждая страница = своя session + INSERT OR REPLACE + commit (fsync),
+т.е. 200-800 маленьких транзакций в одну и ту же секунду.
+
+CandleWriter:
+- один asyncio task читает очередь и склеивает страницы всех символов
+  в одну транзакцию (каждые flush_interval_ms или max_batch_rows строк)
+- транзакция выполняется в потоке (asyncio.to_thread) на отдельном
+  соединении SQLite - event loop не блокируется на fsync
+- вызывающий получает Future, который резолвится ПОСЛЕ commit (данные durable)
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pytz
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from src.data.candle_coverage import candle_coverage
+from src.utils.logger import logger
+from src.utils.perf_metrics import perf_metrics
+
+
+# SQLite: INSERT OR REPLACE автоматически обновит существующие записи
+# (уникальный индекс symbol, timeframe, open_time)
+UPSERT_CANDLES_SQL = text("""
+    INSERT OR REPLACE INTO candles (
+        symbol, timeframe, open_time, open, high, low, close,
+        volume, close_time, quote_volume, trades,
+        taker_buy_base, taker_buy_quote
+    ) VALUES (
+        :symbol, :timeframe, :open_time, :open, :high, :low, :close,
+        :volume, :close_time, :quote_volume, :trades,
+        :taker_buy_base, :taker_buy_quote
+    )
+""")
+
+
+def build_candle_rows(symbol: str, interval: str, klines: List) -> List[dict]:
+    """Binance klines → параметры для UPSERT_CANDLES_SQL"""
+    return [
+        {
+            'symbol': symbol,
+            'timeframe': interval,
+            'open_time': datetime.fromtimestamp(kline[0] / 1000, tz=pytz.UTC),
+            'open': float(kline[1]),
+            'high': float(kline[2]),
+            'low': float(kline[3]),
+            'close': float(kline[4]),
+            'volume': float(kline[5]),
+            'close_time': datetime.fromtimestamp(kline[6] / 1000, tz=pytz.UTC),
+            'quote_volume': float(kline[7]),
+            'trades': int(kline[8]),
+            'taker_buy_base': float(kline[9]),
+            'taker_buy_quote': float(kline[10])
+        }
+        for kline in klines
+    ]
+
+
+def upsert_klines(session, symbol: str, interval: str, klines: List) -> int:
+    """
+    Bulk upsert свечей + обновление candle_coverage в транзакции session (без commit)
+
+    Returns:
+        Количество обработанных свечей
+    """
+    # Покрытие серии (watermark + пропуски) в той же транзакции, что и свечи
+    candle_coverage.apply_batch(session, symbol, interval, (kline[0] for kline in klines))
+    session.execute(UPSERT_CANDLES_SQL, build_candle_rows(symbol, interval, klines))
+    return len(klines)
+
+
+class CandleWriter:
+    """Write-behind writer: страницы свечей всех символов → одна транзакция"""
+
+    def __init__(self, db, flush_interval_ms: int = 20, max_batch_rows: int = 20000,
+                 queue_size: int = 5000):
+        """
+        Args:
+            db: Database instance
+            flush_interval_ms: Сколько ждать попутные страницы после первой в пачке
+            max_batch_rows: Максимум строк в одной транзакции
+            queue_size: Максимум страниц в очереди (backpressure для загрузчиков)
+        """
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.queue_size = queue_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False  # stop() начат - новые страницы не принимаются
+        self._engine = None
+        self._session_factory = None
+
+        self.stats = {'transactions': 0, 'pages': 0, 'rows': 0, 'failed_pages': 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._engine = self.db.create_dedicated_engine()
+        self._session_factory = sessionmaker(bind=self._engine, expire_on_commit=False)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"🖊️ Candle writer started (flush {self.flush_interval * 1000:.0f}ms / {self.max_batch_rows} rows)"
+        )
+
+    async def write(self, symbol: str, interval: str, klines: List) -> int:
+        """
+        Поставить страницу свечей в очередь и дождаться commit
+
+        Returns:
+            Количество сохраненных свечей (0 при ошибке записи)
+        """
+        if not klines:
+            return 0
+        if not self.is_running:
+            raise RuntimeError("Candle writer is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((symbol, interval, klines, future))
+        return await future
+
+    async def stop(self):
+        """Дописать очередь и остановить writer"""
+        if not self.is_running:
+            return
+        # До sentinel: write() после этого момента получает RuntimeError, а не
+        # ставит страницу за sentinel (ее future никто бы не резолвил)
+        self._closing = True
+        await self._queue.put(None)
+        try:
+            await self._task
+        finally:
+            await self._flush_leftovers()
+        self._task = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+        logger.info(
+            f"🖊️ Candle writer stopped: {self.stats['pages']} pages / {self.stats['rows']} rows "
+            f"in {self.stats['transactions']} transactions"
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            rows = len(item[2])
+            deadline = loop.time() + self.flush_interval
+
+            # Собрать попутные страницы других символов до дедлайна / лимита строк
+            while rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item[2])
+
+            await self._flush_batch(batch)
+
+    async def _flush_leftovers(self):
+        """
+        Страницы, оставшиеся в очереди после выхода _run
+
+        Это страницы за sentinel (write() ждал места в полной очереди) или после
+        падения _run. Пишутся здесь же, пока очередь не опустеет - вызывающие
+        не ждут свои future вечно.
+        """
+        while True:
+            # Дать завершиться put() тех, кого разбудило освободившееся место
+            await asyncio.sleep(0)
+            batch = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            if not batch:
+                return
+            await self._flush_batch(batch)
+
+    async def _flush_batch(self, batch: List[Tuple]):
+        """Записать пачку в потоке и резолвить future страниц (ошибка - исключение в future)"""
+        try:
+            results = await asyncio.to_thread(self._flush, [page[:3] for page in batch])
+        except Exception as e:
+            logger.error(f"Candle writer flush failed ({len(batch)} pages): {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _flush(self, pages: List[Tuple[str, str, List]]) -> List[int]:
+        """Записать пачку страниц одной транзакцией (выполняется в потоке)"""
+        started = time.perf_counter()
+        session = self._session_factory()
+        try:
+            results = [upsert_klines(session, symbol, interval, klines) for symbol, interval, klines in pages]
+            session.commit()
+            self.stats['transactions'] += 1
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Candle writer batch failed ({len(pages)} pages), retrying per page: {e}")
+            results = self._flush_per_page(session, pages)
+        finally:
+            session.close()
+            perf_metrics.record('db_write', 'candle_batch', time.perf_counter() - started)
+
+        self.stats['pages'] += len(pages)
+        self.stats['rows'] += sum(results)
+        return results
+
+    def _flush_per_page(self, session, pages: List[Tuple[str, str, List]]) -> List[int]:
+        """Fallback: одна плохая страница не должна терять свечи остальных символов"""
+        results = []
+        for symbol, interval, klines in pages:
+            try:
+                results.append(upsert_klines(session, symbol, interval, klines))
+                session.commit()
+                self.stats['transactions'] += 1
+            except Exception as e:
+                session.rollback()
+                self.stats['failed_pages'] += 1
+                logger.error(f"Error bulk saving klines to DB for {symbol} {interval}: {e}")
+                results.append(0)
+        return results
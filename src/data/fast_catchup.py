@@ -6,7 +6,9 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import pytz
-from src.database.models import Candle
+from src.data.candle_coverage import candle_coverage
+from src.utils.adaptive_concurrency import AdaptiveConcurrency
+from src.utils.config import config
 
 logger = logging.getLogger('trading_bot')
 
@@ -40,16 +42,25 @@ class FastCatchupLoader:
         
         logger.info("📊 Analyzing restart state...")
         
+        # ОПТИМИЗАЦИЯ: last open_time из таблицы покрытия (одно чтение) вместо запросов к candles
+        started = datetime.now()
+        candle_coverage.ensure_bootstrapped()
+        last_times_by_symbol = candle_coverage.last_times(symbols, self.timeframes)
+        
         for symbol in symbols:
-            gaps = self._calculate_symbol_gaps(symbol, current_time)
+            last_times = last_times_by_symbol.get(symbol, {})
+            gaps = self._gaps_from_last_times(last_times, current_time)
             
             if gaps:
                 # Есть данные в БД, но есть gaps
                 existing_gaps[symbol] = gaps
-            elif not self._has_any_data(symbol):
+            elif not any(last_times.values()):
                 # Совсем новый символ
                 new_symbols.append(symbol)
         
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.debug(f"📊 Restart state computed in {elapsed:.2f}s")
+        
         total_gap_requests = sum(len(gaps) for gaps in existing_gaps.values())
         
         logger.info(
@@ -159,9 +170,10 @@ class FastCatchupLoader:
             microsecond=0
         )
     
-    def _calculate_symbol_gaps(self, symbol: str, current_time: datetime) -> Dict[str, Dict]:
+    def _gaps_from_last_times(self, last_times: Dict[str, Optional[datetime]],
+                              current_time: datetime) -> Dict[str, Dict]:
         """
-        Рассчитать gaps для одного символа
+        Рассчитать gaps по времени последних свечей {timeframe: last_candle_time}
         
         ОПТИМИЗАЦИЯ: Проверяет свежесть данных ПЕРЕД определением gap.
         - Если данные свежие → gap не создается (пропуск запроса к Binance)
@@ -174,7 +186,7 @@ class FastCatchupLoader:
         gaps = {}
         
         for tf in self.timeframes:
-            last_candle_time = self._get_last_candle_time(symbol, tf)
+            last_candle_time = last_times.get(tf)
             
             if last_candle_time:
                 # ✅ ОПТИМИЗАЦИЯ: Проверка свежести перед созданием gap
@@ -202,32 +214,6 @@ class FastCatchupLoader:
         
         return gaps
     
-    def _get_last_candle_time(self, symbol: str, timeframe: str) -> Optional[datetime]:
-        """Получить время последней свечи из БД"""
-        session = self.db.get_session()
-        try:
-            latest_candle = session.query(Candle).filter(
-                Candle.symbol == symbol,
-                Candle.timeframe == timeframe
-            ).order_by(Candle.open_time.desc()).first()
-            
-            if latest_candle and latest_candle.open_time:
-                # Ensure timezone-aware datetime
-                last_time = latest_candle.open_time
-                if last_time.tzinfo is None:
-                    last_time = pytz.UTC.localize(last_time)
-                return last_time
-            return None
-        finally:
-            session.close()
-    
-    def _has_any_data(self, symbol: str) -> bool:
-        """Проверить есть ли хоть какие-то данные для символа"""
-        for tf in self.timeframes:
-            if self._get_last_candle_time(symbol, tf):
-                return True
-        return False
-    
     def _get_next_candle_time(self, last_time: datetime, timeframe: str) -> datetime:
         """Получить время следующей свечи"""
         intervals = {
@@ -282,14 +268,21 @@ class FastCatchupLoader:
             f"  ⏱️  Estimated time: {self._estimate_burst_time(total_requests, max_parallel)} seconds"
         )
         
-        semaphore = asyncio.Semaphore(max_parallel)
+        # Параллелизм: AIMD по запасу rate limiter'а (max_parallel - стартовое значение)
+        # или фиксированный max_parallel, если adaptive_loading выключен
+        rate_limiter = self.data_loader.client.rate_limiter
+        if config.get('adaptive_loading.enabled', True):
+            concurrency = AdaptiveConcurrency.from_config(rate_limiter, name='fast catchup', initial=max_parallel)
+        else:
+            concurrency = AdaptiveConcurrency(rate_limiter, initial=max_parallel, minimum=max_parallel,
+                                              maximum=max_parallel, name='fast catchup')
         success_count = 0
         failed_count = 0
         
         async def load_symbol_gaps(symbol: str, gaps: Dict):
             nonlocal success_count, failed_count
             
-            async with semaphore:
+            async with concurrency.slot():
                 try:
                     for tf, gap_info in gaps.items():
                         # Проверить rate limit перед запросом (90% порог)
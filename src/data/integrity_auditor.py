@@ -0,0 +1,238 @@
+"""
+Candle Integrity Auditor - векторизованный аудит непрерывности свечей по всей БД
+
+Вместо загрузки ORM объектов и построчного обхода в Python:
+- open_time читается как int64 epoch секунд (strftime считает SQLite)
+  потоком по индексу (symbol, timeframe, open_time)
+- gaps / дубликаты / невыровненные свечи ищутся через np.diff по массиву
+- результат - компактный GapManifest, который напрямую потребляют
+  DataLoader.auto_fix_gaps и PeriodicGapRefill
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pytz
+from sqlalchemy import Integer, cast, func, select
+
+from src.database.models import Candle
+
+logger = logging.getLogger('trading_bot')
+
+
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400,
+}
+
+DEFAULT_TIMEFRAMES = ['15m', '1h', '4h', '1d']
+
+
+def _to_datetime(epoch_seconds: int) -> datetime:
+    return datetime.fromtimestamp(int(epoch_seconds), tz=pytz.UTC)
+
+
+@dataclass
+class GapManifest:
+    """
+    Результат аудита
+
+    gaps: список gap dict в формате validate_candles_continuity
+        {'symbol', 'interval', 'gap_start', 'gap_end', 'gap_minutes', 'missing_candles', 'after_candle'}
+    coverage: {symbol: {timeframe: {'count', 'first', 'last'}}}
+    duplicates / misaligned: {(symbol, timeframe): количество}
+    """
+    created_at: datetime
+    timeframes: List[str]
+    gaps: List[Dict] = field(default_factory=list)
+    coverage: Dict[str, Dict[str, Dict]] = field(default_factory=dict)
+    duplicates: Dict[tuple, int] = field(default_factory=dict)
+    misaligned: Dict[tuple, int] = field(default_factory=dict)
+    rows_scanned: int = 0
+    elapsed_s: float = 0.0
+
+    def gaps_for(self, symbol: str, interval: Optional[str] = None) -> List[Dict]:
+        return [
+            gap for gap in self.gaps
+            if gap['symbol'] == symbol and (interval is None or gap['interval'] == interval)
+        ]
+
+    def by_symbol(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """{symbol: {timeframe: [gaps]}}"""
+        result: Dict[str, Dict[str, List[Dict]]] = {}
+        for gap in self.gaps:
+            result.setdefault(gap['symbol'], {}).setdefault(gap['interval'], []).append(gap)
+        return result
+
+    @property
+    def missing_candles(self) -> int:
+        return sum(gap['missing_candles'] for gap in self.gaps)
+
+    def summary(self) -> str:
+        series = sum(len(tfs) for tfs in self.coverage.values())
+        return (
+            f"🔎 Candle audit: {len(self.coverage)} symbols / {series} series / {self.rows_scanned} candles "
+            f"in {self.elapsed_s:.2f}s\n"
+            f"  🕳️ Gaps: {len(self.gaps)} ({self.missing_candles} missing candles) "
+            f"in {len(self.by_symbol())} symbols\n"
+            f"  ♊ Duplicates: {sum(self.duplicates.values())} | "
+            f"📐 Misaligned: {sum(self.misaligned.values())}"
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON-совместимое представление (для сохранения manifest в файл)"""
+        def iso(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+
+        return {
+            'created_at': self.created_at.isoformat(),
+            'timeframes': self.timeframes,
+            'rows_scanned': self.rows_scanned,
+            'elapsed_s': round(self.elapsed_s, 3),
+            'gaps': [{key: iso(value) for key, value in gap.items()} for gap in self.gaps],
+            'coverage': {
+                symbol: {tf: {key: iso(value) for key, value in info.items()} for tf, info in tfs.items()}
+                for symbol, tfs in self.coverage.items()
+            },
+            'duplicates': [{'symbol': s, 'interval': tf, 'count': c} for (s, tf), c in self.duplicates.items()],
+            'misaligned': [{'symbol': s, 'interval': tf, 'count': c} for (s, tf), c in self.misaligned.items()],
+        }
+
+
+class CandleIntegrityAuditor:
+    """Векторизованный аудит свечей (один проход по индексу на таймфрейм)"""
+
+    FETCH_CHUNK = 200_000
+    MAX_SQL_SYMBOLS = 900  # Больше - фильтруем в памяти (лимит bind параметров старых SQLite = 999)
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Database instance
+        """
+        self.db = db
+
+    def audit(self, symbols: Optional[Iterable[str]] = None,
+              timeframes: Optional[List[str]] = None,
+              since: Optional[datetime] = None) -> GapManifest:
+        """
+        Проверить непрерывность свечей
+
+        Args:
+            symbols: Символы для проверки (None = вся БД)
+            timeframes: Таймфреймы (по умолчанию 15m/1h/4h/1d)
+            since: Проверять только свечи с open_time >= since
+
+        Returns:
+            GapManifest
+        """
+        started = time.perf_counter()
+        timeframes = list(timeframes or DEFAULT_TIMEFRAMES)
+        symbol_filter = sorted(set(symbols)) if symbols is not None else None
+        manifest = GapManifest(created_at=datetime.now(pytz.UTC), timeframes=timeframes)
+
+        for tf in timeframes:
+            if tf not in INTERVAL_SECONDS:
+                logger.warning(f"Candle audit: unknown timeframe {tf}, skipped")
+                continue
+            symbols_arr, times = self._load_open_times(tf, symbol_filter, since)
+            manifest.rows_scanned += len(times)
+            self._audit_timeframe(manifest, tf, symbols_arr, times)
+
+        manifest.gaps.sort(key=lambda gap: (gap['symbol'], gap['interval'], gap['gap_start']))
+        manifest.elapsed_s = time.perf_counter() - started
+        return manifest
+
+    def _load_open_times(self, timeframe: str, symbols: Optional[List[str]],
+                         since: Optional[datetime]):
+        """
+        Потоком прочитать (symbol, epoch open_time) для таймфрейма, отсортированные по индексу
+
+        Returns:
+            (symbols ndarray[object], times ndarray[int64])
+        """
+        query = select(
+            Candle.symbol,
+            cast(func.strftime('%s', Candle.open_time), Integer)
+        ).where(Candle.timeframe == timeframe)
+        if symbols is not None and len(symbols) <= self.MAX_SQL_SYMBOLS:
+            query = query.where(Candle.symbol.in_(symbols))
+        if since is not None:
+            query = query.where(Candle.open_time >= since.astimezone(pytz.UTC).replace(tzinfo=None))
+        query = query.order_by(Candle.symbol, Candle.open_time)
+
+        symbol_chunks = []
+        time_chunks = []
+        with self.db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(query)
+            while True:
+                rows = result.fetchmany(self.FETCH_CHUNK)
+                if not rows:
+                    break
+                chunk_symbols, chunk_times = zip(*rows)
+                symbol_chunks.append(np.array(chunk_symbols, dtype=object))
+                time_chunks.append(np.array(chunk_times, dtype=np.int64))
+
+        if not time_chunks:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+
+        symbols_arr = np.concatenate(symbol_chunks)
+        times = np.concatenate(time_chunks)
+        if symbols is not None and len(symbols) > self.MAX_SQL_SYMBOLS:
+            mask = np.isin(symbols_arr, np.array(symbols, dtype=object))
+            symbols_arr, times = symbols_arr[mask], times[mask]
+        return symbols_arr, times
+
+    def _audit_timeframe(self, manifest: GapManifest, timeframe: str,
+                         symbols: np.ndarray, times: np.ndarray):
+        if len(times) == 0:
+            return
+
+        step = INTERVAL_SECONDS[timeframe]
+
+        # Границы серий (symbol меняется) → first/last/count по каждому символу
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        ends = np.r_[starts[1:], len(times)]
+        for start, end in zip(starts, ends):
+            manifest.coverage.setdefault(symbols[start], {})[timeframe] = {
+                'count': int(end - start),
+                'first': _to_datetime(times[start]),
+                'last': _to_datetime(times[end - 1]),
+            }
+
+        if len(times) < 2:
+            return
+
+        diffs = np.diff(times)
+        same_series = symbols[1:] == symbols[:-1]
+
+        # Дубликаты и свечи не на границе интервала (diff не кратен шагу)
+        for mask, target in ((same_series & (diffs == 0), manifest.duplicates),
+                             (same_series & (diffs > 0) & (diffs % step != 0), manifest.misaligned)):
+            for idx in np.flatnonzero(mask):
+                key = (symbols[idx], timeframe)
+                target[key] = target.get(key, 0) + 1
+
+        interval_minutes = step / 60
+        for idx in np.flatnonzero(same_series & (diffs > step)):
+            after = _to_datetime(times[idx])
+            gap_end = _to_datetime(times[idx + 1])
+            gap_start = after + timedelta(seconds=step)
+            gap_minutes = (gap_end - gap_start).total_seconds() / 60
+            manifest.gaps.append({
+                'symbol': symbols[idx],
+                'interval': timeframe,
+                'gap_start': gap_start,
+                'gap_end': gap_end,
+                'gap_minutes': gap_minutes,
+                'missing_candles': int(gap_minutes / interval_minutes),
+                'after_candle': after,
+            })
@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 from src.database.db import db
 from src.database.models import Candle
 from src.binance.data_loader import DataLoader
+from src.data.candle_coverage import candle_coverage
+from src.data.integrity_auditor import GapManifest, INTERVAL_SECONDS
 from src.utils.logger import logger
 
 
@@ -64,63 +66,98 @@ class PeriodicGapRefill:
         """
         Находит gaps за последние N минут для указанных символов и таймфреймов
         
+        ОПТИМИЗАЦИЯ: план строится по таблице candle_coverage (watermark +
+        известные пропуски серии), которую поддерживает запись свечей -
+        без сканирования candles каждые 15 минут. Кроме "хвоста"
+        (последняя свеча → сейчас) находит и внутренние пропуски в окне.
+        
         Returns:
             {symbol: {timeframe: {'start': datetime, 'end': datetime, 'count': int}}}
         """
-        gaps = {}
         now = datetime.now(pytz.UTC)
         lookback_start = now - timedelta(minutes=self.lookback_minutes)
         
-        session = db.get_session()
-        try:
-            for symbol in symbols:
-                symbol_gaps = {}
+        candle_coverage.ensure_bootstrapped()
+        manifest = candle_coverage.to_manifest(symbols, timeframes, since=lookback_start)
+        return self.gaps_from_manifest(manifest, symbols, timeframes, now)
+    
+    def gaps_from_manifest(self, manifest: GapManifest, symbols: List[str], timeframes: List[str],
+                           now: datetime) -> Dict[str, Dict[str, dict]]:
+        """
+        Построить план докачки из GapManifest (хвост + внутренние gaps в окне lookback)
+        
+        Returns:
+            {symbol: {timeframe: {'start': datetime, 'end': datetime, 'count': int}}}
+        """
+        gaps = {}
+        lookback_start = now - timedelta(minutes=self.lookback_minutes)
+        internal_gaps = manifest.by_symbol()
+        
+        for symbol in symbols:
+            symbol_gaps = {}
+            symbol_coverage = manifest.coverage.get(symbol, {})
+            
+            for tf in timeframes:
+                # Вычислить интервал для таймфрейма
+                interval_minutes = INTERVAL_SECONDS.get(tf, 900) // 60
                 
-                for tf in timeframes:
-                    # Получить последнюю свечу
-                    last_candle = session.query(Candle).filter(
-                        Candle.symbol == symbol,
-                        Candle.timeframe == tf
-                    ).order_by(Candle.open_time.desc()).first()
-                    
-                    if not last_candle:
+                coverage = symbol_coverage.get(tf)
+                if coverage:
+                    last_time = coverage['last']
+                else:
+                    # Серии нет в таблице покрытия (например, чужая запись в candles)
+                    last_time = self._get_last_candle_time(symbol, tf)
+                    if last_time is None:
                         continue
-                    
-                    # Проверить gap между последней свечой и текущим временем
-                    last_time = last_candle.open_time.replace(tzinfo=pytz.UTC)
-                    
-                    # Вычислить интервал для таймфрейма
-                    interval_minutes = {
-                        '15m': 15,
-                        '1h': 60,
-                        '4h': 240,
-                        '1d': 1440
-                    }.get(tf, 15)
-                    
-                    expected_next = last_time + timedelta(minutes=interval_minutes)
-                    
-                    # Если gap больше одного интервала - добавить
-                    if expected_next < now - timedelta(minutes=interval_minutes):
-                        # Докачиваем только recent gaps (последние lookback_minutes)
-                        gap_start = max(expected_next, lookback_start)
-                        gap_end = now
-                        
-                        if gap_start < gap_end:
-                            gap_count = int((gap_end - gap_start).total_seconds() / 60 / interval_minutes)
-                            
-                            symbol_gaps[tf] = {
-                                'start': gap_start,
-                                'end': gap_end,
-                                'count': gap_count
-                            }
                 
-                if symbol_gaps:
-                    gaps[symbol] = symbol_gaps
-        finally:
-            session.close()
+                gap_start = None
+                gap_end = None
+                
+                expected_next = last_time + timedelta(minutes=interval_minutes)
+                
+                # Если gap больше одного интервала - добавить
+                if expected_next < now - timedelta(minutes=interval_minutes):
+                    # Докачиваем только recent gaps (последние lookback_minutes)
+                    gap_start = max(expected_next, lookback_start)
+                    gap_end = now
+                
+                # Внутренние пропуски внутри окна
+                for gap in internal_gaps.get(symbol, {}).get(tf, []):
+                    if gap['gap_end'] <= lookback_start:
+                        continue
+                    start = max(gap['gap_start'], lookback_start)
+                    gap_start = start if gap_start is None else min(gap_start, start)
+                    gap_end = gap['gap_end'] if gap_end is None else max(gap_end, gap['gap_end'])
+                
+                if gap_start is not None and gap_start < gap_end:
+                    gap_count = int((gap_end - gap_start).total_seconds() / 60 / interval_minutes)
+                    
+                    symbol_gaps[tf] = {
+                        'start': gap_start,
+                        'end': gap_end,
+                        'count': gap_count
+                    }
+            
+            if symbol_gaps:
+                gaps[symbol] = symbol_gaps
         
         return gaps
     
+    def _get_last_candle_time(self, symbol: str, timeframe: str):
+        """Время последней свечи из БД (для серий без записи в candle_coverage)"""
+        session = db.get_session()
+        try:
+            last_candle = session.query(Candle).filter(
+                Candle.symbol == symbol,
+                Candle.timeframe == timeframe
+            ).order_by(Candle.open_time.desc()).first()
+            
+            if not last_candle:
+                return None
+            return last_candle.open_time.replace(tzinfo=pytz.UTC)
+        finally:
+            session.close()
+    
     def calculate_request_weight(self, gaps: Dict[str, Dict[str, dict]]) -> int:
         """
         Подсчитывает общее количество запросов для докачки всех gaps
@@ -1,13 +1,44 @@
 from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, QueuePool
 from pathlib import Path
 from typing import Optional
 import sqlite3
+import threading
 from src.database.models import Base
 from src.utils.config import config
 from src.utils.logger import logger
 
+# Индексы по status таблиц сигналов, замененные partial / covering индексами
+# (планировщик выбирал их для статистики и делал SCAN всей таблицы)
+OBSOLETE_INDEXES = ('idx_status_symbol', 'idx_ap_status_symbol', 'idx_v3sr_status_symbol', 'ix_v3_sr_signals_status')
+
+# wal_autocheckpoint по умолчанию в SQLite (страниц WAL)
+SQLITE_DEFAULT_AUTOCHECKPOINT = 1000
+
+# Сколько соединение ждет блокировку записи (секунды) - одинаково для всех писателей:
+# DB executor, CandleWriter, WalCheckpointer, retention и основной engine
+SQLITE_BUSY_TIMEOUT_S = 30
+
+
+def _set_sqlite_pragma(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    # Новая БД создается с incremental auto_vacuum (место после retention возвращается
+    # через PRAGMA incremental_vacuum). Для существующей БД - без эффекта до VACUUM.
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+
+def _set_read_only_pragma(dbapi_conn, connection_record):
+    # journal_mode хранится в файле БД - read-only соединение его не меняет
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute("PRAGMA cache_size=-32000")
+    cursor.close()
+
 
 class Database:
     def __init__(self, db_path: Optional[str] = None):
@@ -19,27 +50,57 @@ class Database:
         self.db_path = db_path
         self.engine = create_engine(
             f'sqlite:///{db_path}',
-            connect_args={'check_same_thread': False},
+            connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_S},
             poolclass=StaticPool,
             echo=False
         )
         
-        @event.listens_for(self.engine, "connect")
-        def set_sqlite_pragma(dbapi_conn, connection_record):
-            cursor = dbapi_conn.cursor()
-            cursor.execute("PRAGMA journal_mode=WAL")
-            cursor.execute("PRAGMA synchronous=NORMAL")
-            cursor.execute("PRAGMA cache_size=-64000")
-            cursor.close()
+        event.listen(self.engine, "connect", _set_sqlite_pragma)
+        event.listen(self.engine, "checkout", self._sync_autocheckpoint)
+        
+        # wal_autocheckpoint писателей: None - как в SQLite, пока не запущен WalCheckpointer
+        self.wal_autocheckpoint: Optional[int] = None
         
         self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False)
         
+        # Read-only пул для отчетов / Telegram (создается при первом чтении)
+        self.read_pool_size = max(1, int(config.get('database.read_pool_size', 4)))
+        self._read_engine = None
+        self._read_lock = threading.Lock()
+        self.ReadSessionLocal = None
+        
         # КРИТИЧНО: Применить миграции ПЕРЕД create_all
         self._apply_migrations()
         
         Base.metadata.create_all(bind=self.engine)
+        self._ensure_indexes()
         logger.info(f"Database initialized at {db_path}")
     
+    def _ensure_indexes(self):
+        """
+        Создать индексы из models.py, которых нет в существующих таблицах,
+        и удалить устаревшие (OBSOLETE_INDEXES)
+        
+        create_all создает индексы только вместе с новой таблицей -
+        индексы, добавленные в модель позже, сюда не попадают.
+        """
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for name in existing.intersection(OBSOLETE_INDEXES):
+                logger.info(f"🔧 Dropping obsolete index {name} on {table.name}")
+                with self.engine.begin() as conn:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                logger.info(f"🔧 Creating index {index.name} on {table.name}")
+                try:
+                    index.create(bind=self.engine)
+                except Exception as e:
+                    # Не падаем - без индекса запросы медленнее, но работают
+                    logger.error(f"❌ Failed to create index {index.name}: {e}")
+    
     def _apply_migrations(self):
         """Применить миграции схемы БД перед create_all"""
         try:
@@ -75,7 +136,70 @@ class Database:
     def get_session(self) -> Session:
         return self.SessionLocal()
     
+    def get_read_session(self) -> Session:
+        """Session на read-only пуле соединений (отчеты, статистика, Telegram)
+        
+        В WAL читатели не ждут писателя и не блокируют его: тяжелые выборки
+        по таблицам сигналов не добавляют задержку сохранению сигналов.
+        Запись через такую session падает (PRAGMA query_only).
+        """
+        if self.ReadSessionLocal is None:
+            with self._read_lock:
+                if self.ReadSessionLocal is None:
+                    self._read_engine = self.create_dedicated_engine(pool_size=self.read_pool_size, read_only=True)
+                    self.ReadSessionLocal = sessionmaker(bind=self._read_engine, expire_on_commit=False)
+        return self.ReadSessionLocal()
+    
+    def create_dedicated_engine(self, pool_size: Optional[int] = None, read_only: bool = False):
+        """Отдельное соединение к той же БД (для фоновых потоков)
+        
+        Основной engine - StaticPool (одно соединение на процесс), поэтому
+        commit/rollback любой session затрагивает всех. Фоновый поток работает
+        через свое соединение: WAL пускает читателей параллельно, а busy timeout
+        сериализует его запись с записью основного соединения.
+        
+        Args:
+            pool_size: None - одно соединение (StaticPool), иначе пул из
+                pool_size соединений для пула потоков-читателей
+            read_only: Соединения только для чтения (PRAGMA query_only)
+        """
+        pool_args = {'poolclass': StaticPool}
+        if pool_size:
+            pool_args = {'poolclass': QueuePool, 'pool_size': pool_size, 'max_overflow': 0}
+        engine = create_engine(
+            f'sqlite:///{self.db_path}',
+            connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_S},
+            echo=False,
+            **pool_args
+        )
+        if read_only:
+            event.listen(engine, "connect", _set_read_only_pragma)
+        else:
+            event.listen(engine, "connect", _set_sqlite_pragma)
+            event.listen(engine, "checkout", self._sync_autocheckpoint)
+        return engine
+    
+    def set_wal_autocheckpoint(self, pages: Optional[int]):
+        """
+        wal_autocheckpoint для всех пишущих соединений (None - значение SQLite по умолчанию)
+        
+        Применяется при следующей выдаче соединения из пула, в потоке, который
+        его получает - соединение, уже занятое другим потоком, не трогается.
+        """
+        self.wal_autocheckpoint = pages
+    
+    def _sync_autocheckpoint(self, dbapi_conn, connection_record, connection_proxy):
+        pages = self.wal_autocheckpoint if self.wal_autocheckpoint is not None else SQLITE_DEFAULT_AUTOCHECKPOINT
+        if connection_record.info.get('wal_autocheckpoint') == pages:
+            return
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA wal_autocheckpoint={int(pages)}")
+        cursor.close()
+        connection_record.info['wal_autocheckpoint'] = pages
+    
     def close(self):
+        if self._read_engine is not None:
+            self._read_engine.dispose()
         self.engine.dispose()
 
 
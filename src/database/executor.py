@@ -0,0 +1,116 @@
+"""
+Database Executor - синхронный SQLite вне asyncio event loop
+
+db.get_session() + ORM запрос / commit внутри корутины блокирует весь
+event loop: пока SQLite ждет fsync или busy lock, стоят WebSocket,
+Telegram, загрузчики и анализ остальных символов.
+
+DatabaseExecutor выполняет функции fn(session, ...) в потоках:
+- один поток-писатель со своим соединением (запись в SQLite и так
+  сериализуется - один писатель не конкурирует сам с собой за lock)
+- пул потоков-читателей на read-only пуле соединений (db.get_read_session):
+  в WAL читатели не блокируются писателем и видят последнее закоммиченное состояние
+
+Корутина только ждет Future - event loop свободен на время I/O.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from src.database.db import db
+from src.utils.logger import logger
+
+
+class DatabaseExecutor:
+    """Поток-писатель + пул читателей для ORM операций из корутин"""
+
+    def __init__(self, db, readers: Optional[int] = None):
+        """
+        Args:
+            db: Database instance
+            readers: Количество потоков для чтения (по умолчанию = размер read-only пула)
+        """
+        self.db = db
+        self.readers = max(1, readers or db.read_pool_size)
+
+        self._lock = threading.Lock()
+        self._writer_pool: Optional[ThreadPoolExecutor] = None
+        self._reader_pool: Optional[ThreadPoolExecutor] = None
+        self._writer_engine = None
+        self._writer_sessions = None
+
+    def _ensure_started(self):
+        # Ленивый старт: импорт модуля не открывает соединения и не создает потоки
+        if self._writer_pool is not None:
+            return
+        with self._lock:
+            if self._writer_pool is not None:
+                return
+            self._writer_engine = self.db.create_dedicated_engine()
+            self._writer_sessions = sessionmaker(bind=self._writer_engine, expire_on_commit=False)
+            self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='db-reader')
+            self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+            logger.debug(f"🗄️ DB executor started (1 writer + {self.readers} readers)")
+
+    async def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Выполнить fn(session, *args, **kwargs) в потоке-читателе
+
+        Session закрывается после fn - возвращайте значения / DataFrame,
+        а не ленивые ORM атрибуты.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._reader_pool, functools.partial(self._run_read, fn, *args, **kwargs)
+        )
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Выполнить fn(session, *args, **kwargs) в потоке-писателе и commit
+
+        При исключении - rollback и исключение пробрасывается в корутину.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._writer_pool, functools.partial(self._run_write, fn, *args, **kwargs)
+        )
+
+    def _run_read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        session = self.db.get_read_session()
+        try:
+            return fn(session, *args, **kwargs)
+        finally:
+            session.close()
+
+    def _run_write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        session = self._writer_sessions()
+        try:
+            result = fn(session, *args, **kwargs)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def shutdown(self):
+        """Дождаться текущих операций и закрыть соединения"""
+        with self._lock:
+            for pool in (self._writer_pool, self._reader_pool):
+                if pool is not None:
+                    pool.shutdown(wait=True)
+            if self._writer_engine is not None:
+                self._writer_engine.dispose()
+            self._writer_pool = self._reader_pool = None
+            self._writer_engine = None
+
+
+db_executor = DatabaseExecutor(db)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index, JSON, text
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import pytz
 
 Base = declarative_base()
 
+# Открытые сигналы (трекеры, блокировки). Partial индекс SQLite применяется,
+# только если запрос содержит ТОТ ЖЕ литеральный IN (порядок значений важен) -
+# см. signal_queries.active_filter
+ACTIVE_SIGNAL_STATUSES = ('ACTIVE', 'PENDING')
+ACTIVE_SIGNAL_WHERE = "status IN ('ACTIVE', 'PENDING')"
+
 
 class Candle(Base):
     __tablename__ = 'candles'
@@ -29,6 +35,29 @@ class Candle(Base):
     )
 
 
+class CandleCoverage(Base):
+    """
+    Покрытие свечами по (symbol, timeframe): watermark + известные пропуски
+
+    Обновляется в той же транзакции, что и запись свечей (DataLoader._save_klines_to_db),
+    поэтому gap detection - одно чтение на серию вместо запросов к candles.
+    """
+    __tablename__ = 'candle_coverage'
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    timeframe = Column(String(10), nullable=False)
+    first_open_time = Column(DateTime, nullable=False)
+    last_open_time = Column(DateTime, nullable=False)
+    candle_count = Column(Integer, nullable=False, default=0)
+    holes = Column(JSON)  # [[gap_start_epoch, gap_end_epoch], ...] - gap_end = open_time следующей свечи
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(pytz.UTC))
+
+    __table_args__ = (
+        Index('idx_candle_coverage_symbol_tf', 'symbol', 'timeframe', unique=True),
+    )
+
+
 class Trade(Base):
     __tablename__ = 'trades'
     
@@ -133,9 +162,17 @@ class Signal(Base):
     meta_data = Column(JSON)
     
     __table_args__ = (
-        Index('idx_status_symbol', 'status', 'symbol'),
         Index('idx_created_at', 'created_at'),
         Index('idx_regime_confidence', 'market_regime', 'confluence_count'),  # Для анализа
+        # Трекер / блокировки при старте: только открытые сигналы (покрывает symbol, strategy_name).
+        # Заменяет idx_status_symbol: индекс по status с 5-6 значениями планировщик
+        # выбирал и для статистики по периоду (SCAN всей таблицы ради GROUP BY status)
+        Index('idx_signals_active', 'symbol', 'strategy_name', 'status', sqlite_where=text(ACTIVE_SIGNAL_WHERE)),
+        # Статистика за период (все / одна стратегия): агрегаты только по индексу, без чтения строк
+        Index('idx_signals_stats', 'created_at', 'status', 'exit_type', 'pnl_percent'),
+        Index('idx_signals_strategy_stats', 'strategy_id', 'created_at', 'status', 'exit_type', 'pnl_percent'),
+        # Telegram: закрытые за последние N часов
+        Index('idx_signals_closed_at', 'closed_at', 'status'),
     )
 
 
@@ -254,9 +291,12 @@ class ActionPriceSignal(Base):
     meta_data = Column(JSON)
     
     __table_args__ = (
-        Index('idx_ap_status_symbol', 'status', 'symbol'),
         Index('idx_ap_pattern_tf', 'pattern_type', 'timeframe'),
         Index('idx_ap_created_at', 'created_at'),
+        Index('idx_ap_active', 'symbol', 'status', sqlite_where=text(ACTIVE_SIGNAL_WHERE)),
+        Index('idx_ap_stats', 'created_at', 'status', 'exit_reason', 'pnl_percent'),
+        Index('idx_ap_pattern_stats', 'pattern_type', 'created_at', 'status', 'exit_reason', 'pnl_percent'),
+        Index('idx_ap_closed_at', 'closed_at', 'status'),
     )
 
 
@@ -341,7 +381,7 @@ class V3SRSignal(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(pytz.UTC), index=True)
     
     # Execution tracking
-    status = Column(String(20), nullable=False, default='PENDING', index=True)  # PENDING, ACTIVE, CLOSED, CANCELLED
+    status = Column(String(20), nullable=False, default='PENDING')  # PENDING, ACTIVE, CLOSED, CANCELLED
     telegram_message_id = Column(Integer)
     
     # Partial exits (50% TP1, 50% trail to TP2)
@@ -387,10 +427,11 @@ class V3SRSignal(Base):
     meta_data = Column(JSON)
     
     __table_args__ = (
-        Index('idx_v3sr_status_symbol', 'status', 'symbol'),
         Index('idx_v3sr_setup_tf', 'setup_type', 'entry_tf'),
         Index('idx_v3sr_zone_id', 'zone_id'),
         Index('idx_v3sr_created', 'created_at'),
+        # Трекер / /v3_active: открытые сигналы по created_at
+        Index('idx_v3sr_active', 'created_at', 'status', sqlite_where=text(ACTIVE_SIGNAL_WHERE)),
     )
 
 
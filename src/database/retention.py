@@ -0,0 +1,348 @@
+"""
+Retention Service - удаление старых данных по политикам + incremental VACUUM
+
+database.history_days задан, но раньше ничего не удаляло старые строки:
+candles, metrics, market_state, v3_sr_zone_events и их индексы росли
+бесконечно, каждый range scan становился медленнее.
+
+RetentionService (раз в сутки в тихий час, см. retention.run_at_hour_utc / run_at_minute_utc;
+по умолчанию выключен - retention.enabled):
+- candles: по политике на таймфрейм; удаление пачками по batch_size строк
+  через поток-писатель DB executor, candle_coverage обновляется в той же
+  транзакции (first / count / holes остаются согласованными)
+- downsample: 15m старше downsample_15m_after_days сворачиваются в 1h там,
+  где часовой свечи нет, и только потом удаляются
+- trades / metrics / market_state / v3_sr_zone_events: по политике в днях
+- PRAGMA incremental_vacuum возвращает освободившиеся страницы ОС
+  (БД должна быть в auto_vacuum=INCREMENTAL: новые создаются так сразу,
+  существующую конвертирует `python db_retention.py --enable-incremental-vacuum`)
+
+Отчет: удаленные строки по таблицам, свернутые свечи, освобожденное место, время.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pytz
+from sqlalchemy import text
+
+from src.data.candle_coverage import candle_coverage
+from src.data.candle_writer import upsert_klines
+from src.database.models import CandleCoverage
+from src.utils.config import config
+from src.utils.logger import logger
+from src.utils.perf_metrics import perf_metrics
+
+
+# Таблица → колонка времени, по которой работает политика
+TABLE_TIME_COLUMNS = {
+    'trades': 'timestamp',
+    'metrics': 'timestamp',
+    'market_state': 'timestamp',
+    'v3_sr_zone_events': 'created_at',
+}
+
+HOUR_MS = 3600 * 1000
+QUARTERS_PER_HOUR = 4
+
+
+def _cutoff_string(cutoff: datetime) -> str:
+    """
+    Граница в виде строки для сравнения с хранимыми датами
+
+    Свечи хранятся как '2024-12-20 20:00:00+00:00', ORM колонки - как
+    '2024-12-20 20:00:00.000000': префикс из 19 символов сравнивается
+    одинаково для обоих форматов, строка на самой границе не удаляется.
+    """
+    return cutoff.astimezone(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def aggregate_quarters_to_hours(df: pd.DataFrame) -> List[list]:
+    """
+    15m строки (open_time в epoch ms) → часовые свечи в формате Binance klines
+
+    В результат попадают только полные часы (все 4 свечи 15m).
+    """
+    if df.empty:
+        return []
+    hour = (df['open_time'] // HOUR_MS) * HOUR_MS
+    grouped = df.sort_values('open_time').groupby(hour)
+    agg = grouped.agg(
+        n=('open_time', 'size'),
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        volume=('volume', 'sum'),
+        quote_volume=('quote_volume', 'sum'),
+        trades=('trades', 'sum'),
+        taker_buy_base=('taker_buy_base', 'sum'),
+        taker_buy_quote=('taker_buy_quote', 'sum'),
+    )
+    agg = agg[agg['n'] == QUARTERS_PER_HOUR]
+    return [
+        [int(row.Index), row.open, row.high, row.low, row.close, row.volume,
+         int(row.Index) + HOUR_MS - 1, row.quote_volume, int(row.trades),
+         row.taker_buy_base, row.taker_buy_quote]
+        for row in agg.itertuples()
+    ]
+
+
+class RetentionService:
+    """Удаление данных старше политик пачками + incremental VACUUM"""
+
+    def __init__(self, db, executor, candle_days: Dict[str, Optional[int]],
+                 table_days: Dict[str, Optional[int]], downsample_15m_after_days: Optional[int] = None,
+                 batch_size: int = 5000, batch_pause_ms: int = 50, vacuum_pages: int = 5000):
+        """
+        Args:
+            db: Database instance
+            executor: DatabaseExecutor (удаление идет через поток-писатель)
+            candle_days: {timeframe: дней хранения или None}
+            table_days: {таблица: дней хранения или None}
+            downsample_15m_after_days: 15m старше N дней → 1h, затем удаление 15m
+            batch_size: Строк в одной транзакции DELETE
+            batch_pause_ms: Пауза между пачками (даем место горячей записи)
+            vacuum_pages: Максимум страниц за один PRAGMA incremental_vacuum (0 = не делать)
+        """
+        self.db = db
+        self.executor = executor
+        self.candle_days = self._clamp_candle_days(dict(candle_days), downsample_15m_after_days)
+        self.table_days = {t: d for t, d in table_days.items() if t in TABLE_TIME_COLUMNS}
+        self.downsample_after = downsample_15m_after_days
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause_ms / 1000
+        self.vacuum_pages = vacuum_pages
+
+    @classmethod
+    def from_config(cls, db, executor) -> 'RetentionService':
+        history_days = config.get('database.history_days', 270)
+        return cls(
+            db, executor,
+            candle_days=config.get('retention.candles_days', None) or {'15m': history_days, '1h': history_days},
+            table_days=config.get('retention.tables_days', None) or {},
+            downsample_15m_after_days=config.get('retention.downsample_15m_after_days', None),
+            batch_size=config.get('retention.batch_size', 5000),
+            batch_pause_ms=config.get('retention.batch_pause_ms', 50),
+            vacuum_pages=config.get('retention.incremental_vacuum_pages', 5000),
+        )
+
+    @staticmethod
+    def _clamp_candle_days(candle_days: Dict, downsample_after: Optional[int]) -> Dict:
+        # Нельзя удалять то, что warm-up загрузит заново при следующей проверке
+        warm_up_days = config.get('database.warm_up_days', 90)
+        if downsample_after:
+            current = candle_days.get('15m')
+            candle_days['15m'] = downsample_after if current is None else min(current, downsample_after)
+        for tf, days in candle_days.items():
+            if days is not None and days < warm_up_days:
+                logger.warning(f"🧹 Retention for {tf} candles ({days}d) < warm_up_days ({warm_up_days}d), using {warm_up_days}d")
+                candle_days[tf] = warm_up_days
+        return candle_days
+
+    # ------------------------------------------------------------------
+    # Запуск
+    # ------------------------------------------------------------------
+
+    async def run(self) -> Dict:
+        """
+        Один проход retention по всем политикам
+
+        Returns:
+            {'deleted': {name: rows}, 'downsampled': int, 'vacuum_pages': int,
+             'freed_bytes': int, 'db_bytes': int, 'elapsed_s': float}
+        """
+        started = time.perf_counter()
+        now = datetime.now(pytz.UTC)
+        size_before = await self.executor.read(self._db_pages)
+
+        deleted: Dict[str, int] = {}
+        downsampled = 0
+
+        for tf, days in self.candle_days.items():
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            rows, folded = await self._prune_candles(tf, cutoff)
+            deleted[f'candles_{tf}'] = rows
+            downsampled += folded
+
+        for table, days in self.table_days.items():
+            if days is None:
+                continue
+            deleted[table] = await self._prune_table(table, TABLE_TIME_COLUMNS[table], now - timedelta(days=days))
+
+        vacuumed = await self._incremental_vacuum()
+        size_after = await self.executor.read(self._db_pages)
+        page_size = size_after['page_size']
+
+        report = {
+            'deleted': deleted,
+            'downsampled': downsampled,
+            'vacuum_pages': vacuumed,
+            'freed_bytes': max(0, size_before['page_count'] - size_after['page_count']) * page_size,
+            'free_bytes': size_after['freelist_count'] * page_size,
+            'db_bytes': size_after['page_count'] * page_size,
+            'elapsed_s': time.perf_counter() - started,
+        }
+        perf_metrics.record('db_write', 'retention', report['elapsed_s'])
+
+        total_deleted = sum(deleted.values())
+        details = ', '.join(f"{name}: {rows}" for name, rows in deleted.items() if rows)
+        logger.info(
+            f"🧹 Retention: {total_deleted} rows deleted" + (f" ({details})" if details else "") +
+            (f", {downsampled} 1h candles downsampled from 15m" if downsampled else "") +
+            f" | freed {report['freed_bytes'] / 1024 / 1024:.1f}MB, DB {report['db_bytes'] / 1024 / 1024:.1f}MB"
+            f" | {report['elapsed_s']:.1f}s"
+        )
+        return report
+
+    # ------------------------------------------------------------------
+    # Свечи
+    # ------------------------------------------------------------------
+
+    async def _prune_candles(self, timeframe: str, cutoff: datetime):
+        cutoff_str = _cutoff_string(cutoff)
+        symbols = await self.executor.read(self._series_before, timeframe, cutoff.replace(tzinfo=None))
+
+        deleted = 0
+        downsampled = 0
+        for symbol in symbols:
+            if timeframe == '15m' and self.downsample_after:
+                downsampled += await self.executor.write(self._downsample_series, symbol, cutoff_str)
+            while True:
+                rows = await self.executor.write(self._delete_candle_batch, symbol, timeframe, cutoff_str)
+                deleted += rows
+                if rows < self.batch_size:
+                    break
+                await asyncio.sleep(self.batch_pause)
+        return deleted, downsampled
+
+    @staticmethod
+    def _series_before(session, timeframe: str, cutoff_naive: datetime) -> List[str]:
+        # Серии, у которых есть свечи старше cutoff - по таблице покрытия (без скана candles)
+        return [
+            symbol for symbol, in session.query(CandleCoverage.symbol).filter(
+                CandleCoverage.timeframe == timeframe,
+                CandleCoverage.first_open_time < cutoff_naive
+            )
+        ]
+
+    def _delete_candle_batch(self, session, symbol: str, timeframe: str, cutoff_str: str) -> int:
+        result = session.execute(text("""
+            DELETE FROM candles WHERE id IN (
+                SELECT id FROM candles
+                WHERE symbol = :symbol AND timeframe = :timeframe AND open_time < :cutoff
+                LIMIT :limit
+            )
+        """), {'symbol': symbol, 'timeframe': timeframe, 'cutoff': cutoff_str, 'limit': self.batch_size})
+        deleted = result.rowcount or 0
+        candle_coverage.trim_before(session, symbol, timeframe, deleted)
+        return deleted
+
+    @staticmethod
+    def _downsample_series(session, symbol: str, cutoff_str: str) -> int:
+        """15m старше cutoff → 1h свечи для часов, которых нет в БД"""
+        params = {'symbol': symbol, 'cutoff': cutoff_str}
+        quarters = pd.DataFrame(session.execute(text("""
+            SELECT CAST(strftime('%s', open_time) AS INTEGER) * 1000 AS open_time,
+                   open, high, low, close, volume, quote_volume,
+                   COALESCE(trades, 0) AS trades, taker_buy_base, taker_buy_quote
+            FROM candles
+            WHERE symbol = :symbol AND timeframe = '15m' AND open_time < :cutoff
+        """), params).mappings().all())
+        if quarters.empty:
+            return 0
+
+        existing = set(session.execute(text("""
+            SELECT CAST(strftime('%s', open_time) AS INTEGER) * 1000
+            FROM candles
+            WHERE symbol = :symbol AND timeframe = '1h' AND open_time < :cutoff
+        """), params).scalars())
+
+        klines = [k for k in aggregate_quarters_to_hours(quarters) if k[0] not in existing]
+        if not klines:
+            return 0
+        return upsert_klines(session, symbol, '1h', klines)
+
+    # ------------------------------------------------------------------
+    # Прочие таблицы
+    # ------------------------------------------------------------------
+
+    async def _prune_table(self, table: str, column: str, cutoff: datetime) -> int:
+        cutoff_str = _cutoff_string(cutoff)
+        deleted = 0
+        while True:
+            rows = await self.executor.write(self._delete_table_batch, table, column, cutoff_str)
+            deleted += rows
+            if rows < self.batch_size:
+                return deleted
+            await asyncio.sleep(self.batch_pause)
+
+    def _delete_table_batch(self, session, table: str, column: str, cutoff_str: str) -> int:
+        # table / column - только из TABLE_TIME_COLUMNS (не пользовательский ввод)
+        result = session.execute(text(
+            f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM {table} WHERE {column} < :cutoff LIMIT :limit)"
+        ), {'cutoff': cutoff_str, 'limit': self.batch_size})
+        return result.rowcount or 0
+
+    # ------------------------------------------------------------------
+    # VACUUM
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _db_pages(session) -> Dict[str, int]:
+        conn = session.connection()
+        return {
+            pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            for pragma in ('page_count', 'freelist_count', 'page_size', 'auto_vacuum')
+        }
+
+    async def _incremental_vacuum(self) -> int:
+        if not self.vacuum_pages:
+            return 0
+        pages = await self.executor.read(self._db_pages)
+        if pages['auto_vacuum'] != 2:
+            if pages['freelist_count']:
+                logger.info(
+                    f"🧹 {pages['freelist_count']} free pages stay in the DB file (auto_vacuum is not INCREMENTAL). "
+                    f"Run: python db_retention.py --enable-incremental-vacuum"
+                )
+            return 0
+        if not pages['freelist_count']:
+            return 0
+        return await self.executor.write(self._vacuum_batch, min(pages['freelist_count'], self.vacuum_pages))
+
+    @staticmethod
+    def _vacuum_batch(session, max_pages: int) -> int:
+        conn = session.connection()
+        before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # incremental_vacuum освобождает по странице на каждый шаг statement'а -
+        # нужен fetchall на DBAPI курсоре (SQLAlchemy делает только первый шаг)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+        finally:
+            cursor.close()
+        return before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+    def enable_incremental_vacuum(self) -> Dict[str, int]:
+        """
+        Одноразовая конвертация существующей БД в auto_vacuum=INCREMENTAL (полный VACUUM)
+
+        Блокирует БД на время VACUUM - запускать при остановленном боте.
+        """
+        with self.db.engine.connect() as conn:
+            before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+            return {
+                'auto_vacuum': conn.exec_driver_sql("PRAGMA auto_vacuum").scalar(),
+                'pages_before': before,
+                'pages_after': conn.exec_driver_sql("PRAGMA page_count").scalar(),
+                'page_size': conn.exec_driver_sql("PRAGMA page_size").scalar(),
+            }
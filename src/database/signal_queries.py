@@ -0,0 +1,121 @@
+"""
+Signal Queries - SELECT'ы таблиц сигналов под индексы models.py
+
+Модуль без побочных эффектов (не открывает БД): используется SignalRepository,
+трекерами, бенчмарком и тестом планов запросов.
+
+Индексы и запросы, которые ими обслуживаются:
+- idx_signals_active / idx_ap_active / idx_v3sr_active (partial, только открытые):
+  опрос трекеров, блокировки при старте, /v3_active - размер индекса = число
+  открытых сигналов, а не вся история
+- idx_signals_stats / idx_ap_stats (covering): статистика за N дней считается
+  GROUP BY по индексу, строки таблицы не читаются
+- idx_signals_closed_at / idx_ap_closed_at: "закрытые за последние N часов"
+"""
+
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, func, select
+
+from src.database.models import ACTIVE_SIGNAL_STATUSES, ActionPriceSignal, Signal
+
+
+def active_filter(model):
+    """
+    status IN ('ACTIVE', 'PENDING') литералами
+
+    С bind-параметрами (status IN (?, ?)) SQLite не может доказать, что запрос
+    попадает в WHERE partial индекса, и сканирует всю таблицу.
+    """
+    return model.status.in_(
+        bindparam('active_statuses', list(ACTIVE_SIGNAL_STATUSES), unique=True,
+                  expanding=True, literal_execute=True)
+    )
+
+
+def active_signals(model):
+    """Открытые сигналы model (опрос трекера)"""
+    return select(model).where(active_filter(model))
+
+
+def active_main_blocks():
+    """(symbol, strategy_name) открытых основных сигналов - covering partial индекс"""
+    return select(Signal.symbol, Signal.strategy_name).where(active_filter(Signal))
+
+
+def active_action_price_symbols():
+    """symbol открытых Action Price сигналов - covering partial индекс"""
+    return select(ActionPriceSignal.symbol).where(active_filter(ActionPriceSignal))
+
+
+def outcome_summary(model, exit_column, since: datetime, *criteria):
+    """
+    Агрегаты исходов за период: (status, exit, count, count_pnl, sum_pnl)
+
+    Колонки запроса входят в *_stats индекс - план "USING COVERING INDEX".
+
+    Args:
+        model: Signal / ActionPriceSignal
+        exit_column: Signal.exit_type / ActionPriceSignal.exit_reason
+        since: Начало периода (created_at >= since)
+        criteria: Доп. условия по колонкам индекса (strategy_id, pattern_type)
+    """
+    return (
+        select(
+            model.status,
+            exit_column,
+            func.count(),
+            func.count(model.pnl_percent),
+            func.sum(model.pnl_percent),
+        )
+        .where(model.created_at >= since, *criteria)
+        .group_by(model.status, exit_column)
+    )
+
+
+def summary_totals(rows: Iterable[Tuple], statuses: Iterable[str],
+                   exit_match: Optional[Callable[[str], bool]] = None) -> Tuple[int, int, float]:
+    """
+    Свернуть строки outcome_summary по статусам (и условию на exit)
+
+    Returns:
+        (count, count_pnl, sum_pnl)
+    """
+    statuses = set(statuses)
+    count = pnl_count = 0
+    pnl_sum = 0.0
+    for status, exit_value, n, n_pnl, sum_pnl in rows:
+        if str(status) not in statuses:
+            continue
+        if exit_match is not None and not exit_match(exit_value or ''):
+            continue
+        count += n
+        pnl_count += n_pnl
+        pnl_sum += float(sum_pnl or 0.0)
+    return count, pnl_count, pnl_sum
+
+
+def explain_query_plan(connection, statement) -> List[str]:
+    """
+    EXPLAIN QUERY PLAN для SQLAlchemy statement (SQLite)
+
+    Statement выполняется один раз: SQL и параметры берутся уже в том виде,
+    в котором их получает драйвер (literal_execute, DateTime → строка).
+
+    Returns:
+        Строки detail плана, например 'SEARCH signals USING COVERING INDEX ...'
+    """
+    captured = []
+
+    def _capture(conn, cursor, sql, parameters, context, executemany):
+        captured.append((sql, parameters))
+
+    event.listen(connection, 'before_cursor_execute', _capture)
+    try:
+        connection.execute(statement).all()
+    finally:
+        event.remove(connection, 'before_cursor_execute', _capture)
+
+    sql, parameters = captured[-1]
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters)]
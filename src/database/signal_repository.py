@@ -0,0 +1,110 @@
+"""
+Signal Repository - асинхронное сохранение / чтение сигналов через DatabaseExecutor
+
+Запись сигналов (Signal, ActionPriceSignal, V3SRSignal) идет через
+поток-писатель, чтение - через потоки-читатели: корутины отправки
+сигналов не блокируют event loop на commit.
+
+Отчеты (Telegram, статистика трекеров) читают через fetch / count / summary -
+read-only пул соединений, не тот, в который пишет горячий путь.
+Запросы и обслуживающие их индексы - src/database/signal_queries.py.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.database.executor import db_executor
+from src.database import signal_queries
+
+
+class SignalRepository:
+    """Async API для таблиц сигналов"""
+
+    def __init__(self, executor):
+        """
+        Args:
+            executor: DatabaseExecutor
+        """
+        self.executor = executor
+
+    async def save(self, record) -> int:
+        """
+        Сохранить ORM запись сигнала (commit в потоке-писателе)
+
+        Returns:
+            id сохраненной записи
+        """
+        return await self.executor.write(self._save, record)
+
+    @staticmethod
+    def _save(session, record) -> int:
+        session.add(record)
+        session.flush()
+        return record.id
+
+    async def get_active_blocks(self) -> Dict[str, List]:
+        """
+        Символы с активными / pending сигналами (для блокировок при старте)
+
+        Returns:
+            {'main': [(symbol, strategy_name)], 'action_price': [symbol]}
+        """
+        return await self.executor.read(self._get_active_blocks)
+
+    @staticmethod
+    def _get_active_blocks(session) -> Dict[str, List]:
+        main: List[Tuple[str, str]] = [
+            (str(symbol), strategy_name)
+            for symbol, strategy_name in session.execute(signal_queries.active_main_blocks())
+        ]
+        action_price = [
+            str(symbol)
+            for symbol, in session.execute(signal_queries.active_action_price_symbols())
+        ]
+        return {'main': main, 'action_price': action_price}
+
+    async def fetch(self, model, *criteria, order_by: Optional[Any] = None,
+                    limit: Optional[int] = None) -> List:
+        """
+        SELECT записей model по условиям (read-only соединение)
+
+        Returns:
+            Отсоединенные ORM объекты (колонки загружены, session закрыта)
+        """
+        return await self.executor.read(self._fetch, model, criteria, order_by, limit)
+
+    @staticmethod
+    def _fetch(session, model, criteria, order_by, limit) -> List:
+        query = session.query(model).filter(*criteria)
+        if order_by is not None:
+            query = query.order_by(order_by)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    async def count(self, model, *criteria) -> int:
+        """SELECT COUNT(*) по условиям (read-only соединение)"""
+        return await self.executor.read(self._count, model, criteria)
+
+    @staticmethod
+    def _count(session, model, criteria) -> int:
+        return session.query(model).filter(*criteria).count()
+
+    async def summary(self, model, exit_column, since: datetime, *criteria) -> List[Tuple]:
+        """
+        Агрегаты исходов за период по covering индексу (см. signal_queries.outcome_summary)
+
+        Returns:
+            [(status, exit, count, count_pnl, sum_pnl), ...]
+        """
+        return await self.executor.read(self._summary, model, exit_column, since, criteria)
+
+    @staticmethod
+    def _summary(session, model, exit_column, since, criteria) -> List[Tuple]:
+        return [
+            tuple(row)
+            for row in session.execute(signal_queries.outcome_summary(model, exit_column, since, *criteria))
+        ]
+
+
+signal_repository = SignalRepository(db_executor)
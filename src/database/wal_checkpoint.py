@@ -0,0 +1,152 @@
+"""
+WAL Checkpointer - фоновое управление WAL файлом SQLite
+
+По умолчанию SQLite делает checkpoint внутри commit писателя, когда WAL
+дорастает до 1000 страниц (wal_autocheckpoint): сохранение сигнала или
+пачки свечей периодически платит за перенос всего WAL в основной файл.
+А длинные читатели (отчеты) не дают checkpoint'у дойти до конца - WAL растет.
+
+WalCheckpointer (пока он запущен, autocheckpoint писателей выключен -
+Database.set_wal_autocheckpoint; CLI и импорт без него работают с checkpoint SQLite):
+- PASSIVE, если с прошлого цикла не было commit'ов (PRAGMA data_version
+  не изменился) - переносит страницы, никого не блокируя
+- TRUNCATE, если WAL больше truncate_wal_mb - сбрасывает файл в 0;
+  ждет читателей не дольше busy_timeout_ms, иначе повтор на следующем цикле
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from src.utils.config import config
+from src.utils.logger import logger
+from src.utils.perf_metrics import perf_metrics
+
+
+class WalCheckpointer:
+    """Периодический checkpoint WAL на собственном соединении"""
+
+    def __init__(self, db, interval_seconds: float = 30, truncate_wal_mb: float = 64,
+                 busy_timeout_ms: int = 2000, autocheckpoint_pages: int = 0):
+        """
+        Args:
+            db: Database instance
+            interval_seconds: Период проверки WAL
+            truncate_wal_mb: Размер WAL, после которого делается TRUNCATE
+            busy_timeout_ms: Сколько TRUNCATE ждет читателей / писателя
+            autocheckpoint_pages: wal_autocheckpoint писателей, пока checkpointer запущен
+        """
+        self.db = db
+        self.autocheckpoint_pages = autocheckpoint_pages
+        self.interval = interval_seconds
+        self.truncate_bytes = int(truncate_wal_mb * 1024 * 1024)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.wal_path = f"{db.db_path}-wal"
+
+        self._engine = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_data_version: Optional[int] = None
+
+        self.stats = {'passive': 0, 'truncate': 0, 'busy': 0, 'skipped': 0}
+
+    @classmethod
+    def from_config(cls, db) -> 'WalCheckpointer':
+        return cls(
+            db,
+            interval_seconds=config.get('database.wal_checkpoint.interval_seconds', 30),
+            truncate_wal_mb=config.get('database.wal_checkpoint.truncate_wal_mb', 64),
+            busy_timeout_ms=config.get('database.wal_checkpoint.busy_timeout_ms', 2000),
+            autocheckpoint_pages=config.get('database.wal_checkpoint.autocheckpoint_pages', 0),
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._engine = self.db.create_dedicated_engine()
+        self._task = asyncio.create_task(self._run())
+        # Checkpoint теперь делает этот цикл, а не commit писателя
+        self.db.set_wal_autocheckpoint(self.autocheckpoint_pages)
+        logger.info(
+            f"🧾 WAL checkpointer started (every {self.interval:.0f}s, "
+            f"TRUNCATE > {self.truncate_bytes / 1024 / 1024:.0f}MB)"
+        )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Без фонового цикла писатели снова делают checkpoint сами
+        self.db.set_wal_autocheckpoint(None)
+        if self._engine is not None:
+            # Финальный checkpoint: следующий старт начинает с пустого WAL
+            await asyncio.to_thread(self.checkpoint, 'TRUNCATE')
+            self._engine.dispose()
+            self._engine = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"WAL checkpoint failed: {e}", exc_info=True)
+
+    def wal_size(self) -> int:
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+
+    def run_once(self) -> Optional[str]:
+        """
+        Один цикл политики (выполняется в потоке)
+
+        Returns:
+            Режим выполненного checkpoint или None
+        """
+        if self.wal_size() >= self.truncate_bytes:
+            return self.checkpoint('TRUNCATE')
+
+        with self._engine.connect() as conn:
+            data_version = conn.exec_driver_sql("PRAGMA data_version").scalar()
+        idle = data_version == self._last_data_version
+        self._last_data_version = data_version
+
+        if not idle:
+            self.stats['skipped'] += 1
+            return None
+        return self.checkpoint('PASSIVE')
+
+    def checkpoint(self, mode: str) -> str:
+        """PRAGMA wal_checkpoint(mode) на соединении checkpointer'а"""
+        started = time.perf_counter()
+        wal_before = self.wal_size()
+        with self._engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            busy, log_frames, checkpointed = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").one()
+        elapsed = time.perf_counter() - started
+        perf_metrics.record('db_write', f'wal_checkpoint_{mode.lower()}', elapsed)
+
+        if busy:
+            self.stats['busy'] += 1
+            logger.debug(f"🧾 WAL checkpoint {mode} busy ({checkpointed}/{log_frames} frames), retry next cycle")
+        else:
+            self.stats[mode.lower()] += 1
+            if mode == 'TRUNCATE' and wal_before:
+                logger.info(
+                    f"🧾 WAL truncated: {wal_before / 1024 / 1024:.1f}MB → {self.wal_size() / 1024 / 1024:.1f}MB "
+                    f"in {elapsed * 1000:.0f}ms"
+                )
+        return mode
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'wal_bytes': self.wal_size()}
@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 from enum import Enum
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
+from src.indicators.percentiles import rolling_rank
 from src.indicators.technical import TechnicalIndicators
+from src.indicators.universe import UniverseIndicators
 from src.utils.config import config
 from src.utils.logger import logger
 
@@ -23,15 +26,18 @@ class MarketRegimeDetector:
         self.late_trend_atr_mult = config.get('market_detector.trend.late_trend_atr_multiplier', 1.8)
         self.ema_periods = config.get('market_detector.trend.ema_periods', [20, 50, 200])
     
+    def _undecided(self, bars: int) -> Dict:
+        logger.warning(f"Insufficient data for regime detection ({bars} bars)")
+        return {
+            'regime': MarketRegime.UNDECIDED,
+            'confidence': 0.0,
+            'late_trend': False,
+            'details': {}
+        }
+    
     def detect_regime(self, df: pd.DataFrame, timeframe: str = '1h') -> Dict:
         if len(df) < 200:
-            logger.warning(f"Insufficient data for regime detection ({len(df)} bars)")
-            return {
-                'regime': MarketRegime.UNDECIDED,
-                'confidence': 0.0,
-                'late_trend': False,
-                'details': {}
-            }
+            return self._undecided(len(df))
         
         adx_data = TechnicalIndicators.calculate_adx(df)
         adx = adx_data[f'ADX_{14}'].iloc[-1] if f'ADX_{14}' in adx_data.columns else 0
@@ -40,14 +46,67 @@ class MarketRegimeDetector:
         atr_percent = TechnicalIndicators.calculate_atr_percent(df).iloc[-1]
         
         bb_width = TechnicalIndicators.calculate_bb_width(df)
-        bb_width_current = bb_width.iloc[-1] if not bb_width.empty else 0
-        bb_width_percentile = TechnicalIndicators.calculate_percentile(bb_width, bb_width_current, period=90)
         
         ema_20 = TechnicalIndicators.calculate_ema(df, 20).iloc[-1]
         ema_50 = TechnicalIndicators.calculate_ema(df, 50).iloc[-1]
         ema_200 = TechnicalIndicators.calculate_ema(df, 200).iloc[-1]
         
-        close = df['close'].iloc[-1]
+        def ema_slopes() -> Tuple[float, float]:
+            return (TechnicalIndicators.calculate_ema_slope(df, 20).iloc[-1],
+                    TechnicalIndicators.calculate_ema_slope(df, 50).iloc[-1])
+        
+        return self._classify(adx, atr, atr_percent, bb_width, ema_20, ema_50, ema_200,
+                              df['close'].iloc[-1], ema_slopes)
+    
+    def detect_regime_batch(self, frames: Dict[str, pd.DataFrame], timeframe: str = '4h',
+                            universe: Optional[UniverseIndicators] = None) -> Dict[str, Dict]:
+        """
+        detect_regime для всех символов: ADX/ATR/EMA/BB считаются матрицами вселенной
+        
+        Args:
+            frames: {symbol: DataFrame} одного таймфрейма
+            timeframe: Таймфрейм
+            universe: Уже построенные UniverseIndicators этих frames (иначе строятся здесь)
+            
+        Returns:
+            {symbol: результат detect_regime}
+        """
+        eligible = {symbol: df for symbol, df in frames.items() if len(df) >= 200}
+        if eligible and universe is None:
+            universe = UniverseIndicators(eligible, timeframe)
+        
+        results = {}
+        for symbol, df in frames.items():
+            if symbol not in eligible:
+                results[symbol] = self._undecided(len(df))
+                continue
+            if not universe.matches(symbol, df):
+                results[symbol] = self.detect_regime(df, timeframe)
+                continue
+            
+            row = universe.row
+            atr = row(symbol, 'atr_14')
+            ema_20 = row(symbol, 'ema_20')
+            ema_50 = row(symbol, 'ema_50')
+            bb_width = TechnicalIndicators.calculate_bb_width(df, bb=universe.bb_frame(symbol, df.index))
+            
+            def ema_slopes(ema_20=ema_20, ema_50=ema_50) -> Tuple[float, float]:
+                return (ema_20[-1] - ema_20[-6]) / 5, (ema_50[-1] - ema_50[-6]) / 5
+            
+            results[symbol] = self._classify(
+                row(symbol, 'adx_adx')[-1], atr[-1], row(symbol, 'atr_pct_14')[-1], bb_width,
+                ema_20[-1], ema_50[-1], row(symbol, 'ema_200')[-1], df['close'].iloc[-1], ema_slopes
+            )
+        
+        return results
+    
+    def _classify(self, adx, atr, atr_percent, bb_width: pd.Series, ema_20, ema_50, ema_200,
+                  close, ema_slopes: Callable[[], Tuple[float, float]]) -> Dict:
+        """Режим по значениям индикаторов последнего бара (общая логика detect_regime / batch)"""
+        # Перцентиль каждого бара среди 90 последних: последний - текущий перцентиль,
+        # серия с конца - squeeze bars (один проход вместо calculate_percentile + подсчета)
+        ranks = rolling_rank(bb_width, period=90)
+        bb_width_percentile = ranks[-1] if len(ranks) else 0.0
         
         ema_aligned_bull = ema_20 > ema_50 > ema_200
         ema_aligned_bear = ema_20 < ema_50 < ema_200
@@ -56,7 +115,7 @@ class MarketRegimeDetector:
         distance_to_ema20 = abs(close - ema_20) / atr if atr > 0 else 0
         late_trend = distance_to_ema20 > self.late_trend_atr_mult
         
-        squeeze_bars = self._count_squeeze_bars(bb_width, self.squeeze_bb_percentile)
+        squeeze_bars = self._count_squeeze_bars(ranks, self.squeeze_bb_percentile)
         is_squeeze = (bb_width_percentile < self.squeeze_bb_percentile and 
                      squeeze_bars >= self.squeeze_min_bars)
         
@@ -84,8 +143,9 @@ class MarketRegimeDetector:
         
         # ПРИОРИТЕТ 3: RANGE/CHOP - низкий ADX и низкая волатильность (но не squeeze)
         elif adx < self.adx_threshold and bb_width_percentile < self.bb_percentile_threshold:
-            ema_20_slope_raw = abs(TechnicalIndicators.calculate_ema_slope(df, 20).iloc[-1])
-            ema_50_slope_raw = abs(TechnicalIndicators.calculate_ema_slope(df, 50).iloc[-1])
+            ema_20_slope, ema_50_slope = ema_slopes()
+            ema_20_slope_raw = abs(ema_20_slope)
+            ema_50_slope_raw = abs(ema_50_slope)
             
             # Нормализация slope в процентах от цены (чтобы работало для любых активов)
             ema_20_slope_pct = (ema_20_slope_raw / ema_20 * 100) if ema_20 > 0 else 0
@@ -125,30 +185,28 @@ class MarketRegimeDetector:
             'details': details
         }
     
-    def _count_squeeze_bars(self, bb_width: pd.Series, percentile_threshold: float) -> int:
-        if bb_width.empty or len(bb_width) < 20:
+    def _count_squeeze_bars(self, ranks: np.ndarray, percentile_threshold: float) -> int:
+        """Баров подряд с конца, у которых перцентиль BB width (rolling_rank) ниже порога"""
+        if len(ranks) < 20:
             return 0
         
-        count = 0
-        for i in range(len(bb_width) - 1, -1, -1):
-            percentile = TechnicalIndicators.calculate_percentile(
-                bb_width[:i+1], bb_width.iloc[i], period=90
-            )
-            if percentile < percentile_threshold:
-                count += 1
-            else:
-                break
-        
-        return count
+        above = np.flatnonzero(~(ranks < percentile_threshold))
+        return int(len(ranks) - 1 - above[-1]) if len(above) else len(ranks)
     
     def get_h4_bias(self, df_h4: pd.DataFrame) -> str:
         if len(df_h4) < 50:
             return 'neutral'
         
-        ema_50 = TechnicalIndicators.calculate_ema(df_h4, 50).iloc[-1]
-        ema_200 = TechnicalIndicators.calculate_ema(df_h4, 200).iloc[-1]
-        close = df_h4['close'].iloc[-1]
+        ema_200 = TechnicalIndicators.calculate_ema(df_h4, 200)
+        if ema_200 is None:  # < 200 баров (молодой листинг) - EMA 200 еще нет
+            return 'neutral'
         
+        ema_50 = TechnicalIndicators.calculate_ema(df_h4, 50).iloc[-1]
+        return self.classify_bias(df_h4['close'].iloc[-1], ema_50, ema_200.iloc[-1])
+    
+    @staticmethod
+    def classify_bias(close: float, ema_50: float, ema_200: float) -> str:
+        """H4 bias по close и EMA 50/200 последнего бара (общая логика get_h4_bias / RegimeService)"""
         if close > ema_50 > ema_200:
             return 'bullish'
         elif close < ema_50 < ema_200:
@@ -0,0 +1,158 @@
+"""
+Regime Service - кеш режима рынка (H4) по символам
+
+detect_regime + get_h4_bias по 360 барам 4h пересчитывают ADX, ATR, BB width,
+перцентиль и три EMA, хотя вход меняется только при закрытии 4h свечи
+(каждый 16-й цикл 15m). Сервис хранит regime / bias / confidence / details
+символа с ключом по последнему бару 4h (сигнатура DataFrame, как у
+PrefixSumCache) и пересчитывает только символы, у которых бар сменился:
+- get()      один символ (промах - detect_regime + get_h4_bias)
+- refresh()  все устаревшие символы одним detect_regime_batch (закрытие 4h)
+- remember() результат, посчитанный в worker процессе пула анализа
+
+snapshot() - сводка режимов по всем символам (для скоринга и Telegram).
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+import pytz
+
+from src.detectors.market_regime import MarketRegime, MarketRegimeDetector
+from src.indicators.prefix_sums import PrefixSumCache
+from src.indicators.universe import UniverseIndicators
+
+
+BIASES = ('bullish', 'bearish', 'neutral')
+
+
+class RegimeService:
+    """Режим рынка и H4 bias по символам с кешем до закрытия следующей 4h свечи"""
+
+    def __init__(self, detector: Optional[MarketRegimeDetector] = None, timeframe: str = '4h'):
+        """
+        Args:
+            detector: MarketRegimeDetector (по умолчанию создается свой)
+            timeframe: Таймфрейм режима
+        """
+        self.detector = detector or MarketRegimeDetector()
+        self.timeframe = timeframe
+        self._entries: Dict[str, Dict] = {}
+        self._snapshot: Optional[Dict] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, df: pd.DataFrame) -> Dict:
+        """
+        Режим символа: из кеша, если последний бар df не сменился, иначе пересчитать
+
+        Returns:
+            {'regime', 'bias', 'confidence', 'regime_data', 'bar_time', 'updated_at'}
+        """
+        signature = PrefixSumCache.signature(df)
+        entry = self._entries.get(symbol)
+        if entry is not None and entry['signature'] == signature:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        regime_data = self.detector.detect_regime(df, self.timeframe)
+        return self._store(symbol, signature, df, regime_data, self.detector.get_h4_bias(df))
+
+    def refresh(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Пересчитать символы с новым 4h баром одним batch (матрицы вселенной)
+
+        Args:
+            frames: {symbol: DataFrame 4h}
+
+        Returns:
+            {symbol: запись как у get()}
+        """
+        signatures = {symbol: PrefixSumCache.signature(df) for symbol, df in frames.items()}
+        stale = {
+            symbol: df for symbol, df in frames.items()
+            if symbol not in self._entries or self._entries[symbol]['signature'] != signatures[symbol]
+        }
+        self.hits += len(frames) - len(stale)
+        self.misses += len(stale)
+
+        if stale:
+            eligible = {symbol: df for symbol, df in stale.items() if len(df) >= 200}
+            universe = UniverseIndicators(eligible, self.timeframe) if eligible else None
+            results = self.detector.detect_regime_batch(stale, self.timeframe, universe=universe)
+
+            for symbol, df in stale.items():
+                if universe is not None and symbol in universe:
+                    bias = self.detector.classify_bias(
+                        df['close'].iloc[-1],
+                        universe.row(symbol, 'ema_50')[-1],
+                        universe.row(symbol, 'ema_200')[-1]
+                    )
+                else:
+                    bias = self.detector.get_h4_bias(df)
+                self._store(symbol, signatures[symbol], df, results[symbol], bias)
+
+        return {symbol: self._entries[symbol] for symbol in frames}
+
+    def remember(self, symbol: str, df: pd.DataFrame, regime_data: Dict, bias: str) -> Dict:
+        """Сохранить режим, рассчитанный в другом процессе (worker пула анализа)"""
+        return self._store(symbol, PrefixSumCache.signature(df), df, regime_data, bias)
+
+    def retain(self, symbols: Iterable[str]):
+        """Оставить только символы из списка (выбывшие не попадают в snapshot)"""
+        keep = set(symbols)
+        dropped = [symbol for symbol in self._entries if symbol not in keep]
+        for symbol in dropped:
+            del self._entries[symbol]
+        if dropped:
+            self._snapshot = None
+
+    def snapshot(self) -> Dict:
+        """
+        Сводка режимов по всем символам в кеше
+
+        Returns:
+            {'total', 'counts': {regime: n}, 'shares': {regime: доля}, 'bias': {bias: n}, 'updated_at'}
+        """
+        if self._snapshot is None:
+            counts = Counter(entry['regime'] for entry in self._entries.values())
+            bias = Counter(entry['bias'] for entry in self._entries.values())
+            total = len(self._entries)
+            self._snapshot = {
+                'total': total,
+                'counts': {regime.value: counts.get(regime.value, 0) for regime in MarketRegime},
+                'shares': {regime.value: counts.get(regime.value, 0) / total if total else 0.0
+                           for regime in MarketRegime},
+                'bias': {name: bias.get(name, 0) for name in BIASES},
+                'updated_at': max((entry['updated_at'] for entry in self._entries.values()), default=None),
+            }
+        return self._snapshot
+
+    def get_stats(self) -> Dict:
+        """Статистика кеша (hits / misses / символов)"""
+        return {
+            'symbols_count': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _store(self, symbol: str, signature, df: pd.DataFrame, regime_data: Dict, bias: str) -> Dict:
+        if 'open_time' in df.columns and len(df):
+            bar_time = df['open_time'].iat[-1]
+        else:
+            bar_time = df.index[-1] if len(df) else None
+
+        entry = {
+            'signature': signature,
+            'regime': regime_data['regime'].value,
+            'bias': bias,
+            'confidence': regime_data['confidence'],
+            'regime_data': regime_data,
+            'bar_time': bar_time,
+            'updated_at': datetime.now(pytz.UTC),
+        }
+        self._entries[symbol] = entry
+        self._snapshot = None
+        return entry
@@ -1,116 +1,213 @@
 """
 Расчет общих индикаторов для всех стратегий
 Рассчитывается ОДИН РАЗ и используется всеми стратегиями
+
+Индикаторы разбиты на группы: одна группа - один расчет, дающий несколько
+ключей (Bollinger → bb_20, bb_width_*, bb_range_*). calculate_common_indicators
+считает все группы, LazyIndicators (src/indicators/lazy.py) - только группы,
+к ключам которых обратились стратегии.
 """
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Callable, Dict, Optional, Tuple
 from src.indicators.technical import TechnicalIndicators
+from src.indicators.percentiles import RollingPercentiles
 from src.indicators.cvd import CVDCalculator
 from src.indicators.vwap import VWAPCalculator
+from src.indicators.prefix_sums import PrefixSums, prefix_sum_cache
 from src.indicators.volume_profile import VolumeProfile
+from src.utils.config import config
 
 
-def calculate_common_indicators(df: pd.DataFrame, timeframe: str = '1h') -> Dict:
-    """
-    Рассчитать все общие индикаторы один раз
-    
-    Args:
-        df: DataFrame с OHLCV данными
-        timeframe: Таймфрейм (для специфичных расчетов)
-        
-    Returns:
-        Dict со всеми рассчитанными индикаторами
-    """
+# === pandas_ta часть: group(df) ===
+
+def _atr_indicators(df: pd.DataFrame) -> Dict:
+    return {
+        'atr_14': TechnicalIndicators.calculate_atr(df, period=14),
+        'atr_pct_14': TechnicalIndicators.calculate_atr_percent(df, period=14),
+    }
+
+
+def _ema_indicators(df: pd.DataFrame) -> Dict:
+    return {
+        'ema_20': TechnicalIndicators.calculate_ema(df, period=20),
+        'ema_50': TechnicalIndicators.calculate_ema(df, period=50),
+        'ema_200': TechnicalIndicators.calculate_ema(df, period=200),
+        'ema_9': TechnicalIndicators.calculate_ema(df, period=9),
+    }
+
+
+def _bb_indicators(df: pd.DataFrame) -> Dict:
     indicators = {}
-    
-    # === ATR ===
-    indicators['atr_14'] = TechnicalIndicators.calculate_atr(df, period=14)
-    indicators['atr_pct_14'] = TechnicalIndicators.calculate_atr_percent(df, period=14)
-    
-    # === EMA ===
-    indicators['ema_20'] = TechnicalIndicators.calculate_ema(df, period=20)
-    indicators['ema_50'] = TechnicalIndicators.calculate_ema(df, period=50)
-    indicators['ema_200'] = TechnicalIndicators.calculate_ema(df, period=200)
-    indicators['ema_9'] = TechnicalIndicators.calculate_ema(df, period=9)
-    
-    # === Bollinger Bands ===
     bb_20 = TechnicalIndicators.calculate_bb(df, period=20, std=2.0)
     indicators['bb_20'] = bb_20
     indicators['bb_width_20'] = TechnicalIndicators.calculate_bb_width(df, period=20, std=2.0)
     
-    # Перцентили BB width на 60 барах (для проверки сжатия)
-    if 'bb_width_20' in indicators and indicators['bb_width_20'] is not None:
-        bb_width = indicators['bb_width_20']
-        indicators['bb_width_p30'] = bb_width.rolling(60).quantile(0.30)
-        indicators['bb_width_p40'] = bb_width.rolling(60).quantile(0.40)
-        indicators['bb_width_p50'] = bb_width.rolling(60).quantile(0.50)
-    
-    # === Donchian Channels ===
-    indicators['donchian_20'] = TechnicalIndicators.calculate_donchian(df, period=20)
-    indicators['donchian_55'] = TechnicalIndicators.calculate_donchian(df, period=55)
+    # Перцентили BB width на 60 барах (для проверки сжатия) - одна сортировка окон
+    if indicators['bb_width_20'] is not None:
+        (indicators['bb_width_p30'], indicators['bb_width_p40'],
+         indicators['bb_width_p50']) = RollingPercentiles(indicators['bb_width_20'], 60).quantiles(0.30, 0.40, 0.50)
     
-    # === ADX ===
+    # Для Squeeze Breakout - проверка сжатия
+    if bb_20 is not None:
+        upper_col = [col for col in bb_20.columns if 'BBU' in col]
+        lower_col = [col for col in bb_20.columns if 'BBL' in col]
+        
+        if upper_col and lower_col:
+            bb_range = bb_20[upper_col[0]] - bb_20[lower_col[0]]
+            indicators['bb_range_20'] = bb_range
+            indicators['bb_range_p20'] = RollingPercentiles(bb_range, 50).quantile(0.20)
+    return indicators
+
+
+def _donchian_indicators(df: pd.DataFrame) -> Dict:
+    return {
+        'donchian_20': TechnicalIndicators.calculate_donchian(df, period=20),
+        'donchian_55': TechnicalIndicators.calculate_donchian(df, period=55),
+    }
+
+
+def _adx_indicators(df: pd.DataFrame) -> Dict:
     adx_data = TechnicalIndicators.calculate_adx(df, period=14)
-    indicators['adx_14'] = adx_data
+    indicators = {'adx_14': adx_data}
     if adx_data is not None and not adx_data.empty:
         # Извлекаем столбцы ADX
         adx_col = [col for col in adx_data.columns if 'ADX' in col and 'DI' not in col]
         if adx_col:
             indicators['adx_value'] = adx_data[adx_col[0]]
-    
-    # === RSI ===
-    indicators['rsi_14'] = TechnicalIndicators.calculate_rsi(df, period=14)
-    
-    # === Stochastic ===
-    indicators['stoch_14_3'] = TechnicalIndicators.calculate_stochastic(df, k_period=14, d_period=3)
-    
-    # === CVD (Cumulative Volume Delta) ===
-    indicators['cvd'] = CVDCalculator.calculate_bar_cvd(df)
-    
-    # === VWAP ===
-    indicators['daily_vwap'] = VWAPCalculator.calculate_daily_vwap(df)
-    
-    # === EMA Slope ===
-    indicators['ema_slope_20'] = TechnicalIndicators.calculate_ema_slope(df, period=20, lookback=5)
-    
-    # === Дополнительные расчеты для стратегий ===
-    
-    # Для Squeeze Breakout - проверка сжатия
-    if 'bb_20' in indicators and indicators['bb_20'] is not None:
-        bb = indicators['bb_20']
-        upper_col = [col for col in bb.columns if 'BBU' in col]
-        lower_col = [col for col in bb.columns if 'BBL' in col]
-        
-        if upper_col and lower_col:
-            bb_range = bb[upper_col[0]] - bb[lower_col[0]]
-            indicators['bb_range_20'] = bb_range
-            indicators['bb_range_p20'] = bb_range.rolling(50).quantile(0.20)
-    
+    return indicators
+
+
+def _rsi_indicators(df: pd.DataFrame) -> Dict:
+    return {'rsi_14': TechnicalIndicators.calculate_rsi(df, period=14)}
+
+
+def _ema_slope_indicators(df: pd.DataFrame) -> Dict:
+    return {'ema_slope_20': TechnicalIndicators.calculate_ema_slope(df, period=20, lookback=5)}
+
+
+def _range_indicators(df: pd.DataFrame) -> Dict:
     # Для Range Fade - range detection
-    indicators['high_20'] = df['high'].rolling(20).max()
-    indicators['low_20'] = df['low'].rolling(20).min()
-    indicators['range_20'] = indicators['high_20'] - indicators['low_20']
-    
+    high_20 = df['high'].rolling(20).max()
+    low_20 = df['low'].rolling(20).min()
+    return {'high_20': high_20, 'low_20': low_20, 'range_20': high_20 - low_20}
+
+
+def _volume_stats_indicators(df: pd.DataFrame) -> Dict:
     # Для Volume Profile - volume statistics
-    indicators['volume_mean_20'] = df['volume'].rolling(20).mean()
-    indicators['volume_std_20'] = df['volume'].rolling(20).std()
-    
-    # === Volume Profile (POC, VAH, VAL) - ВЕКТОРИЗОВАННЫЙ ===
-    # Кешируется в IndicatorCache для быстрого доступа
+    return {
+        'volume_mean_20': df['volume'].rolling(20).mean(),
+        'volume_std_20': df['volume'].rolling(20).std(),
+    }
+
+
+# === Индикаторы с состоянием символа: group(df, timeframe, symbol) ===
+
+def _stoch_indicators(df: pd.DataFrame, timeframe: str, symbol: Optional[str]) -> Dict:
+    return {'stoch_14_3': TechnicalIndicators.calculate_stochastic(df, k_period=14, d_period=3)}
+
+
+def _cvd_indicators(df: pd.DataFrame, timeframe: str, symbol: Optional[str]) -> Dict:
+    # CVD (Cumulative Volume Delta)
+    return {'cvd': CVDCalculator.calculate_bar_cvd(df)}
+
+
+def _vwap_indicators(df: pd.DataFrame, timeframe: str, symbol: Optional[str]) -> Dict:
+    # Накопленные суммы PV/V/CVD: окна VWAP и дельты за O(1) (src/indicators/prefix_sums.py)
+    prefix_sums = prefix_sum_cache.get(symbol, timeframe, df) if symbol else PrefixSums(df)
+    return {
+        'prefix_sums': prefix_sums,
+        'daily_vwap': VWAPCalculator.calculate_daily_vwap(df, sums=prefix_sums),
+    }
+
+
+def _volume_profile_indicators(df: pd.DataFrame, timeframe: str, symbol: Optional[str]) -> Dict:
+    # Volume Profile (POC, VAH, VAL) - ВЕКТОРИЗОВАННЫЙ
     try:
         vp_result = VolumeProfile.calculate_profile(df, num_bins=50)
-        if vp_result:
-            indicators['volume_profile'] = vp_result
-            # Добавляем ключевые уровни отдельно для удобства
-            indicators['vpoc'] = vp_result.get('vpoc')
-            indicators['vah'] = vp_result.get('vah')
-            indicators['val'] = vp_result.get('val')
+        if not vp_result:
+            return {}
+        return {
+            'volume_profile': vp_result,
+            # Ключевые уровни отдельно для удобства
+            'vpoc': vp_result.get('vpoc'),
+            'vah': vp_result.get('vah'),
+            'val': vp_result.get('val'),
+        }
     except Exception as e:
         # Если ошибка - не падать, просто пропустить VP
-        indicators['volume_profile'] = None
-        indicators['vpoc'] = None
-        indicators['vah'] = None
-        indicators['val'] = None
+        return {'volume_profile': None, 'vpoc': None, 'vah': None, 'val': None}
+
+
+# === Производные от других групп: group(df, indicators) ===
+
+def _cvd_divergence_indicators(df: pd.DataFrame, indicators) -> Dict:
+    # Пики/впадины цены и CVD в них - один раз на бар для всех сигналов символа (SignalScorer)
+    cvd = indicators.get('cvd')
+    if cvd is None:
+        return {'cvd_divergence': None}
+    lookback = config.get('scoring.cvd_divergence', {}).get('lookback_bars', 20)
+    return {'cvd_divergence': CVDCalculator.divergence_points(df, cvd, lookback)}
+
+
+# {группа: (ключи, расчет)} - ключи нужны LazyIndicators до расчета
+TECHNICAL_GROUPS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'atr': (('atr_14', 'atr_pct_14'), _atr_indicators),
+    'ema': (('ema_20', 'ema_50', 'ema_200', 'ema_9'), _ema_indicators),
+    'bb': (('bb_20', 'bb_width_20', 'bb_width_p30', 'bb_width_p40', 'bb_width_p50',
+            'bb_range_20', 'bb_range_p20'), _bb_indicators),
+    'donchian': (('donchian_20', 'donchian_55'), _donchian_indicators),
+    'adx': (('adx_14', 'adx_value'), _adx_indicators),
+    'rsi': (('rsi_14',), _rsi_indicators),
+    'ema_slope': (('ema_slope_20',), _ema_slope_indicators),
+    'range': (('high_20', 'low_20', 'range_20'), _range_indicators),
+    'volume_stats': (('volume_mean_20', 'volume_std_20'), _volume_stats_indicators),
+}
+
+FRAME_GROUPS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'stoch': (('stoch_14_3',), _stoch_indicators),
+    'cvd': (('cvd',), _cvd_indicators),
+    'vwap': (('prefix_sums', 'daily_vwap'), _vwap_indicators),
+    'volume_profile': (('volume_profile', 'vpoc', 'vah', 'val'), _volume_profile_indicators),
+}
+
+DERIVED_GROUPS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'cvd_divergence': (('cvd_divergence',), _cvd_divergence_indicators),
+}
+
+
+def calculate_technical_indicators(df: pd.DataFrame) -> Dict:
+    """
+    pandas_ta часть общих индикаторов для одного символа
+    
+    Те же ключи отдает UniverseIndicators.symbol_indicators срезом матриц вселенной.
+    """
+    indicators = {}
+    for _, calculate in TECHNICAL_GROUPS.values():
+        indicators.update(calculate(df))
+    return indicators
+
+
+def calculate_common_indicators(df: pd.DataFrame, timeframe: str = '1h',
+                                symbol: Optional[str] = None) -> Dict:
+    """
+    Рассчитать все общие индикаторы один раз
+    
+    Args:
+        df: DataFrame с OHLCV данными
+        timeframe: Таймфрейм (для специфичных расчетов)
+        symbol: Символ - накопленные суммы VWAP/CVD берутся из prefix_sum_cache
+            и используются стратегиями того же бара повторно
+        
+    Returns:
+        Dict со всеми рассчитанными индикаторами
+    """
+    indicators = calculate_technical_indicators(df)
+    
+    for _, calculate in FRAME_GROUPS.values():
+        indicators.update(calculate(df, timeframe, symbol))
+    
+    for _, calculate in DERIVED_GROUPS.values():
+        indicators.update(calculate(df, indicators))
     
     return indicators
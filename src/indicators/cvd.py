@@ -1,9 +1,30 @@
 import pandas as pd
 import numpy as np
-from typing import Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Optional, Tuple
 from src.utils.logger import logger
 
 
+def find_local_extrema(values, order: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Локальные максимумы и минимумы: точка >= (<=) order соседей с каждой стороны
+    
+    Одно сравнение окон 2·order+1 вместо цикла по барам; NaN не бывает экстремумом.
+    
+    Returns:
+        (индексы пиков, индексы впадин) по возрастанию
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2 * order + 1:
+        empty = np.empty(0, dtype=int)
+        return empty, empty
+    windows = sliding_window_view(values, 2 * order + 1)
+    center = windows[:, order:order + 1]
+    peaks = np.flatnonzero((center >= windows).all(axis=1)) + order
+    troughs = np.flatnonzero((center <= windows).all(axis=1)) + order
+    return peaks, troughs
+
+
 class CVDCalculator:
     @staticmethod
     def calculate_bar_cvd(df: pd.DataFrame) -> pd.Series:
@@ -83,6 +104,41 @@ class CVDCalculator:
         
         return 'none'
     
+    @staticmethod
+    def divergence_points(df: pd.DataFrame, cvd: pd.Series, lookback: int = 20,
+                          order: int = 3) -> Dict:
+        """
+        Пики и впадины цены за последние lookback баров + CVD и объем в этих точках
+        
+        Считается один раз на бар (LazyIndicators 'cvd_divergence'), дивергенция для
+        любого направления сигнала - сравнение двух последних точек (SignalScorer).
+        
+        Returns:
+            {'lookback', 'bars', 'median_volume',
+             'peaks' / 'troughs': {'index', 'price', 'cvd', 'volume'}} - индексы внутри окна
+        """
+        price = df['close'].to_numpy(dtype=float)[-lookback:]
+        cvd_tail = np.asarray(cvd, dtype=float)[-lookback:]
+        volume = df['volume'].to_numpy(dtype=float)[-lookback:] if 'volume' in df.columns else None
+        
+        # Медиана без NaN, как Series.median()
+        valid_volume = volume[~np.isnan(volume)] if volume is not None else np.empty(0)
+        
+        peaks, troughs = find_local_extrema(price, order)
+        points = {
+            'lookback': lookback,
+            'bars': len(df),
+            'median_volume': float(np.median(valid_volume)) if len(valid_volume) else np.nan,
+        }
+        for name, index in (('peaks', peaks), ('troughs', troughs)):
+            points[name] = {
+                'index': index,
+                'price': price[index],
+                'cvd': cvd_tail[index],
+                'volume': volume[index] if volume is not None else None,
+            }
+        return points
+    
     @staticmethod
     def calculate_cvd_slope(cvd: pd.Series, period: int = 10) -> pd.Series:
         return cvd.diff(period) / period
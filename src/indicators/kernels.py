@@ -0,0 +1,342 @@
+"""
+Indicator Kernels - индикаторы сразу для всей вселенной символов
+
+Вход - матрицы (symbols × bars) float64: строка = символ, столбец = бар.
+Свечи разной длины складываются stack_frames по последнему бару, молодые
+листинги дополняются NaN слева; starts[row] - столбец первого бара истории
+символа. Каждая функция считает все строки одним векторным вызовом и дает
+те же значения, что pandas_ta / pandas rolling на DataFrame символа:
+
+- EMA / RMA / ATR / RSI / ADX - рекурсия ewm(adjust=False) через lfilter
+- SMA / stdev / Bollinger / Donchian / квантили - скользящие окна
+  (sliding_window_view): окно с NaN → NaN, как rolling(min_periods=window)
+
+Без starts каждая строка - полная история (как колонка DataFrame).
+Строки с NaN внутри истории считаются через pandas (ewm держит прошлое значение).
+Одномерный ряд (bars,) тоже принимается - как матрица из одной строки.
+"""
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from src.indicators.percentiles import interpolate_sorted
+
+
+# pandas_ta non_zero_range / zero
+EPSILON = sys.float_info.epsilon
+
+# Размер блока скользящих окон (элементов) - ограничивает память квантилей
+WINDOW_BLOCK = 4_000_000
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def stack_frames(frames: Dict[str, pd.DataFrame],
+                 columns: Sequence[str] = PRICE_COLUMNS) -> Tuple[List[str], Dict[str, np.ndarray], np.ndarray]:
+    """
+    Сложить свечи символов в матрицы, выровненные по последнему бару
+
+    Returns:
+        (symbols, {column: (symbols × bars)}, starts) - история символа
+        занимает столбцы starts[row]:, слева NaN
+    """
+    symbols = list(frames)
+    bars = max((len(df) for df in frames.values()), default=0)
+    starts = np.array([bars - len(frames[symbol]) for symbol in symbols], dtype=np.int64)
+
+    matrices = {}
+    for column in columns:
+        if not all(column in df.columns for df in frames.values()):
+            continue
+        matrix = np.full((len(symbols), bars), np.nan)
+        for row, symbol in enumerate(symbols):
+            matrix[row, starts[row]:] = frames[symbol][column].to_numpy(dtype=float)
+        matrices[column] = matrix
+
+    return symbols, matrices, starts
+
+
+def _as_rows(values) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values.reshape(-1, values.shape[-1])
+
+
+def _starts(starts: Optional[np.ndarray], rows: np.ndarray) -> np.ndarray:
+    if starts is None:
+        return np.zeros(rows.shape[0], dtype=np.int64)
+    return np.asarray(starts, dtype=np.int64).reshape(-1)
+
+
+def _require(result: np.ndarray, starts: np.ndarray, min_bars: int) -> np.ndarray:
+    """pandas_ta возвращает None для ряда короче min_bars - здесь NaN строка"""
+    rows = result.reshape(-1, result.shape[-1])
+    short = rows.shape[1] - starts < min_bars
+    if short.any():
+        rows[short] = np.nan
+    return result
+
+
+def shift(values, periods: int = 1) -> np.ndarray:
+    """Series.shift(periods) по последней оси"""
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if periods < values.shape[-1]:
+        result[..., periods:] = values[..., :values.shape[-1] - periods]
+    return result
+
+
+def smoothed(values, alpha: float, starts: Optional[np.ndarray] = None,
+             seed_length: Optional[int] = None) -> np.ndarray:
+    """
+    ewm(alpha, adjust=False) каждой строки
+
+    seed_length - затравка pandas_ta (EMA/ATR): первое значение = SMA первых
+    seed_length баров истории. Без нее (RMA) рекурсия стартует с первого
+    не-NaN значения истории. y = alpha*x + (1-alpha)*y_prev считается lfilter
+    (те же значения, что pandas ewm); строки, где после старта есть NaN, -
+    через pandas.
+    """
+    values = np.asarray(values, dtype=float)
+    rows = _as_rows(values)
+    starts = _starts(starts, rows)
+    count, bars = rows.shape
+    result = np.full(rows.shape, np.nan)
+    cols = np.arange(bars)
+
+    if seed_length:
+        first = starts + seed_length - 1
+        enough = first < bars
+        head = (cols >= starts[:, None]) & (cols <= first[:, None]) & ~np.isnan(rows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            seed = np.where(head, rows, 0.0).sum(axis=1) / head.sum(axis=1)
+    else:
+        valid = ~np.isnan(rows) & (cols >= starts[:, None])
+        enough = valid.any(axis=1)
+        first = np.where(enough, valid.argmax(axis=1), bars)
+        seed = np.full(count, np.nan)
+        seed[enough] = rows[enough, first[enough]]
+
+    interior_nan = (np.isnan(rows) & (cols > first[:, None])).any(axis=1)
+    fast = enough & ~interior_nan & ~np.isnan(seed)
+    fast_rows = np.flatnonzero(fast)
+
+    if len(fast_rows):
+        offsets = first[fast_rows]
+        zi = ((1.0 - alpha) * seed[fast_rows])[:, None]
+        if (offsets == offsets[0]).all():
+            # Истории одной длины - общий столбец старта, без перестановок
+            offset = offsets[0]
+            result[fast_rows, offset] = seed[fast_rows]
+            if offset + 1 < bars:
+                result[fast_rows, offset + 1:], _ = lfilter(
+                    [alpha], [1.0, alpha - 1.0], rows[fast_rows, offset + 1:], axis=1, zi=zi
+                )
+        else:
+            # Сдвинуть строки к общему старту, посчитать и вернуть на место
+            index = offsets[:, None] + cols
+            inside = index < bars
+            aligned = np.take_along_axis(rows[fast_rows], np.minimum(index, bars - 1), axis=1)
+            aligned[~inside] = 0.0
+            smoothed_rows = np.empty_like(aligned)
+            smoothed_rows[:, 0] = seed[fast_rows]
+            smoothed_rows[:, 1:], _ = lfilter([alpha], [1.0, alpha - 1.0], aligned[:, 1:], axis=1, zi=zi)
+            placed = np.full(aligned.shape, np.nan)
+            row_index, col_index = np.nonzero(inside)
+            placed[row_index, index[inside]] = smoothed_rows[row_index, col_index]
+            result[fast_rows] = placed
+
+    for row in np.flatnonzero(enough & ~fast):
+        history = rows[row, starts[row]:].copy()
+        if seed_length:
+            history[:seed_length - 1] = np.nan
+            history[seed_length - 1] = seed[row]
+        result[row, starts[row]:] = pd.Series(history).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+    return result.reshape(values.shape)
+
+
+def ema(close, length: int, starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """pandas_ta.ema (presma, без TA-Lib)"""
+    result = smoothed(close, 2.0 / (length + 1), starts, seed_length=length)
+    return _require(result, _starts(starts, _as_rows(result)), length)
+
+
+def rma(values, length: int, starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """pandas_ta.rma - ewm(alpha=1/length) без затравки"""
+    result = smoothed(values, 1.0 / length, starts)
+    return _require(result, _starts(starts, _as_rows(result)), length)
+
+
+def true_range(high, low, close, prenan: bool = False,
+               starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """pandas_ta.true_range: max(|high-low|, |high-prev_close|, |prev_close-low|)"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    # non_zero_range: +epsilon ко всему ряду, если в нем есть нулевой range
+    hl_range = high - low
+    zero_range = (hl_range == 0).any(axis=-1, keepdims=True)
+    hl_range = hl_range + np.where(zero_range, EPSILON, 0.0)
+    prev_close = shift(close)
+    # fmax пропускает NaN как pandas max(axis=1)
+    result = np.fmax(np.fmax(np.abs(hl_range), np.abs(high - prev_close)), np.abs(prev_close - low))
+    if prenan:
+        rows = result.reshape(-1, result.shape[-1])
+        starts = _starts(starts, rows)
+        rows[np.arange(rows.shape[0]), np.minimum(starts, rows.shape[1] - 1)] = np.nan
+    return result
+
+
+def atr(high, low, close, length: int = 14, prenan: bool = False,
+        starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """pandas_ta.atr (RMA true range с SMA затравкой)"""
+    tr = true_range(high, low, close, prenan=prenan, starts=starts)
+    result = smoothed(tr, 1.0 / length, starts, seed_length=length)
+    return _require(result, _starts(starts, _as_rows(result)), length + 1)
+
+
+def rsi(close, length: int = 14, starts: Optional[np.ndarray] = None) -> np.ndarray:
+    """pandas_ta.rsi (RMA приростов)"""
+    diff = np.asarray(close, dtype=float) - shift(close)
+    positive = np.where(diff < 0, 0.0, diff)
+    negative = np.where(diff > 0, 0.0, diff)
+    positive_avg = rma(positive, length, starts)
+    negative_avg = rma(negative, length, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = 100 * positive_avg / (positive_avg + np.abs(negative_avg))
+    return _require(result, _starts(starts, _as_rows(result)), length + 1)
+
+
+def adx(high, low, close, length: int = 14,
+        starts: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    pandas_ta.adx
+
+    Returns:
+        {'adx', 'adxr', 'dmp', 'dmn'} - колонки ADX_14 / ADXR_14_2 / DMP_14 / DMN_14
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    atr_ = atr(high, low, close, length, prenan=True, starts=starts)
+
+    up = high - shift(high)
+    dn = shift(low) - low
+    pos = ((up > dn) & (up > 0)) * up
+    neg = ((dn > up) & (dn > 0)) * dn
+    pos = np.where(np.abs(pos) < EPSILON, 0.0, pos)
+    neg = np.where(np.abs(neg) < EPSILON, 0.0, neg)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = 100 / atr_
+        dmp = k * rma(pos, length, starts)
+        dmn = k * rma(neg, length, starts)
+        dx = 100 * np.abs(dmp - dmn) / (dmp + dmn)
+    adx_ = rma(dx, length, starts)
+    adxr = 0.5 * (adx_ + shift(adx_, 2))
+
+    rows_starts = _starts(starts, _as_rows(adx_))
+    return {
+        name: _require(values, rows_starts, length + 1)
+        for name, values in (('adx', adx_), ('adxr', adxr), ('dmp', dmp), ('dmn', dmn))
+    }
+
+
+def _rolling(values, window: int, reducer) -> np.ndarray:
+    """rolling(window) с min_periods=window: reducer по окнам последней оси"""
+    values = np.asarray(values, dtype=float)
+    rows = _as_rows(values)
+    result = np.full(rows.shape, np.nan)
+    if rows.shape[1] >= window:
+        result[:, window - 1:] = reducer(sliding_window_view(rows, window, axis=1))
+    return result.reshape(values.shape)
+
+
+def sma(values, length: int) -> np.ndarray:
+    """pandas_ta.sma / rolling(length).mean()"""
+    return _rolling(values, length, lambda windows: windows.mean(axis=-1))
+
+
+def rolling_std(values, length: int, ddof: int = 1) -> np.ndarray:
+    """rolling(length).std(ddof)"""
+    return _rolling(values, length, lambda windows: windows.std(axis=-1, ddof=ddof))
+
+
+def rolling_max(values, length: int) -> np.ndarray:
+    """rolling(length).max()"""
+    return _rolling(values, length, lambda windows: windows.max(axis=-1))
+
+
+def rolling_min(values, length: int) -> np.ndarray:
+    """rolling(length).min()"""
+    return _rolling(values, length, lambda windows: windows.min(axis=-1))
+
+
+def donchian(high, low, length: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Donchian channel (upper, lower) как TechnicalIndicators.calculate_donchian"""
+    return rolling_max(high, length), rolling_min(low, length)
+
+
+def bbands(close, length: int = 20, std: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    pandas_ta.bbands (SMA ± std * stdev, ddof=1)
+
+    Returns:
+        {'lower', 'mid', 'upper', 'bandwidth', 'percent'} - BBL / BBM / BBU / BBB / BBP
+    """
+    close = np.asarray(close, dtype=float)
+    deviation = rolling_std(close, length)
+    mid = sma(close, length)
+    lower = mid - std * deviation
+    upper = mid + std * deviation
+
+    # non_zero_range: +epsilon ко всему ряду, если где-то разность = 0
+    band_range = upper - lower
+    band_range = band_range + np.where((band_range == 0).any(axis=-1, keepdims=True), EPSILON, 0.0)
+    above_lower = close - lower
+    above_lower = above_lower + np.where((above_lower == 0).any(axis=-1, keepdims=True), EPSILON, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'lower': lower,
+            'mid': mid,
+            'upper': upper,
+            'bandwidth': 100 * band_range / mid,
+            'percent': above_lower / band_range,
+        }
+
+
+def bb_width(close, length: int = 20, std: float = 2.0) -> np.ndarray:
+    """Ширина Bollinger (upper - lower) / mid"""
+    bands = bbands(close, length, std)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (bands['upper'] - bands['lower']) / bands['mid']
+
+
+def rolling_quantiles(values, window: int, quantiles: Iterable[float]) -> np.ndarray:
+    """
+    rolling(window).quantile(q) для нескольких q за одну сортировку окон
+
+    Интерполяция - percentiles.interpolate_sorted (linear как в pandas).
+    Окна сортируются блоками строк (WINDOW_BLOCK элементов).
+
+    Returns:
+        (len(quantiles), *values.shape)
+    """
+    quantiles = list(quantiles)
+    values = np.asarray(values, dtype=float)
+    rows = _as_rows(values)
+    count, bars = rows.shape
+    result = np.full((len(quantiles), count, bars), np.nan)
+    if bars < window:
+        return result.reshape((len(quantiles),) + values.shape)
+
+    block = max(1, WINDOW_BLOCK // (window * (bars - window + 1)))
+    for begin in range(0, count, block):
+        ordered = np.sort(sliding_window_view(rows[begin:begin + block], window, axis=1), axis=-1)
+        for index, q in enumerate(quantiles):
+            result[index, begin:begin + block, window - 1:] = interpolate_sorted(ordered, q)
+
+    return result.reshape((len(quantiles),) + values.shape)
@@ -0,0 +1,139 @@
+"""
+Lazy Indicators - общие индикаторы таймфрейма по требованию
+
+calculate_common_indicators считает ~30 индикаторов (включая Volume Profile)
+для каждого таймфрейма каждого символа на новом баре, хотя стратегии читают
+из них единицы (cvd, volume_profile, rsi_14), а отключенные и заблокированные
+стратегии - ничего. LazyIndicators - Mapping с теми же ключами: группа
+(common.TECHNICAL_GROUPS / FRAME_GROUPS / DERIVED_GROUPS) считается при первом обращении к
+любому ее ключу и запоминается - mapping живет в IndicatorCache до нового бара.
+
+Каждый расчет группы пишется в perf_metrics (family 'indicator', label
+'{timeframe}.{group}', из worker процессов пула тоже), поэтому статистика
+цикла показывает, какие индикаторы реально были посчитаны.
+"""
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.indicators.common import DERIVED_GROUPS, FRAME_GROUPS, TECHNICAL_GROUPS
+from src.utils.perf_metrics import perf_metrics
+
+
+# Ключ индикатора → группа, которая его считает
+KEY_GROUPS = {
+    key: group
+    for groups in (TECHNICAL_GROUPS, FRAME_GROUPS, DERIVED_GROUPS)
+    for group, (keys, _) in groups.items()
+    for key in keys
+}
+
+
+class LazyIndicators(Mapping):
+    """Общие индикаторы одного DataFrame: расчет группы при первом обращении"""
+
+    def __init__(self, df: pd.DataFrame, timeframe: str = '1h', symbol: Optional[str] = None):
+        """
+        Args:
+            df: DataFrame с OHLCV данными
+            timeframe: Таймфрейм (label метрик, ключ prefix_sum_cache)
+            symbol: Символ (ключ prefix_sum_cache)
+        """
+        self.df = df
+        self.timeframe = timeframe
+        self.symbol = symbol
+        self._values: Dict = {}
+        self._loaded: List[str] = []
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            group = KEY_GROUPS.get(key)
+            if group is None or group in self._loaded:
+                raise KeyError(key)
+            self._load(group)
+            if key not in self._values:
+                # Группа не дала ключ (например, Volume Profile пустой)
+                raise KeyError(key)
+        return self._values[key]
+
+    def __iter__(self):
+        self.materialize()
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        self.materialize()
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"LazyIndicators({self.symbol} {self.timeframe}, loaded={self._loaded})"
+
+    @property
+    def loaded_groups(self) -> List[str]:
+        """Группы, которые уже посчитаны (в порядке расчета)"""
+        return list(self._loaded)
+
+    def materialize(self, keys: Optional[Iterable[str]] = None) -> 'LazyIndicators':
+        """
+        Посчитать группы ключей заранее (по умолчанию - все)
+
+        Неизвестные ключи пропускаются: стратегия может объявить индикатор,
+        которого нет в общих (он просто не будет посчитан).
+        """
+        if keys is None:
+            groups = list(TECHNICAL_GROUPS) + list(FRAME_GROUPS) + list(DERIVED_GROUPS)
+        else:
+            groups = [KEY_GROUPS[key] for key in keys if key in KEY_GROUPS]
+        for group in groups:
+            if group not in self._loaded:
+                self._load(group)
+        return self
+
+    def _load(self, group: str):
+        started = time.perf_counter()
+        if group in TECHNICAL_GROUPS:
+            _, calculate = TECHNICAL_GROUPS[group]
+            values = calculate(self.df)
+        elif group in FRAME_GROUPS:
+            _, calculate = FRAME_GROUPS[group]
+            values = calculate(self.df, self.timeframe, self.symbol)
+        else:
+            # Производная группа читает другие группы через self (считаются по требованию)
+            _, calculate = DERIVED_GROUPS[group]
+            values = calculate(self.df, self)
+
+        self._values.update(values)
+        self._loaded.append(group)
+        perf_metrics.record('indicator', f'{self.timeframe}.{group}', time.perf_counter() - started)
+
+
+class FrameIndicators(Mapping):
+    """
+    '{tf}_data' для стратегий: {'df': DataFrame, **индикаторы} без копирования
+
+    Распаковка {**indicators} посчитала бы все группы LazyIndicators.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame], indicators: Optional[Mapping] = None):
+        self.df = df
+        self.indicators = indicators if indicators is not None else {}
+
+    def __getitem__(self, key):
+        if key == 'df':
+            return self.df
+        return self.indicators[key]
+
+    def __iter__(self):
+        yield 'df'
+        for key in self.indicators:
+            if key != 'df':
+                yield key
+
+    def __len__(self) -> int:
+        return 1 + sum(1 for key in self.indicators if key != 'df')
+
+
+def materialized_counts() -> Dict[str, int]:
+    """Сколько раз посчитана каждая группа ('{timeframe}.{group}') с начала окна perf_metrics"""
+    return {label: stats['count'] for label, stats in perf_metrics.summary('indicator').items()}
@@ -0,0 +1,123 @@
+"""
+Rolling Percentiles - порядковые статистики скользящего окна
+
+Окна ряда (sliding_window_view) сортируются ОДИН раз, из одной сортировки
+берутся все нужные квантили (rolling(window).quantile(q), интерполяция linear
+как в pandas). Перцентиль-ранг (доля окна строго меньше значения, как
+TechnicalIndicators.calculate_percentile) - percentile_rank для одного
+значения и rolling_rank для всех баров одним сравнением окон.
+
+pandas rolling().quantile() держит skiplist и проходит ряд заново на каждый
+квантиль; здесь p30/p40/p50 - один проход сортировки.
+
+Используется в:
+- calculate_technical_indicators / UniverseIndicators (bb_width p30/p40/p50, bb_range p20;
+  матрицы вселенной - kernels.rolling_quantiles на той же интерполяции)
+- TechnicalIndicators.calculate_percentile
+- MarketRegimeDetector (перцентиль BB width + squeeze bars - один ряд рангов)
+- MarketRegimePro (перцентили BB width / ATR)
+- VWAP Mean Reversion (p40 ATR%, p30 BB width последнего окна)
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def interpolate_sorted(ordered: np.ndarray, quantile: float) -> np.ndarray:
+    """
+    Квантиль по отсортированным окнам (последняя ось), окно с NaN → NaN
+
+    Интерполяция linear как в pandas: v[lo] + (v[lo+1] - v[lo]) * frac.
+    """
+    window = ordered.shape[-1]
+    position = quantile * (window - 1)
+    low = int(position)
+    high, fraction = min(low + 1, window - 1), position - low
+    value = ordered[..., low]
+    if fraction:
+        value = value + (ordered[..., high] - value) * fraction
+    # NaN сортируется в конец окна
+    return np.where(np.isnan(ordered[..., -1]), np.nan, value)
+
+
+class RollingPercentiles:
+    """Отсортированные окна одного ряда: несколько квантилей без повторной сортировки"""
+
+    def __init__(self, values, window: int):
+        """
+        Args:
+            values: pd.Series или массив значений
+            window: Размер окна (min_periods = window, как rolling(window))
+        """
+        self.index = values.index if isinstance(values, pd.Series) else None
+        self.values = np.asarray(values, dtype=float)
+        self.window = window
+        self._ordered: Optional[np.ndarray] = None
+
+    @property
+    def ordered(self) -> np.ndarray:
+        """Отсортированные окна (bars - window + 1, window), сортировка один раз"""
+        if self._ordered is None:
+            if len(self.values) < self.window:
+                self._ordered = np.empty((0, self.window))
+            else:
+                self._ordered = np.sort(sliding_window_view(self.values, self.window), axis=-1)
+        return self._ordered
+
+    def quantiles(self, *quantiles: float) -> List:
+        """
+        rolling(window).quantile(q) для каждого q
+
+        Returns:
+            Список pd.Series (если на входе Series) или массивов длины ряда
+        """
+        result = []
+        for quantile in quantiles:
+            values = np.full(len(self.values), np.nan)
+            if len(self.ordered):
+                values[self.window - 1:] = interpolate_sorted(self.ordered, quantile)
+            result.append(pd.Series(values, index=self.index) if self.index is not None else values)
+        return result
+
+    def quantile(self, quantile: float):
+        """rolling(window).quantile(quantile)"""
+        return self.quantiles(quantile)[0]
+
+
+def last_quantile(values, window: int, quantile: float) -> float:
+    """
+    rolling(window).quantile(quantile).iloc[-1] без расчета по всему ряду
+
+    Только последнее окно: NaN если баров меньше window или в окне есть NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < window:
+        return np.nan
+    return float(interpolate_sorted(np.sort(values[-window:]), quantile))
+
+
+def percentile_rank(values, value: float, period: int = 90) -> float:
+    """
+    Перцентиль value среди последних period значений (доля строго меньших, %)
+
+    NaN в окне входит в знаменатель, как в (series.tail(period) < value).sum() / len.
+    """
+    recent = np.asarray(values, dtype=float)[-period:]
+    return (recent < value).sum() / len(recent) * 100
+
+
+def rolling_rank(values, period: int = 90) -> np.ndarray:
+    """
+    percentile_rank каждого бара среди period последних баров (включая сам бар)
+
+    Первые бары - среди всех доступных (знаменатель min(i + 1, period)),
+    поэтому rolling_rank(values)[-1] == percentile_rank(values, values[-1], period).
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return np.empty(0)
+    padded = np.concatenate([np.full(period - 1, np.nan), values])
+    below = (sliding_window_view(padded, period) < values[:, None]).sum(axis=1)
+    return below / np.minimum(np.arange(1, len(values) + 1), period) * 100
@@ -0,0 +1,335 @@
+"""
+Prefix Sums - накопленные суммы объема для VWAP / CVD окон за O(1)
+
+Один проход по свечам (на бар) строит массивы с ведущим нулем:
+- cum_pv:  Σ typical_price × volume
+- cum_v:   Σ volume
+- cum_pv2: Σ (typical_price - ref)² × volume  (ref - первая цена: без потери точности)
+- cum_delta: Σ (taker buy - taker sell) - CVD (если есть taker buy колонка)
+
+Сумма по любому окну [start, stop) = cum[stop] - cum[start], поэтому anchored /
+session / rolling VWAP, стандартное отклонение вокруг VWAP и дельта CVD окна
+считаются без срезов DataFrame.
+
+NaN ведут себя как в pandas cumsum (skipna): в суммы не входят, а значение на
+самом баре с NaN - NaN.
+
+prefix_sum_cache хранит PrefixSums по (symbol, timeframe) и отдает одни и те же
+массивы всем потребителям бара: общие индикаторы, стратегии VWAP, V3 builder.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TAKER_BUY_COLUMNS = ('taker_buy_base', 'takerBuyBaseAssetVolume', 'taker_buy_base_asset_volume')
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """Накопленная сумма с ведущим нулем (NaN = 0, как skipna)"""
+    out = np.zeros(len(values) + 1)
+    np.nancumsum(values, out=out[1:])
+    return out
+
+
+class PrefixSums:
+    """Накопленные суммы по свечам одного DataFrame"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.index = df.index
+        self.close = _column(df, 'close')
+        self.tp = (_column(df, 'high') + _column(df, 'low') + self.close) / 3
+        self.has_volume = 'volume' in df.columns
+        self.volume = _column(df, 'volume') if self.has_volume else np.full(len(df), np.nan)
+
+        pv = self.tp * self.volume
+        # pandas: значение на баре с NaN в числителе - NaN
+        self.nan_mask = np.isnan(pv)
+
+        finite = self.tp[np.isfinite(self.tp)]
+        self.ref = float(finite[0]) if len(finite) else 0.0
+
+        self.cum_pv = _prefix(pv)
+        self.cum_v = _prefix(self.volume)
+        self.cum_pv2 = _prefix((self.tp - self.ref) ** 2 * self.volume)
+        # Объем баров с ценой (для std): без NaN совпадает с cum_v
+        self.cum_v_priced = (_prefix(np.where(self.nan_mask, 0.0, self.volume))
+                             if self.nan_mask.any() else self.cum_v)
+
+        taker_col = next((col for col in TAKER_BUY_COLUMNS if col in df.columns), None)
+        self.has_taker_buy = taker_col is not None
+        if self.has_taker_buy:
+            buy = _column(df, taker_col)
+            delta = buy - (self.volume - buy)
+            self.delta_nan_mask = np.isnan(delta)
+            self.cum_delta = _prefix(delta)
+        else:
+            self.delta_nan_mask = None
+            self.cum_delta = None
+
+        self._sessions: Dict[str, Tuple[pd.DatetimeIndex, np.ndarray]] = {}
+        self._daily: Dict[str, pd.Series] = {}
+        self._bands: Dict[Tuple[str, float], Tuple[pd.Series, pd.Series]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tp)
+
+    def _bounds(self, start: int, stop: Optional[int]) -> Tuple[int, int]:
+        n = len(self)
+        stop = n if stop is None else stop
+        if start < 0:
+            start += n
+        if stop < 0:
+            stop += n
+        return max(0, min(start, n)), max(0, min(stop, n))
+
+    # === Окна за O(1) ===
+
+    def window(self, start: int = 0, stop: Optional[int] = None) -> Tuple[float, float]:
+        """(Σ PV, Σ V) по барам [start, stop)"""
+        start, stop = self._bounds(start, stop)
+        if stop <= start:
+            return 0.0, 0.0
+        return (float(self.cum_pv[stop] - self.cum_pv[start]),
+                float(self.cum_v[stop] - self.cum_v[start]))
+
+    def vwap(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """VWAP баров [start, stop); NaN если объема нет"""
+        pv, v = self.window(start, stop)
+        return pv / v if v > 0 else float('nan')
+
+    def anchored_vwap(self, anchor_index: int) -> float:
+        """VWAP от якоря до последнего бара"""
+        return self.vwap(anchor_index)
+
+    def vwap_std(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """Объемно-взвешенное стандартное отклонение цены вокруг VWAP окна"""
+        start, stop = self._bounds(start, stop)
+        pv, v = self.window(start, stop)
+        if v <= 0:
+            return float('nan')
+        # Σv(tp - vwap)² через суммы от ref: Σv(tp-ref)² - 2(vwap-ref)Σv(tp-ref) + (vwap-ref)²Σv
+        pv2 = float(self.cum_pv2[stop] - self.cum_pv2[start])
+        v_priced = float(self.cum_v_priced[stop] - self.cum_v_priced[start])
+        shift = pv / v - self.ref
+        squares = pv2 - 2 * shift * (pv - self.ref * v_priced) + shift * shift * v_priced
+        return float(np.sqrt(max(squares / v, 0.0)))
+
+    def vwap_band(self, start: int = 0, stop: Optional[int] = None,
+                  std_mult: float = 2.0) -> Tuple[float, float, float]:
+        """(vwap, upper, lower) окна [start, stop)"""
+        vwap = self.vwap(start, stop)
+        offset = self.vwap_std(start, stop) * std_mult
+        return vwap, vwap + offset, vwap - offset
+
+    def delta(self, start: int = 0, stop: Optional[int] = None) -> float:
+        """Дельта объема (taker buy - sell) окна [start, stop); 0 без taker buy колонки"""
+        if not self.has_taker_buy:
+            return 0.0
+        start, stop = self._bounds(start, stop)
+        if stop <= start:
+            return 0.0
+        return float(self.cum_delta[stop] - self.cum_delta[start])
+
+    # === Серии (по одному O(1) окну на бар) ===
+
+    def _window_ratio(self, starts, stops) -> np.ndarray:
+        """VWAP окон [starts, stops) (массивы индексов), NaN на барах с NaN"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = (self.cum_pv[stops] - self.cum_pv[starts]) / (self.cum_v[stops] - self.cum_v[starts])
+        values[self.nan_mask[stops - 1]] = np.nan
+        return values
+
+    def cumulative_vwap(self) -> pd.Series:
+        """VWAP от первого бара (cumsum(PV) / cumsum(V))"""
+        stops = np.arange(1, len(self) + 1)
+        return pd.Series(self._window_ratio(0, stops), index=self.index)
+
+    def anchored_vwap_series(self, anchor_index: int) -> pd.Series:
+        """VWAP от якоря на каждом баре, до якоря - NaN"""
+        result = np.full(len(self), np.nan)
+        if anchor_index < 0:
+            anchor_index += len(self)
+        if 0 <= anchor_index < len(self):
+            stops = np.arange(anchor_index + 1, len(self) + 1)
+            result[anchor_index:] = self._window_ratio(anchor_index, stops)
+        return pd.Series(result, index=self.index)
+
+    def rolling_vwap(self, window: int) -> pd.Series:
+        """VWAP последних window баров на каждом баре (первые window-1 - NaN)"""
+        result = np.full(len(self), np.nan)
+        if 0 < window <= len(self):
+            stops = np.arange(window, len(self) + 1)
+            result[window - 1:] = self._window_ratio(stops - window, stops)
+        return pd.Series(result, index=self.index)
+
+    def cvd(self) -> pd.Series:
+        """CVD (накопленная дельта) на каждом баре; нули без taker buy колонки"""
+        if not self.has_taker_buy:
+            return pd.Series(0, index=self.index)
+        values = self.cum_delta[1:].copy()
+        values[self.delta_nan_mask] = np.nan
+        return pd.Series(values, index=self.index)
+
+    # === Дневные сессии ===
+
+    def session_starts(self, tz: str = 'Europe/Kiev') -> np.ndarray:
+        """Индекс первого бара дня (в tz) для каждого бара"""
+        return self._session(tz)[1]
+
+    def _session(self, tz: str) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        cached = self._sessions.get(tz)
+        if cached is not None:
+            return cached
+
+        index = self.index
+        if not isinstance(index, pd.DatetimeIndex):
+            index = pd.to_datetime(index)
+        local = index.tz_localize('UTC').tz_convert(tz) if index.tz is None else index.tz_convert(tz)
+        # Номер локального дня без .date (объекты datetime.date на каждый бар)
+        days = local.tz_localize(None).asi8 // (86400 * 10**9)
+
+        positions = np.arange(len(days))
+        new_day = np.ones(len(days), dtype=bool)
+        new_day[1:] = days[1:] != days[:-1]
+        starts = np.maximum.accumulate(np.where(new_day, positions, 0)) if len(days) else positions
+
+        self._sessions[tz] = (index, starts)
+        return index, starts
+
+    def daily_vwap(self, tz: str = 'Europe/Kiev') -> pd.Series:
+        """VWAP с начала дня (сброс в полночь tz) на каждом баре"""
+        cached = self._daily.get(tz)
+        if cached is not None:
+            return cached
+
+        index, starts = self._session(tz)
+        stops = np.arange(1, len(self) + 1)
+        values = self._window_ratio(starts, stops)
+
+        series = pd.Series(values, index=index, dtype=float)
+        self._daily[tz] = series
+        return series
+
+    def daily_vwap_bands(self, tz: str = 'Europe/Kiev', std_mult: float = 2.0) -> Tuple[pd.Series, pd.Series]:
+        """
+        Полосы daily VWAP (формула VWAPCalculator.calculate_vwap_bands)
+
+        Дисперсия накапливается от первого бара DataFrame, а не от начала дня, и
+        считается вокруг VWAP каждого бара - это не сумма окна, поэтому один
+        O(n) проход на бар, запомненный до следующего бара.
+        """
+        key = (tz, std_mult)
+        cached = self._bands.get(key)
+        if cached is not None:
+            return cached
+
+        vwap_vals = self.daily_vwap(tz).to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = np.nancumsum((self.tp - vwap_vals) ** 2 * self.volume) / self.cum_v[1:]
+            variance = np.where(self.cum_v[1:] > 0, variance, np.nan)
+        std_vals = np.sqrt(variance)
+
+        bands = (pd.Series(vwap_vals + std_vals * std_mult, index=self.index),
+                 pd.Series(vwap_vals - std_vals * std_mult, index=self.index))
+        self._bands[key] = bands
+        return bands
+
+
+class PrefixSumCache:
+    """
+    PrefixSums по (symbol, timeframe)
+
+    Запись сверяется с DataFrame по сигнатуре (длина, время первого/последнего
+    бара, OHLCV последнего бара): новый бар или обновление незакрытого бара
+    строят суммы заново, повторный запрос того же бара - нет.
+    Разные потребители могут держать DataFrame разной длины одного TF, поэтому
+    на ключ хранится до MAX_FRAMES вариантов - только последнего бара: суммы
+    предыдущего бара удаляются, как только построены суммы нового.
+    Символы, выбывшие из вселенной, удаляет clear_symbol (_update_symbols_task).
+    """
+
+    MAX_FRAMES = 2
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, str], Dict[Tuple, PrefixSums]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def signature(df: pd.DataFrame) -> Tuple:
+        if len(df) == 0:
+            return (0,)
+        if 'open_time' in df.columns:
+            first_time, last_time = df['open_time'].iat[0], df['open_time'].iat[-1]
+        else:
+            first_time, last_time = df.index[0], df.index[-1]
+        return (
+            len(df), first_time, last_time,
+            float(df['close'].iat[-1]), float(df['high'].iat[-1]), float(df['low'].iat[-1]),
+            float(df['volume'].iat[-1]) if 'volume' in df.columns else None,
+        )
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame) -> PrefixSums:
+        """
+        PrefixSums для df: из кеша, если df совпадает по сигнатуре, иначе построить
+
+        Args:
+            symbol: Символ (например, BTCUSDT)
+            timeframe: Таймфрейм (например, 1h)
+            df: DataFrame со свечами
+        """
+        key = (symbol, timeframe)
+        signature = self.signature(df)
+
+        with self._lock:
+            frames = self._cache.get(key)
+            if frames is not None and signature in frames:
+                self.hits += 1
+                sums = frames.pop(signature)
+                frames[signature] = sums
+                return sums
+
+        sums = PrefixSums(df)
+
+        with self._lock:
+            self.misses += 1
+            frames = self._cache.setdefault(key, {})
+            if len(signature) > 1:
+                # Суммы предыдущих баров больше не запросят - не держим их память
+                for stale in [sig for sig in frames if len(sig) > 1 and sig[2] < signature[2]]:
+                    del frames[stale]
+            frames[signature] = sums
+            while len(frames) > self.MAX_FRAMES:
+                del frames[next(iter(frames))]
+        return sums
+
+    def clear_symbol(self, symbol: str):
+        """Очистить кеш символа (все таймфреймы)"""
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == symbol]:
+                del self._cache[key]
+
+    def clear_all(self):
+        """Очистить весь кеш"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict:
+        """Статистика кеша"""
+        with self._lock:
+            return {
+                'total_entries': sum(len(frames) for frames in self._cache.values()),
+                'keys': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+prefix_sum_cache = PrefixSumCache()
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Optional
 import pandas_ta as ta
+from src.indicators.percentiles import percentile_rank
 
 
 class TechnicalIndicators:
@@ -29,8 +30,11 @@ class TechnicalIndicators:
         return bb
     
     @staticmethod
-    def calculate_bb_width(df: pd.DataFrame, period: int = 20, std: float = 2.0) -> pd.Series:
-        bb = TechnicalIndicators.calculate_bb(df, period, std)
+    def calculate_bb_width(df: pd.DataFrame, period: int = 20, std: float = 2.0,
+                           bb: Optional[pd.DataFrame] = None) -> pd.Series:
+        # bb - уже посчитанные полосы (например, срез матриц UniverseIndicators)
+        if bb is None:
+            bb = TechnicalIndicators.calculate_bb(df, period, std)
         if bb is None or bb.empty:
             return pd.Series(index=df.index, dtype=float)
         
@@ -81,12 +85,8 @@ class TechnicalIndicators:
     
     @staticmethod
     def calculate_percentile(series: pd.Series, value: float, period: int = 90) -> float:
-        if len(series) < period:
-            period = len(series)
-        
-        recent_values = series.tail(period)
-        percentile = (recent_values < value).sum() / len(recent_values) * 100
-        return percentile
+        # Общий движок перцентилей (src/indicators/percentiles.py)
+        return percentile_rank(series, value, period)
 
 
 # Standalone функции для совместимости с импортами
@@ -0,0 +1,151 @@
+"""
+Universe Indicators - общие индикаторы одного таймфрейма для всех символов
+
+Свечи символов складываются в матрицы (symbols × bars) и каждый индикатор
+считается одним вызовом kernels на всю вселенную (src/indicators/kernels.py).
+MarketRegimeDetector.detect_regime_batch (RegimeService) берет строку символа
+вместо пересчета pandas_ta по одному символу: значения те же, что дает pandas_ta
+на DataFrame символа. symbol_indicators отдает срез в формате
+calculate_technical_indicators.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import kernels
+from src.indicators.percentiles import RollingPercentiles
+from src.indicators.prefix_sums import PrefixSumCache
+from src.indicators.technical import TechnicalIndicators
+
+
+BB_PERIOD = 20
+BB_STD = 2.0
+
+
+class UniverseIndicators:
+    """Матрицы общих индикаторов таймфрейма + срезы по символам"""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], timeframe: str = '1h'):
+        """
+        Args:
+            frames: {symbol: DataFrame с OHLCV} одного таймфрейма
+            timeframe: Таймфрейм
+        """
+        self.timeframe = timeframe
+        self.symbols, prices, self.starts = kernels.stack_frames(frames)
+        self._rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        # Срез отдается только тому же DataFrame, из которого строилась строка
+        self._signatures = {symbol: PrefixSumCache.signature(df) for symbol, df in frames.items()}
+
+        high, low, close = prices['high'], prices['low'], prices['close']
+        starts = self.starts
+        matrices = {}
+
+        matrices['atr_14'] = kernels.atr(high, low, close, 14, starts=starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matrices['atr_pct_14'] = (matrices['atr_14'] / close) * 100
+        for period in (9, 20, 50, 200):
+            matrices[f'ema_{period}'] = kernels.ema(close, period, starts)
+        matrices['ema_slope_20'] = (matrices['ema_20'] - kernels.shift(matrices['ema_20'], 5)) / 5
+
+        for name, values in kernels.bbands(close, BB_PERIOD, BB_STD).items():
+            matrices[f'bb_{name}'] = values
+        matrices['bb_range_20'] = matrices['bb_upper'] - matrices['bb_lower']
+        matrices['bb_range_p20'] = kernels.rolling_quantiles(matrices['bb_range_20'], 50, (0.20,))[0]
+
+        for period in (20, 55):
+            matrices[f'donchian_high_{period}'], matrices[f'donchian_low_{period}'] = kernels.donchian(high, low, period)
+
+        for name, values in kernels.adx(high, low, close, 14, starts).items():
+            matrices[f'adx_{name}'] = values
+        matrices['rsi_14'] = kernels.rsi(close, 14, starts)
+
+        if 'volume' in prices:
+            matrices['volume_mean_20'] = kernels.sma(prices['volume'], 20)
+            matrices['volume_std_20'] = kernels.rolling_std(prices['volume'], 20)
+
+        self.matrices = matrices
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    def row(self, symbol: str, name: str) -> np.ndarray:
+        """Строка матрицы name для символа (только история, без NaN паддинга)"""
+        row = self._rows[symbol]
+        return self.matrices[name][row, self.starts[row]:]
+
+    def last(self, name: str) -> np.ndarray:
+        """Значения на последнем баре для всех символов (порядок self.symbols)"""
+        return self.matrices[name][:, -1]
+
+    def matches(self, symbol: str, df: pd.DataFrame) -> bool:
+        """df - тот же DataFrame, из которого построена строка символа"""
+        signature = self._signatures.get(symbol)
+        return signature is not None and signature == PrefixSumCache.signature(df)
+
+    def bb_frame(self, symbol: str, index: pd.Index) -> pd.DataFrame:
+        """Полосы Bollinger символа в формате pandas_ta.bbands"""
+        suffix = f'_{BB_PERIOD}_{BB_STD}_{BB_STD}'
+        return pd.DataFrame({
+            f'BBL{suffix}': self.row(symbol, 'bb_lower'),
+            f'BBM{suffix}': self.row(symbol, 'bb_mid'),
+            f'BBU{suffix}': self.row(symbol, 'bb_upper'),
+            f'BBB{suffix}': self.row(symbol, 'bb_bandwidth'),
+            f'BBP{suffix}': self.row(symbol, 'bb_percent'),
+        }, index=index)
+
+    def symbol_indicators(self, symbol: str, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Индикаторы calculate_common_indicators (pandas_ta часть) из матриц
+
+        Returns:
+            Dict Series / DataFrame на df.index или None, если символа нет
+            во вселенной или df не тот, из которого она построена
+        """
+        if symbol not in self._rows or not self.matches(symbol, df):
+            return None
+
+        index = df.index
+
+        def series(name: str, label: Optional[str] = None) -> pd.Series:
+            return pd.Series(self.row(symbol, name), index=index, name=label)
+
+        indicators = {
+            'atr_14': series('atr_14', 'ATRr_14'),
+            'atr_pct_14': series('atr_pct_14'),
+            'ema_20': series('ema_20', 'EMA_20'),
+            'ema_50': series('ema_50', 'EMA_50'),
+            'ema_200': series('ema_200', 'EMA_200'),
+            'ema_9': series('ema_9', 'EMA_9'),
+        }
+
+        bb = self.bb_frame(symbol, index)
+        indicators['bb_20'] = bb
+        indicators['bb_width_20'] = TechnicalIndicators.calculate_bb_width(df, BB_PERIOD, BB_STD, bb=bb)
+        (indicators['bb_width_p30'], indicators['bb_width_p40'],
+         indicators['bb_width_p50']) = RollingPercentiles(indicators['bb_width_20'], 60).quantiles(0.30, 0.40, 0.50)
+
+        indicators['donchian_20'] = (series('donchian_high_20', 'high'), series('donchian_low_20', 'low'))
+        indicators['donchian_55'] = (series('donchian_high_55', 'high'), series('donchian_low_55', 'low'))
+
+        indicators['adx_14'] = pd.DataFrame({
+            'ADX_14': self.row(symbol, 'adx_adx'),
+            'ADXR_14_2': self.row(symbol, 'adx_adxr'),
+            'DMP_14': self.row(symbol, 'adx_dmp'),
+            'DMN_14': self.row(symbol, 'adx_dmn'),
+        }, index=index)
+        indicators['adx_value'] = indicators['adx_14']['ADX_14']
+        indicators['rsi_14'] = series('rsi_14', 'RSI_14')
+        indicators['ema_slope_20'] = series('ema_slope_20', 'EMA_20')
+
+        indicators['bb_range_20'] = series('bb_range_20')
+        indicators['bb_range_p20'] = series('bb_range_p20')
+        indicators['high_20'] = series('donchian_high_20', 'high')
+        indicators['low_20'] = series('donchian_low_20', 'low')
+        indicators['range_20'] = indicators['high_20'] - indicators['low_20']
+        if 'volume_mean_20' in self.matrices:
+            indicators['volume_mean_20'] = series('volume_mean_20', 'volume')
+            indicators['volume_std_20'] = series('volume_std_20', 'volume')
+
+        return indicators
@@ -3,53 +3,38 @@ import numpy as np
 from datetime import datetime
 import pytz
 from typing import Optional
+from src.indicators.prefix_sums import PrefixSums
+
+
+def _prefix_sums(df: pd.DataFrame, sums: Optional[PrefixSums]) -> PrefixSums:
+    return sums if sums is not None else PrefixSums(df)
 
 
 class VWAPCalculator:
+    """
+    VWAP из накопленных сумм (src/indicators/prefix_sums.py)
+
+    sums - PrefixSums того же DataFrame (обычно из prefix_sum_cache): тогда
+    суммы не пересчитываются, иначе строятся по df.
+    """
+
     @staticmethod
-    def calculate_vwap(df: pd.DataFrame) -> pd.Series:
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-        return vwap
+    def calculate_vwap(df: pd.DataFrame, sums: Optional[PrefixSums] = None) -> pd.Series:
+        return _prefix_sums(df, sums).cumulative_vwap()
     
     @staticmethod
-    def calculate_daily_vwap(df: pd.DataFrame, tz: str = 'Europe/Kiev') -> pd.Series:
-        df = df.copy()
-        
-        if not isinstance(df.index, pd.DatetimeIndex):
-            df.index = pd.to_datetime(df.index)
-        
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        df['tp_volume'] = typical_price * df['volume']
-        
-        df['date'] = df.index.tz_localize('UTC').tz_convert(tz).date if df.index.tz is None else df.index.tz_convert(tz).date
-        
-        daily_vwap = df.groupby('date').apply(
-            lambda x: (x['tp_volume'].cumsum() / x['volume'].cumsum()).values,
-            include_groups=False
-        )
-        
-        vwap_series = pd.Series(index=df.index, dtype=float)
-        for date, values in daily_vwap.items():
-            mask = df['date'] == date
-            vwap_series[mask] = values
-        
-        return vwap_series
+    def calculate_daily_vwap(df: pd.DataFrame, tz: str = 'Europe/Kiev',
+                             sums: Optional[PrefixSums] = None) -> pd.Series:
+        # Сброс в полночь tz: окно [начало дня, бар] из накопленных сумм
+        return _prefix_sums(df, sums).daily_vwap(tz)
     
     @staticmethod
-    def calculate_anchored_vwap(df: pd.DataFrame, anchor_index: int) -> pd.Series:
+    def calculate_anchored_vwap(df: pd.DataFrame, anchor_index: int,
+                                sums: Optional[PrefixSums] = None) -> pd.Series:
         if anchor_index >= len(df):
             return pd.Series(index=df.index, dtype=float)
         
-        df_subset = df.iloc[anchor_index:].copy()
-        typical_price = (df_subset['high'] + df_subset['low'] + df_subset['close']) / 3
-        
-        avwap = (typical_price * df_subset['volume']).cumsum() / df_subset['volume'].cumsum()
-        
-        result = pd.Series(index=df.index, dtype=float)
-        result.iloc[anchor_index:] = avwap.values
-        
-        return result
+        return _prefix_sums(df, sums).anchored_vwap_series(anchor_index)
     
     @staticmethod
     def calculate_vwap_bands(df: pd.DataFrame, vwap: pd.Series, std_mult: float = 1.0) -> tuple:
@@ -84,12 +69,15 @@ class VWAPCalculator:
 
 
 # Standalone функции для совместимости
-def calculate_daily_vwap(df: pd.DataFrame, tz: str = 'Europe/Kiev') -> tuple:
+def calculate_daily_vwap(df: pd.DataFrame, tz: str = 'Europe/Kiev',
+                         sums: Optional[PrefixSums] = None) -> tuple:
     """Calculate daily VWAP with bands"""
-    vwap = VWAPCalculator.calculate_daily_vwap(df, tz)
-    upper, lower = VWAPCalculator.calculate_vwap_bands(df, vwap, std_mult=2.0)
+    sums = _prefix_sums(df, sums)
+    vwap = sums.daily_vwap(tz)
+    upper, lower = sums.daily_vwap_bands(tz, std_mult=2.0)
     return vwap, upper, lower
 
-def calculate_anchored_vwap(df: pd.DataFrame, anchor_index: int) -> pd.Series:
+def calculate_anchored_vwap(df: pd.DataFrame, anchor_index: int,
+                            sums: Optional[PrefixSums] = None) -> pd.Series:
     """Calculate anchored VWAP"""
-    return VWAPCalculator.calculate_anchored_vwap(df, anchor_index)
+    return VWAPCalculator.calculate_anchored_vwap(df, anchor_index, sums)
@@ -12,7 +12,9 @@
 
 import pandas as pd
 import numpy as np
+from collections.abc import Mapping
 from typing import Dict, Optional
+from src.indicators.cvd import CVDCalculator, find_local_extrema
 from src.strategies.base_strategy import Signal
 from src.utils.logger import logger
 
@@ -146,6 +148,11 @@ class SignalScorer:
             regime = indicators.get('regime', 'UNKNOWN')
             components.append(f"Regime: +{regime_bonus:.1f} ({regime} aligned)")
         
+        # Контекст: доля символов в том же режиме (RegimeService.snapshot, без влияния на score)
+        breadth = self._regime_breadth(indicators)
+        if breadth is not None:
+            components.append(f"Market: {breadth * 100:.0f}% {indicators.get('regime')}")
+        
         # -0.5: High ATR volatility penalty (риск слишком высокий)
         atr_penalty = self._score_atr_volatility(signal, indicators)
         score += atr_penalty
@@ -340,6 +347,16 @@ class SignalScorer:
         
         return 0.0
     
+    def _regime_breadth(self, indicators: Dict) -> Optional[float]:
+        """
+        Доля символов вселенной в режиме сигнала (из indicators['regime_snapshot'])
+        None если снимка нет или он пустой
+        """
+        snapshot = indicators.get('regime_snapshot')
+        if not snapshot or not snapshot.get('total'):
+            return None
+        return snapshot['shares'].get(indicators.get('regime'), 0.0)
+    
     def _score_atr_volatility(self, signal: Signal, indicators: Dict) -> float:
         """
         Пенальти за экстремальную волатильность
@@ -372,32 +389,13 @@ class SignalScorer:
                 return 0.0
             
             # Проверка: есть ли данные?
-            if not isinstance(indicators.get('15m'), dict) and not isinstance(indicators.get('1h'), dict):
+            if not isinstance(indicators.get('15m'), Mapping) and not isinstance(indicators.get('1h'), Mapping):
                 logger.debug(f"{signal.symbol} CVD Divergence: нет данных TF")
                 return 0.0
             
-            div_15m = False
-            div_1h = False
-            
-            # Check 15m divergence
-            if self.cvd_check_15m and isinstance(indicators.get('15m_data'), dict):
-                df_15m = indicators.get('15m_data', {}).get('df')
-                cvd_15m = indicators.get('15m_data', {}).get('cvd')
-                
-                if df_15m is not None and cvd_15m is not None and len(df_15m) >= self.cvd_lookback_bars:
-                    div_15m = self._detect_divergence_single_tf(
-                        df_15m, cvd_15m, signal.direction
-                    )
-            
-            # Check 1H divergence
-            if self.cvd_check_1h and isinstance(indicators.get('1h_data'), dict):
-                df_1h = indicators.get('1h_data', {}).get('df')
-                cvd_1h = indicators.get('1h_data', {}).get('cvd')
-                
-                if df_1h is not None and cvd_1h is not None and len(df_1h) >= self.cvd_lookback_bars:
-                    div_1h = self._detect_divergence_single_tf(
-                        df_1h, cvd_1h, signal.direction
-                    )
+            # Точки дивергенции посчитаны один раз на бар (LazyIndicators 'cvd_divergence')
+            div_15m = self.cvd_check_15m and self._tf_divergence(indicators.get('15m_data'), signal.direction)
+            div_1h = self.cvd_check_1h and self._tf_divergence(indicators.get('1h_data'), signal.direction)
             
             # Scoring logic
             if div_15m and div_1h:
@@ -420,6 +418,32 @@ class SignalScorer:
             logger.warning(f"{signal.symbol} CVD Divergence check failed: {e}")
             return 0.0
     
+    def _tf_divergence(self, tf_data, direction: str) -> bool:
+        """
+        Divergence таймфрейма по точкам 'cvd_divergence' из '{tf}_data'
+        
+        Точки пересчитываются только если их нет (или lookback другой) - старые
+        indicators без производной группы.
+        """
+        if not isinstance(tf_data, Mapping):
+            return False
+        
+        points = tf_data.get('cvd_divergence')
+        if points is None or points.get('lookback') != self.cvd_lookback_bars:
+            df = tf_data.get('df')
+            cvd = tf_data.get('cvd')
+            if df is None or cvd is None or len(df) < self.cvd_lookback_bars:
+                return False
+            try:
+                points = CVDCalculator.divergence_points(df, cvd, self.cvd_lookback_bars)
+            except Exception as e:
+                logger.debug(f"CVD divergence points error: {e}")
+                return False
+        
+        if points['bars'] < self.cvd_lookback_bars:
+            return False
+        return self._divergence_from_points(points, direction)
+    
     def _detect_divergence_single_tf(self, df: pd.DataFrame, cvd_series: pd.Series, direction: str) -> bool:
         """
         Детектирует divergence на одном таймфрейме
@@ -428,104 +452,59 @@ class SignalScorer:
             True если обнаружена divergence в сторону сигнала
         """
         try:
-            # Последние N баров для анализа
-            price_tail = df['close'].tail(self.cvd_lookback_bars).reset_index(drop=True)
-            cvd_tail = cvd_series.tail(self.cvd_lookback_bars).reset_index(drop=True)
-            
-            # Volume проверка (если требуется)
-            if self.cvd_require_volume:
-                volume_tail = df['volume'].tail(self.cvd_lookback_bars).reset_index(drop=True)
-                median_volume = volume_tail.median()
-            else:
-                median_volume = 0
-            
-            # Находим локальные peaks и troughs
-            price_highs = self._find_local_peaks(price_tail, order=3)
-            price_lows = self._find_local_troughs(price_tail, order=3)
-            
-            # BEARISH DIVERGENCE для SHORT
-            if direction == 'SHORT' and len(price_highs) >= 2:
-                last_price_high_idx = price_highs[-1]
-                prev_price_high_idx = price_highs[-2]
-                
-                last_price_high = price_tail[last_price_high_idx]
-                prev_price_high = price_tail[prev_price_high_idx]
-                
-                # Цена делает Higher High
-                if last_price_high > prev_price_high:
-                    last_cvd = cvd_tail[last_price_high_idx]
-                    prev_cvd = cvd_tail[prev_price_high_idx]
-                    
-                    # CVD делает Lower High (дивергенция!)
-                    if last_cvd < prev_cvd:
-                        cvd_drop = (prev_cvd - last_cvd) / (abs(prev_cvd) + 1e-8)
-                        
-                        # Volume check
-                        if self.cvd_require_volume:
-                            last_volume = volume_tail[last_price_high_idx]
-                            if last_volume < median_volume:
-                                return False  # Volume слабый
-                        
-                        if cvd_drop > self.cvd_min_divergence:
-                            return True  # ✅ Bearish divergence найдена!
-            
-            # BULLISH DIVERGENCE для LONG
-            if direction == 'LONG' and len(price_lows) >= 2:
-                last_price_low_idx = price_lows[-1]
-                prev_price_low_idx = price_lows[-2]
-                
-                last_price_low = price_tail[last_price_low_idx]
-                prev_price_low = price_tail[prev_price_low_idx]
-                
-                # Цена делает Lower Low
-                if last_price_low < prev_price_low:
-                    last_cvd = cvd_tail[last_price_low_idx]
-                    prev_cvd = cvd_tail[prev_price_low_idx]
-                    
-                    # CVD делает Higher Low (дивергенция!)
-                    if last_cvd > prev_cvd:
-                        cvd_rise = (last_cvd - prev_cvd) / (abs(prev_cvd) + 1e-8)
-                        
-                        # Volume check
-                        if self.cvd_require_volume:
-                            last_volume = volume_tail[last_price_low_idx]
-                            if last_volume < median_volume:
-                                return False  # Volume слабый
-                        
-                        if cvd_rise > self.cvd_min_divergence:
-                            return True  # ✅ Bullish divergence найдена!
-            
-            return False
-            
+            points = CVDCalculator.divergence_points(df, cvd_series, self.cvd_lookback_bars)
+            return self._divergence_from_points(points, direction)
         except Exception as e:
             logger.debug(f"CVD divergence detection error: {e}")
             return False
     
+    def _divergence_from_points(self, points: Dict, direction: str) -> bool:
+        """
+        Divergence по двум последним пикам (SHORT) / впадинам (LONG) цены - O(1)
+        
+        SHORT: Higher High цены + Lower High CVD, LONG: Lower Low цены + Higher Low CVD.
+        Сила (изменение CVD / |CVD прошлой точки|) > min_divergence, объем
+        последней точки не ниже медианы окна (require_volume).
+        """
+        if direction == 'SHORT':
+            extrema, sign = points['peaks'], 1
+        elif direction == 'LONG':
+            extrema, sign = points['troughs'], -1
+        else:
+            return False
+        
+        if len(extrema['index']) < 2:
+            return False
+        
+        prev_price, last_price = extrema['price'][-2], extrema['price'][-1]
+        prev_cvd, last_cvd = extrema['cvd'][-2], extrema['cvd'][-1]
+        
+        # Цена обновила экстремум (HH / LL), CVD - нет (LH / HL)
+        if not (sign * last_price > sign * prev_price and sign * last_cvd < sign * prev_cvd):
+            return False
+        
+        if self.cvd_require_volume:
+            if extrema['volume'] is None:
+                return False
+            if extrema['volume'][-1] < points['median_volume']:
+                return False  # Volume слабый
+        
+        strength = sign * (prev_cvd - last_cvd) / (abs(prev_cvd) + 1e-8)
+        return bool(strength > self.cvd_min_divergence)
+    
     def _find_local_peaks(self, series: pd.Series, order: int = 3) -> list:
         """
         Найти локальные максимумы (пики)
         order = минимальное расстояние между пиками
         """
-        peaks = []
-        for i in range(order, len(series) - order):
-            # Проверяем что точка выше соседей
-            if all(series[i] >= series[i-j] for j in range(1, order+1)) and \
-               all(series[i] >= series[i+j] for j in range(1, order+1)):
-                peaks.append(i)
-        return peaks
+        return find_local_extrema(series, order)[0].tolist()
     
     def _find_local_troughs(self, series: pd.Series, order: int = 3) -> list:
         """
         Найти локальные минимумы (впадины)
         order = минимальное расстояние между минимумами
         """
-        troughs = []
-        for i in range(order, len(series) - order):
-            # Проверяем что точка ниже соседей
-            if all(series[i] <= series[i-j] for j in range(1, order+1)) and \
-               all(series[i] <= series[i+j] for j in range(1, order+1)):
-                troughs.append(i)
-        return troughs
+        return find_local_extrema(series, order)[1].tolist()
     
     def should_enter(self, score: float) -> bool:
         """Проверить, достаточен ли score для входа"""
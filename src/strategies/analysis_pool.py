@@ -0,0 +1,132 @@
+"""
+Sharded Analysis Pool
+
+Выполнение стратегий вне event loop: N процессов (shards), символ
+закрепляется за shard'ом по crc32(symbol) % N. Так состояние стратегий
+и IndicatorCache по символу не размазываются между процессами.
+
+Основной процесс делает только I/O (свечи, mark price, БД, Telegram),
+скоринг, блокировки и отправку сигналов.
+
+Процессы запускаются через forkserver (spawn там, где его нет), а не fork:
+к старту пула в основном процессе уже работают потоки DatabaseExecutor и
+CandleWriter, и fork мог скопировать в worker захваченную блокировку
+(perf_metrics, logging) - worker зависал бы на первом же вызове.
+"""
+
+import asyncio
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.strategies.analysis_worker import init_worker, analyze_symbol_task, forget_symbols_task
+from src.utils.logger import logger
+from src.utils.shared_frames import pack_frames
+
+
+# fork небезопасен в процессе с потоками (Python 3.12 предупреждает DeprecationWarning)
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class ShardedAnalysisPool:
+    """Пул worker процессов для анализа символов, шардированный по символу"""
+
+    def __init__(self, shards: int = 4):
+        self.shards = max(1, int(shards))
+        self._executors: List[Optional[ProcessPoolExecutor]] = [None] * self.shards
+
+    def start(self):
+        for shard_id in range(self.shards):
+            self._start_shard(shard_id)
+        logger.info(f"🧵 Strategy analysis pool started: {self.shards} shards")
+
+    def _start_shard(self, shard_id: int):
+        self._executors[shard_id] = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=init_worker,
+            initargs=(shard_id,)
+        )
+
+    def _restart_shard(self, shard_id: int):
+        executor = self._executors[shard_id]
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._start_shard(shard_id)
+
+    def shard_for(self, symbol: str) -> int:
+        """Номер shard'а для символа (стабилен между перезапусками)"""
+        return zlib.crc32(symbol.encode()) % self.shards
+
+    @property
+    def is_running(self) -> bool:
+        return any(executor is not None for executor in self._executors)
+
+    async def analyze(self, symbol: str, timeframe_data: Dict[str, pd.DataFrame],
+                      market_context: Dict, blocked_strategies: Optional[Dict] = None,
+                      enabled_names: Optional[set] = None) -> Optional[Dict]:
+        """
+        Проанализировать символ в его shard'е
+
+        Returns:
+            Результат analyze_symbol_task или None если shard упал
+            (вызывающий выполняет анализ inline)
+        """
+        shard_id = self.shard_for(symbol)
+        executor = self._executors[shard_id]
+        if executor is None:
+            return None
+
+        # Только блокировки этого символа - не пересылаем весь dict каждый раз
+        blocked = {
+            name: {symbol}
+            for name, symbols in (blocked_strategies or {}).items()
+            if symbol in symbols
+        }
+
+        shm, descriptor = pack_frames(timeframe_data)
+        try:
+            task = {
+                'symbol': symbol,
+                'frames': descriptor,
+                'market_context': market_context,
+                'blocked_strategies': blocked,
+                'enabled_names': enabled_names,
+            }
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, analyze_symbol_task, task)
+        except BrokenProcessPool:
+            logger.error(f"❌ Analysis shard #{shard_id} crashed on {symbol}, restarting")
+            self._restart_shard(shard_id)
+            return None
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def forget(self, symbols) -> None:
+        """Удалить кеши символов, выбывших из вселенной, в их shard'ах"""
+        by_shard: Dict[int, List[str]] = {}
+        for symbol in symbols:
+            by_shard.setdefault(self.shard_for(symbol), []).append(symbol)
+
+        loop = asyncio.get_running_loop()
+        for shard_id, shard_symbols in by_shard.items():
+            executor = self._executors[shard_id]
+            if executor is None:
+                continue
+            try:
+                await loop.run_in_executor(executor, forget_symbols_task, shard_symbols)
+            except BrokenProcessPool:
+                # Перезапущенный shard начинает с пустыми кешами
+                self._restart_shard(shard_id)
+
+    def shutdown(self):
+        for shard_id, executor in enumerate(self._executors):
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+                self._executors[shard_id] = None
+        logger.info("Strategy analysis pool stopped")
@@ -0,0 +1,130 @@
+"""
+Analysis Worker for ShardedAnalysisPool
+
+Worker процесс пула анализа стратегий. Каждый shard - отдельный процесс со
+своим набором стратегий, IndicatorCache и RegimeService. Символ всегда
+попадает в один и тот же shard, поэтому состояние стратегий и кеш
+индикаторов по символу живут в одном процессе.
+
+Свечи приходят через shared memory (descriptor), обратно возвращаются
+только Signal'ы + минимальный срез indicators для скоринга.
+"""
+
+import time
+from typing import Dict, Optional
+
+from src.detectors.regime_service import RegimeService
+from src.indicators.cache import IndicatorCache
+from src.indicators.prefix_sums import prefix_sum_cache
+from src.strategies.registry import create_all_strategies
+from src.strategies.strategy_manager import StrategyManager
+from src.strategies.symbol_analysis import prepare_symbol_analysis, extract_scoring_indicators
+from src.utils.logger import logger
+from src.utils.perf_metrics import perf_metrics
+from src.utils.shared_frames import unpack_frames
+
+
+# Состояние worker процесса (создается в init_worker)
+_state: Dict = {}
+
+
+def init_worker(shard_id: int):
+    """Initializer для ProcessPoolExecutor: создать стратегии и кеши shard'а"""
+    manager = StrategyManager(binance_client=None)  # mark price применяется в основном процессе
+    manager.strategies = create_all_strategies()
+
+    _state['shard_id'] = shard_id
+    _state['manager'] = manager
+    _state['regime_service'] = RegimeService()
+    _state['indicator_cache'] = IndicatorCache()
+
+    # Тайминги стратегий пересылаются в основной процесс вместе с результатом
+    perf_metrics.enable_forwarding()
+
+
+def analyze_symbol_task(task: Dict) -> Dict:
+    """
+    Worker function: подготовить indicators и проверить все стратегии для символа
+
+    Args:
+        task: {
+            'symbol': str,
+            'frames': descriptor shared memory (см. pack_frames),
+            'market_context': oi_metrics, depth_metrics, btc_bias, validate,
+                updated_timeframes, btc_block_mr (префильтр стратегий),
+            'blocked_strategies': {strategy_name: {symbol}},
+            'enabled_names': set имен включенных стратегий
+        }
+
+    Returns:
+        {
+            'symbol', 'skipped', 'regime', 'bias', 'regime_data', 'signals',
+            'scoring_indicators', 'timings', 'perf_samples', 'prefilter_skips', 'error'
+        }
+    """
+    symbol = task['symbol']
+    result: Dict[str, Optional[object]] = {
+        'symbol': symbol,
+        'skipped': False,
+        'regime': None,
+        'bias': None,
+        'regime_data': None,
+        'signals': [],
+        'scoring_indicators': None,
+        'timings': {},
+        'perf_samples': [],
+        'prefilter_skips': {},
+        'error': None,
+    }
+
+    try:
+        timeframe_data = unpack_frames(task['frames'])
+        timings = result['timings']
+
+        analysis = prepare_symbol_analysis(
+            symbol,
+            timeframe_data,
+            _state['regime_service'],
+            _state['indicator_cache'],
+            task['market_context'],
+            timings=timings
+        )
+        if analysis is None:
+            result['skipped'] = True
+            return result
+
+        started = time.perf_counter()
+        signals = _state['manager'].collect_signals(
+            symbol=symbol,
+            timeframe_data=timeframe_data,
+            regime=analysis['regime'],
+            bias=analysis['bias'],
+            indicators=analysis['indicators'],
+            blocked_symbols_by_strategy=task.get('blocked_strategies'),
+            enabled_names=task.get('enabled_names'),
+            market_context=task['market_context']
+        )
+        timings['strategies'] = time.perf_counter() - started
+
+        result['regime'] = analysis['regime']
+        result['bias'] = analysis['bias']
+        result['regime_data'] = analysis['regime_data']
+        result['signals'] = signals
+        if signals:
+            result['scoring_indicators'] = extract_scoring_indicators(analysis['indicators'])
+    except Exception as e:
+        logger.error(f"Analysis worker #{_state.get('shard_id')} error for {symbol}: {e}", exc_info=True)
+        result['error'] = str(e)
+    finally:
+        result['perf_samples'] = perf_metrics.drain_pending()
+        result['prefilter_skips'] = _state['manager'].drain_prefilter_skips()
+
+    return result
+
+
+def forget_symbols_task(symbols) -> int:
+    """Worker function: удалить кеши символов, выбывших из вселенной (IndicatorCache + PrefixSums)"""
+    for symbol in symbols:
+        _state['indicator_cache'].clear_symbol(symbol)
+        prefix_sum_cache.clear_symbol(symbol)
+    return len(symbols)
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 from typing import Dict, Optional
 import pandas as pd
 import numpy as np
@@ -21,6 +22,10 @@ class ATRMomentumStrategy(BaseStrategy):
     - Тайм-стоп: 6–8 баров без 0.5 ATR прогресса
     """
     
+    required_indicators = ('rsi_14',)
+    allowed_regimes = ('TREND',)
+    min_bars = 100
+    
     def __init__(self):
         strategy_config = config.get('strategies.momentum', {})
         super().__init__("ATR Momentum", strategy_config)
@@ -38,6 +43,8 @@ class ATRMomentumStrategy(BaseStrategy):
         self.htf_ema200_check = strategy_config.get('htf_ema200_check', True)
         self.prefer_pin_bar = strategy_config.get('prefer_pin_bar', True)
         self.rsi_overextension_filter = strategy_config.get('rsi_overextension_filter', True)
+        if not self.rsi_overextension_filter:
+            self.required_indicators = ()  # RSI читается только фильтром перекупленности
     
     def get_timeframe(self) -> str:
         return self.timeframe
@@ -213,7 +220,7 @@ class ATRMomentumStrategy(BaseStrategy):
         
         # НОВОЕ 2025: RSI Overextension Filter
         if self.rsi_overextension_filter:
-            rsi_14 = indicators.get('15m', {}).get('rsi_14') if isinstance(indicators.get('15m'), dict) else None
+            rsi_14 = indicators.get('15m', {}).get('rsi_14') if isinstance(indicators.get('15m'), Mapping) else None
             
             # Если RSI не в закешированных индикаторах, вычисляем напрямую
             if rsi_14 is None:
@@ -64,6 +64,15 @@ class Signal:
 class BaseStrategy(ABC):
     """Базовый класс для всех торговых стратегий"""
     
+    # Общие индикаторы своего таймфрейма (indicators[timeframe]), которые читает check_signal.
+    # StrategyManager считает их перед вызовом стратегии, остальные - по первому обращению
+    required_indicators: Tuple[str, ...] = ()
+    
+    # Префильтр (src/strategies/prefilter.py): дешевые проверки до indicators и check_signal
+    allowed_regimes: Tuple[str, ...] = ()  # Пусто - любой режим
+    min_bars: int = 50  # Минимум баров таймфрейма стратегии
+    requires_closed_timeframe: bool = False  # Только на закрытии свечи своего таймфрейма
+    
     def __init__(self, name: str, config: Dict):
         self.name = name
         self.config = config
@@ -100,6 +109,10 @@ class BaseStrategy(ABC):
         """Вернуть категорию: breakout, pullback, mean_reversion"""
         pass
     
+    def in_time_window(self, df: pd.DataFrame) -> bool:
+        """Последний бар в торговом окне стратегии (префильтр, по умолчанию - всегда)"""
+        return True
+    
     def calculate_position_size(self, entry: float, stop_loss: float, 
                                 risk_percent: float = 0.01) -> float:
         """Рассчитать размер позиции на основе риска"""
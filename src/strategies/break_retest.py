@@ -23,6 +23,8 @@ class BreakRetestStrategy(BaseStrategy):
     УЛУЧШЕНИЕ: Интеграция с V3 S/R зонами для более точного определения уровней ретеста
     """
     
+    required_indicators = ('cvd',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.retest', {})
         super().__init__("Break & Retest", strategy_config)
@@ -5,6 +5,7 @@ from src.strategies.base_strategy import BaseStrategy, Signal
 from src.utils.config import config
 from src.utils.strategy_logger import strategy_logger
 from src.indicators.technical import calculate_atr
+from src.indicators.cvd import find_local_extrema
 from src.utils.sr_zones_15m import create_sr_zones, find_nearest_zone, calculate_stop_loss_from_zone
 
 
@@ -19,6 +20,8 @@ class CVDDivergenceStrategy(BaseStrategy):
     У уровня/в режиме; точные данные из aggTrades или барная CVD из klines
     """
     
+    required_indicators = ('cvd',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.cvd_divergence', {})
         super().__init__("CVD Divergence", strategy_config)
@@ -208,26 +211,14 @@ class CVDDivergenceStrategy(BaseStrategy):
         Найти локальные максимумы (пики)
         order = минимальное расстояние между пиками
         """
-        peaks = []
-        for i in range(order, len(series) - order):
-            # Проверяем что точка выше соседей
-            if all(series[i] >= series[i-j] for j in range(1, order+1)) and \
-               all(series[i] >= series[i+j] for j in range(1, order+1)):
-                peaks.append(i)
-        return peaks
+        return find_local_extrema(series, order)[0].tolist()
     
     def _find_local_troughs(self, series: pd.Series, order: int = 3) -> list:
         """
         Найти локальные минимумы (впадины)
         order = минимальное расстояние между минимумами
         """
-        troughs = []
-        for i in range(order, len(series) - order):
-            # Проверяем что точка ниже соседей
-            if all(series[i] <= series[i-j] for j in range(1, order+1)) and \
-               all(series[i] <= series[i+j] for j in range(1, order+1)):
-                troughs.append(i)
-        return troughs
+        return find_local_extrema(series, order)[1].tolist()
     
     def _create_divergence_signal(self, symbol: str, df: pd.DataFrame, direction: str,
                                   atr: float, indicators: Dict, regime_score_multiplier: float = 1.0) -> Signal:
@@ -20,6 +20,8 @@ class DonchianBreakoutStrategy(BaseStrategy):
     - Контекст: H4 bias должен совпадать с направлением
     """
     
+    allowed_regimes = ('TREND',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.donchian', {})
         super().__init__("Donchian Breakout", strategy_config)
@@ -32,6 +34,7 @@ class DonchianBreakoutStrategy(BaseStrategy):
         self.bbw_percentile_low = 30  # BB width должен быть в p30-40 до пробоя
         self.bbw_percentile_high = 40
         self.lookback_days = 14  # Для перцентилей (14 дней = 336 баров H1, более реалистично)
+        self.min_bars = max(self.period, self.lookback_days * 24) + 1
     
     def get_timeframe(self) -> str:
         return self.timeframe
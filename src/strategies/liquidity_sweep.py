@@ -24,6 +24,8 @@ class LiquiditySweepStrategy(BaseStrategy):
     Сканер: прокол ≥0.1–0.3 ATR или ≥0.1–0.2%; объём свейпа >1.5–2×
     """
     
+    required_indicators = ('cvd',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.liquidity_sweep', {})
         super().__init__("Liquidity Sweep", strategy_config)
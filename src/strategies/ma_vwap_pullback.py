@@ -6,6 +6,7 @@ from src.utils.config import config
 from src.utils.strategy_logger import strategy_logger
 from src.indicators.technical import calculate_ema, calculate_atr, calculate_adx
 from src.indicators.vwap import calculate_daily_vwap
+from src.indicators.prefix_sums import prefix_sum_cache
 from src.utils.time_of_day import get_adaptive_volume_threshold
 from src.utils.sr_zones_15m import create_sr_zones, find_nearest_zone, calculate_stop_loss_from_zone
 
@@ -22,6 +23,10 @@ class MAVWAPPullbackStrategy(BaseStrategy):
     - Подтверждения: объём>1.2–1.5×, CVD flip вверх
     """
     
+    allowed_regimes = ('TREND', 'SQUEEZE')
+    min_bars = 200
+    requires_closed_timeframe = True  # H4 бар не меняется между закрытиями
+    
     def __init__(self):
         strategy_config = config.get('strategies.pullback', {})
         super().__init__("MA/VWAP Pullback", strategy_config)
@@ -57,7 +62,8 @@ class MAVWAPPullbackStrategy(BaseStrategy):
         ema50 = calculate_ema(df['close'], period=50)
         atr = calculate_atr(df['high'], df['low'], df['close'], period=14)
         adx = calculate_adx(df['high'], df['low'], df['close'], period=14)
-        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(df)
+        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(
+            df, sums=prefix_sum_cache.get(symbol, self.get_timeframe(), df))
         
         # Текущие значения
         current_close = df['close'].iloc[-1]
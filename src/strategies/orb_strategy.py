@@ -35,6 +35,7 @@ class ORBStrategy(BaseStrategy):
         self.ib_duration_minutes = 60
         self.width_percentile = 30  # p30
         self.lookback_days = 60
+        self.min_bars = self.lookback_days * 24 * 4  # 60 дней по 15m
         self.atr_multiplier = 1.3  # <1.3·ATR (повышено с 0.8 - более реалистичный порог)
         self.breakout_atr = 0.25  # ≥0.25 ATR
         self.volume_threshold = 1.5
@@ -55,6 +56,10 @@ class ORBStrategy(BaseStrategy):
                 return True
         return False
     
+    def in_time_window(self, df: pd.DataFrame) -> bool:
+        """Префильтр: последний бар в одном из слотов"""
+        return self._is_in_slot(df['open_time'].iloc[-1])
+    
     def _calculate_ib_range(self, df: pd.DataFrame) -> tuple:
         """
         Рассчитать Initial Balance (первый час диапазона)
@@ -20,6 +20,8 @@ class OrderFlowStrategy(BaseStrategy):
     - Триггер: только вместе с ценовым подтверждением (reclaim/acceptance)
     """
     
+    required_indicators = ('cvd',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.order_flow', {})
         super().__init__("Order Flow", strategy_config)
@@ -0,0 +1,63 @@
+"""
+Strategy Prefilter - дешевые предикаты стратегии до индикаторов и check_signal
+
+Стратегии проверяют режим, длину истории и торговые окна в начале
+check_signal - уже после подготовки indicators. Префильтр проверяет то же
+по объявленным атрибутам стратегии (BaseStrategy) и пропускает стратегию
+целиком, без расчета required_indicators и вызова check_signal:
+- timeframe_not_closed  requires_closed_timeframe, а свеча таймфрейма не закрылась
+- min_bars              меньше min_bars баров таймфрейма стратегии
+- regime                режим не в allowed_regimes
+- regime_weight         вес режима ниже порога RegimeStrategyWeights
+- btc_block             категория заблокирована импульсом BTC (mean reversion)
+- time_window           in_time_window() == False (ToD окна, ORB слоты)
+
+Порядок - от самых дешевых проверок; причина пропуска - первая сработавшая.
+"""
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+SKIP_REASONS = ('timeframe_not_closed', 'min_bars', 'regime', 'regime_weight', 'btc_block', 'time_window')
+
+# Категории стратегий, которые блокирует BTCFilter.should_block_mean_reversion
+BTC_BLOCKED_CATEGORIES = ('mean_reversion',)
+
+
+def prefilter_reason(strategy, df: Optional[pd.DataFrame], regime: str,
+                     market_context: Optional[Dict] = None,
+                     regime_weights=None) -> Optional[str]:
+    """
+    Причина пропуска стратегии или None, если стратегию нужно проверить
+
+    Args:
+        strategy: BaseStrategy
+        df: DataFrame таймфрейма стратегии (None - таймфрейм не загружен)
+        regime: Режим рынка символа
+        market_context: updated_timeframes (закрывшиеся свечи), btc_block_mr
+        regime_weights: RegimeStrategyWeights (None - без проверки веса)
+    """
+    market_context = market_context or {}
+
+    updated_timeframes = market_context.get('updated_timeframes')
+    if (strategy.requires_closed_timeframe and updated_timeframes is not None
+            and strategy.get_timeframe() not in updated_timeframes):
+        return 'timeframe_not_closed'
+
+    if df is None or len(df) < strategy.min_bars:
+        return 'min_bars'
+
+    if strategy.allowed_regimes and regime not in strategy.allowed_regimes:
+        return 'regime'
+
+    if regime_weights is not None and not regime_weights.is_suitable(strategy.name, regime):
+        return 'regime_weight'
+
+    if market_context.get('btc_block_mr') and strategy.get_category() in BTC_BLOCKED_CATEGORIES:
+        return 'btc_block'
+
+    if not strategy.in_time_window(df):
+        return 'time_window'
+
+    return None
@@ -21,6 +21,9 @@ class RangeFadeStrategy(BaseStrategy):
     - Подтверждения: CVD-дивергенция, imbalance flip, абсорбция-прокси
     """
     
+    allowed_regimes = ('RANGE', 'CHOP')
+    min_bars = 100
+    
     def __init__(self):
         strategy_config = config.get('strategies.range_fade', {})
         super().__init__("Range Fade", strategy_config)
@@ -123,9 +126,11 @@ class RangeFadeStrategy(BaseStrategy):
         
         # Получить VA/VWAP для confluence проверки
         from src.indicators.vwap import calculate_daily_vwap
+        from src.indicators.prefix_sums import prefix_sum_cache
         from src.indicators.volume_profile import calculate_volume_profile
         
-        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(df)
+        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(
+            df, sums=prefix_sum_cache.get(symbol, self.get_timeframe(), df))
         vp_result = calculate_volume_profile(df, num_bins=50)
         vah = vp_result['vah']
         val = vp_result['val']
@@ -0,0 +1,48 @@
+"""
+Реестр стратегий
+
+Единый список стратегий для основного процесса (TradingBot) и worker
+процессов пула анализа - оба создают одинаковый набор экземпляров.
+"""
+
+from typing import List
+
+from src.strategies.base_strategy import BaseStrategy
+from src.strategies.donchian_breakout import DonchianBreakoutStrategy
+from src.strategies.squeeze_breakout import SqueezeBreakoutStrategy
+from src.strategies.orb_strategy import ORBStrategy
+from src.strategies.ma_vwap_pullback import MAVWAPPullbackStrategy
+from src.strategies.break_retest import BreakRetestStrategy
+from src.strategies.atr_momentum import ATRMomentumStrategy
+from src.strategies.vwap_mean_reversion import VWAPMeanReversionStrategy
+from src.strategies.range_fade import RangeFadeStrategy
+from src.strategies.rsi_stoch_mr import RSIStochMRStrategy
+from src.strategies.volume_profile import VolumeProfileStrategy
+from src.strategies.liquidity_sweep import LiquiditySweepStrategy
+from src.strategies.cvd_divergence import CVDDivergenceStrategy
+from src.strategies.time_of_day import TimeOfDayStrategy
+from src.strategies.order_flow import OrderFlowStrategy
+from src.strategies.cash_and_carry import CashAndCarryStrategy
+from src.strategies.market_making import MarketMakingStrategy
+
+
+def create_all_strategies() -> List[BaseStrategy]:
+    """Создать экземпляры всех стратегий согласно мануалу"""
+    return [
+        DonchianBreakoutStrategy(),          # Стратегия #1
+        SqueezeBreakoutStrategy(),           # Стратегия #2
+        ORBStrategy(),                       # Стратегия #3
+        MAVWAPPullbackStrategy(),            # Стратегия #4
+        BreakRetestStrategy(),               # Стратегия #5
+        ATRMomentumStrategy(),               # Стратегия #6
+        VWAPMeanReversionStrategy(),         # Стратегия #7
+        RangeFadeStrategy(),                 # Стратегия #8
+        VolumeProfileStrategy(),             # Стратегия #9
+        RSIStochMRStrategy(),                # Стратегия #10
+        LiquiditySweepStrategy(),            # Стратегия #11
+        OrderFlowStrategy(),                 # Стратегия #12
+        CVDDivergenceStrategy(),             # Стратегия #13
+        TimeOfDayStrategy(),                 # Стратегия #14
+        CashAndCarryStrategy(),              # Стратегия #19 (требует funding данных)
+        MarketMakingStrategy(),              # Стратегия #26 (требует HFT orderbook)
+    ]
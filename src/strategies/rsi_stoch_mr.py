@@ -21,6 +21,8 @@ class RSIStochMRStrategy(BaseStrategy):
     - Подтверждения: CVD-дивергенция, imbalance flip
     """
     
+    allowed_regimes = ('RANGE', 'CHOP')
+    
     def __init__(self):
         strategy_config = config.get('strategies.oscillator_mr', {})
         super().__init__("RSI/Stoch MR", strategy_config)
@@ -30,6 +32,7 @@ class RSIStochMRStrategy(BaseStrategy):
         self.oversold_percentile = strategy_config.get('oversold_percentile', 20)  # p15-20
         self.overbought_percentile = strategy_config.get('overbought_percentile', 80)  # p80-85
         self.lookback = strategy_config.get('lookback', 90)  # 90 дней
+        self.min_bars = max(self.min_bars, self.lookback * 24 * 4)
         self.reclaim_bars = strategy_config.get('reclaim_bars', 2)  # Hold N bars для reclaim
         self.timeframe = '15m'
     
@@ -87,9 +90,11 @@ class RSIStochMRStrategy(BaseStrategy):
         
         # Получаем VWAP/VA для reclaim проверки (зона = край рейнджа ∩ VWAP/VA)
         from src.indicators.vwap import calculate_daily_vwap
+        from src.indicators.prefix_sums import prefix_sum_cache
         from src.indicators.volume_profile import calculate_volume_profile
         
-        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(df)
+        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(
+            df, sums=prefix_sum_cache.get(symbol, self.get_timeframe(), df))
         vp_result = calculate_volume_profile(df, num_bins=50)
         val = vp_result['val']
         
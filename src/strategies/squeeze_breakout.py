@@ -19,11 +19,14 @@ class SqueezeBreakoutStrategy(BaseStrategy):
     - Фильтр: не далее 1.5 ATR от EMA20
     """
     
+    allowed_regimes = ('SQUEEZE',)
+    
     def __init__(self):
         strategy_config = config.get('strategies.squeeze', {})
         super().__init__("Squeeze Breakout", strategy_config)
         
         self.lookback = strategy_config.get('lookback', 90)
+        self.min_bars = max(self.min_bars, self.lookback)
         self.bb_percentile = strategy_config.get('bb_percentile', 25)
         self.min_duration = strategy_config.get('min_duration', 12)
         self.breakout_atr = strategy_config.get('breakout_atr', 0.25)
@@ -1,10 +1,14 @@
 from typing import Dict, List, Optional
 import pandas as pd
 from datetime import datetime
+from src.indicators.lazy import LazyIndicators
 from src.strategies.base_strategy import BaseStrategy, Signal
+from src.strategies.prefilter import prefilter_reason
 from src.utils.logger import logger
 from src.utils.strategy_logger import strategy_logger
 from src.utils.config import config
+from src.utils.perf_metrics import perf_metrics
+from src.utils.strategy_profiler import strategy_profiler
 # ФАЗА 3: Multi-Factor Confirmation & Regime Weighting
 from src.strategies.multi_factor_confirmation import MultiFactorConfirmation
 from src.strategies.regime_strategy_weights import RegimeStrategyWeights
@@ -22,6 +26,9 @@ class StrategyManager:
         self.multi_factor = MultiFactorConfirmation(config)
         self.regime_weights = RegimeStrategyWeights(config)
         
+        # Пропуски префильтром: {strategy_name: {reason: count}}
+        self.prefilter_skips: Dict[str, Dict[str, int]] = {}
+        
     def register_strategy(self, strategy: BaseStrategy):
         """Зарегистрировать стратегию"""
         self.strategies.append(strategy)
@@ -34,21 +41,56 @@ class StrategyManager:
     
     async def check_all_signals(self, symbol: str, timeframe_data: Dict[str, pd.DataFrame],
                          regime: str, bias: str, indicators: Dict,
-                         blocked_symbols_by_strategy: Optional[dict] = None) -> List[Signal]:
+                         blocked_symbols_by_strategy: Optional[dict] = None,
+                         market_context: Optional[Dict] = None) -> List[Signal]:
         """
-        Проверить все стратегии на сигналы
+        Проверить все стратегии на сигналы и обновить entry по mark price
         
         Args:
             symbol: Торговая пара
             timeframe_data: Словарь {timeframe: DataFrame}
             regime: Рыночный режим
             bias: Направление тренда H4
-            indicators: Рассчитанные индикаторы
+            indicators: Индикаторы; indicators[tf] - LazyIndicators (расчет при первом обращении,
+                required_indicators стратегии считаются перед ее вызовом)
             blocked_symbols_by_strategy: dict[strategy_name, set(symbols)] - заблокированные символы для каждой стратегии
+            market_context: updated_timeframes, btc_block_mr - для префильтра стратегий
             
         Returns:
             Список сгенерированных сигналов
         """
+        signals = self.collect_signals(
+            symbol, timeframe_data, regime, bias, indicators, blocked_symbols_by_strategy,
+            market_context=market_context
+        )
+        for signal in signals:
+            await self.apply_mark_price(symbol, signal)
+        return signals
+    
+    def collect_signals(self, symbol: str, timeframe_data: Dict[str, pd.DataFrame],
+                        regime: str, bias: str, indicators: Dict,
+                        blocked_symbols_by_strategy: Optional[dict] = None,
+                        enabled_names: Optional[set] = None,
+                        market_context: Optional[Dict] = None) -> List[Signal]:
+        """
+        Проверить все стратегии на сигналы (только CPU, без сетевых запросов)
+        
+        Используется напрямую в worker процессах пула анализа: mark price
+        применяется потом в основном процессе через apply_mark_price.
+        
+        Args:
+            symbol: Торговая пара
+            timeframe_data: Словарь {timeframe: DataFrame}
+            regime: Рыночный режим
+            bias: Направление тренда H4
+            indicators: Рассчитанные индикаторы
+            blocked_symbols_by_strategy: dict[strategy_name, set(symbols)] - заблокированные символы для каждой стратегии
+            enabled_names: Имена включенных стратегий (для worker процессов - состояние основного процесса)
+            market_context: updated_timeframes, btc_block_mr - для префильтра стратегий
+            
+        Returns:
+            Список сгенерированных сигналов (entry = close цена, offset'ы рассчитаны)
+        """
         signals = []
         checked_count = 0
         skipped_count = 0
@@ -57,7 +99,8 @@ class StrategyManager:
             blocked_symbols_by_strategy = {}
         
         for strategy in self.strategies:
-            if not strategy.is_enabled():
+            is_enabled = strategy.name in enabled_names if enabled_names is not None else strategy.is_enabled()
+            if not is_enabled:
                 strategy_logger.debug(f"  ⏭️  {strategy.name} - отключена")
                 skipped_count += 1
                 continue
@@ -73,8 +116,11 @@ class StrategyManager:
             tf = strategy.get_timeframe()
             df = timeframe_data.get(tf)
             
-            if df is None or len(df) < 50:
-                strategy_logger.debug(f"  ⏭️  {strategy.name} ({tf}) - недостаточно данных")
+            # Префильтр: режим, длина истории, окна, BTC блокировка - до индикаторов и check_signal
+            reason = prefilter_reason(strategy, df, regime, market_context, self.regime_weights)
+            if reason:
+                strategy_logger.debug(f"  ⏭️  {strategy.name} ({tf}) - префильтр: {reason}")
+                self.count_prefilter_skip(strategy.name, reason)
                 skipped_count += 1
                 continue
             
@@ -82,7 +128,13 @@ class StrategyManager:
                 strategy_logger.debug(f"  🔍 Проверка: {strategy.name} ({tf})")
                 checked_count += 1
                 
-                signal = strategy.check_signal(symbol, df, regime, bias, indicators)
+                # Объявленные индикаторы - до замера стратегии (время идет в perf_metrics 'indicator')
+                tf_indicators = indicators.get(tf)
+                if strategy.required_indicators and isinstance(tf_indicators, LazyIndicators):
+                    tf_indicators.materialize(strategy.required_indicators)
+                
+                with perf_metrics.span('strategy', strategy.name), strategy_profiler.measure(strategy.name):
+                    signal = strategy.check_signal(symbol, df, regime, bias, indicators)
                 if signal:
                     # ФАЗА 3: Multi-Factor Confirmation - проверка подтверждающих факторов
                     df_1h = timeframe_data.get('1h')
@@ -98,14 +150,7 @@ class StrategyManager:
                         )
                         continue  # Пропустить сигнал
                     
-                    # ФАЗА 3: Regime-Based Strategy Weighting - проверка соответствия режиму
-                    if not self.regime_weights.is_suitable(strategy.name, regime):
-                        strategy_logger.info(
-                            f"  ❌ {strategy.name} BLOCKED by Regime Weight: "
-                            f"unsuitable for {regime} regime"
-                        )
-                        continue  # Пропустить сигнал
-                    
+                    # ФАЗА 3: Regime-Based Strategy Weighting (соответствие режиму проверено префильтром)
                     # Применить weight multiplier к score
                     original_score = signal.base_score
                     signal.base_score = self.regime_weights.apply_weight(
@@ -129,33 +174,6 @@ class StrategyManager:
                     # Установить entry_type как MARKET
                     signal.entry_type = "MARKET"
                     
-                    # Получить актуальную рыночную цену
-                    if self.binance_client:
-                        try:
-                            mark_data = await self.binance_client.get_mark_price(symbol)
-                            current_mark_price = float(mark_data.get('markPrice', signal.entry_price))
-                            
-                            # Обновить entry_price на актуальную mark price
-                            strategy_logger.debug(
-                                f"    💹 Updated entry: {signal.entry_price:.4f} → {current_mark_price:.4f} "
-                                f"(mark price)"
-                            )
-                            signal.entry_price = current_mark_price
-                            
-                            # Пересчитать SL/TP с актуальной ценой используя offset'ы
-                            if signal.direction == "LONG":
-                                signal.stop_loss = current_mark_price - (signal.stop_offset or 0)
-                                signal.take_profit_1 = current_mark_price + (signal.tp1_offset or 0)
-                                if signal.tp2_offset:
-                                    signal.take_profit_2 = current_mark_price + signal.tp2_offset
-                            else:  # SHORT
-                                signal.stop_loss = current_mark_price + (signal.stop_offset or 0)
-                                signal.take_profit_1 = current_mark_price - (signal.tp1_offset or 0)
-                                if signal.tp2_offset:
-                                    signal.take_profit_2 = current_mark_price - signal.tp2_offset
-                        except Exception as e:
-                            strategy_logger.warning(f"    ⚠️  Could not get mark price: {e}, using close price")
-                    
                     strategy.increment_signal_count()
                     signals.append(signal)
                     logger.info(
@@ -178,6 +196,60 @@ class StrategyManager:
         
         return signals
     
+    async def apply_mark_price(self, symbol: str, signal: Signal):
+        """Обновить entry на актуальную mark price и пересчитать SL/TP по offset'ам"""
+        if not self.binance_client:
+            return
+        
+        try:
+            mark_data = await self.binance_client.get_mark_price(symbol)
+            current_mark_price = float(mark_data.get('markPrice', signal.entry_price))
+            
+            # Обновить entry_price на актуальную mark price
+            strategy_logger.debug(
+                f"    💹 Updated entry: {signal.entry_price:.4f} → {current_mark_price:.4f} "
+                f"(mark price)"
+            )
+            signal.entry_price = current_mark_price
+            
+            # Пересчитать SL/TP с актуальной ценой используя offset'ы
+            if signal.direction == "LONG":
+                signal.stop_loss = current_mark_price - (signal.stop_offset or 0)
+                signal.take_profit_1 = current_mark_price + (signal.tp1_offset or 0)
+                if signal.tp2_offset:
+                    signal.take_profit_2 = current_mark_price + signal.tp2_offset
+            else:  # SHORT
+                signal.stop_loss = current_mark_price + (signal.stop_offset or 0)
+                signal.take_profit_1 = current_mark_price - (signal.tp1_offset or 0)
+                if signal.tp2_offset:
+                    signal.take_profit_2 = current_mark_price - signal.tp2_offset
+        except Exception as e:
+            strategy_logger.warning(f"    ⚠️  Could not get mark price: {e}, using close price")
+    
+    def count_prefilter_skip(self, strategy_name: str, reason: str, count: int = 1):
+        """Учесть пропуск стратегии префильтром"""
+        reasons = self.prefilter_skips.setdefault(strategy_name, {})
+        reasons[reason] = reasons.get(reason, 0) + count
+    
+    def drain_prefilter_skips(self) -> Dict[str, Dict[str, int]]:
+        """Забрать накопленные пропуски (worker процессы пула анализа → основной процесс)"""
+        skips, self.prefilter_skips = self.prefilter_skips, {}
+        return skips
+    
+    def merge_prefilter_skips(self, skips: Optional[Dict[str, Dict[str, int]]]):
+        """Добавить пропуски, полученные из worker процесса"""
+        for strategy_name, reasons in (skips or {}).items():
+            for reason, count in reasons.items():
+                self.count_prefilter_skip(strategy_name, reason, count)
+    
+    def get_prefilter_skips(self) -> Dict[str, Dict[str, int]]:
+        """Копия счетчиков пропусков {strategy_name: {reason: count}}"""
+        return {name: dict(reasons) for name, reasons in self.prefilter_skips.items()}
+    
+    def get_enabled_names(self) -> set:
+        """Имена включенных стратегий (передаются в worker процессы)"""
+        return {s.name for s in self.strategies if s.is_enabled()}
+    
     def get_strategy(self, name: str) -> Optional[BaseStrategy]:
         """Получить стратегию по имени"""
         for strategy in self.strategies:
@@ -199,7 +271,10 @@ class StrategyManager:
     
     def get_all_stats(self) -> List[Dict]:
         """Получить статистику всех стратегий"""
-        return [s.get_stats() for s in self.strategies]
+        return [
+            {**s.get_stats(), 'prefilter_skips': dict(self.prefilter_skips.get(s.name, {}))}
+            for s in self.strategies
+        ]
     
     def get_enabled_count(self) -> int:
         """Получить количество активных стратегий"""
@@ -0,0 +1,176 @@
+"""
+Подготовка анализа символа: режим рынка, bias, H4 swings и indicators dict
+
+Режим и bias берутся из RegimeService (кеш по последнему 4h бару).
+Общие индикаторы - LazyIndicators (кеш по последнему бару таймфрейма):
+считаются только те, к которым обратились стратегии и скоринг.
+
+Общий код для основного процесса (_check_symbol_signals) и worker процессов
+пула анализа (analysis_worker) - оба строят indicators одинаково.
+"""
+
+import time
+from collections.abc import Mapping
+from typing import Dict, Optional
+
+import pandas as pd
+
+from src.indicators.lazy import FrameIndicators, LazyIndicators
+from src.indicators.swing_levels import calculate_swing_levels
+from src.utils.indicator_validator import IndicatorValidator
+from src.utils.logger import logger
+from src.utils.strategy_logger import strategy_logger
+
+
+# Ключи indicators, которые читает SignalScorer (помимо '{tf}_data')
+SCORING_KEYS = (
+    'cvd', 'doi_pct', 'depth_imbalance',
+    'adx', 'rsi', 'regime', 'atr', 'atr_avg',
+)
+
+DEFAULT_OI_METRICS = {
+    'oi_delta': 0.0,
+    'doi_pct': 0.0,
+    'current_oi': 0.0,
+    'data_valid': False
+}
+
+DEFAULT_DEPTH_METRICS = {
+    'depth_imbalance': 0.0,
+    'bid_volume': 0.0,
+    'ask_volume': 0.0,
+    'spread_pct': 0.0,
+    'data_valid': False  # Fallback если символа нет в кеше
+}
+
+
+def prepare_symbol_analysis(symbol: str, timeframe_data: Dict[str, pd.DataFrame],
+                            regime_service, indicator_cache, market_context: Dict,
+                            timings: Optional[Dict[str, float]] = None) -> Optional[Dict]:
+    """
+    Определить режим рынка и собрать indicators для стратегий
+
+    Args:
+        symbol: Символ
+        timeframe_data: {timeframe: DataFrame} (4h обязателен)
+        regime_service: RegimeService (режим кешируется до закрытия 4h свечи)
+        indicator_cache: IndicatorCache (кеш живет в процессе, который вызывает)
+        market_context: oi_metrics, depth_metrics, btc_bias, validate
+        timings: Dict для записи времени стадий (regime, indicators) в секундах
+
+    Returns:
+        {'regime', 'bias', 'regime_data', 'indicators'} или None если мало H4 данных
+    """
+    if timings is None:
+        timings = {}
+
+    # Определить режим рынка и bias
+    h4_data = timeframe_data.get('4h')
+    if h4_data is None or len(h4_data) < 200:
+        logger.debug(f"❌ {symbol}: Insufficient H4 data ({len(h4_data) if h4_data is not None else 0} bars, требуется 200)")
+        return None
+
+    started = time.perf_counter()
+    regime_entry = regime_service.get(symbol, h4_data)
+    regime_data = regime_entry['regime_data']
+    regime = regime_entry['regime']  # ENUM уже переведен в string
+    bias = regime_entry['bias']
+    timings['regime'] = time.perf_counter() - started
+
+    logger.debug(f"🔍 Analyzing {symbol} | Regime: {regime} | Bias: {bias}")
+    strategy_logger.info(f"\n{'='*80}")
+    strategy_logger.info(f"🔍 АНАЛИЗ: {symbol} | Режим: {regime} | Bias: {bias}")
+
+    # Рассчитать H4 swings для confluence проверки
+    # Используем fractal patterns (локальные экстремумы) вместо простого max/min
+    # lookback=5 означает 5 баров с каждой стороны для подтверждения swing
+    h4_swing_high, h4_swing_low = calculate_swing_levels(h4_data, lookback=5) if h4_data is not None and len(h4_data) >= 20 else (None, None)
+
+    # Общие индикаторы (с кешированием): LazyIndicators считает группу при первом обращении
+    # Ключ кеша - open_time последнего бара (RangeIndex DataLoader не меняется при сдвиге окна)
+    started = time.perf_counter()
+    cached_indicators = {}
+    for tf, df in timeframe_data.items():
+        last_bar_time = df['open_time'].iat[-1] if 'open_time' in df.columns else df.index[-1]
+        cached = indicator_cache.get(symbol, tf, last_bar_time)
+
+        if cached is None:
+            # Кеша нет или устарел - новый mapping, расчет по требованию
+            common_indicators = LazyIndicators(df, tf, symbol)
+            indicator_cache.set(symbol, tf, last_bar_time, common_indicators)
+            cached_indicators[tf] = common_indicators
+        else:
+            # Используем закешированные индикаторы
+            cached_indicators[tf] = cached
+    timings['indicators'] = time.perf_counter() - started
+
+    # ОПТИМИЗАЦИЯ: OI и orderbook предзагружены параллельно в начале цикла
+    oi_metrics = market_context.get('oi_metrics') or DEFAULT_OI_METRICS
+    depth_metrics = market_context.get('depth_metrics') or DEFAULT_DEPTH_METRICS
+
+    # Indicators для стратегий (объединяем кешированные + дополнительные)
+    # NOTE: CVD теперь берется из indicators[self.timeframe]['cvd'] в каждой стратегии
+    indicators = {
+        **cached_indicators,  # Все закешированные индикаторы по таймфреймам (включая CVD)
+        # Nested timeframe data with both DataFrames and indicators (for CVD Divergence)
+        # This allows both old style (indicators['1h'] = DataFrame) and new style (indicators['15m_data']['df'])
+        '15m_data': FrameIndicators(timeframe_data.get('15m'), cached_indicators.get('15m')),
+        '1h_data': FrameIndicators(timeframe_data.get('1h'), cached_indicators.get('1h')),
+        '4h_data': FrameIndicators(timeframe_data.get('4h'), cached_indicators.get('4h')),
+        # Keep backward compatibility for Break&Retest (expects direct DataFrames)
+        '1h': timeframe_data.get('1h'),  # DataFrame 1H для HTF проверки
+        '4h': timeframe_data.get('4h'),  # DataFrame 4H для HTF проверки
+        'doi_pct': oi_metrics['doi_pct'],  # Реальные данные Open Interest Delta %
+        'oi_delta': oi_metrics['oi_delta'],  # Абсолютное изменение OI
+        'oi_data_valid': oi_metrics.get('data_valid', False),  # Флаг валидности OI данных
+        'depth_imbalance': depth_metrics['depth_imbalance'],  # Реальный дисбаланс orderbook
+        'bid_volume': depth_metrics['bid_volume'],  # Bid ликвидность
+        'ask_volume': depth_metrics['ask_volume'],  # Ask ликвидность
+        'spread_pct': depth_metrics['spread_pct'],  # Спред в %
+        'depth_data_valid': depth_metrics.get('data_valid', False),  # Флаг валидности depth данных
+        'late_trend': regime_data.get('late_trend', False),
+        'h4_adx': regime_data.get('details', {}).get('adx', 0),  # H4 ADX для ORB стратегии
+        'btc_bias': market_context.get('btc_bias', 'Neutral'),
+        'h4_swing_high': h4_swing_high,
+        'h4_swing_low': h4_swing_low
+    }
+
+    # Валидация индикаторов (только для первого символа или периодически)
+    if market_context.get('validate'):
+        validation = IndicatorValidator.validate_indicators(indicators, symbol=symbol)
+        IndicatorValidator.log_validation_results(validation, symbol=symbol)
+
+    return {
+        'regime': regime,
+        'bias': bias,
+        'regime_data': regime_data,
+        'indicators': indicators,
+    }
+
+
+def extract_scoring_indicators(indicators: Dict) -> Dict:
+    """
+    Минимальный срез indicators для SignalScorer (без DataFrame)
+
+    Worker процесс возвращает только это - DataFrame'ы уже есть в основном
+    процессе и подставляются через attach_scoring_frames.
+    """
+    result = {key: indicators[key] for key in SCORING_KEYS if key in indicators}
+    for tf in ('15m', '1h'):
+        tf_indicators = indicators.get(tf)
+        if isinstance(tf_indicators, Mapping):
+            result[tf] = {'cvd': tf_indicators.get('cvd')}
+        tf_data = indicators.get(f'{tf}_data')
+        if isinstance(tf_data, Mapping):
+            # Точки CVD divergence - скоринг без DataFrame и повторного поиска экстремумов
+            result[f'{tf}_data'] = {'cvd': tf_data.get('cvd'), 'cvd_divergence': tf_data.get('cvd_divergence')}
+    return result
+
+
+def attach_scoring_frames(scoring_indicators: Dict, timeframe_data: Dict[str, pd.DataFrame]) -> Dict:
+    """Подставить DataFrame'ы основного процесса в '{tf}_data' (для CVD divergence)"""
+    for tf in ('15m', '1h'):
+        tf_data = scoring_indicators.get(f'{tf}_data')
+        if isinstance(tf_data, dict):
+            tf_data['df'] = timeframe_data.get(tf)
+    return scoring_indicators
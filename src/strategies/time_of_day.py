@@ -19,6 +19,8 @@ class TimeOfDayStrategy(BaseStrategy):
     - Работает только в выбранных временных слотах при объёме >1.5× и волатильности выше медианы
     """
     
+    min_bars = 100
+    
     def __init__(self):
         strategy_config = config.get('strategies.time_of_day', {})
         super().__init__("Time-of-Day", strategy_config)
@@ -55,16 +57,7 @@ class TimeOfDayStrategy(BaseStrategy):
             return None
         
         # Текущее время в UTC
-        current_time = df['open_time'].iloc[-1]
-        if not isinstance(current_time, pd.Timestamp):
-            current_time = pd.Timestamp(current_time, tz='UTC')
-        else:
-            if current_time.tz is None:
-                current_time = current_time.tz_localize('UTC')
-            else:
-                current_time = current_time.tz_convert('UTC')
-        
-        current_hour = current_time.hour
+        current_hour = self._bar_time_utc(df).hour
         
         # Определяем тип окна
         window_type = self._get_window_type(current_hour)
@@ -109,6 +102,20 @@ class TimeOfDayStrategy(BaseStrategy):
         strategy_logger.debug(f"    ❌ Неопределенный тип временного окна")
         return None
     
+    def in_time_window(self, df: pd.DataFrame) -> bool:
+        """Префильтр: час последнего бара в жирном или тонком окне"""
+        return self._get_window_type(self._bar_time_utc(df).hour) is not None
+    
+    @staticmethod
+    def _bar_time_utc(df: pd.DataFrame) -> pd.Timestamp:
+        """open_time последнего бара в UTC"""
+        current_time = df['open_time'].iloc[-1]
+        if not isinstance(current_time, pd.Timestamp):
+            return pd.Timestamp(current_time, tz='UTC')
+        if current_time.tz is None:
+            return current_time.tz_localize('UTC')
+        return current_time.tz_convert('UTC')
+    
     def _get_window_type(self, hour: int) -> Optional[str]:
         """
         Определяет тип временного окна
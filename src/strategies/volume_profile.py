@@ -24,6 +24,9 @@ class VolumeProfileStrategy(BaseStrategy):
     - Acceptance: как breakout (стоп за ретест, TP по R-множителю)
     """
     
+    required_indicators = ('volume_profile', 'cvd')
+    min_bars = 100
+    
     def __init__(self):
         strategy_config = config.get('strategies.volume_profile', {})
         super().__init__("Volume Profile", strategy_config)
@@ -5,6 +5,8 @@ from src.strategies.base_strategy import BaseStrategy, Signal
 from src.utils.config import config
 from src.utils.strategy_logger import strategy_logger
 from src.indicators.vwap import calculate_daily_vwap
+from src.indicators.prefix_sums import prefix_sum_cache
+from src.indicators.percentiles import last_quantile
 from src.indicators.volume_profile import calculate_volume_profile
 from src.utils.reclaim_checker import check_value_area_reclaim, check_level_reclaim
 from src.utils.sr_zones_15m import create_sr_zones, find_nearest_zone, calculate_stop_loss_from_zone
@@ -24,6 +26,9 @@ class VWAPMeanReversionStrategy(BaseStrategy):
     - Подтверждения: CVD-дивергенция, imbalance flip
     """
     
+    allowed_regimes = ('RANGE', 'CHOP')
+    min_bars = 100
+    
     def __init__(self):
         strategy_config = config.get('strategies.vwap_mr', {})
         super().__init__("VWAP Mean Reversion", strategy_config)
@@ -75,7 +80,8 @@ class VWAPMeanReversionStrategy(BaseStrategy):
             return None
         
         # ATR% < p40 (проверка низкой волатильности)
-        atr_pct_p40 = atr_pct.rolling(60*24).quantile(0.40).iloc[-1] if len(atr_pct) > 60*24 else atr_pct.quantile(0.40)
+        # Квантиль только последнего окна (= rolling(...).quantile(...).iloc[-1])
+        atr_pct_p40 = last_quantile(atr_pct, 60*24, 0.40) if len(atr_pct) > 60*24 else atr_pct.quantile(0.40)
         if current_atr_pct >= atr_pct_p40:
             strategy_logger.debug(f"    ❌ ATR% слишком высокий: {current_atr_pct:.3f}% >= p40 ({atr_pct_p40:.3f}%)")
             return None
@@ -84,7 +90,7 @@ class VWAPMeanReversionStrategy(BaseStrategy):
         bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(df['close'], period=20, std=2.0)
         bb_width = (bb_upper - bb_lower) / bb_middle
         current_bb_width = bb_width.iloc[-1]
-        bb_width_p30 = bb_width.rolling(90).quantile(0.30).iloc[-1] if len(bb_width) > 90 else bb_width.quantile(0.30)
+        bb_width_p30 = last_quantile(bb_width, 90, 0.30) if len(bb_width) > 90 else bb_width.quantile(0.30)
         
         if current_bb_width >= bb_width_p30:
             strategy_logger.debug(f"    ❌ BB width слишком широкий: {current_bb_width:.6f} >= p30 ({bb_width_p30:.6f})")
@@ -115,7 +121,8 @@ class VWAPMeanReversionStrategy(BaseStrategy):
             return None
         
         # Рассчитать VWAP и ленты (±2σ)
-        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(df)
+        vwap, vwap_upper, vwap_lower = calculate_daily_vwap(
+            df, sums=prefix_sum_cache.get(symbol, self.get_timeframe(), df))
         
         # Рассчитать Volume Profile для VAH/VAL/POC
         vp_result = calculate_volume_profile(df, num_bins=50)
@@ -1,11 +1,15 @@
 import asyncio
+import html
 from datetime import datetime, timedelta
 from telegram import Update, Bot, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
 from src.utils.config import config
 from src.utils.logger import logger
+from src.utils.perf_metrics import perf_metrics
+from src.utils.strategy_profiler import strategy_profiler, PROFILE_MODES
 from src.database.models import Signal, ActionPriceSignal, V3SRSignal
-from src.database.db import Database
+from src.database.signal_repository import signal_repository
+from src.database.signal_queries import active_filter
 import pytz
 
 
@@ -22,8 +26,8 @@ class TelegramBot:
         self.ap_performance_tracker = None  # Action Price tracker
         self.v3_performance_tracker = None  # V3 S/R tracker
         self.strategy_validator = None
+        self.regime_service = None  # RegimeService (снимок режимов по символам)
         self.binance_client = binance_client
-        self.db = Database()
     
     async def start(self):
         if not self.token:
@@ -65,6 +69,8 @@ class TelegramBot:
         self.app.add_handler(CommandHandler("status", self.cmd_status))
         self.app.add_handler(CommandHandler("strategies", self.cmd_strategies))
         self.app.add_handler(CommandHandler("latency", self.cmd_latency))
+        self.app.add_handler(CommandHandler("perf", self.cmd_perf))
+        self.app.add_handler(CommandHandler("profile", self.cmd_profile))
         self.app.add_handler(CommandHandler("report", self.cmd_report))
         self.app.add_handler(CommandHandler("performance", self.cmd_performance))
         self.app.add_handler(CommandHandler("stats", self.cmd_stats))
@@ -77,6 +83,7 @@ class TelegramBot:
         self.app.add_handler(CommandHandler("validate", self.cmd_validate))
         # Новые профессиональные команды
         self.app.add_handler(CommandHandler("regime_stats", self.cmd_regime_stats))
+        self.app.add_handler(CommandHandler("regimes", self.cmd_regimes))
         self.app.add_handler(CommandHandler("confluence_stats", self.cmd_confluence_stats))
         # V3 S/R Strategy commands
         self.app.add_handler(CommandHandler("v3_status", self.cmd_v3_status))
@@ -187,10 +194,12 @@ class TelegramBot:
             "/closed_ap - Закрытые Action Price (24ч)\n\n"
             "📈 <b>Профессиональная аналитика:</b>\n"
             "/regime_stats - Статистика по режимам рынка\n"
+            "/regimes - Текущие режимы по символам\n"
             "/confluence_stats - Эффективность confluence\n\n"
             "⚙️ <b>Диагностика:</b>\n"
             "/validate - Проверка стратегий\n"
             "/latency - Задержки системы\n"
+            "/perf - Тайминги цикла\n"
             "/report - Статистика сигналов\n\n"
             "Используй кнопки внизу для быстрого доступа! 👇"
         )
@@ -223,8 +232,11 @@ class TelegramBot:
             "/v3_zones - Информация о зонах\n\n"
             "/validate - Проверка корректности стратегий\n"
             "/regime_stats - Статистика по режимам рынка\n"
+            "/regimes - Текущие режимы рынка (H4) по символам\n"
             "/confluence_stats - Эффективность confluence\n"
             "/latency - Задержки WebSocket\n"
+            "/perf - Тайминги цикла (p50/p95/p99)\n"
+            "/profile [start N режим|stop|reset] - CPU стоимость стратегий\n"
             "/report - Статистика за период\n"
         )
         await update.message.reply_text(help_text, parse_mode='HTML')
@@ -268,6 +280,117 @@ class TelegramBot:
             return
         await update.message.reply_text("⏱ Latency: в процессе разработки")
     
+    async def cmd_perf(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Показать тайминги цикла: стадии, топ символов/стратегий/индикаторов, rate limiter, БД"""
+        if not update.message:
+            return
+        
+        try:
+            def fmt_row(label: str, stats: dict) -> str:
+                # Метки - имена символов / стратегий / стадий ('Break & Retest'): HTML parse mode
+                name = html.escape(f"{label[:18]:<18}")
+                return (
+                    f"{name} {stats['p50'] * 1000:>7.0f} {stats['p95'] * 1000:>7.0f} "
+                    f"{stats['p99'] * 1000:>7.0f} {stats['count']:>6}"
+                )
+            
+            header = f"{'':<18} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'n':>6}"
+            sections = [
+                ('⏱ Стадии цикла', perf_metrics.top('cycle', n=10, by='p95')),
+                ('🔬 Стадии символа', perf_metrics.top('symbol_stage', n=10, by='p95')),
+                ('🐢 Топ-10 символов (p95)', perf_metrics.top('symbol', n=10, by='p95')),
+                ('🧠 Топ-10 стратегий (суммарно)', perf_metrics.top('strategy', n=10, by='total')),
+                ('🧮 Индикаторы по требованию (суммарно)', perf_metrics.top('indicator', n=10, by='total')),
+                ('🚦 Rate limiter', perf_metrics.top('rate_limiter', n=5, by='p95')),
+                ('💾 БД чтение', perf_metrics.top('db_read', n=5, by='p95')),
+                ('💾 БД запись', perf_metrics.top('db_write', n=5, by='p95')),
+            ]
+            
+            uptime_min = perf_metrics.uptime_seconds / 60
+            text = f"📈 <b>Производительность</b> (окно {perf_metrics.window_size}, {uptime_min:.0f} мин)\n"
+            
+            has_data = False
+            for title, rows in sections:
+                if not rows:
+                    continue
+                has_data = True
+                lines = [header] + [fmt_row(label, stats) for label, stats in rows]
+                text += f"\n<b>{title}</b>\n<pre>" + "\n".join(lines) + "</pre>\n"
+            
+            if not has_data:
+                text += "\n⚪ Пока нет замеров (ждём первый цикл)"
+            
+            await update.message.reply_text(text, parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error in /perf command: {e}", exc_info=True)
+            await update.message.reply_text(f"❌ Ошибка: {e}")
+    
+    async def cmd_profile(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """CPU профилирование стратегий: /profile, /profile start 3 sampling, /profile stop, /profile reset"""
+        if not update.message:
+            return
+        
+        try:
+            action = context.args[0].lower() if context.args else 'show'
+            
+            if action == 'start':
+                cycles = int(context.args[1]) if len(context.args) > 1 and context.args[1].isdigit() else 3
+                mode = context.args[2].lower() if len(context.args) > 2 else 'sampling'
+                if mode not in PROFILE_MODES:
+                    await update.message.reply_text(f"⚠️ Режим: {' / '.join(PROFILE_MODES)}")
+                    return
+                if not strategy_profiler.start_session(cycles=cycles, mode=mode):
+                    await update.message.reply_text(
+                        f"⚠️ Профилирование уже идёт ({strategy_profiler.mode}, осталось циклов: {strategy_profiler.cycles_left})"
+                    )
+                    return
+                await update.message.reply_text(
+                    f"🔬 Профилирование запущено: <b>{mode}</b> на {cycles} цикл(а)\n"
+                    f"Результаты будут в {strategy_profiler.output_dir}/",
+                    parse_mode='HTML'
+                )
+                return
+            
+            if action == 'stop':
+                outputs = strategy_profiler.stop_session()
+                files = "\n".join(outputs) if outputs else "нет активной сессии"
+                await update.message.reply_text(f"🔬 Профилирование остановлено\n{files}")
+                return
+            
+            if action == 'reset':
+                strategy_profiler.reset()
+                await update.message.reply_text("🔬 Счётчики стратегий сброшены")
+                return
+            
+            table = strategy_profiler.get_table(sort_by='cpu')
+            if not table:
+                await update.message.reply_text(
+                    "🔬 Нет данных профилирования\n"
+                    "Включи profiling.enabled в config.yaml или запусти /profile start 3"
+                )
+                return
+            
+            lines = [f"{'strategy':<18} {'calls':>6} {'cpu,s':>7} {'ms/call':>8} {'%':>5}"]
+            for row in table[:20]:
+                name = html.escape(f"{row['strategy'][:18]:<18}")  # 'Break & Retest' в HTML
+                lines.append(
+                    f"{name} {row['calls']:>6} {row['cpu_total']:>7.2f} "
+                    f"{row['cpu_mean_ms']:>8.1f} {row['cpu_share']:>5.1f}"
+                )
+            
+            text = "🔬 <b>CPU стоимость стратегий</b>\n<pre>" + "\n".join(lines) + "</pre>"
+            if strategy_profiler.session_active:
+                text += f"\n⏳ Сессия {strategy_profiler.mode}: осталось циклов {strategy_profiler.cycles_left}"
+            elif strategy_profiler.last_outputs:
+                text += "\n📁 Последний профиль:\n" + "\n".join(html.escape(path) for path in strategy_profiler.last_outputs)
+            
+            await update.message.reply_text(text, parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error in /profile command: {e}", exc_info=True)
+            await update.message.reply_text(f"❌ Ошибка: {e}")
+    
     async def cmd_report(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not update.message:
             return
@@ -389,67 +512,65 @@ class TelegramBot:
             
             start_time = datetime.now(pytz.UTC) - timedelta(hours=hours)
             
-            session = self.db.get_session()
-            try:
-                closed_signals = session.query(Signal).filter(
-                    Signal.closed_at >= start_time,
-                    Signal.status.in_(['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN'])
-                ).order_by(Signal.closed_at.desc()).limit(20).all()
+            closed_signals = await signal_repository.fetch(
+                Signal,
+                Signal.closed_at >= start_time,
+                Signal.status.in_(['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN']),
+                order_by=Signal.closed_at.desc(),
+                limit=20
+            )
+            
+            if not closed_signals:
+                await update.message.reply_text(f"📊 Нет закрытых сигналов за последние {hours}ч")
+                return
+            
+            text = f"📊 <b>Закрытые сигналы ({hours}ч)</b>\n\n"
+            count = 0
+            
+            for sig in closed_signals:
+                direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
                 
-                if not closed_signals:
-                    await update.message.reply_text(f"📊 Нет закрытых сигналов за последние {hours}ч")
-                    return
+                exit_type = getattr(sig, 'exit_type', 'N/A')
+                if sig.status == 'WIN':
+                    status_emoji = "✅"
+                    exit_label = exit_type if exit_type else "WIN"
+                elif sig.status == 'LOSS':
+                    status_emoji = "❌"
+                    exit_label = exit_type if exit_type else "LOSS"
+                elif sig.status == 'BREAKEVEN':
+                    status_emoji = "⚖️"
+                    exit_label = "BE"
+                else:
+                    status_emoji = "⏱️"
+                    exit_label = "TIME_STOP"
                 
-                text = f"📊 <b>Закрытые сигналы ({hours}ч)</b>\n\n"
-                count = 0
+                pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
+                pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
                 
-                for sig in closed_signals:
-                    direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
-                    
-                    exit_type = getattr(sig, 'exit_type', 'N/A')
-                    if sig.status == 'WIN':
-                        status_emoji = "✅"
-                        exit_label = exit_type if exit_type else "WIN"
-                    elif sig.status == 'LOSS':
-                        status_emoji = "❌"
-                        exit_label = exit_type if exit_type else "LOSS"
-                    elif sig.status == 'BREAKEVEN':
-                        status_emoji = "⚖️"
-                        exit_label = "BE"
-                    else:
-                        status_emoji = "⏱️"
-                        exit_label = "TIME_STOP"
-                    
-                    pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
-                    pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
-                    
-                    strategy_short = sig.strategy_name[:15]
-                    
-                    signal_text = (
-                        f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
-                        f"   {status_emoji} {exit_label} | {pnl_str} | {strategy_short}\n\n"
-                    )
-                    
-                    # Проверка лимита Telegram (4096 символов)
-                    footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
-                    if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
-                        # Отправить текущее сообщение с footer
-                        await update.message.reply_text(text + footer, parse_mode='HTML')
-                        text = f"📊 <b>Закрытые сигналы ({hours}ч) - продолжение</b>\n\n"
-                    
-                    text += signal_text
-                    count += 1
+                strategy_short = sig.strategy_name[:15]
                 
-                # Финальное сообщение
-                final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
-                if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
-                    await update.message.reply_text(text, parse_mode='HTML')
-                    await update.message.reply_text(final_footer, parse_mode='HTML')
-                else:
-                    await update.message.reply_text(text + final_footer, parse_mode='HTML')
+                signal_text = (
+                    f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
+                    f"   {status_emoji} {exit_label} | {pnl_str} | {strategy_short}\n\n"
+                )
                 
-            finally:
-                session.close()
+                # Проверка лимита Telegram (4096 символов)
+                footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
+                if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
+                    # Отправить текущее сообщение с footer
+                    await update.message.reply_text(text + footer, parse_mode='HTML')
+                    text = f"📊 <b>Закрытые сигналы ({hours}ч) - продолжение</b>\n\n"
+                
+                text += signal_text
+                count += 1
+            
+            # Финальное сообщение
+            final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
+            if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
+                await update.message.reply_text(text, parse_mode='HTML')
+                await update.message.reply_text(final_footer, parse_mode='HTML')
+            else:
+                await update.message.reply_text(text + final_footer, parse_mode='HTML')
                 
         except Exception as e:
             logger.error(f"Error getting closed signals: {e}", exc_info=True)
@@ -467,75 +588,72 @@ class TelegramBot:
             
             start_time = datetime.now(pytz.UTC) - timedelta(hours=hours)
             
-            session = self.db.get_session()
-            try:
-                closed_signals = session.query(ActionPriceSignal).filter(
-                    ActionPriceSignal.closed_at >= start_time,
-                    ActionPriceSignal.status.in_(['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN'])
-                ).order_by(ActionPriceSignal.closed_at.desc()).all()
-                
-                if not closed_signals:
-                    await update.message.reply_text(f"📊 Нет закрытых Action Price сигналов за последние {hours}ч")
-                    return
+            closed_signals = await signal_repository.fetch(
+                ActionPriceSignal,
+                ActionPriceSignal.closed_at >= start_time,
+                ActionPriceSignal.status.in_(['WIN', 'LOSS', 'TIME_STOP', 'BREAKEVEN']),
+                order_by=ActionPriceSignal.closed_at.desc()
+            )
+            
+            if not closed_signals:
+                await update.message.reply_text(f"📊 Нет закрытых Action Price сигналов за последние {hours}ч")
+                return
+            
+            text = f"📊 <b>Action Price закрытые ({hours}ч)</b>\n\n"
+            count = 0
+            
+            for sig in closed_signals:
+                direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
                 
-                text = f"📊 <b>Action Price закрытые ({hours}ч)</b>\n\n"
-                count = 0
+                exit_reason = sig.exit_reason if sig.exit_reason else 'N/A'
                 
-                for sig in closed_signals:
-                    direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
-                    
-                    exit_reason = sig.exit_reason if sig.exit_reason else 'N/A'
-                    
-                    if sig.status == 'WIN':
-                        status_emoji = "✅"
-                        if 'TAKE_PROFIT_2' in exit_reason:
-                            exit_label = "TP2"
-                        elif 'TAKE_PROFIT_1' in exit_reason:
-                            exit_label = "TP1"
-                        elif 'BREAKEVEN' in exit_reason:
-                            exit_label = "BE"
-                        else:
-                            exit_label = "WIN"
-                    elif sig.status == 'LOSS':
-                        status_emoji = "❌"
-                        exit_label = "SL"
-                    elif sig.status == 'BREAKEVEN':
-                        status_emoji = "⚖️"
+                if sig.status == 'WIN':
+                    status_emoji = "✅"
+                    if 'TAKE_PROFIT_2' in exit_reason:
+                        exit_label = "TP2"
+                    elif 'TAKE_PROFIT_1' in exit_reason:
+                        exit_label = "TP1"
+                    elif 'BREAKEVEN' in exit_reason:
                         exit_label = "BE"
                     else:
-                        status_emoji = "⏱️"
-                        exit_label = "TIME_STOP"
-                    
-                    pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
-                    pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
-                    
-                    pattern = sig.pattern_type[:12]
-                    
-                    signal_text = (
-                        f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
-                        f"   {status_emoji} {exit_label} | {pnl_str} | {pattern}\n\n"
-                    )
-                    
-                    # Проверка лимита Telegram (4096 символов)
-                    footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
-                    if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
-                        # Отправить текущее сообщение с footer
-                        await update.message.reply_text(text + footer, parse_mode='HTML')
-                        text = f"📊 <b>Action Price закрытые ({hours}ч) - продолжение</b>\n\n"
-                    
-                    text += signal_text
-                    count += 1
-                
-                # Финальное сообщение
-                final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
-                if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
-                    await update.message.reply_text(text, parse_mode='HTML')
-                    await update.message.reply_text(final_footer, parse_mode='HTML')
+                        exit_label = "WIN"
+                elif sig.status == 'LOSS':
+                    status_emoji = "❌"
+                    exit_label = "SL"
+                elif sig.status == 'BREAKEVEN':
+                    status_emoji = "⚖️"
+                    exit_label = "BE"
                 else:
-                    await update.message.reply_text(text + final_footer, parse_mode='HTML')
+                    status_emoji = "⏱️"
+                    exit_label = "TIME_STOP"
+                
+                pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
+                pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
+                
+                pattern = sig.pattern_type[:12]
                 
-            finally:
-                session.close()
+                signal_text = (
+                    f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
+                    f"   {status_emoji} {exit_label} | {pnl_str} | {pattern}\n\n"
+                )
+                
+                # Проверка лимита Telegram (4096 символов)
+                footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
+                if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
+                    # Отправить текущее сообщение с footer
+                    await update.message.reply_text(text + footer, parse_mode='HTML')
+                    text = f"📊 <b>Action Price закрытые ({hours}ч) - продолжение</b>\n\n"
+                
+                text += signal_text
+                count += 1
+            
+            # Финальное сообщение
+            final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
+            if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
+                await update.message.reply_text(text, parse_mode='HTML')
+                await update.message.reply_text(final_footer, parse_mode='HTML')
+            else:
+                await update.message.reply_text(text + final_footer, parse_mode='HTML')
                 
         except Exception as e:
             logger.error(f"Error getting closed AP signals: {e}", exc_info=True)
@@ -553,48 +671,45 @@ class TelegramBot:
             
             start_time = datetime.now(pytz.UTC) - timedelta(hours=hours)
             
-            session = self.db.get_session()
-            try:
-                closed_signals = session.query(ActionPriceSignal).filter(
-                    ActionPriceSignal.closed_at >= start_time,
-                    ActionPriceSignal.status == 'LOSS'
-                ).order_by(ActionPriceSignal.closed_at.desc()).all()
-                
-                if not closed_signals:
-                    await update.message.reply_text(f"📊 Нет закрытых по SL Action Price сигналов за последние {hours}ч")
-                    return
-                
-                text = f"🔴 <b>Action Price Stop Loss ({hours}ч)</b>\n\n"
-                count = 0
+            closed_signals = await signal_repository.fetch(
+                ActionPriceSignal,
+                ActionPriceSignal.closed_at >= start_time,
+                ActionPriceSignal.status == 'LOSS',
+                order_by=ActionPriceSignal.closed_at.desc()
+            )
+            
+            if not closed_signals:
+                await update.message.reply_text(f"📊 Нет закрытых по SL Action Price сигналов за последние {hours}ч")
+                return
+            
+            text = f"🔴 <b>Action Price Stop Loss ({hours}ч)</b>\n\n"
+            count = 0
+            
+            for sig in closed_signals:
+                direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
+                pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
+                pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
+                pattern = sig.pattern_type[:12]
                 
-                for sig in closed_signals:
-                    direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
-                    pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
-                    pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
-                    pattern = sig.pattern_type[:12]
-                    
-                    signal_text = (
-                        f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
-                        f"   ❌ SL | {pnl_str} | {pattern}\n\n"
-                    )
-                    
-                    footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
-                    if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
-                        await update.message.reply_text(text + footer, parse_mode='HTML')
-                        text = f"🔴 <b>Action Price Stop Loss ({hours}ч) - продолжение</b>\n\n"
-                    
-                    text += signal_text
-                    count += 1
+                signal_text = (
+                    f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
+                    f"   ❌ SL | {pnl_str} | {pattern}\n\n"
+                )
                 
-                final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
-                if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
-                    await update.message.reply_text(text, parse_mode='HTML')
-                    await update.message.reply_text(final_footer, parse_mode='HTML')
-                else:
-                    await update.message.reply_text(text + final_footer, parse_mode='HTML')
+                footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
+                if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
+                    await update.message.reply_text(text + footer, parse_mode='HTML')
+                    text = f"🔴 <b>Action Price Stop Loss ({hours}ч) - продолжение</b>\n\n"
                 
-            finally:
-                session.close()
+                text += signal_text
+                count += 1
+            
+            final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
+            if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
+                await update.message.reply_text(text, parse_mode='HTML')
+                await update.message.reply_text(final_footer, parse_mode='HTML')
+            else:
+                await update.message.reply_text(text + final_footer, parse_mode='HTML')
                 
         except Exception as e:
             logger.error(f"Error getting closed AP SL signals: {e}", exc_info=True)
@@ -612,65 +727,62 @@ class TelegramBot:
             
             start_time = datetime.now(pytz.UTC) - timedelta(hours=hours)
             
-            session = self.db.get_session()
-            try:
-                closed_signals = session.query(ActionPriceSignal).filter(
-                    ActionPriceSignal.closed_at >= start_time,
-                    ActionPriceSignal.status.in_(['WIN', 'BREAKEVEN'])
-                ).order_by(ActionPriceSignal.closed_at.desc()).all()
-                
-                if not closed_signals:
-                    await update.message.reply_text(f"📊 Нет закрытых по TP/BE Action Price сигналов за последние {hours}ч")
-                    return
+            closed_signals = await signal_repository.fetch(
+                ActionPriceSignal,
+                ActionPriceSignal.closed_at >= start_time,
+                ActionPriceSignal.status.in_(['WIN', 'BREAKEVEN']),
+                order_by=ActionPriceSignal.closed_at.desc()
+            )
+            
+            if not closed_signals:
+                await update.message.reply_text(f"📊 Нет закрытых по TP/BE Action Price сигналов за последние {hours}ч")
+                return
+            
+            text = f"🟢 <b>Action Price TP/BE ({hours}ч)</b>\n\n"
+            count = 0
+            
+            for sig in closed_signals:
+                direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
                 
-                text = f"🟢 <b>Action Price TP/BE ({hours}ч)</b>\n\n"
-                count = 0
+                exit_reason = sig.exit_reason if sig.exit_reason else 'N/A'
                 
-                for sig in closed_signals:
-                    direction_emoji = "🟢" if sig.direction.lower() == "long" else "🔴"
-                    
-                    exit_reason = sig.exit_reason if sig.exit_reason else 'N/A'
-                    
-                    if sig.status == 'WIN':
-                        status_emoji = "✅"
-                        if 'TAKE_PROFIT_2' in exit_reason:
-                            exit_label = "TP2"
-                        elif 'TAKE_PROFIT_1' in exit_reason:
-                            exit_label = "TP1"
-                        elif 'BREAKEVEN' in exit_reason:
-                            exit_label = "BE"
-                        else:
-                            exit_label = "WIN"
-                    else:
-                        status_emoji = "✅"
+                if sig.status == 'WIN':
+                    status_emoji = "✅"
+                    if 'TAKE_PROFIT_2' in exit_reason:
+                        exit_label = "TP2"
+                    elif 'TAKE_PROFIT_1' in exit_reason:
+                        exit_label = "TP1"
+                    elif 'BREAKEVEN' in exit_reason:
                         exit_label = "BE"
-                    
-                    pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
-                    pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
-                    pattern = sig.pattern_type[:12]
-                    
-                    signal_text = (
-                        f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
-                        f"   {status_emoji} {exit_label} | {pnl_str} | {pattern}\n\n"
-                    )
-                    
-                    footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
-                    if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
-                        await update.message.reply_text(text + footer, parse_mode='HTML')
-                        text = f"🟢 <b>Action Price TP/BE ({hours}ч) - продолжение</b>\n\n"
-                    
-                    text += signal_text
-                    count += 1
-                
-                final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
-                if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
-                    await update.message.reply_text(text, parse_mode='HTML')
-                    await update.message.reply_text(final_footer, parse_mode='HTML')
+                    else:
+                        exit_label = "WIN"
                 else:
-                    await update.message.reply_text(text + final_footer, parse_mode='HTML')
+                    status_emoji = "✅"
+                    exit_label = "BE"
                 
-            finally:
-                session.close()
+                pnl = sig.pnl_percent if sig.pnl_percent is not None else 0.0
+                pnl_str = f"{pnl:+.2f}%" if pnl != 0 else "0.00%"
+                pattern = sig.pattern_type[:12]
+                
+                signal_text = (
+                    f"{direction_emoji} <b>{sig.symbol}</b> {sig.direction.lower()}\n"
+                    f"   {status_emoji} {exit_label} | {pnl_str} | {pattern}\n\n"
+                )
+                
+                footer = f"\n📈 Показано: {count} из {len(closed_signals)}"
+                if len(text + signal_text + footer) > self.TELEGRAM_MAX_LENGTH:
+                    await update.message.reply_text(text + footer, parse_mode='HTML')
+                    text = f"🟢 <b>Action Price TP/BE ({hours}ч) - продолжение</b>\n\n"
+                
+                text += signal_text
+                count += 1
+            
+            final_footer = f"\n📈 Всего показано: {len(closed_signals)}"
+            if len(text + final_footer) > self.TELEGRAM_MAX_LENGTH:
+                await update.message.reply_text(text, parse_mode='HTML')
+                await update.message.reply_text(final_footer, parse_mode='HTML')
+            else:
+                await update.message.reply_text(text + final_footer, parse_mode='HTML')
                 
         except Exception as e:
             logger.error(f"Error getting closed AP TP signals: {e}", exc_info=True)
@@ -691,7 +803,7 @@ class TelegramBot:
             # Можно передать символ как аргумент: /validate BTCUSDT
             symbol = context.args[0] if context.args else 'BTCUSDT'
             
-            results = self.strategy_validator.validate_all_strategies(symbol)
+            results = await self.strategy_validator.validate_all_strategies(symbol)
             
             # Форматирование результатов
             passed = results['strategies_passed']
@@ -734,6 +846,10 @@ class TelegramBot:
         """Установить трекер производительности для доступа из команд"""
         self.performance_tracker = tracker
     
+    def set_regime_service(self, service):
+        """Установить RegimeService для снимка режимов в /regimes"""
+        self.regime_service = service
+    
     def set_ap_performance_tracker(self, tracker):
         """Установить Action Price трекер для доступа из команд"""
         self.ap_performance_tracker = tracker
@@ -909,17 +1025,16 @@ class TelegramBot:
             import pytz
             from datetime import datetime
             
-            session = self.performance_tracker.db.get_session()
             start_date = datetime.now(pytz.UTC) - timedelta(days=7)
             
-            signals = session.query(Signal).filter(
+            signals = await signal_repository.fetch(
+                Signal,
                 Signal.created_at >= start_date,
                 Signal.status.in_(['WIN', 'LOSS', 'TIME_STOP'])
-            ).all()
+            )
             
             if not signals:
                 await update.message.reply_text("📊 Пока нет данных по режимам рынка")
-                session.close()
                 return
             
             regime_data = {}
@@ -934,8 +1049,6 @@ class TelegramBot:
                 if sig.pnl_percent:
                     regime_data[regime]['pnl'].append(sig.pnl_percent)
             
-            session.close()
-            
             text = "📊 <b>Market Regime Performance (7d)</b>\n\n"
             
             regime_emojis = {
@@ -965,6 +1078,49 @@ class TelegramBot:
             logger.error(f"Error getting regime stats: {e}", exc_info=True)
             await update.message.reply_text(f"❌ Ошибка: {e}")
     
+    async def cmd_regimes(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Текущие режимы рынка (H4) по всем символам - снимок RegimeService"""
+        if not update.message:
+            return
+        
+        if not self.regime_service:
+            await update.message.reply_text("⚠️ Сервис режимов рынка не запущен")
+            return
+        
+        try:
+            snapshot = self.regime_service.snapshot()
+            if not snapshot['total']:
+                await update.message.reply_text("🧭 Режимы еще не рассчитаны (ждём первый цикл)")
+                return
+            
+            regime_emojis = {
+                'TREND': '📈',
+                'RANGE': '↔️',
+                'CHOP': '🌊',
+                'SQUEEZE': '🗜',
+                'UNDECIDED': '❓'
+            }
+            
+            text = f"🧭 <b>Режимы рынка H4</b> ({snapshot['total']} символов)\n\n"
+            for regime, count in snapshot['counts'].items():
+                if count:
+                    text += (f"{regime_emojis.get(regime, '📊')} <b>{regime}</b>: {count} "
+                             f"({snapshot['shares'][regime] * 100:.0f}%)\n")
+            
+            bias = snapshot['bias']
+            text += (
+                f"\n🟢 Bullish: {bias['bullish']} | 🔴 Bearish: {bias['bearish']} | "
+                f"⚪ Neutral: {bias['neutral']}\n"
+            )
+            if snapshot['updated_at']:
+                text += f"\n🕐 Обновлено: {snapshot['updated_at'].strftime('%H:%M UTC')}"
+            
+            await update.message.reply_text(text, parse_mode='HTML')
+            
+        except Exception as e:
+            logger.error(f"Error in /regimes command: {e}", exc_info=True)
+            await update.message.reply_text(f"❌ Ошибка: {e}")
+    
     async def cmd_confluence_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Статистика по confluence сигналов"""
         if not update.message:
@@ -980,17 +1136,16 @@ class TelegramBot:
             import pytz
             from datetime import datetime
             
-            session = self.performance_tracker.db.get_session()
             start_date = datetime.now(pytz.UTC) - timedelta(days=7)
             
-            signals = session.query(Signal).filter(
+            signals = await signal_repository.fetch(
+                Signal,
                 Signal.created_at >= start_date,
                 Signal.status.in_(['WIN', 'LOSS', 'TIME_STOP'])
-            ).all()
+            )
             
             if not signals:
                 await update.message.reply_text("📊 Пока нет данных по confluence")
-                session.close()
                 return
             
             conf_data = {}
@@ -1005,8 +1160,6 @@ class TelegramBot:
                 if sig.pnl_percent:
                     conf_data[count]['pnl'].append(sig.pnl_percent)
             
-            session.close()
-            
             text = "✨ <b>Signal Confluence Performance (7d)</b>\n\n"
             
             for count in sorted(conf_data.keys()):
@@ -1064,31 +1217,27 @@ class TelegramBot:
             return
         
         try:
-            session = self.db.get_session()
-            
             # Active signals
-            active = session.query(V3SRSignal).filter(
-                V3SRSignal.status.in_(['PENDING', 'ACTIVE'])
-            ).count()
+            active = await signal_repository.count(
+                V3SRSignal, active_filter(V3SRSignal)
+            )
             
             # Today's signals
             today_start = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
-            today_signals = session.query(V3SRSignal).filter(
-                V3SRSignal.created_at >= today_start
-            ).count()
+            today_signals = await signal_repository.count(
+                V3SRSignal, V3SRSignal.created_at >= today_start
+            )
             
             # Total signals
-            total = session.query(V3SRSignal).count()
+            total = await signal_repository.count(V3SRSignal)
             
             # Setups breakdown
-            flip_count = session.query(V3SRSignal).filter(
-                V3SRSignal.setup_type == 'FlipRetest'
-            ).count()
-            sweep_count = session.query(V3SRSignal).filter(
-                V3SRSignal.setup_type == 'SweepReturn'
-            ).count()
-            
-            session.close()
+            flip_count = await signal_repository.count(
+                V3SRSignal, V3SRSignal.setup_type == 'FlipRetest'
+            )
+            sweep_count = await signal_repository.count(
+                V3SRSignal, V3SRSignal.setup_type == 'SweepReturn'
+            )
             
             text = (
                 f"🔷 <b>V3 S/R Strategy Status</b>\n\n"
@@ -1114,15 +1263,15 @@ class TelegramBot:
             return
         
         try:
-            session = self.db.get_session()
-            
-            active_signals = session.query(V3SRSignal).filter(
-                V3SRSignal.status.in_(['PENDING', 'ACTIVE'])
-            ).order_by(V3SRSignal.created_at.desc()).limit(10).all()
+            active_signals = await signal_repository.fetch(
+                V3SRSignal,
+                active_filter(V3SRSignal),
+                order_by=V3SRSignal.created_at.desc(),
+                limit=10
+            )
             
             if not active_signals:
                 await update.message.reply_text("📭 Нет активных V3 S/R сигналов")
-                session.close()
                 return
             
             text = f"🔷 <b>V3 S/R Active Signals ({len(active_signals)})</b>\n\n"
@@ -1160,8 +1309,6 @@ class TelegramBot:
                     f"└─ Age: {age_minutes}m\n\n"
                 )
             
-            session.close()
-            
             # Split if too long
             if len(text) > self.TELEGRAM_MAX_LENGTH:
                 text = text[:self.TELEGRAM_MAX_LENGTH-100] + "\n\n... (список обрезан)"
@@ -1181,12 +1328,10 @@ class TelegramBot:
             days = 7
             start_time = datetime.now(pytz.UTC) - timedelta(days=days)
             
-            session = self.db.get_session()
-            
             # Total signals
-            all_signals = session.query(V3SRSignal).filter(
-                V3SRSignal.created_at >= start_time
-            ).all()
+            all_signals = await signal_repository.fetch(
+                V3SRSignal, V3SRSignal.created_at >= start_time
+            )
             
             total = len(all_signals)
             closed = len([s for s in all_signals if s.status == 'CLOSED'])
@@ -1194,7 +1339,6 @@ class TelegramBot:
             
             if closed == 0:
                 await update.message.reply_text(f"📊 V3 S/R: Нет закрытых сигналов за {days} дней")
-                session.close()
                 return
             
             # Calculate metrics
@@ -1245,8 +1389,6 @@ class TelegramBot:
             sweep_wins = len([s for s in sweep_signals if s.pnl_percent and s.pnl_percent > 0])
             sweep_wr = (sweep_wins / len(sweep_signals) * 100) if sweep_signals else 0
             
-            session.close()
-            
             text = (
                 f"📊 <b>V3 S/R Performance ({days} дней)</b>\n\n"
                 f"📈 Всего сигналов: {total}\n"
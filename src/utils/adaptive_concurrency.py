@@ -0,0 +1,109 @@
+"""
+Adaptive Concurrency - AIMD регулятор параллелизма для массовой загрузки данных
+
+Вместо фиксированного max_parallel (1 "для защиты от IP ban") количество
+одновременных загрузок подстраивается под живой запас rate limiter'а:
+- Additive increase: +1 слот после каждой успешной операции, пока
+  использованный вес (current + pending) ниже target_usage от safe_limit
+- Hold: выше target - параллелизм не растет (RateLimiter сам ставит паузу у safe_limit)
+- Multiplicative decrease: 429 / 418 (RateLimiter.throttle_events) → лимит / 2
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from src.utils.config import config
+from src.utils.logger import logger
+
+
+class AdaptiveConcurrency:
+    """AIMD ограничитель параллелизма, привязанный к RateLimiter"""
+
+    def __init__(self, rate_limiter, initial: int = 2, minimum: int = 1, maximum: int = 16,
+                 target_usage: float = 0.7, name: str = 'loader'):
+        """
+        Args:
+            rate_limiter: RateLimiter клиента Binance
+            initial: Стартовый параллелизм
+            minimum / maximum: Границы параллелизма
+            target_usage: Доля safe_limit, ниже которой параллелизм увеличивается
+            name: Имя для логов
+        """
+        self.rate_limiter = rate_limiter
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.target_usage = target_usage
+        self.name = name
+
+        self._active = 0
+        self._condition = asyncio.Condition()
+        self._seen_throttles = rate_limiter.throttle_events
+        self.peak = self.limit
+        self.decreases = 0
+
+    @classmethod
+    def from_config(cls, rate_limiter, name: str = 'loader',
+                    initial: Optional[int] = None) -> 'AdaptiveConcurrency':
+        """Параметры из секции adaptive_loading (initial - стартовое значение вместо config)"""
+        return cls(
+            rate_limiter,
+            initial=initial if initial is not None else config.get('adaptive_loading.initial', 2),
+            minimum=config.get('adaptive_loading.min', 1),
+            maximum=config.get('adaptive_loading.max', 16),
+            target_usage=config.get('adaptive_loading.target_usage', 0.7),
+            name=name
+        )
+
+    def usage(self) -> float:
+        """Использованный вес (Binance + в полете) как доля safe_limit"""
+        limiter = self.rate_limiter
+        if limiter.safe_limit <= 0:
+            return 1.0
+        return (limiter.current_weight + limiter.pending_weight) / limiter.safe_limit
+
+    @asynccontextmanager
+    async def slot(self):
+        """Занять слот (ждет, пока активных операций меньше текущего лимита)"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            async with self._condition:
+                self._active -= 1
+                self._adjust(success)
+                self._condition.notify_all()
+
+    def _adjust(self, success: bool):
+        throttles = self.rate_limiter.throttle_events
+        if throttles != self._seen_throttles:
+            # Multiplicative decrease: Binance уже ответил 429/418
+            self._seen_throttles = throttles
+            previous = self.limit
+            self.limit = max(self.minimum, self.limit // 2)
+            self.decreases += 1
+            logger.warning(
+                f"🐢 {self.name}: rate limit hit, concurrency {previous} → {self.limit}"
+            )
+            return
+
+        if success and self.limit < self.maximum and self.usage() < self.target_usage:
+            # Additive increase: запас по весу есть
+            self.limit += 1
+            self.peak = max(self.peak, self.limit)
+            logger.debug(f"🚀 {self.name}: concurrency → {self.limit} (usage {self.usage() * 100:.0f}% of safe)")
+
+    def get_stats(self) -> Dict:
+        return {
+            'limit': self.limit,
+            'active': self._active,
+            'peak': self.peak,
+            'decreases': self.decreases,
+            'usage': self.usage(),
+        }
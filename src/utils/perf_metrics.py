@@ -0,0 +1,215 @@
+"""
+Метрики производительности цикла анализа
+
+Структурированные тайминги (spans) по семействам:
+- cycle            стадии _check_signals (label: stage)
+- symbol           полный анализ одного символа (label: symbol)
+- symbol_stage     стадии _check_symbol_signals (label: stage)
+- strategy         check_signal каждой стратегии (label: strategy)
+- indicator        расчет группы общих индикаторов LazyIndicators (label: '{timeframe}.{group}')
+- rate_limiter     ожидание в RateLimiter.acquire (label: op)
+- db_read/db_write операции с БД (label: op)
+
+Каждая серия хранит скользящее окно последних N замеров → p50/p95/p99
+считаются по требованию (Telegram /perf, Prometheus text endpoint).
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.config import config
+from src.utils.logger import logger
+
+
+# Имя label для Prometheus по семейству метрик
+FAMILY_LABELS = {
+    'cycle': 'stage',
+    'symbol': 'symbol',
+    'symbol_stage': 'stage',
+    'strategy': 'strategy',
+    'indicator': 'indicator',
+    'rate_limiter': 'op',
+    'db_read': 'op',
+    'db_write': 'op',
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Series:
+    """Скользящее окно замеров + накопительные счетчики"""
+
+    __slots__ = ('window', 'count', 'total', 'max')
+
+    def __init__(self, window_size: int):
+        self.window = deque(maxlen=window_size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.window.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class PerfMetrics:
+    """
+    In-memory агрегатор таймингов с rolling percentiles
+
+    Потокобезопасен (запись из event loop и из потоков БД).
+    """
+
+    def __init__(self, window_size: Optional[int] = None):
+        self.enabled = config.get('perf_metrics.enabled', True)
+        self.window_size = window_size or config.get('perf_metrics.window_size', 1024)
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._http_runner = None
+        self._pending: Optional[List[Tuple[str, str, float]]] = None
+
+    def record(self, family: str, label: str, seconds: float):
+        """Записать один замер"""
+        if not self.enabled:
+            return
+        key = (family, label)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((family, label, seconds))
+            series = self._series.get(key)
+            if series is None:
+                series = _Series(self.window_size)
+                self._series[key] = series
+            series.add(seconds)
+
+    @contextmanager
+    def span(self, family: str, label: str):
+        """Замерить блок кода: with perf_metrics.span('cycle', 'strategies'): ..."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(family, label, time.perf_counter() - started)
+
+    def enable_forwarding(self):
+        """Копить замеры для передачи в основной процесс (worker процессы пула анализа)"""
+        with self._lock:
+            self._pending = []
+
+    def drain_pending(self) -> List[Tuple[str, str, float]]:
+        """Забрать накопленные замеры (family, label, seconds)"""
+        with self._lock:
+            if not self._pending:
+                return []
+            pending, self._pending = self._pending, []
+            return pending
+
+    def merge(self, samples: List[Tuple[str, str, float]]):
+        """Добавить замеры, полученные из worker процесса"""
+        for family, label, seconds in samples:
+            self.record(family, label, seconds)
+
+    def get_stats(self, family: str, label: str) -> Optional[Dict]:
+        """Статистика одной серии: count, total, max + p50/p95/p99 по окну"""
+        with self._lock:
+            series = self._series.get((family, label))
+            if series is None or not series.window:
+                return None
+            window = np.fromiter(series.window, dtype=float)
+            count, total, max_value = series.count, series.total, series.max
+
+        p50, p95, p99 = np.quantile(window, QUANTILES)
+        return {
+            'count': count,
+            'total': total,
+            'max': max_value,
+            'mean': float(window.mean()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+        }
+
+    def summary(self, family: str) -> Dict[str, Dict]:
+        """Статистика всех серий семейства {label: stats}"""
+        with self._lock:
+            labels = [label for fam, label in self._series.keys() if fam == family]
+        result = {}
+        for label in labels:
+            stats = self.get_stats(family, label)
+            if stats:
+                result[label] = stats
+        return result
+
+    def top(self, family: str, n: int = 10, by: str = 'p95') -> List[Tuple[str, Dict]]:
+        """Топ-N серий семейства по метрике (p95, total, max...)"""
+        items = list(self.summary(family).items())
+        items.sort(key=lambda x: x[1].get(by, 0.0), reverse=True)
+        return items[:n]
+
+    def families(self) -> List[str]:
+        with self._lock:
+            return sorted(set(fam for fam, _ in self._series.keys()))
+
+    def reset(self):
+        """Очистить все серии"""
+        with self._lock:
+            self._series.clear()
+            self._started_at = time.time()
+
+    @property
+    def uptime_seconds(self) -> float:
+        return time.time() - self._started_at
+
+    def to_prometheus(self) -> str:
+        """Экспорт в Prometheus text format (summary с квантилями по окну)"""
+        lines = []
+        for family in self.families():
+            metric = f"trading_bot_{family}_seconds"
+            label_name = FAMILY_LABELS.get(family, 'name')
+            lines.append(f"# HELP {metric} Duration of {family} spans (rolling window quantiles)")
+            lines.append(f"# TYPE {metric} summary")
+            for label, stats in sorted(self.summary(family).items()):
+                safe_label = label.replace('\\', '\\\\').replace('"', '\\"')
+                for q, key in zip(QUANTILES, ('p50', 'p95', 'p99')):
+                    lines.append(f'{metric}{{{label_name}="{safe_label}",quantile="{q}"}} {stats[key]:.6f}')
+                lines.append(f'{metric}_sum{{{label_name}="{safe_label}"}} {stats["total"]:.6f}')
+                lines.append(f'{metric}_count{{{label_name}="{safe_label}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    async def start_http_server(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Запустить /metrics endpoint (Prometheus text) на aiohttp"""
+        from aiohttp import web
+
+        host = host or config.get('perf_metrics.prometheus.host', '127.0.0.1')
+        port = port or config.get('perf_metrics.prometheus.port', 9108)
+
+        async def handle_metrics(request):
+            return web.Response(text=self.to_prometheus(), content_type='text/plain', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        self._http_runner = runner
+        logger.info(f"📈 Prometheus metrics endpoint: http://{host}:{port}/metrics")
+
+    async def stop_http_server(self):
+        if self._http_runner:
+            await self._http_runner.cleanup()
+            self._http_runner = None
+
+
+perf_metrics = PerfMetrics()
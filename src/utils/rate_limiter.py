@@ -4,6 +4,7 @@ from collections import deque
 from typing import Dict, Optional, Any
 from src.utils.logger import logger
 from src.utils.config import config
+from src.utils.perf_metrics import perf_metrics
 
 
 class RateLimiter:
@@ -26,8 +27,19 @@ class RateLimiter:
         
         # Warning debounce (показывать warning максимум раз в 60 секунд)
         self.last_threshold_warning_time: float = 0
+        
+        # Счетчик ответов 429/418 (AdaptiveConcurrency снижает параллелизм при его росте)
+        self.throttle_events = 0
     
     async def acquire(self, weight: int = 1) -> bool:
+        started = time.perf_counter()
+        try:
+            return await self._acquire(weight)
+        finally:
+            # Время ожидания в очереди (lock + пауза при достижении лимита)
+            perf_metrics.record('rate_limiter', 'acquire_wait', time.perf_counter() - started)
+    
+    async def _acquire(self, weight: int) -> bool:
         while True:
             async with self.lock:
                 now = time.time()
@@ -106,6 +118,8 @@ class RateLimiter:
                     # update_from_binance_headers() уже установил ip_ban_until
                     # Следующий acquire() автоматически подождёт окончания бана
                     if '418' in error_str:
+                        self.throttle_events += 1
+                        
                         # Освободить acquired чтобы следующая итерация вызвала acquire()
                         if acquired:
                             async with self.lock:
@@ -120,6 +134,7 @@ class RateLimiter:
                     
                     # 429 (обычный rate limit) - делаем backoff retry
                     if '429' in error_str:
+                        self.throttle_events += 1
                         wait_time = (self.backoff_base ** attempt) + (time.time() % 1)
                         logger.warning(
                             f"Rate limit 429 (attempt {attempt + 1}/{self.max_retries}), "
@@ -0,0 +1,94 @@
+"""
+Передача свечных DataFrame между процессами через shared memory
+
+Все таймфреймы символа упаковываются в один блок SharedMemory:
+[float64 OHLCV матрица tf1][int64 open_time tf1][float64 матрица tf2]...
+Worker получает только маленький descriptor (имя блока + смещения) вместо
+pickle тысяч строк DataFrame.
+"""
+
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+FRAME_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'taker_buy_base', 'taker_buy_quote')
+
+
+def pack_frames(frames: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """
+    Упаковать {timeframe: DataFrame} в один блок shared memory
+
+    Returns:
+        (SharedMemory, descriptor) - вызывающий обязан close() + unlink() блок
+    """
+    layout = {}
+    offset = 0
+    for tf, df in frames.items():
+        columns = [c for c in FRAME_COLUMNS if c in df.columns]
+        rows = len(df)
+        layout[tf] = {
+            'rows': rows,
+            'columns': columns,
+            'values_offset': offset,
+            'time_offset': offset + rows * len(columns) * 8,
+        }
+        offset += rows * (len(columns) + 1) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for tf, df in frames.items():
+            spec = layout[tf]
+            rows, columns = spec['rows'], spec['columns']
+            values = np.ndarray((rows, len(columns)), dtype=np.float64,
+                                buffer=shm.buf, offset=spec['values_offset'])
+            values[:] = df[columns].to_numpy(dtype=np.float64)
+
+            times = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=spec['time_offset'])
+            if 'open_time' in df.columns:
+                times[:] = pd.to_datetime(df['open_time'], utc=True).astype('int64').to_numpy()
+            else:
+                times[:] = 0
+            spec['has_time'] = 'open_time' in df.columns
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+
+    return shm, {'name': shm.name, 'frames': layout}
+
+
+def _copy_arrays(shm: shared_memory.SharedMemory, spec: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Скопировать массивы из блока (view не должны пережить shm.close())"""
+    rows, columns = spec['rows'], spec['columns']
+    values = np.ndarray((rows, len(columns)), dtype=np.float64,
+                        buffer=shm.buf, offset=spec['values_offset']).copy()
+    times = np.ndarray((rows,), dtype=np.int64,
+                       buffer=shm.buf, offset=spec['time_offset']).copy()
+    return values, times
+
+
+def unpack_frames(descriptor: Dict) -> Dict[str, pd.DataFrame]:
+    """
+    Восстановить {timeframe: DataFrame} из shared memory (данные копируются,
+    блок закрывается сразу - владелец блока делает unlink)
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=descriptor['name'], track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+
+    frames = {}
+    try:
+        for tf, spec in descriptor['frames'].items():
+            values, times = _copy_arrays(shm, spec)
+            df = pd.DataFrame(values, columns=spec['columns'])
+            if spec.get('has_time'):
+                df.insert(0, 'open_time', pd.to_datetime(times, utc=True))
+            frames[tf] = df
+    finally:
+        shm.close()
+
+    return frames
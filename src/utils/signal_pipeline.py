@@ -0,0 +1,121 @@
+"""
+Конвейер обработки символов для цикла сигналов
+
+Вместо фаз "все свечи → все orderbook → все OI → все стратегии" каждый символ
+проходит стадии независимо (fetch → analyze → dispatch), как только готовы
+его собственные данные. Между стадиями - ограниченные asyncio.Queue, поэтому
+быстрая I/O стадия не накапливает в памяти сотни символов впереди CPU стадии.
+
+Время цикла стремится к max(I/O, CPU) вместо их суммы, а первые сигналы
+уходят, пока остальные символы еще загружаются.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from src.utils.logger import logger
+
+
+_STOP = object()  # Маркер завершения для worker'ов стадии
+
+
+@dataclass
+class PipelineStage:
+    """Стадия конвейера: handler(item) -> результат для следующей стадии (None = дальше не передавать)"""
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+
+
+class SignalPipeline:
+    """
+    Многостадийный конвейер с ограниченными очередями между стадиями
+
+    Одноразовый: создается на каждый цикл (события стадий не сбрасываются).
+    """
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 50):
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._stage_done: Dict[str, asyncio.Event] = {stage.name: asyncio.Event() for stage in stages}
+        self.stats: Dict = {}
+
+    async def wait_stage(self, name: str):
+        """Дождаться, пока стадия обработает все элементы (например fetch → запуск Action Price)"""
+        await self._stage_done[name].wait()
+
+    async def run(self, items: Iterable[Any]) -> Dict:
+        """
+        Прогнать элементы через все стадии
+
+        Returns:
+            Статистика: processed/dropped/errors по стадиям, first_output_s, elapsed_s
+        """
+        started = time.perf_counter()
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.stats = {
+            'stages': {stage.name: {'processed': 0, 'dropped': 0, 'errors': 0} for stage in self.stages},
+            'first_output_s': None,
+            'elapsed_s': 0.0,
+        }
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(max(1, self.stages[0].workers)):
+                await queues[0].put(_STOP)
+
+        async def worker(index: int):
+            stage = self.stages[index]
+            stage_stats = self.stats['stages'][stage.name]
+            is_last = index == len(self.stages) - 1
+            while True:
+                item = await queues[index].get()
+                if item is _STOP:
+                    return
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    stage_stats['errors'] += 1
+                    logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+                    continue
+
+                stage_stats['processed'] += 1
+                if is_last:
+                    if self.stats['first_output_s'] is None:
+                        self.stats['first_output_s'] = time.perf_counter() - started
+                elif result is None:
+                    stage_stats['dropped'] += 1
+                else:
+                    await queues[index + 1].put(result)
+
+        async def run_stage(index: int):
+            stage = self.stages[index]
+            try:
+                await asyncio.gather(*(worker(index) for _ in range(max(1, stage.workers))))
+            finally:
+                self._stage_done[stage.name].set()
+                # Сигнал следующей стадии: больше элементов не будет
+                if index + 1 < len(self.stages):
+                    for _ in range(max(1, self.stages[index + 1].workers)):
+                        await queues[index + 1].put(_STOP)
+
+        await asyncio.gather(feed(), *(run_stage(i) for i in range(len(self.stages))))
+
+        self.stats['elapsed_s'] = time.perf_counter() - started
+        return self.stats
+
+    def format_stats(self) -> str:
+        parts = []
+        for name, stage_stats in self.stats.get('stages', {}).items():
+            part = f"{name}={stage_stats['processed']}"
+            if stage_stats['errors']:
+                part += f" (errors {stage_stats['errors']})"
+            parts.append(part)
+        first = self.stats.get('first_output_s')
+        first_str = f"{first:.2f}s" if first is not None else "-"
+        return f"{' | '.join(parts)} | first output {first_str} | total {self.stats.get('elapsed_s', 0.0):.2f}s"
@@ -5,6 +5,8 @@ import pytz
 from sqlalchemy import and_
 from src.database.models import Signal
 from src.database.db import Database
+from src.database.signal_repository import signal_repository
+from src.database.signal_queries import active_filter, summary_totals
 from src.binance.client import BinanceClient
 from src.utils.signal_lock import SignalLockManager
 from src.utils.logger import logger
@@ -51,9 +53,7 @@ class SignalPerformanceTracker:
         """Проверить все активные сигналы по историческим свечам (закрыть старые)"""
         session = self.db.get_session()
         try:
-            active_signals = session.query(Signal).filter(
-                Signal.status.in_(['ACTIVE', 'PENDING'])
-            ).all()
+            active_signals = session.query(Signal).filter(active_filter(Signal)).all()
             
             if not active_signals:
                 return
@@ -303,9 +303,7 @@ class SignalPerformanceTracker:
         """Проверить все активные сигналы"""
         session = self.db.get_session()
         try:
-            active_signals = session.query(Signal).filter(
-                Signal.status.in_(['ACTIVE', 'PENDING'])
-            ).all()
+            active_signals = session.query(Signal).filter(active_filter(Signal)).all()
             
             if not active_signals:
                 return
@@ -553,120 +551,100 @@ class SignalPerformanceTracker:
     
     async def get_strategy_performance(self, strategy_id: Optional[int] = None, 
                                       days: int = 7) -> Dict:
-        """Получить статистику производительности стратегии"""
-        session = self.db.get_session()
-        try:
-            start_date = datetime.now(pytz.UTC) - timedelta(days=days)
-            
-            query = session.query(Signal).filter(
-                Signal.created_at >= start_date
-            )
-            
-            if strategy_id:
-                query = query.filter(Signal.strategy_id == strategy_id)
-            
-            signals = query.all()
-            
-            if not signals:
-                return {
-                    'total_signals': 0,
-                    'closed_signals': 0,
-                    'active_signals': 0,
-                    'wins': 0,
-                    'losses': 0,
-                    'tp1_count': 0,
-                    'tp2_count': 0,
-                    'breakeven_count': 0,
-                    'time_stop_count': 0,
-                    'win_rate': 0.0,
-                    'avg_pnl': 0.0,
-                    'total_pnl': 0.0,
-                    'avg_win': 0.0,
-                    'avg_loss': 0.0,
-                    'time_stop_total_pnl': 0.0,
-                    'time_stop_avg_pnl': 0.0
-                }
-            
-            total = len(signals)
-            closed = [s for s in signals if str(s.status) in ['WIN', 'LOSS', 'TIME_STOP']]  # type: ignore
-            wins = [s for s in closed if str(s.status) == 'WIN']  # type: ignore
-            losses = [s for s in closed if str(s.status) == 'LOSS']  # type: ignore
-            time_stops = [s for s in closed if str(s.status) == 'TIME_STOP']  # type: ignore
-            
-            # Подсчет TP1, TP2 и BREAKEVEN
-            tp1_count = len([s for s in closed if hasattr(s, 'exit_type') and s.exit_type == 'TP1'])  # type: ignore
-            tp2_count = len([s for s in closed if hasattr(s, 'exit_type') and s.exit_type == 'TP2'])  # type: ignore
-            breakeven_count = len([s for s in closed if hasattr(s, 'exit_type') and s.exit_type == 'BREAKEVEN'])  # type: ignore
-            
-            win_rate = (len(wins) / len(closed) * 100) if closed else 0.0
-            
-            closed_with_pnl = [s for s in closed if s.pnl_percent is not None]  # type: ignore
-            avg_pnl = sum(float(s.pnl_percent) for s in closed_with_pnl) / len(closed_with_pnl) if closed_with_pnl else 0.0  # type: ignore
-            total_pnl = sum(float(s.pnl_percent) for s in closed_with_pnl)  # type: ignore
-            
-            wins_with_pnl = [s for s in wins if s.pnl_percent is not None]  # type: ignore
-            losses_with_pnl = [s for s in losses if s.pnl_percent is not None]  # type: ignore
-            time_stops_with_pnl = [s for s in time_stops if s.pnl_percent is not None]  # type: ignore
-            
-            # Статистика TIME_STOP отдельно
-            time_stop_count = len(time_stops)
-            time_stop_total_pnl = sum(float(s.pnl_percent) for s in time_stops_with_pnl) if time_stops_with_pnl else 0.0  # type: ignore
-            time_stop_avg_pnl = time_stop_total_pnl / len(time_stops_with_pnl) if time_stops_with_pnl else 0.0
-            
+        """Получить статистику производительности стратегии (read-only соединение)"""
+        start_date = datetime.now(pytz.UTC) - timedelta(days=days)
+        
+        criteria = [Signal.created_at >= start_date]
+        if strategy_id:
+            criteria.append(Signal.strategy_id == strategy_id)
+        
+        # Агрегаты (status, exit_type) по covering индексу - строки сигналов не читаются
+        rows = await signal_repository.summary(Signal, Signal.exit_type, start_date, *criteria)
+        
+        if not rows:
             return {
-                'total_signals': total,
-                'closed_signals': len(closed),
-                'active_signals': total - len(closed),
-                'wins': len(wins),
-                'losses': len(losses),
-                'tp1_count': tp1_count,
-                'tp2_count': tp2_count,
-                'breakeven_count': breakeven_count,
-                'time_stop_count': time_stop_count,
-                'win_rate': round(win_rate, 2),
-                'avg_pnl': round(avg_pnl, 2),
-                'total_pnl': round(total_pnl, 2),
-                'avg_win': round(sum(float(s.pnl_percent) for s in wins_with_pnl) / len(wins_with_pnl), 2) if wins_with_pnl else 0.0,  # type: ignore
-                'avg_loss': round(sum(float(s.pnl_percent) for s in losses_with_pnl) / len(losses_with_pnl), 2) if losses_with_pnl else 0.0,  # type: ignore
-                'time_stop_total_pnl': round(time_stop_total_pnl, 2),
-                'time_stop_avg_pnl': round(time_stop_avg_pnl, 2)
+                'total_signals': 0,
+                'closed_signals': 0,
+                'active_signals': 0,
+                'wins': 0,
+                'losses': 0,
+                'tp1_count': 0,
+                'tp2_count': 0,
+                'breakeven_count': 0,
+                'time_stop_count': 0,
+                'win_rate': 0.0,
+                'avg_pnl': 0.0,
+                'total_pnl': 0.0,
+                'avg_win': 0.0,
+                'avg_loss': 0.0,
+                'time_stop_total_pnl': 0.0,
+                'time_stop_avg_pnl': 0.0
             }
-            
-        finally:
-            session.close()
+        
+        closed_statuses = ['WIN', 'LOSS', 'TIME_STOP']
+        total = sum(row[2] for row in rows)
+        closed_count, closed_pnl_count, total_pnl = summary_totals(rows, closed_statuses)
+        wins_count, wins_pnl_count, wins_pnl = summary_totals(rows, ['WIN'])
+        losses_count, losses_pnl_count, losses_pnl = summary_totals(rows, ['LOSS'])
+        time_stop_count, time_stops_pnl_count, time_stop_total_pnl = summary_totals(rows, ['TIME_STOP'])
+        
+        # Подсчет TP1, TP2 и BREAKEVEN
+        tp1_count = summary_totals(rows, closed_statuses, lambda exit_type: exit_type == 'TP1')[0]
+        tp2_count = summary_totals(rows, closed_statuses, lambda exit_type: exit_type == 'TP2')[0]
+        breakeven_count = summary_totals(rows, closed_statuses, lambda exit_type: exit_type == 'BREAKEVEN')[0]
+        
+        win_rate = (wins_count / closed_count * 100) if closed_count else 0.0
+        avg_pnl = total_pnl / closed_pnl_count if closed_pnl_count else 0.0
+        
+        # Статистика TIME_STOP отдельно
+        time_stop_avg_pnl = time_stop_total_pnl / time_stops_pnl_count if time_stops_pnl_count else 0.0
+        
+        return {
+            'total_signals': total,
+            'closed_signals': closed_count,
+            'active_signals': total - closed_count,
+            'wins': wins_count,
+            'losses': losses_count,
+            'tp1_count': tp1_count,
+            'tp2_count': tp2_count,
+            'breakeven_count': breakeven_count,
+            'time_stop_count': time_stop_count,
+            'win_rate': round(win_rate, 2),
+            'avg_pnl': round(avg_pnl, 2),
+            'total_pnl': round(total_pnl, 2),
+            'avg_win': round(wins_pnl / wins_pnl_count, 2) if wins_pnl_count else 0.0,
+            'avg_loss': round(losses_pnl / losses_pnl_count, 2) if losses_pnl_count else 0.0,
+            'time_stop_total_pnl': round(time_stop_total_pnl, 2),
+            'time_stop_avg_pnl': round(time_stop_avg_pnl, 2)
+        }
+        
     
     async def get_all_strategies_performance(self, days: int = 7) -> List[Dict]:
-        """Получить статистику по всем стратегиям"""
-        session = self.db.get_session()
-        try:
-            start_date = datetime.now(pytz.UTC) - timedelta(days=days)
-            
-            signals = session.query(Signal).filter(
-                Signal.created_at >= start_date
-            ).all()
-            
-            strategies = {}
-            for signal in signals:
-                if signal.strategy_id not in strategies:
-                    strategies[signal.strategy_id] = {
-                        'strategy_id': signal.strategy_id,
-                        'strategy_name': signal.strategy_name,
-                        'signals': []
-                    }
-                strategies[signal.strategy_id]['signals'].append(signal)
-            
-            results = []
-            for strategy_id, data in strategies.items():
-                perf = await self._calculate_performance(data['signals'])
-                perf['strategy_id'] = strategy_id
-                perf['strategy_name'] = data['strategy_name']
-                results.append(perf)
-            
-            results.sort(key=lambda x: x['win_rate'], reverse=True)
-            return results
-            
-        finally:
-            session.close()
+        """Получить статистику по всем стратегиям (read-only соединение)"""
+        start_date = datetime.now(pytz.UTC) - timedelta(days=days)
+        
+        signals = await signal_repository.fetch(Signal, Signal.created_at >= start_date)
+        
+        strategies = {}
+        for signal in signals:
+            if signal.strategy_id not in strategies:
+                strategies[signal.strategy_id] = {
+                    'strategy_id': signal.strategy_id,
+                    'strategy_name': signal.strategy_name,
+                    'signals': []
+                }
+            strategies[signal.strategy_id]['signals'].append(signal)
+        
+        results = []
+        for strategy_id, data in strategies.items():
+            perf = await self._calculate_performance(data['signals'])
+            perf['strategy_id'] = strategy_id
+            perf['strategy_name'] = data['strategy_name']
+            results.append(perf)
+        
+        results.sort(key=lambda x: x['win_rate'], reverse=True)
+        return results
+        
     
     async def _calculate_performance(self, signals: List[Signal]) -> Dict:
         """Вычислить производительность для списка сигналов"""
@@ -27,6 +27,7 @@ import numpy as np
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from src.indicators.prefix_sums import PrefixSums, prefix_sum_cache
 from .config import get_config, V3_DEFAULT_CONFIG
 from .clustering import ZoneClusterer
 from .validation import ReactionValidator
@@ -249,7 +250,7 @@ class SRZonesV3Builder:
         all_zones = zones_supply + zones_demand
         
         # 3. Calculate VWAP для confluence
-        vwap = self._calculate_vwap(df)
+        vwap = self._calculate_vwap(df, symbol, tf)
         
         # 4. Add zone IDs, TF, and SYMBOL metadata (before any filtering)
         for zone in all_zones:
@@ -478,12 +479,15 @@ class SRZonesV3Builder:
         
         return atr.fillna(0)
     
-    def _calculate_vwap(self, df: pd.DataFrame) -> pd.Series:
+    def _calculate_vwap(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                        tf: Optional[str] = None) -> pd.Series:
         """
         Рассчитать VWAP (Volume Weighted Average Price)
         
         Args:
             df: DataFrame с OHLC и volume
+            symbol: Символ - суммы берутся из prefix_sum_cache (общие с V3 стратегией)
+            tf: Таймфрейм df
         
         Returns:
             VWAP series
@@ -493,16 +497,14 @@ class SRZonesV3Builder:
             # Если нет volume, вернуть close price как fallback
             return df['close'].copy()
         
-        # Типичная цена (HL2 или HLC3)
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        
-        # VWAP = cumsum(typical_price × volume) / cumsum(volume)
-        pv = typical_price * df['volume']
-        cumulative_pv = pv.cumsum()
-        cumulative_volume = df['volume'].cumsum()
+        # VWAP = cumsum(typical_price × volume) / cumsum(volume) из накопленных сумм
+        sums = prefix_sum_cache.get(symbol, tf, df) if symbol and tf else PrefixSums(df)
+        cumulative_volume = sums.cum_v[1:]
         
         # Избежать деления на 0
-        vwap = cumulative_pv / cumulative_volume.replace(0, 1)
+        vwap = pd.Series(sums.cum_pv[1:] / np.where(cumulative_volume == 0, 1, cumulative_volume),
+                         index=df.index)
+        vwap[sums.nan_mask] = np.nan
         
         return vwap.fillna(df['close'])
     
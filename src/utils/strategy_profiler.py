@@ -0,0 +1,240 @@
+"""
+Профилирование CPU стоимости стратегий
+
+Режимы:
+- accounting  CPU (process_time) + wall время и количество вызовов check_signal
+              по каждой стратегии. Дешево, можно держать включенным постоянно.
+- cprofile    cProfile только внутри check_signal на N циклов →
+              logs/strategy_profile_<ts>.prof (snakeviz / flameprof) + .txt топ функций
+- sampling    фоновый поток снимает стек event loop потока каждые interval_ms,
+              пока выполняется check_signal → logs/strategy_profile_<ts>.folded
+              (формат flamegraph.pl / speedscope: "strategy;module:func;... count")
+
+Включение: profiling.enabled в config.yaml или /profile start [циклы] [режим] в Telegram.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytz
+
+from src.utils.config import config
+from src.utils.logger import logger
+
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+
+class _StrategyCost:
+    __slots__ = ('calls', 'cpu', 'wall', 'max_wall')
+
+    def __init__(self):
+        self.calls = 0
+        self.cpu = 0.0
+        self.wall = 0.0
+        self.max_wall = 0.0
+
+
+class StrategyProfiler:
+    """Учет CPU времени стратегий + опциональный cProfile / sampling профайлер на N циклов"""
+
+    def __init__(self):
+        self.accounting_enabled = config.get('profiling.enabled', False)
+        self.sample_interval = config.get('profiling.sample_interval_ms', 5) / 1000.0
+        self.output_dir = config.get('profiling.output_dir', 'logs')
+
+        self._costs: Dict[str, _StrategyCost] = {}
+        self._lock = threading.Lock()
+
+        # Сессия детального профилирования
+        self.mode: Optional[str] = None
+        self.cycles_left = 0
+        self.cycles_total = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._samples: Counter = Counter()
+        self._current_strategy: Optional[str] = None
+        self._target_thread_id: Optional[int] = None
+        self._sampler_thread: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self.last_outputs: List[str] = []
+
+    @property
+    def session_active(self) -> bool:
+        return self.mode is not None
+
+    @contextmanager
+    def measure(self, strategy_name: str):
+        """Обернуть вызов check_signal стратегии"""
+        if not self.accounting_enabled and not self.session_active:
+            yield
+            return
+
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        profile = self._profile if self.mode == 'cprofile' else None
+        if self.mode == 'sampling':
+            self._current_strategy = strategy_name
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self._current_strategy = None
+            cpu = time.process_time() - cpu_started
+            wall = time.perf_counter() - wall_started
+            with self._lock:
+                cost = self._costs.get(strategy_name)
+                if cost is None:
+                    cost = _StrategyCost()
+                    self._costs[strategy_name] = cost
+                cost.calls += 1
+                cost.cpu += cpu
+                cost.wall += wall
+                if wall > cost.max_wall:
+                    cost.max_wall = wall
+
+    def start_session(self, cycles: int = 3, mode: str = 'sampling') -> bool:
+        """Запустить детальное профилирование на N циклов анализа"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode: {mode} (expected one of {PROFILE_MODES})")
+        if self.session_active:
+            return False
+
+        self.mode = mode
+        self.cycles_left = max(1, cycles)
+        self.cycles_total = self.cycles_left
+        self._samples = Counter()
+
+        if mode == 'cprofile':
+            self._profile = cProfile.Profile()
+        else:
+            # Стратегии выполняются в потоке event loop → сэмплируем именно его
+            self._target_thread_id = threading.get_ident()
+            self._sampler_stop.clear()
+            self._sampler_thread = threading.Thread(
+                target=self._sampler_loop, name='strategy-sampler', daemon=True
+            )
+            self._sampler_thread.start()
+
+        logger.info(f"🔬 Strategy profiling started: mode={mode}, cycles={self.cycles_left}")
+        return True
+
+    def on_cycle_end(self):
+        """Вызывается в конце каждого цикла _check_signals"""
+        if not self.session_active:
+            return
+        self.cycles_left -= 1
+        if self.cycles_left <= 0:
+            self.stop_session()
+
+    def stop_session(self) -> List[str]:
+        """Остановить сессию и сохранить результаты в logs/"""
+        if not self.session_active:
+            return []
+
+        mode = self.mode
+        if self._sampler_thread:
+            self._sampler_stop.set()
+            self._sampler_thread.join(timeout=2)
+            self._sampler_thread = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now(pytz.UTC).strftime('%Y%m%d_%H%M%S')
+        base_path = os.path.join(self.output_dir, f"strategy_profile_{timestamp}")
+        outputs = []
+
+        try:
+            if mode == 'cprofile' and self._profile:
+                prof_path = f"{base_path}.prof"
+                self._profile.dump_stats(prof_path)
+                outputs.append(prof_path)
+
+                stream = io.StringIO()
+                stats = pstats.Stats(self._profile, stream=stream)
+                stats.sort_stats('cumulative').print_stats(60)
+                txt_path = f"{base_path}.txt"
+                with open(txt_path, 'w', encoding='utf-8') as f:
+                    f.write(stream.getvalue())
+                outputs.append(txt_path)
+            elif mode == 'sampling':
+                folded_path = f"{base_path}.folded"
+                with open(folded_path, 'w', encoding='utf-8') as f:
+                    for stack, count in self._samples.most_common():
+                        f.write(f"{stack} {count}\n")
+                outputs.append(folded_path)
+        except Exception as e:
+            logger.error(f"Failed to save strategy profile: {e}", exc_info=True)
+
+        self.mode = None
+        self._profile = None
+        self.cycles_left = 0
+        self.last_outputs = outputs
+        logger.info(f"🔬 Strategy profiling finished ({mode}): {', '.join(outputs) or 'no output'}")
+        return outputs
+
+    def _sampler_loop(self):
+        """Сэмплирование стека потока event loop пока выполняется check_signal"""
+        root = os.path.abspath('.')
+        while not self._sampler_stop.wait(self.sample_interval):
+            strategy = self._current_strategy
+            if strategy is None:
+                continue
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = code.co_filename
+                if filename.startswith(root):
+                    filename = os.path.relpath(filename, root)
+                stack.append(f"{filename}:{code.co_name}")
+                frame = frame.f_back
+            stack.reverse()
+
+            # Обрезать всё выше check_signal - интересна только стоимость стратегии
+            for idx, entry in enumerate(stack):
+                if entry.endswith(':check_signal'):
+                    stack = stack[idx:]
+                    break
+            self._samples[';'.join([strategy] + stack)] += 1
+
+    def get_table(self, sort_by: str = 'cpu') -> List[Dict]:
+        """Агрегированная таблица стоимости стратегий"""
+        with self._lock:
+            items = [(name, cost.calls, cost.cpu, cost.wall, cost.max_wall)
+                     for name, cost in self._costs.items()]
+
+        total_cpu = sum(item[2] for item in items) or 1.0
+        table = [{
+            'strategy': name,
+            'calls': calls,
+            'cpu_total': cpu,
+            'cpu_mean_ms': cpu / calls * 1000 if calls else 0.0,
+            'wall_total': wall,
+            'wall_max_ms': max_wall * 1000,
+            'cpu_share': cpu / total_cpu * 100,
+        } for name, calls, cpu, wall, max_wall in items]
+
+        key = {'cpu': 'cpu_total', 'calls': 'calls', 'mean': 'cpu_mean_ms', 'wall': 'wall_total'}.get(sort_by, 'cpu_total')
+        table.sort(key=lambda row: row[key], reverse=True)
+        return table
+
+    def reset(self):
+        with self._lock:
+            self._costs.clear()
+
+
+strategy_profiler = StrategyProfiler()
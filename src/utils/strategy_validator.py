@@ -1,6 +1,7 @@
 """
 Strategy Validation Tool - проверка корректности работы стратегий
 """
+import asyncio
 import pandas as pd
 from typing import Dict, List
 import logging
@@ -15,7 +16,7 @@ class StrategyValidator:
         self.strategy_manager = strategy_manager
         self.data_loader = data_loader
         
-    def validate_all_strategies(self, symbol: str = 'BTCUSDT') -> Dict:
+    async def validate_all_strategies(self, symbol: str = 'BTCUSDT') -> Dict:
         """
         Проверить все стратегии на тестовых данных
         
@@ -30,10 +31,13 @@ class StrategyValidator:
             'details': []
         }
         
-        # Загрузить данные для всех таймфреймов
+        # Загрузить данные для всех таймфреймов (чтение в DB executor, не в event loop)
+        timeframes = ['15m', '1h', '4h']
+        frames = await asyncio.gather(
+            *(self.data_loader.get_candles_async(symbol, tf, limit=200) for tf in timeframes)
+        )
         timeframe_data = {}
-        for tf in ['15m', '1h', '4h']:
-            df = self.data_loader.get_candles(symbol, tf, limit=200)
+        for tf, df in zip(timeframes, frames):
             if df is not None and not df.empty:
                 timeframe_data[tf] = df
         
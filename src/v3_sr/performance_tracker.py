@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 import pytz
 
 from src.database.models import V3SRSignal
+from src.database.signal_queries import active_filter
 from src.binance.client import BinanceClient
 from src.v3_sr.logger import get_v3_sr_logger
 from src.v3_sr.helpers import calculate_r_multiple
@@ -68,7 +69,7 @@ class V3SRPerformanceTracker:
         session = self.db.get_session()
         try:
             active_signals = session.query(V3SRSignal).filter(
-                V3SRSignal.status.in_(['PENDING', 'ACTIVE'])
+                active_filter(V3SRSignal)
             ).all()
             
             if not active_signals:
@@ -17,6 +17,7 @@ import pytz
 from src.database.models import V3SRSignal, V3SRZoneEvent, V3SRSignalLock
 from src.utils.v3_zones_provider import get_v3_zones_provider
 from src.indicators.vwap import VWAPCalculator
+from src.indicators.prefix_sums import prefix_sum_cache
 from src.v3_sr.logger import get_v3_sr_logger
 from src.v3_sr.helpers import (
     round_price_to_tick, calculate_r_multiple, generate_signal_id,
@@ -306,8 +307,11 @@ class SRZonesV3Strategy:
         atr_1h = indicators.get('1h', {}).get('atr', current_price_1h * 0.01 if current_price_1h else 0)
         
         # [4] Calculate VWAP for each TF
-        vwap_15m = self.vwap_calc.calculate_daily_vwap(df_15m) if len(df_15m) > 0 else pd.Series([current_price_15m])
-        vwap_1h = self.vwap_calc.calculate_daily_vwap(df_1h) if len(df_1h) > 0 else pd.Series([current_price_1h])
+        # Накопленные суммы общие с V3 builder (prefix_sum_cache по symbol/TF)
+        vwap_15m = (self.vwap_calc.calculate_daily_vwap(df_15m, sums=prefix_sum_cache.get(symbol, '15m', df_15m))
+                    if len(df_15m) > 0 else pd.Series([current_price_15m]))
+        vwap_1h = (self.vwap_calc.calculate_daily_vwap(df_1h, sums=prefix_sum_cache.get(symbol, '1h', df_1h))
+                   if len(df_1h) > 0 else pd.Series([current_price_1h]))
         
         # [5] Generate M15 signals
         signals_m15 = []
@@ -0,0 +1,90 @@
+"""
+Unit тесты для инкрементального AVWAP (AVWAPAccumulator)
+
+Проверяют:
+- Паритет с полным пересчетом среза df.iloc[anchor_idx:] на скользящем окне
+- Растущее окно (новые бары без вытеснения старых)
+- Обновление незакрытого последнего бара
+- Сброс сумм при переякорении
+- Свечи с open_time колонкой (RangeIndex, как в DataLoader)
+"""
+import unittest
+
+from src.action_price.avwap import AnchoredVWAP, AVWAPAccumulator
+from tests.candles import create_candles
+
+
+class TestAVWAPIncremental(unittest.TestCase):
+    """Тесты инкрементального AVWAP против полного среза"""
+
+    def setUp(self):
+        """Инициализация"""
+        self.avwap = AnchoredVWAP({})
+
+    def assert_parity(self, df, anchor, symbol='BTCUSDT', timeframe='1h'):
+        full = self.avwap.calculate_avwap_from_anchor(df, anchor)
+        incremental = self.avwap.calculate_avwap_from_anchor(df, anchor, symbol, timeframe)
+        self.assertAlmostEqual(incremental, full, delta=abs(full) * 1e-10)
+
+    def test_sliding_window_parity(self):
+        """Окно 200 баров скользит на 1 бар: каждый шаг = полному срезу"""
+        candles = create_candles(600, seed=7, freq='h', index=True)
+        anchor = {'index': 40, 'price': 100.0, 'timestamp': candles.index[40]}
+
+        for end in range(200, 600):
+            self.assert_parity(candles.iloc[end - 200:end], anchor)
+
+        # Больше REBASE_UPDATES шагов - был хотя бы один полный пересчет
+        state = self.avwap.avwap_state[('BTCUSDT', '1h')]
+        self.assertLess(state.updates, AVWAPAccumulator.REBASE_UPDATES)
+
+    def test_growing_window_parity(self):
+        """Новые бары добавляются без вытеснения: суммы только растут"""
+        candles = create_candles(300, seed=7, freq='h', index=True)
+        anchor = {'index': 25, 'price': 100.0, 'timestamp': candles.index[25]}
+
+        for end in range(30, 300, 7):
+            self.assert_parity(candles.iloc[:end], anchor)
+
+    def test_unclosed_last_bar_update(self):
+        """Последний бар обновляется (объем растет) - AVWAP использует свежие значения"""
+        candles = create_candles(250, seed=7, freq='h', index=True)
+        anchor = {'index': 10, 'price': 100.0, 'timestamp': candles.index[10]}
+        window = candles.iloc[:200].copy()
+
+        self.assert_parity(window, anchor)
+        window.iloc[-1, window.columns.get_loc('volume')] *= 3
+        window.iloc[-1, window.columns.get_loc('close')] += 2
+        self.assert_parity(window, anchor)
+
+    def test_reanchor_resets_state(self):
+        """Смена якоря - суммы считаются заново от нового якоря"""
+        candles = create_candles(300, seed=7, freq='h', index=True)
+        window = candles.iloc[:250]
+        first = {'index': 20, 'price': 100.0, 'timestamp': window.index[20]}
+        second = {'index': 150, 'price': 101.0, 'timestamp': window.index[150]}
+
+        self.assert_parity(window, first)
+        self.assert_parity(window, second)
+        self.assertEqual(self.avwap.avwap_state[('BTCUSDT', '1h')].anchor_key[0], 150)
+
+    def test_open_time_column_frames(self):
+        """Свечи DataLoader: RangeIndex + open_time колонка"""
+        candles = create_candles(400, seed=7, freq='h', index=True).rename_axis('open_time').reset_index()
+        anchor = {'index': 30, 'price': 100.0, 'timestamp': 30}
+
+        for end in range(150, 400, 3):
+            window = candles.iloc[end - 150:end].reset_index(drop=True)
+            self.assert_parity(window, anchor, timeframe='4h')
+
+    def test_zero_volume_returns_anchor_price(self):
+        """Нулевой объем от якоря - цена якоря, как и в полном срезе"""
+        candles = create_candles(100, seed=7, freq='h', index=True)
+        candles['volume'] = 0.0
+        anchor = {'index': 50, 'price': 123.0, 'timestamp': candles.index[50]}
+
+        self.assertEqual(self.avwap.calculate_avwap_from_anchor(candles, anchor, 'ETHUSDT', '1h'), 123.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
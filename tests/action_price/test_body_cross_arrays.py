@@ -0,0 +1,120 @@
+"""
+Unit тесты для расчета Body Cross на NumPy массивах (ActionPriceEngine)
+
+Проверяют:
+- EMA / ATR совпадают с pandas_ta (включая NaN посреди ряда и нулевой range)
+- Булевы условия _body_cross_window = поэлементной проверке баров
+- analyze не копирует/не меняет входной df и сортирует несортированные свечи
+- analyze_batch = analyze по каждому символу (разная длина, NaN, несортированные)
+"""
+import asyncio
+import unittest
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from src.action_price.engine import ActionPriceEngine, _atr, _ema
+from tests.candles import create_candles
+
+
+class _NullSignalLogger:
+    """JSONL логгер без записи на диск"""
+
+    def log_signal(self, signal_data):
+        pass
+
+    def create_signal_entry(self, **fields):
+        return dict(fields)
+
+
+class TestBodyCrossArrays(unittest.TestCase):
+    """Тесты массивного пути Action Price"""
+
+    def setUp(self):
+        """Инициализация"""
+        self.engine = ActionPriceEngine({}, signal_logger=_NullSignalLogger())
+
+    def test_ema_atr_match_pandas_ta(self):
+        """EMA/ATR = pandas_ta на тех же данных"""
+        candles = create_candles(600, seed=21)
+        candles.loc[::50, 'high'] = candles['low'][::50]  # нулевой range → epsilon в true range
+        candles.loc[300, 'close'] = np.nan                 # NaN посреди ряда
+
+        close = candles['close'].to_numpy()
+        for length in (5, 9, 13, 21, 200):
+            np.testing.assert_allclose(_ema(close, length), ta.ema(candles['close'], length=length).to_numpy(),
+                                       rtol=1e-12, equal_nan=True)
+
+        expected_atr = ta.atr(candles['high'], candles['low'], candles['close'], length=14).to_numpy()
+        actual_atr = _atr(candles['high'].to_numpy(), candles['low'].to_numpy(), close, 14)
+        np.testing.assert_allclose(actual_atr, expected_atr, rtol=1e-12, equal_nan=True)
+
+    def test_window_conditions_match_bars(self):
+        """cross/hold/touch/base/retest в окне = проверке каждого бара"""
+        indicators = self.engine._calculate_indicators(create_candles(600, seed=21))
+        window = self.engine._body_cross_window(indicators)
+
+        for pos in range(-ActionPriceEngine.SCORE_WINDOW, 0):
+            o, h, l, c = (indicators[col][pos] for col in ('open', 'high', 'low', 'close'))
+            ema13, ema21, ema200 = (indicators[col][pos] for col in ('ema13', 'ema21', 'ema200'))
+            small_range = (h - l) < 0.5 * indicators['atr'][pos]
+
+            self.assertEqual(window['cross_up'][pos], c > ema200 and o < ema200)
+            self.assertEqual(window['cross_down'][pos], c < ema200 and o > ema200)
+            self.assertEqual(window['hold_above'][pos], c > ema200 and l > ema200)
+            self.assertEqual(window['touch_ema200'][pos], l <= ema200 <= h)
+            self.assertEqual(window['base_long'][pos], c > ema13 and l > ema21 and small_range)
+            self.assertEqual(window['retest_short'][pos],
+                             (h >= ema13 and c < ema13) or (h >= ema21 and c < ema21))
+
+    def test_score_components_order(self):
+        """Компоненты score - полный набор в порядке спецификации"""
+        candles = create_candles(600, seed=21)
+        indicators = self.engine._calculate_indicators(candles)
+
+        for direction in ('long', 'short'):
+            score_total, components = self.engine._calculate_score_components(
+                candles, indicators, direction, -2, -1
+            )
+            self.assertEqual(tuple(components), ActionPriceEngine.SCORE_COMPONENTS)
+            self.assertEqual(score_total, sum(components.values()))
+
+    def test_analyze_does_not_touch_input(self):
+        """Несортированный df не меняется, результат = анализу отсортированного"""
+        candles = create_candles(600, seed=21)
+        shuffled = candles.sample(frac=1, random_state=3)
+        snapshot = shuffled.copy()
+
+        result_shuffled = asyncio.run(self.engine.analyze('BTCUSDT', shuffled))
+        self.engine.cooldown = ActionPriceEngine({}, signal_logger=_NullSignalLogger()).cooldown
+        result_sorted = asyncio.run(self.engine.analyze('BTCUSDT', candles))
+
+        pd.testing.assert_frame_equal(shuffled, snapshot)
+        self.assertEqual(result_shuffled, result_sorted)
+
+    def test_analyze_batch_matches_per_symbol(self):
+        """Батч по вселенной = analyze() каждого символа"""
+        candles = create_candles(3000, seed=21)
+        frames = {}
+        for end in range(500, 3000, 4):
+            bars = 500 if end % 3 else 400  # две группы по длине
+            frames[f'S{end}USDT'] = candles.iloc[end - bars:end].reset_index(drop=True)
+        frames['S1000USDT'].loc[450, 'close'] = np.nan        # NaN в хвосте → EMA200 NaN
+        frames['S1004USDT'] = frames['S1004USDT'].sample(frac=1, random_state=5)
+        frames['SHORTUSDT'] = candles.iloc[:200]
+
+        batch_engine = ActionPriceEngine({}, signal_logger=_NullSignalLogger())
+        batch = asyncio.run(batch_engine.analyze_batch(frames))
+        expected = {}
+        for symbol, df in frames.items():
+            signal = asyncio.run(self.engine.analyze(symbol, df))
+            if signal:
+                expected[symbol] = signal
+
+        self.assertTrue(expected)
+        self.assertEqual(list(batch), list(expected))
+        self.assertEqual(batch, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
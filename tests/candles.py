@@ -0,0 +1,69 @@
+"""
+Общие фабрики детерминированных свечей для тестов
+
+create_candles - случайное блуждание close с сидом, open/high/low вокруг него, равномерный объем.
+По умолчанию - RangeIndex + колонка open_time, как DataLoader; index=True кладет
+время в DatetimeIndex (как klines → DataFrame у Action Price / VWAP).
+make_klines - ответ Binance klines для записи свечей в БД.
+"""
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+def create_candles(num_bars: int, seed: int = 0, freq: str = '15min',
+                   end: Optional[str] = '2025-03-01', start: Optional[str] = None,
+                   tz: Optional[str] = None, step: Union[float, Tuple[float, float]] = 0.3,
+                   taker_buy: bool = False, decimals: Optional[int] = None,
+                   index: bool = False) -> pd.DataFrame:
+    """
+    Создать детерминированные свечи OHLCV
+
+    Args:
+        num_bars: Количество свечей
+        seed: Сид генератора (одинаковые параметры → одинаковые свечи)
+        freq: Шаг свечей (pandas freq)
+        end: Время последней свечи (игнорируется, если задан start)
+        start: Время первой свечи
+        tz: Часовой пояс времени свечей
+        step: Масштаб шага блуждания close; кортеж (min, max) - случайный масштаб для сида
+        taker_buy: Добавить taker_buy_base (доля объема 0.2-0.8)
+        decimals: Округлить close до стольких знаков (плато для экстремумов)
+        index: Время в DatetimeIndex вместо колонки open_time
+
+    Returns:
+        DataFrame со свечами
+    """
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(*step) if isinstance(step, tuple) else step
+    close = 100 + rng.standard_normal(num_bars).cumsum() * scale
+    if decimals is not None:
+        close = np.round(close, decimals)
+    open_ = close + rng.normal(0, 0.3, num_bars)
+    bars = {
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0, 0.3, num_bars),
+        'low': np.minimum(open_, close) - rng.uniform(0, 0.3, num_bars),
+        'close': close,
+        'volume': rng.uniform(1, 100, num_bars),
+    }
+    if taker_buy:
+        bars['taker_buy_base'] = bars['volume'] * rng.uniform(0.2, 0.8, num_bars)
+
+    if start is not None:
+        times = pd.date_range(start=start, periods=num_bars, freq=freq, tz=tz)
+    else:
+        times = pd.date_range(end=end, periods=num_bars, freq=freq, tz=tz)
+    if index:
+        return pd.DataFrame(bars, index=times)
+    return pd.DataFrame({'open_time': times, **bars})
+
+
+def make_klines(start_index: int, count: int, step_ms: int = 900_000) -> List[list]:
+    """Binance klines (по умолчанию 15m) начиная со свечи номер start_index от эпохи"""
+    return [
+        [(start_index + i) * step_ms, '1', '2', '0.5', '1.5', '10', (start_index + i + 1) * step_ms - 1,
+         '15', 5, '4', '6']
+        for i in range(count)
+    ]
@@ -0,0 +1,107 @@
+"""
+Unit тесты для записи candle_coverage (src/data/candle_coverage.py)
+
+Проверяют:
+- apply_batch читает строку покрытия уже под блокировкой записи (BEGIN IMMEDIATE)
+- retention (DELETE + trim_before) во время записи свечей не теряет first / count
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.data.candle_coverage import candle_coverage
+from src.data.candle_writer import UPSERT_CANDLES_SQL, build_candle_rows, upsert_klines
+from src.database.db import Database
+from src.database.models import Candle, CandleCoverage
+from tests.candles import make_klines
+
+
+class TestCoverageWriteLock(unittest.TestCase):
+    """Тесты согласованности покрытия при параллельной retention"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.writer = self.db.create_dedicated_engine()
+        self.retention = self.db.create_dedicated_engine()
+        self.writer_sessions = sessionmaker(bind=self.writer)
+        self.retention_sessions = sessionmaker(bind=self.retention)
+
+        session = self.writer_sessions()
+        upsert_klines(session, 'AAAUSDT', '15m', make_klines(0, 10))
+        session.commit()
+        session.close()
+
+        # Соединение retention открыто заранее (PRAGMA при подключении не ждут писателя)
+        with self.retention.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+    def tearDown(self):
+        for engine in (self.writer, self.retention):
+            engine.dispose()
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def trim_oldest(self, count: int):
+        """Как RetentionService: DELETE самых старых свечей + trim_before в одной транзакции"""
+        session = self.retention_sessions()
+        try:
+            oldest = session.query(Candle.id).filter(
+                Candle.symbol == 'AAAUSDT', Candle.timeframe == '15m'
+            ).order_by(Candle.open_time).limit(count).all()
+            deleted = session.query(Candle).filter(
+                Candle.id.in_([row.id for row in oldest])
+            ).delete(synchronize_session=False)
+            candle_coverage.trim_before(session, 'AAAUSDT', '15m', deleted)
+            session.commit()
+        finally:
+            session.close()
+
+    def test_apply_batch_takes_write_lock(self):
+        """После apply_batch другой писатель ждет commit, а не пишет между чтением и INSERT"""
+        session = self.writer_sessions()
+        candle_coverage.apply_batch(session, 'AAAUSDT', '15m', [kline[0] for kline in make_klines(10, 1)])
+
+        with self.retention.connect() as conn:
+            conn.exec_driver_sql("PRAGMA busy_timeout=100")
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        session.rollback()
+        session.close()
+
+    def test_concurrent_trim_keeps_coverage_consistent(self):
+        """Retention между чтением покрытия и INSERT свечей ждет commit - покрытие = свечи"""
+        klines = make_klines(10, 2)
+        session = self.writer_sessions()
+        candle_coverage.apply_batch(session, 'AAAUSDT', '15m', [kline[0] for kline in klines])
+
+        trimmer = threading.Thread(target=self.trim_oldest, args=(4,))
+        trimmer.start()
+        time.sleep(0.2)  # retention ждет блокировку писателя
+        session.execute(UPSERT_CANDLES_SQL, build_candle_rows('AAAUSDT', '15m', klines))
+        session.commit()
+        session.close()
+        trimmer.join(10)
+        self.assertFalse(trimmer.is_alive())
+
+        check = self.writer_sessions()
+        row = check.query(CandleCoverage).filter(CandleCoverage.symbol == 'AAAUSDT').one()
+        first, count = check.query(func.min(Candle.open_time), func.count(Candle.id)).filter(
+            Candle.symbol == 'AAAUSDT', Candle.timeframe == '15m'
+        ).one()
+        check.close()
+
+        self.assertEqual(count, 8)
+        self.assertEqual(row.candle_count, count)
+        self.assertEqual(row.first_open_time.replace(tzinfo=None), first.replace(tzinfo=None))
+
+
+if __name__ == '__main__':
+    unittest.main()
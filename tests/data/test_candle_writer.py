@@ -0,0 +1,74 @@
+"""
+Unit тесты для остановки CandleWriter (src/data/candle_writer.py)
+
+Проверяют:
+- write() во время stop() получает RuntimeError, а не ждет future вечно
+- страницы, оставшиеся в очереди за sentinel, записываются до выхода stop()
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from src.data.candle_writer import CandleWriter
+from src.database.db import Database
+from tests.candles import make_klines
+
+
+class TestCandleWriterStop(unittest.TestCase):
+    """Тесты гонки write() / stop()"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'test.db'))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def count_candles(self):
+        with self.db.engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(*) FROM candles")).scalar()
+
+    def test_write_during_stop_fails_fast(self):
+        """Страница после начала stop() не попадает за sentinel"""
+        writer = CandleWriter(self.db, flush_interval_ms=50)
+
+        async def run():
+            await writer.start()
+            first = asyncio.create_task(writer.write('AAAUSDT', '15m', make_klines(0, 3)))
+            await asyncio.sleep(0)
+            stopping = asyncio.create_task(writer.stop())
+            await asyncio.sleep(0)
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(writer.write('BBBUSDT', '15m', make_klines(0, 2)), 1)
+            await asyncio.wait_for(stopping, 5)
+            return await asyncio.wait_for(first, 1)
+
+        self.assertEqual(asyncio.run(run()), 3)
+        self.assertEqual(self.count_candles(), 3)
+
+    def test_pages_behind_sentinel_are_flushed(self):
+        """Страница, оказавшаяся в очереди после sentinel, записывается и резолвится"""
+        writer = CandleWriter(self.db, flush_interval_ms=50)
+
+        async def run():
+            await writer.start()
+            loop = asyncio.get_running_loop()
+            # Как write(), прошедший проверку is_running до stop() и вставший за sentinel
+            late = loop.create_future()
+            writer._closing = True
+            writer._queue.put_nowait(None)
+            writer._queue.put_nowait(('CCCUSDT', '15m', make_klines(0, 4), late))
+            writer._closing = False
+            await asyncio.wait_for(writer.stop(), 5)
+            return await asyncio.wait_for(late, 1)
+
+        self.assertEqual(asyncio.run(run()), 4)
+        self.assertEqual(self.count_candles(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
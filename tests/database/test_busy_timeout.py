@@ -0,0 +1,35 @@
+"""
+Unit тесты для busy timeout соединений SQLite
+
+Проверяют:
+- основной engine ждет блокировку записи столько же, сколько выделенные писатели
+"""
+import os
+import tempfile
+import unittest
+
+from src.database.db import Database, SQLITE_BUSY_TIMEOUT_S
+
+
+class TestBusyTimeout(unittest.TestCase):
+    """Тесты busy timeout основного и выделенного engine"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.writer_engine = self.db.create_dedicated_engine()
+
+    def tearDown(self):
+        self.writer_engine.dispose()
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_main_engine_waits_like_dedicated_writers(self):
+        """Запись трекера не падает 'database is locked' через 5с во время checkpoint / retention"""
+        for engine in (self.db.engine, self.writer_engine):
+            with engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql("PRAGMA busy_timeout").scalar(), SQLITE_BUSY_TIMEOUT_S * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
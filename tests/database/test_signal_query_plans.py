@@ -0,0 +1,114 @@
+"""
+Unit тесты для планов запросов таблиц сигналов
+
+Проверяют:
+- Опрос трекеров / блокировки используют partial индексы открытых сигналов
+- Статистика за период считается по covering индексу (без чтения строк)
+- summary_totals сворачивает агрегаты так же, как подсчет по списку сигналов
+"""
+import unittest
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import create_engine, insert
+
+from src.database import signal_queries as q
+from src.database.models import ActionPriceSignal, Base, Signal, V3SRSignal
+
+
+class TestSignalQueryPlans(unittest.TestCase):
+    """Тесты EXPLAIN QUERY PLAN для запросов signal_queries"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine('sqlite://')
+        Base.metadata.create_all(cls.engine)
+        cls.now = datetime.now(pytz.UTC)
+
+        statuses = ['WIN', 'LOSS', 'TIME_STOP', 'ACTIVE', 'PENDING']
+        signals = [
+            {
+                'context_hash': f"ctx{i}", 'symbol': f"SYM{i % 20}USDT", 'strategy_id': i % 5,
+                'strategy_name': f"Strategy {i % 5}", 'direction': 'LONG', 'entry_price': 1.0,
+                'stop_loss': 0.9, 'score': 2.0, 'market_regime': 'TREND', 'timeframe': '15m',
+                'created_at': cls.now - timedelta(hours=i), 'status': statuses[i % 5],
+                'exit_type': ['TP1', 'TP2', 'BREAKEVEN', None, None][i % 5],
+                'pnl_percent': [1.5, -1.0, 0.2, None, None][i % 5],
+            }
+            for i in range(200)
+        ]
+        ap_signals = [
+            {
+                'context_hash': f"ap{i}", 'symbol': f"SYM{i % 20}USDT", 'pattern_type': 'pin_bar',
+                'direction': 'LONG', 'timeframe': '1h', 'zone_id': f"z{i}", 'zone_low': 0.9,
+                'zone_high': 1.1, 'entry_price': 1.0, 'stop_loss': 0.9, 'take_profit_1': 1.2,
+                'confidence_score': 5.0, 'created_at': cls.now - timedelta(hours=i),
+                'status': statuses[i % 5],
+            }
+            for i in range(200)
+        ]
+        with cls.engine.begin() as conn:
+            conn.execute(insert(Signal.__table__), signals)
+            conn.execute(insert(ActionPriceSignal.__table__), ap_signals)
+
+    def _plan(self, statement):
+        with self.engine.connect() as conn:
+            return ' | '.join(q.explain_query_plan(conn, statement))
+
+    def test_tracker_polls_use_partial_indexes(self):
+        """Опрос открытых сигналов - partial индекс, а не SCAN таблицы"""
+        self.assertIn('idx_signals_active', self._plan(q.active_signals(Signal)))
+        self.assertIn('idx_ap_active', self._plan(q.active_signals(ActionPriceSignal)))
+        self.assertIn('idx_v3sr_active', self._plan(q.active_signals(V3SRSignal)))
+
+    def test_active_blocks_are_covering(self):
+        """Блокировки при старте читают только индекс"""
+        self.assertIn('COVERING INDEX idx_signals_active', self._plan(q.active_main_blocks()))
+        self.assertIn('COVERING INDEX idx_ap_active', self._plan(q.active_action_price_symbols()))
+
+    def test_active_filter_renders_literal_in(self):
+        """IN с bind-параметрами не попадает в partial индекс - значения должны быть литералами"""
+        with self.engine.connect() as conn:
+            active = conn.execute(q.active_signals(Signal)).all()
+        self.assertEqual(len(active), 80)
+
+    def test_stats_use_covering_indexes(self):
+        """Статистика за 30 дней (все / одна стратегия / один паттерн) - covering индекс"""
+        since = self.now - timedelta(days=30)
+        self.assertIn(
+            'COVERING INDEX idx_signals_stats',
+            self._plan(q.outcome_summary(Signal, Signal.exit_type, since))
+        )
+        self.assertIn(
+            'COVERING INDEX idx_signals_strategy_stats',
+            self._plan(q.outcome_summary(Signal, Signal.exit_type, since, Signal.strategy_id == 3))
+        )
+        self.assertIn(
+            'COVERING INDEX idx_ap_pattern_stats',
+            self._plan(q.outcome_summary(ActionPriceSignal, ActionPriceSignal.exit_reason, since,
+                                         ActionPriceSignal.pattern_type == 'pin_bar'))
+        )
+
+    def test_summary_totals_match_row_counts(self):
+        """Агрегаты GROUP BY сворачиваются в те же числа, что подсчет по строкам"""
+        since = self.now - timedelta(days=30)
+        with self.engine.connect() as conn:
+            rows = [tuple(row) for row in conn.execute(q.outcome_summary(Signal, Signal.exit_type, since))]
+            signals = conn.execute(
+                Signal.__table__.select().where(Signal.created_at >= since)
+            ).all()
+
+        wins = [s for s in signals if s.status == 'WIN']
+        count, pnl_count, pnl_sum = q.summary_totals(rows, ['WIN'])
+        self.assertEqual(count, len(wins))
+        self.assertEqual(pnl_count, len([s for s in wins if s.pnl_percent is not None]))
+        self.assertAlmostEqual(pnl_sum, sum(s.pnl_percent for s in wins), places=6)
+
+        closed = [s for s in signals if s.status in ('WIN', 'LOSS', 'TIME_STOP')]
+        tp2_count = q.summary_totals(rows, ['WIN', 'LOSS', 'TIME_STOP'], lambda exit_type: exit_type == 'TP2')[0]
+        self.assertEqual(tp2_count, len([s for s in closed if s.exit_type == 'TP2']))
+        self.assertEqual(sum(row[2] for row in rows), len(signals))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit тесты для wal_autocheckpoint пишущих соединений
+
+Проверяют:
+- без запущенного WalCheckpointer писатели делают checkpoint как SQLite (1000 страниц)
+- WalCheckpointer.start выключает autocheckpoint, stop возвращает значение SQLite
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.database.db import Database, SQLITE_DEFAULT_AUTOCHECKPOINT
+from src.database.wal_checkpoint import WalCheckpointer
+
+
+class TestWalAutocheckpoint(unittest.TestCase):
+    """Тесты autocheckpoint основного и выделенного engine"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.writer_engine = self.db.create_dedicated_engine()
+
+    def tearDown(self):
+        self.writer_engine.dispose()
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def autocheckpoint(self):
+        values = []
+        for engine in (self.db.engine, self.writer_engine):
+            with engine.connect() as conn:
+                values.append(conn.exec_driver_sql("PRAGMA wal_autocheckpoint").scalar())
+        return values
+
+    def test_default_without_checkpointer(self):
+        """CLI и импорт без WalCheckpointer - checkpoint SQLite по умолчанию"""
+        self.assertEqual(self.autocheckpoint(), [SQLITE_DEFAULT_AUTOCHECKPOINT] * 2)
+
+    def test_disabled_only_while_checkpointer_runs(self):
+        """start → 0 на уже открытых соединениях, stop → снова значение SQLite"""
+        checkpointer = WalCheckpointer(self.db, interval_seconds=3600, autocheckpoint_pages=0)
+
+        async def run():
+            await checkpointer.start()
+            running = self.autocheckpoint()
+            await checkpointer.stop()
+            return running
+
+        self.assertEqual(asyncio.run(run()), [0, 0])
+        self.assertEqual(self.autocheckpoint(), [SQLITE_DEFAULT_AUTOCHECKPOINT] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
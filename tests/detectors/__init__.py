@@ -0,0 +1 @@
+# Detectors tests
@@ -0,0 +1,87 @@
+"""
+Unit тесты для кеша режима рынка (RegimeService)
+
+Проверяют:
+- get(): тот же 4h DataFrame - из кеша, новый бар - пересчет = detect_regime / get_h4_bias
+- refresh(): batch пересчет только устаревших символов = get() по символу
+- snapshot(): счетчики режимов / bias по символам, retain() убирает выбывшие символы
+"""
+import unittest
+
+from src.detectors.market_regime import MarketRegime, MarketRegimeDetector
+from src.detectors.regime_service import RegimeService
+from tests.candles import create_candles
+
+
+class TestRegimeService(unittest.TestCase):
+    """Тесты RegimeService против MarketRegimeDetector"""
+
+    def assert_entry(self, entry, df, detector):
+        expected = detector.detect_regime(df, '4h')
+        self.assertEqual(entry['regime'], expected['regime'].value)
+        self.assertEqual(entry['bias'], detector.get_h4_bias(df))
+        self.assertAlmostEqual(entry['confidence'], expected['confidence'], places=9)
+        self.assertEqual(entry['bar_time'], df['open_time'].iloc[-1])
+
+    def test_get_caches_until_new_bar(self):
+        """Тот же DataFrame - кеш, закрытие 4h свечи - пересчет"""
+        detector = MarketRegimeDetector()
+        service = RegimeService(detector)
+        history = create_candles(361, seed=1, freq='4h', tz='UTC', step=(0.1, 0.8))
+        df = history.iloc[:360].reset_index(drop=True)
+
+        first = service.get('BTCUSDT', df)
+        self.assert_entry(first, df, detector)
+        self.assertIs(service.get('BTCUSDT', df.copy()), first)
+        self.assertEqual((service.hits, service.misses), (1, 1))
+
+        # Новая 4h свеча: окно сдвигается на бар (limit=360)
+        shifted = history.iloc[1:].reset_index(drop=True)
+        second = service.get('BTCUSDT', shifted)
+        self.assertIsNot(second, first)
+        self.assert_entry(second, shifted, detector)
+        self.assertEqual((service.hits, service.misses), (1, 2))
+
+    def test_refresh_matches_get_and_skips_fresh(self):
+        """refresh() = get() по каждому символу, свежие символы не пересчитываются"""
+        detector = MarketRegimeDetector()
+        frames = {f'S{i}USDT': create_candles(n, seed=10 + i, freq='4h', tz='UTC', step=(0.1, 0.8))
+                  for i, n in enumerate([360] * 6 + [250, 120])}
+
+        service = RegimeService(detector)
+        entries = service.refresh(frames)
+        self.assertEqual(list(entries), list(frames))
+        for symbol, df in frames.items():
+            if len(df) >= 200:
+                self.assert_entry(entries[symbol], df, detector)
+            else:
+                self.assertEqual(entries[symbol]['regime'], MarketRegime.UNDECIDED.value)
+
+        # Новый бар только у одного символа
+        frames['S0USDT'] = create_candles(361, seed=10, freq='4h', tz='UTC', step=(0.1, 0.8)).iloc[1:].reset_index(drop=True)
+        refreshed = service.refresh(frames)
+        self.assertEqual(service.misses, len(frames) + 1)
+        self.assertIsNot(refreshed['S0USDT'], entries['S0USDT'])
+        self.assertIs(refreshed['S1USDT'], entries['S1USDT'])
+        self.assert_entry(refreshed['S0USDT'], frames['S0USDT'], detector)
+
+    def test_snapshot_counts(self):
+        """snapshot() - счетчики по всем символам, retain() убирает выбывшие"""
+        service = RegimeService()
+        frames = {f'S{i}USDT': create_candles(360, seed=30 + i, freq='4h', tz='UTC', step=(0.1, 0.8)) for i in range(5)}
+        entries = service.refresh(frames)
+
+        snapshot = service.snapshot()
+        self.assertEqual(snapshot['total'], 5)
+        self.assertEqual(set(snapshot['counts']), {regime.value for regime in MarketRegime})
+        for regime, count in snapshot['counts'].items():
+            self.assertEqual(count, sum(entry['regime'] == regime for entry in entries.values()))
+        self.assertEqual(sum(snapshot['bias'].values()), 5)
+        self.assertAlmostEqual(sum(snapshot['shares'].values()), 1.0)
+
+        service.retain(['S0USDT', 'S1USDT'])
+        self.assertEqual(service.snapshot()['total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
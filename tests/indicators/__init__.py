@@ -0,0 +1 @@
+# Indicators tests
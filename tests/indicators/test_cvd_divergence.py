@@ -0,0 +1,112 @@
+"""
+Unit тесты для точек CVD divergence (src/indicators/cvd.py + SignalScorer)
+
+Проверяют:
+- find_local_extrema = цикл по барам (прежний _find_local_peaks/_troughs)
+- SignalScorer по точкам 'cvd_divergence' = прежний расчет по хвосту DataFrame
+- точки считаются один раз на бар (LazyIndicators), не на каждый сигнал
+"""
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.indicators.cvd import CVDCalculator, find_local_extrema
+from src.indicators.lazy import FrameIndicators, LazyIndicators
+from src.scoring.signal_scorer import SignalScorer
+from src.strategies.base_strategy import Signal
+from src.utils.perf_metrics import perf_metrics
+from tests.candles import create_candles
+
+
+def _loop_extrema(series, order=3):
+    """Прежний поиск экстремумов циклом (эталон)"""
+    peaks, troughs = [], []
+    for i in range(order, len(series) - order):
+        neighbours = [series[i - j] for j in range(1, order + 1)] + [series[i + j] for j in range(1, order + 1)]
+        if all(series[i] >= value for value in neighbours):
+            peaks.append(i)
+        if all(series[i] <= value for value in neighbours):
+            troughs.append(i)
+    return peaks, troughs
+
+
+def _loop_divergence(df, cvd, direction, lookback=20, min_divergence=0.3, require_volume=True):
+    """Прежний SignalScorer._detect_divergence_single_tf (эталон)"""
+    price = df['close'].tail(lookback).reset_index(drop=True)
+    cvd_tail = cvd.tail(lookback).reset_index(drop=True)
+    volume = df['volume'].tail(lookback).reset_index(drop=True)
+    peaks, troughs = _loop_extrema(price)
+    points, sign = (peaks, 1) if direction == 'SHORT' else (troughs, -1)
+    if len(points) < 2:
+        return False
+    last, prev = points[-1], points[-2]
+    if not (sign * price[last] > sign * price[prev] and sign * cvd_tail[last] < sign * cvd_tail[prev]):
+        return False
+    if require_volume and volume[last] < volume.median():
+        return False
+    return sign * (cvd_tail[prev] - cvd_tail[last]) / (abs(cvd_tail[prev]) + 1e-8) > min_divergence
+
+
+class TestCVDDivergencePoints(unittest.TestCase):
+    """Тесты векторизованных точек дивергенции против циклов"""
+
+    def make_scorer(self, **overrides):
+        params = {'enabled': True, 'lookback_bars': 20, 'min_divergence': 0.3, 'require_volume': True}
+        params.update(overrides)
+        return SignalScorer({'scoring.cvd_divergence': params})
+
+    def test_extrema_match_loop(self):
+        """Пики/впадины совпадают с циклом: плато, NaN, короткие ряды"""
+        rng = np.random.default_rng(1)
+        cases = [rng.integers(0, 5, 60).astype(float), np.full(10, 2.0), np.arange(5.0), np.array([])]
+        with_nan = rng.standard_normal(40)
+        with_nan[[3, 17, 18]] = np.nan
+        cases.append(with_nan)
+
+        for values in cases:
+            peaks, troughs = find_local_extrema(values)
+            expected_peaks, expected_troughs = _loop_extrema(pd.Series(values))
+            self.assertEqual(peaks.tolist(), expected_peaks)
+            self.assertEqual(troughs.tolist(), expected_troughs)
+
+    def test_scorer_matches_loop_detection(self):
+        """Решение по точкам = прежний расчет для обоих направлений и настроек"""
+        checked = found = 0
+        for seed in range(150):
+            df = create_candles(120, seed=seed, decimals=1, taker_buy=True)
+            cvd = pd.Series(np.random.default_rng(seed + 1000).standard_normal(len(df)).cumsum())
+            for require_volume in (True, False):
+                scorer = self.make_scorer(require_volume=require_volume, min_divergence=0.05)
+                for direction in ('LONG', 'SHORT'):
+                    expected = _loop_divergence(df, cvd, direction, min_divergence=0.05,
+                                                require_volume=require_volume)
+                    self.assertEqual(scorer._detect_divergence_single_tf(df, cvd, direction), expected)
+                    checked += 1
+                    found += expected
+        self.assertGreater(found, 0)
+        self.assertLess(found, checked)
+
+    def test_points_computed_once_per_bar(self):
+        """Все сигналы символа читают одни точки из LazyIndicators"""
+        perf_metrics.reset()
+        df = create_candles(200, seed=7, decimals=1, taker_buy=True)
+        lazy = LazyIndicators(df, '15m', 'TESTUSDT')
+        indicators = {'15m': lazy, '15m_data': FrameIndicators(df, lazy)}
+        scorer = self.make_scorer(check_1h=False)
+
+        points = lazy['cvd_divergence']
+        expected = CVDCalculator.divergence_points(df, lazy['cvd'], 20)
+        self.assertEqual(points['peaks']['index'].tolist(), expected['peaks']['index'].tolist())
+
+        for direction in ('LONG', 'SHORT', 'LONG'):
+            signal = Signal(strategy_name='Probe', symbol='TESTUSDT', direction=direction,
+                            timestamp=df['open_time'].iloc[-1], timeframe='15m', entry_price=df['close'].iloc[-1], stop_loss=0.0,
+                            take_profit_1=0.0, take_profit_2=0.0, regime='RANGE', bias='neutral', base_score=1.0)
+            self.assertIn(scorer._score_cvd_divergence(signal, indicators), (0.0, scorer.cvd_score_15m))
+
+        counts = {label: stats['count'] for label, stats in perf_metrics.summary('indicator').items()}
+        self.assertEqual(counts, {'15m.cvd': 1, '15m.cvd_divergence': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
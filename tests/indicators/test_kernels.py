@@ -0,0 +1,133 @@
+"""
+Unit тесты для матричных индикаторов вселенной (kernels / UniverseIndicators)
+
+Проверяют:
+- EMA / ATR / RSI / ADX / Bollinger / Donchian / квантили по строкам матрицы =
+  pandas_ta на DataFrame символа (молодые листинги с NaN слева, NaN внутри
+  истории, нулевой range)
+- UniverseIndicators.symbol_indicators = calculate_technical_indicators
+- detect_regime_batch = detect_regime по каждому символу
+"""
+import unittest
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from src.detectors.market_regime import MarketRegimeDetector
+from src.indicators import kernels
+from src.indicators.common import calculate_technical_indicators
+from src.indicators.universe import UniverseIndicators
+from tests.candles import create_candles
+
+
+class TestIndicatorKernels(unittest.TestCase):
+    """Тесты матричных индикаторов против pandas_ta по одному символу"""
+
+    def create_universe(self):
+        """Символы разной длины + NaN внутри истории + нулевой range"""
+        frames = {f'S{i}USDT': create_candles(n, seed=i, freq='1h', step=(0.1, 0.6))
+                  for i, n in enumerate([400] * 6 + [380, 260, 210, 40, 12])}
+        frames['S1USDT'].loc[150, 'close'] = np.nan
+        frames['S2USDT'].loc[::30, 'high'] = frames['S2USDT']['low'][::30]
+        return frames
+
+    def assert_row(self, matrix, row, start, expected, rtol=1e-12):
+        expected = np.full(matrix.shape[1] - start, np.nan) if expected is None else np.asarray(expected, dtype=float)
+        self.assertTrue(np.isnan(matrix[row, :start]).all())
+        np.testing.assert_allclose(matrix[row, start:], expected, rtol=rtol, equal_nan=True)
+
+    def test_recursive_kernels_match_pandas_ta(self):
+        """EMA / ATR / RSI / ADX каждой строки = pandas_ta"""
+        frames = self.create_universe()
+        symbols, prices, starts = kernels.stack_frames(frames)
+        high, low, close = prices['high'], prices['low'], prices['close']
+
+        ema = {length: kernels.ema(close, length, starts) for length in (9, 50, 200)}
+        atr = kernels.atr(high, low, close, 14, starts=starts)
+        rsi = kernels.rsi(close, 14, starts)
+        adx = kernels.adx(high, low, close, 14, starts)
+
+        for row, symbol in enumerate(symbols):
+            df, start = frames[symbol], starts[row]
+            for length, values in ema.items():
+                self.assert_row(values, row, start, ta.ema(df['close'], length=length))
+            self.assert_row(atr, row, start, ta.atr(df['high'], df['low'], df['close'], length=14))
+            self.assert_row(rsi, row, start, ta.rsi(df['close'], length=14))
+            expected = ta.adx(df['high'], df['low'], df['close'], length=14)
+            for name, column in (('adx', 'ADX_14'), ('adxr', 'ADXR_14_2'), ('dmp', 'DMP_14'), ('dmn', 'DMN_14')):
+                self.assert_row(adx[name], row, start, None if expected is None else expected[column], rtol=1e-10)
+
+    def test_window_kernels_match_pandas(self):
+        """Bollinger / Donchian / rolling квантили = pandas_ta / pandas rolling"""
+        frames = self.create_universe()
+        symbols, prices, starts = kernels.stack_frames(frames)
+
+        bands = kernels.bbands(prices['close'], 20, 2.0)
+        upper, lower = kernels.donchian(prices['high'], prices['low'], 20)
+        band_range = bands['upper'] - bands['lower']
+        quantiles = kernels.rolling_quantiles(band_range, 50, (0.2, 0.5, 0.9))
+
+        for row, symbol in enumerate(symbols):
+            df, start = frames[symbol], starts[row]
+            self.assert_row(upper, row, start, df['high'].rolling(20).max(), rtol=0)
+            self.assert_row(lower, row, start, df['low'].rolling(20).min(), rtol=0)
+
+            expected = ta.bbands(df['close'], length=20)
+            if expected is None:
+                self.assertTrue(np.isnan(bands['mid'][row]).all())
+                continue
+            for name, column in (('lower', 'BBL'), ('mid', 'BBM'), ('upper', 'BBU'), ('bandwidth', 'BBB')):
+                self.assert_row(bands[name], row, start, expected[f'{column}_20_2.0_2.0'], rtol=1e-9)
+
+            expected_range = expected['BBU_20_2.0_2.0'] - expected['BBL_20_2.0_2.0']
+            for index, q in enumerate((0.2, 0.5, 0.9)):
+                self.assert_row(quantiles[index], row, start, expected_range.rolling(50).quantile(q), rtol=1e-9)
+
+    def test_universe_views_match_per_symbol(self):
+        """symbol_indicators = calculate_technical_indicators того же DataFrame"""
+        frames = {symbol: df for symbol, df in self.create_universe().items() if len(df) >= 200}
+        universe = UniverseIndicators(frames, '1h')
+
+        for symbol, df in frames.items():
+            expected = calculate_technical_indicators(df)
+            actual = universe.symbol_indicators(symbol, df)
+            self.assertEqual(set(actual), set(expected))
+
+            for name, value in expected.items():
+                if isinstance(value, pd.DataFrame):
+                    self.assertEqual(list(actual[name].columns), list(value.columns))
+                    pairs = [(actual[name][column], value[column]) for column in value.columns]
+                elif isinstance(value, tuple):
+                    pairs = list(zip(actual[name], value))
+                else:
+                    pairs = [(actual[name], value)]
+                for got, want in pairs:
+                    self.assertTrue(got.index.equals(want.index))
+                    # %B около нуля - сокращение разрядов, сравниваем абсолютно
+                    np.testing.assert_allclose(got.to_numpy(dtype=float), want.to_numpy(dtype=float),
+                                               rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+        # Другой DataFrame того же символа - не срез вселенной
+        self.assertIsNone(universe.symbol_indicators('S0USDT', frames['S0USDT'].iloc[:-1]))
+
+    def test_regime_batch_matches_detect_regime(self):
+        """detect_regime_batch = detect_regime по каждому символу"""
+        frames = {f'S{i}USDT': create_candles(n, seed=100 + i, freq='4h', step=(0.1, 0.6))
+                  for i, n in enumerate([360] * 8 + [250, 150])}
+        detector = MarketRegimeDetector()
+
+        batch = detector.detect_regime_batch(frames, '4h')
+
+        self.assertEqual(list(batch), list(frames))
+        for symbol, df in frames.items():
+            expected = detector.detect_regime(df, '4h')
+            self.assertEqual(batch[symbol]['regime'], expected['regime'])
+            self.assertEqual(batch[symbol]['late_trend'], expected['late_trend'])
+            self.assertAlmostEqual(batch[symbol]['confidence'], expected['confidence'], places=9)
+            self.assertEqual(set(batch[symbol]['details']), set(expected['details']))
+            for name, value in expected['details'].items():
+                self.assertAlmostEqual(batch[symbol]['details'][name], value, places=9, msg=name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Unit тесты для общих индикаторов по требованию (src/indicators/lazy.py)
+
+Проверяют:
+- LazyIndicators (все группы) = calculate_common_indicators
+- считаются только группы ключей, к которым обратились (perf_metrics 'indicator')
+- StrategyManager считает required_indicators только для проверяемых стратегий
+"""
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.indicators.common import calculate_common_indicators
+from src.indicators.lazy import FrameIndicators, LazyIndicators
+from src.strategies.base_strategy import BaseStrategy
+from src.strategies.strategy_manager import StrategyManager
+from src.utils.perf_metrics import perf_metrics
+from tests.candles import create_candles
+
+
+class _ProbeStrategy(BaseStrategy):
+    """Стратегия без сигналов: читает свои required_indicators"""
+
+    def __init__(self, name, required, enabled=True):
+        super().__init__(name, {'enabled': enabled})
+        self.required_indicators = required
+        self.seen = None
+
+    def check_signal(self, symbol, df, regime, bias, indicators):
+        self.seen = indicators['15m'].loaded_groups
+        return None
+
+    def get_timeframe(self):
+        return '15m'
+
+    def get_category(self):
+        return 'test'
+
+
+class TestLazyIndicators(unittest.TestCase):
+    """Тесты LazyIndicators против eager расчета"""
+
+    def assert_same(self, actual, expected, name):
+        if isinstance(expected, (pd.Series, pd.DataFrame)):
+            self.assertTrue(actual.equals(expected), name)
+        elif isinstance(expected, tuple):
+            for got, want in zip(actual, expected):
+                self.assertTrue(got.equals(want), name)
+        elif isinstance(expected, dict):
+            self.assertEqual(set(actual), set(expected), name)
+        elif isinstance(expected, (int, float, np.floating)):
+            self.assertAlmostEqual(actual, expected, places=12, msg=name)
+
+    def test_all_groups_match_eager(self):
+        """dict(LazyIndicators) = calculate_common_indicators (те же ключи и значения)"""
+        df = create_candles(400, seed=3, taker_buy=True)
+        expected = calculate_common_indicators(df, '15m')
+        lazy = LazyIndicators(df, '15m')
+
+        self.assertEqual(set(lazy), set(expected))
+        for name, value in expected.items():
+            self.assert_same(lazy[name], value, name)
+
+    def test_only_accessed_groups_are_computed(self):
+        """Обращение к ключу считает одну группу, повторное - из памяти"""
+        perf_metrics.reset()
+        lazy = LazyIndicators(create_candles(400, seed=3, taker_buy=True), '15m', 'TESTUSDT')
+
+        self.assertIsNotNone(lazy['cvd'])
+        self.assertIsNotNone(lazy.get('bb_width_p30'))
+        lazy['cvd']
+        self.assertIsNone(lazy.get('unknown_indicator'))
+
+        self.assertEqual(lazy.loaded_groups, ['cvd', 'bb'])
+        counts = {label: stats['count'] for label, stats in perf_metrics.summary('indicator').items()}
+        self.assertEqual(counts, {'15m.cvd': 1, '15m.bb': 1})
+
+        frame = FrameIndicators(lazy.df, lazy)
+        self.assertIs(frame['df'], lazy.df)
+        self.assertIs(frame['cvd'], lazy['cvd'])
+        self.assertEqual(lazy.loaded_groups, ['cvd', 'bb'])
+
+    def test_manager_materializes_checked_strategies_only(self):
+        """Отключенная и заблокированная стратегии не считают свои индикаторы"""
+        df = create_candles(400, seed=3, taker_buy=True)
+        lazy = LazyIndicators(df, '15m', 'TESTUSDT')
+        checked = _ProbeStrategy('Checked', ('cvd',))
+        disabled = _ProbeStrategy('Disabled', ('volume_profile',), enabled=False)
+        blocked = _ProbeStrategy('Blocked', ('rsi_14',))
+
+        manager = StrategyManager()
+        manager.strategies = [checked, disabled, blocked]
+        signals = manager.collect_signals(
+            'TESTUSDT', {'15m': df}, 'TREND', 'bullish', {'15m': lazy},
+            blocked_symbols_by_strategy={'Blocked': {'TESTUSDT'}}
+        )
+
+        self.assertEqual(signals, [])
+        self.assertEqual(checked.seen, ['cvd'])
+        self.assertIsNone(disabled.seen)
+        self.assertIsNone(blocked.seen)
+        self.assertEqual(lazy.loaded_groups, ['cvd'])
+
+
+if __name__ == '__main__':
+    unittest.main()
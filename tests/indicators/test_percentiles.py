@@ -0,0 +1,68 @@
+"""
+Unit тесты для движка скользящих перцентилей (src/indicators/percentiles.py)
+
+Проверяют:
+- RollingPercentiles.quantiles = pandas rolling(window).quantile(q) (NaN в окне → NaN)
+- last_quantile = rolling(window).quantile(q).iloc[-1]
+- percentile_rank / rolling_rank = (series.tail(period) < value).sum() / len * 100
+"""
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.indicators.percentiles import RollingPercentiles, last_quantile, percentile_rank, rolling_rank
+
+
+class TestRollingPercentiles(unittest.TestCase):
+    """Тесты движка перцентилей против pandas"""
+
+    def create_series(self, num_bars=700, seed=5):
+        """BB width-подобный ряд: NaN прогрев + NaN внутри + повторяющиеся значения"""
+        rng = np.random.default_rng(seed)
+        values = np.abs(rng.standard_normal(num_bars)).round(2)
+        values[:19] = np.nan
+        values[300] = np.nan
+        return pd.Series(values, index=pd.RangeIndex(100, 100 + num_bars))
+
+    def test_quantiles_match_pandas_rolling(self):
+        """Несколько квантилей из одной сортировки = pandas rolling quantile"""
+        series = self.create_series()
+        for window, quantiles in ((60, (0.30, 0.40, 0.50)), (50, (0.20,)), (7, (0.0, 1.0, 0.999))):
+            engine = RollingPercentiles(series, window)
+            for q, actual in zip(quantiles, engine.quantiles(*quantiles)):
+                expected = series.rolling(window).quantile(q)
+                self.assertTrue(actual.index.equals(series.index))
+                np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-12, equal_nan=True)
+
+        # Ряд короче окна и массив без индекса
+        short = RollingPercentiles(series.to_numpy()[:30], 60).quantile(0.5)
+        self.assertIsInstance(short, np.ndarray)
+        self.assertTrue(np.isnan(short).all())
+
+    def test_last_quantile_matches_rolling_last(self):
+        """last_quantile = rolling(window).quantile(q).iloc[-1]"""
+        series = self.create_series()
+        for window in (90, 400, 699, 700):
+            for q in (0.30, 0.40):
+                expected = series.rolling(window).quantile(q).iloc[-1]
+                np.testing.assert_allclose(last_quantile(series, window, q), expected, rtol=1e-12, equal_nan=True)
+        self.assertTrue(np.isnan(last_quantile(series, 701, 0.4)))
+
+    def test_percentile_rank_and_rolling_rank(self):
+        """Ранг значения среди последних period баров (NaN в знаменателе)"""
+        series = self.create_series()
+        ranks = rolling_rank(series, 90)
+        self.assertEqual(len(ranks), len(series))
+
+        for end in (1, 5, 89, 90, 91, 320, 700):
+            window = series.iloc[:end]
+            expected = (window.tail(90) < window.iloc[-1]).sum() / len(window.tail(90)) * 100
+            self.assertEqual(ranks[end - 1], expected)
+            self.assertEqual(percentile_rank(window, window.iloc[-1], 90), expected)
+
+        self.assertEqual(percentile_rank(series, 10.0, 50), 100.0)
+        self.assertEqual(len(rolling_rank(pd.Series([], dtype=float))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
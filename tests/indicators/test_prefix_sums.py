@@ -0,0 +1,101 @@
+"""
+Unit тесты для накопленных сумм VWAP / CVD (PrefixSums)
+
+Проверяют:
+- Окна [start, stop): VWAP, std вокруг VWAP, дельта CVD = прямому расчету по срезу
+- Daily VWAP со сбросом в полночь tz = groupby по локальной дате
+- Anchored / rolling VWAP и CVD = pandas cumsum / rolling
+- prefix_sum_cache: повторный запрос того же бара не пересчитывает суммы
+"""
+import unittest
+import numpy as np
+
+from src.indicators.prefix_sums import PrefixSums, PrefixSumCache
+from tests.candles import create_candles
+
+DST_WEEKEND = '2025-03-29 18:00'  # История проходит через переход Europe/Kiev на летнее время
+
+
+class TestPrefixSums(unittest.TestCase):
+    """Тесты PrefixSums против расчетов по срезам DataFrame"""
+
+    def assert_series_close(self, actual, expected):
+        np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float),
+                                   rtol=1e-9, equal_nan=True)
+
+    def test_window_aggregates(self):
+        """VWAP / std / дельта окна = срезу"""
+        candles = create_candles(400, start=DST_WEEKEND, taker_buy=True, index=True)
+        sums = PrefixSums(candles)
+
+        for start, stop in [(0, 10), (37, 180), (120, None), (-50, None)]:
+            window = candles.iloc[start:stop]
+            tp = (window['high'] + window['low'] + window['close']) / 3
+            vwap = (tp * window['volume']).sum() / window['volume'].sum()
+            std = np.sqrt(((tp - vwap) ** 2 * window['volume']).sum() / window['volume'].sum())
+            delta = (2 * window['taker_buy_base'] - window['volume']).sum()
+
+            self.assertAlmostEqual(sums.vwap(start, stop), vwap, delta=vwap * 1e-12)
+            self.assertAlmostEqual(sums.vwap_std(start, stop), std, delta=std * 1e-8)
+            self.assertAlmostEqual(sums.delta(start, stop), delta, delta=abs(delta) * 1e-9)
+
+    def test_daily_vwap_resets_at_local_midnight(self):
+        """Daily VWAP (включая переход на летнее время) = groupby по дате в tz"""
+        candles = create_candles(400, start=DST_WEEKEND, taker_buy=True, index=True)
+        tp_volume = (candles['high'] + candles['low'] + candles['close']) / 3 * candles['volume']
+        dates = candles.index.tz_localize('UTC').tz_convert('Europe/Kiev').date
+        expected = tp_volume.groupby(dates).cumsum() / candles['volume'].groupby(dates).cumsum()
+
+        daily = PrefixSums(candles).daily_vwap('Europe/Kiev')
+        self.assert_series_close(daily, expected)
+        self.assertTrue((daily.index == candles.index).all())
+
+    def test_series_match_pandas(self):
+        """Anchored / rolling VWAP и CVD = pandas cumsum / rolling"""
+        candles = create_candles(400, start=DST_WEEKEND, taker_buy=True, index=True)
+        candles.iloc[60, candles.columns.get_loc('close')] = np.nan
+        sums = PrefixSums(candles)
+        tp_volume = (candles['high'] + candles['low'] + candles['close']) / 3 * candles['volume']
+
+        anchored = tp_volume.iloc[100:].cumsum() / candles['volume'].iloc[100:].cumsum()
+        self.assert_series_close(sums.anchored_vwap_series(100).iloc[100:], anchored)
+        self.assertTrue(sums.anchored_vwap_series(100).iloc[:100].isna().all())
+
+        rolling = tp_volume.rolling(20, min_periods=1).sum() / candles['volume'].rolling(20).sum()
+        rolling[tp_volume.isna()] = np.nan
+        self.assert_series_close(sums.rolling_vwap(20), rolling)
+
+        cvd = (candles['taker_buy_base'] - (candles['volume'] - candles['taker_buy_base'])).cumsum()
+        self.assert_series_close(sums.cvd(), cvd)
+
+    def test_cache_reuses_sums_for_same_bar(self):
+        """Тот же бар - тот же объект; обновленный незакрытый бар - новые суммы"""
+        cache = PrefixSumCache()
+        candles = create_candles(400, start=DST_WEEKEND, taker_buy=True, index=True)
+
+        first = cache.get('BTCUSDT', '15m', candles)
+        self.assertIs(cache.get('BTCUSDT', '15m', candles.copy()), first)
+
+        updated = candles.copy()
+        updated.iloc[-1, updated.columns.get_loc('volume')] += 10
+        self.assertIsNot(cache.get('BTCUSDT', '15m', updated), first)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        self.assertLessEqual(cache.get_stats()['total_entries'], PrefixSumCache.MAX_FRAMES)
+
+    def test_cache_keeps_only_latest_bar(self):
+        """Новый бар вытесняет суммы предыдущего; выбывший символ удаляется целиком"""
+        cache = PrefixSumCache()
+        candles = create_candles(400, start=DST_WEEKEND, taker_buy=True, index=True)
+
+        cache.get('BTCUSDT', '15m', candles.iloc[:-1])
+        cache.get('BTCUSDT', '15m', candles)
+        cache.get('BTCUSDT', '15m', candles.iloc[100:])  # Другой потребитель, тот же бар
+        self.assertEqual(cache.get_stats()['total_entries'], 2)
+
+        cache.get('ETHUSDT', '15m', candles)
+        cache.clear_symbol('BTCUSDT')
+        self.assertEqual(cache.get_stats()['keys'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1 @@
+# Strategies tests
@@ -0,0 +1,115 @@
+"""
+Unit тесты для префильтра стратегий (src/strategies/prefilter.py)
+
+Проверяют:
+- причины пропуска по объявленным атрибутам стратегий (режим, история, окна,
+  закрытие таймфрейма, BTC блокировка MR)
+- префильтр не отсекает стратегию, которая могла бы дать сигнал:
+  при пропуске check_signal тоже возвращает None
+- счетчики пропусков StrategyManager и перенос из worker процесса
+"""
+import unittest
+
+from src.strategies.base_strategy import BaseStrategy
+from src.strategies.prefilter import prefilter_reason
+from src.strategies.registry import create_all_strategies
+from src.strategies.strategy_manager import StrategyManager
+from tests.candles import create_candles
+
+LAST_BAR = '2025-03-01 07:15'  # Последняя 15m свеча внутри торговых окон стратегий
+
+
+class _ProbeStrategy(BaseStrategy):
+    """Стратегия без сигналов: считает вызовы check_signal"""
+
+    allowed_regimes = ('TREND',)
+
+    def __init__(self, name, category='breakout'):
+        super().__init__(name, {'enabled': True})
+        self.category = category
+        self.calls = 0
+
+    def check_signal(self, symbol, df, regime, bias, indicators):
+        self.calls += 1
+        return None
+
+    def get_timeframe(self):
+        return '15m'
+
+    def get_category(self):
+        return self.category
+
+
+class TestStrategyPrefilter(unittest.TestCase):
+    """Тесты префильтра на реальных стратегиях"""
+
+    def setUp(self):
+        self.strategies = {strategy.name: strategy for strategy in create_all_strategies()}
+
+    def test_declared_predicates(self):
+        """Причина пропуска - первая сработавшая проверка"""
+        df = create_candles(400, end=LAST_BAR)
+        closed_15m = {'updated_timeframes': ['15m']}
+
+        cases = [
+            ('ATR Momentum', df, 'RANGE', closed_15m, 'regime'),
+            ('ATR Momentum', df.tail(80), 'TREND', closed_15m, 'min_bars'),
+            ('ATR Momentum', df, 'TREND', closed_15m, None),
+            ('MA/VWAP Pullback', create_candles(300, freq='4h', end=LAST_BAR), 'TREND', closed_15m, 'timeframe_not_closed'),
+            ('MA/VWAP Pullback', create_candles(300, freq='4h', end=LAST_BAR), 'TREND', {'updated_timeframes': ['15m', '4h']}, None),
+            ('VWAP Mean Reversion', df, 'RANGE', {'btc_block_mr': True}, 'btc_block'),
+            ('VWAP Mean Reversion', df, 'RANGE', {'btc_block_mr': False}, None),
+            ('Time-of-Day', create_candles(400, end='2025-03-01 05:00'), 'TREND', None, 'time_window'),
+            ('Time-of-Day', df, 'TREND', None, None),
+            ('ORB/IRB', create_candles(5760, end='2025-03-01 10:00'), 'TREND', None, 'time_window'),
+            ('ORB/IRB', create_candles(5760, end=LAST_BAR), 'TREND', None, None),
+        ]
+        for name, frame, regime, context, expected in cases:
+            with self.subTest(strategy=name, expected=expected):
+                self.assertEqual(prefilter_reason(self.strategies[name], frame, regime, context), expected)
+
+    def test_skipped_strategies_cannot_fire(self):
+        """Пропуск по режиму / истории / окну = check_signal возвращает None"""
+        frames = {
+            '15m': [create_candles(120, end=LAST_BAR), create_candles(400, end='2025-03-01 05:00')],
+            '1h': [create_candles(120, freq='1h', end=LAST_BAR)],
+            '4h': [create_candles(150, freq='4h', end=LAST_BAR)],
+        }
+        checked = 0
+        for strategy in self.strategies.values():
+            for df in frames.get(strategy.get_timeframe(), []):
+                for regime in ('TREND', 'RANGE', 'SQUEEZE', 'CHOP'):
+                    reason = prefilter_reason(strategy, df, regime)
+                    if reason not in ('regime', 'min_bars', 'time_window'):
+                        continue
+                    checked += 1
+                    with self.subTest(strategy=strategy.name, regime=regime, reason=reason):
+                        self.assertIsNone(strategy.check_signal('TESTUSDT', df, regime, 'Neutral', {}))
+        self.assertGreater(checked, 10)
+
+    def test_manager_counts_skips(self):
+        """Пропущенная стратегия не вызывается, счетчики переносятся drain/merge"""
+        trend_only = _ProbeStrategy('Trend Only')
+        mean_reversion = _ProbeStrategy('MR', category='mean_reversion')
+        mean_reversion.allowed_regimes = ()
+
+        worker = StrategyManager()
+        worker.strategies = [trend_only, mean_reversion]
+        df = create_candles(100, end=LAST_BAR)
+        worker.collect_signals('TESTUSDT', {'15m': df}, 'RANGE', 'Neutral', {},
+                               market_context={'btc_block_mr': True})
+        worker.collect_signals('TESTUSDT', {'15m': df}, 'TREND', 'Neutral', {},
+                               market_context={'btc_block_mr': True})
+
+        self.assertEqual(trend_only.calls, 1)
+        self.assertEqual(mean_reversion.calls, 0)
+
+        main = StrategyManager()
+        main.count_prefilter_skip('MR', 'btc_block')
+        main.merge_prefilter_skips(worker.drain_prefilter_skips())
+        self.assertEqual(main.get_prefilter_skips(), {'Trend Only': {'regime': 1}, 'MR': {'btc_block': 3}})
+        self.assertEqual(worker.get_prefilter_skips(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
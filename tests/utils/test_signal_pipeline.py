@@ -0,0 +1,71 @@
+"""
+Unit тесты для конвейера сигналов (src/utils/signal_pipeline.py)
+
+Проверяют:
+- все элементы проходят стадии, wait_stage срабатывает после стадии
+- отмена run() при заполненных очередях завершает конвейер, handler'ы больше не вызываются
+"""
+import asyncio
+import unittest
+
+from src.utils.signal_pipeline import PipelineStage, SignalPipeline
+
+
+class TestSignalPipeline(unittest.TestCase):
+    """Тесты SignalPipeline"""
+
+    def test_items_pass_all_stages(self):
+        """Каждый элемент доходит до последней стадии"""
+        dispatched = []
+
+        async def double(item):
+            return item * 2
+
+        async def collect(item):
+            dispatched.append(item)
+
+        async def run():
+            pipeline = SignalPipeline(
+                [PipelineStage('fetch', double, workers=3), PipelineStage('dispatch', collect)],
+                queue_size=2
+            )
+            task = asyncio.create_task(pipeline.run(range(10)))
+            await asyncio.wait_for(pipeline.wait_stage('fetch'), 1)
+            return await asyncio.wait_for(task, 1)
+
+        stats = asyncio.run(run())
+        self.assertEqual(sorted(dispatched), [i * 2 for i in range(10)])
+        self.assertEqual(stats['stages']['dispatch']['processed'], 10)
+
+    def test_cancel_with_full_queues(self):
+        """Отмена посреди цикла не зависает на очереди и останавливает отправку"""
+        dispatched = []
+
+        async def fetch(item):
+            return item
+
+        async def dispatch(item):
+            dispatched.append(item)
+            await asyncio.sleep(0.05)
+
+        async def run():
+            pipeline = SignalPipeline(
+                [PipelineStage('fetch', fetch, workers=4), PipelineStage('dispatch', dispatch)],
+                queue_size=1
+            )
+            task = asyncio.create_task(pipeline.run(range(100)))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 1)
+            sent = len(dispatched)
+            await asyncio.sleep(0.1)
+            return task, sent
+
+        task, sent = asyncio.run(run())
+        self.assertTrue(task.cancelled())
+        self.assertEqual(len(dispatched), sent)
+        self.assertLess(sent, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()